@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Cada solicitud ASGI corre en un hilo propio: una conexión persistente por
+# hilo nunca se reutiliza. La reutilización bajo ASGI la da DB_POOL_TAMANO.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+# Las conexiones de /movimientos/en-vivo/ (SSE, gestion.en_vivo) quedan
+# abiertas sin ocupar un hilo: comparten el difusor del bucle de eventos.
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,7 +43,10 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    # Primero: mide la solicitud completa, incluidas sesión y autenticación
+    'gestion.metricas.metricas_middleware',
     'django.middleware.security.SecurityMiddleware',
+    'gestion.enrutador.lectura_primaria_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,7 +59,9 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates con medición del tiempo de render (gestion.metricas)
+        'BACKEND': 'gestion.metricas.PlantillasMedidas',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,20 +79,174 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.2/ref/databases/#persistent-connections
+#
+# Conexiones (variables de entorno):
+# - DB_CONN_MAX_AGE: segundos que cada hilo conserva su conexión (0 = cerrar al
+#   terminar cada solicitud). Por defecto 60 bajo WSGI; config/asgi.py lo deja
+#   en 0 porque bajo ASGI cada solicitud usa un hilo nuevo.
+# - DB_CONN_HEALTH_CHECKS: '1' (por defecto) valida la conexión reutilizada
+#   antes de la primera consulta de cada solicitud.
+# - DB_POOL_TAMANO: mayor que 0 activa el pool por proceso
+#   (gestion.backends.mysql): las conexiones cerradas vuelven al pool y las
+#   reutiliza cualquier hilo, también bajo ASGI. DB_POOL_DESBORDE,
+#   DB_POOL_ESPERA y DB_POOL_VIDA_MAXIMA ajustan picos, espera y reciclado.
+# Con el pool, el máximo de conexiones al servidor es
+# procesos x (DB_POOL_TAMANO + DB_POOL_DESBORDE); debe quedar bajo max_connections.
+
+DB_POOL_TAMANO = int(os.environ.get('DB_POOL_TAMANO', '0'))
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'gestion.backends.mysql' if DB_POOL_TAMANO else 'django.db.backends.mysql',
         'NAME': 'logistica_forestal',
         'USER': 'inacap',
         'PASSWORD': 'clave123',
         'HOST': 'localhost',
         'PORT': '3306',
         'OPTIONS': {'charset': 'utf8mb4'},
+        # Con pool la reutilización la hace el pool: cada solicitud devuelve su conexión
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '0' if DB_POOL_TAMANO else '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'TAMANO': DB_POOL_TAMANO,
+            'DESBORDE': int(os.environ.get('DB_POOL_DESBORDE', '10')),
+            'ESPERA': float(os.environ.get('DB_POOL_ESPERA', '30')),
+            # Por debajo del wait_timeout de MySQL (8 h por defecto)
+            'VIDA_MAXIMA': int(os.environ.get('DB_POOL_VIDA_MAXIMA', '3600')),
+        },
     }
 }
 
+# Réplicas de lectura (gestion.enrutador)
+# DB_REPLICAS: servidores réplica separados por coma (host o host:puerto), con
+# las mismas credenciales que la primaria. Se agregan como alias replica1,
+# replica2, ...; las lecturas de los modelos de gestion van a una de ellas y
+# las escrituras a default. Tras escribir, el navegador lee de la primaria
+# durante REPLICA_VENTANA_PRIMARIA segundos (debe superar el retraso de
+# replicación).
+
+for _numero, _servidor in enumerate(
+    (s.strip() for s in os.environ.get('DB_REPLICAS', '').split(',') if s.strip()), start=1
+):
+    _host, _, _puerto = _servidor.partition(':')
+    DATABASES[f'replica{_numero}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _puerto or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['gestion.enrutador.EnrutadorReplicas']
+REPLICA_VENTANA_PRIMARIA = int(os.environ.get('REPLICA_VENTANA_PRIMARIA', '5'))
+
+# Particiones y archivo de movimientos (gestion.particiones, gestion.archivo)
+# MOVIMIENTOS_PARTICIONADOS=1 indica que movimiento_carga fue convertida a
+# particiones mensuales (comando particionar_movimientos, sólo MySQL). Una
+# tabla particionada no admite índices FULLTEXT: la búsqueda por descripción
+# pasa a LIKE. MOVIMIENTOS_MESES_RECIENTES > 0 limita el listado sin filtro de
+# fechas a los últimos N meses, para que sólo lea las particiones recientes.
+
+MOVIMIENTOS_PARTICIONADOS = os.environ.get('MOVIMIENTOS_PARTICIONADOS') == '1'
+MOVIMIENTOS_MESES_RECIENTES = int(os.environ.get('MOVIMIENTOS_MESES_RECIENTES', '0'))
+
+
+# Métricas y presupuestos de consultas (gestion.metricas)
+# Métricas por vista en /metricas/ (formato Prometheus, token de un usuario
+# staff). Cada proceso publica las suyas en la caché cada
+# METRICAS_INTERVALO_PUBLICACION segundos. PRESUPUESTO_CONSULTAS fija el
+# máximo de consultas por nombre de ruta; al superarlo se registra un aviso,
+# o se lanza PresupuestoExcedido con PRESUPUESTO_CONSULTAS_ESTRICTO=1 (CI).
+
+METRICAS_INTERVALO_PUBLICACION = int(os.environ.get('METRICAS_INTERVALO_PUBLICACION', '10'))
+# Incluyen las 2 consultas de sesión y usuario; el listado del admin de
+# movimientos detecta un N+1 por fila (p. ej. MovimientoCarga.__str__ sin
+# select_related de vehiculo).
+PRESUPUESTO_CONSULTAS = {
+    'vehiculo_list': 6,
+    'vehiculo_autocomplete': 5,
+    'vehiculo_create': 10,
+    'vehiculo_update': 10,
+    'vehiculo_delete': 25,
+    'movimiento_list': 6,
+    'movimiento_export': 6,
+    'movimiento_en_vivo': 3,
+    'movimiento_create': 14,
+    'movimiento_update': 20,
+    'movimiento_delete': 14,
+    'resumen_dashboard': 8,
+    'reporte_patio': 8,
+    'reporte_agregados': 6,
+    'api_vehiculos': 6,
+    'api_movimientos': 6,
+    'api_cola': 4,
+    'metricas': 4,
+    'admin:gestion_movimientocarga_changelist': 8,
+    'admin:gestion_vehiculo_changelist': 8,
+}
+PRESUPUESTO_CONSULTAS_ESTRICTO = os.environ.get('PRESUPUESTO_CONSULTAS_ESTRICTO') == '1'
+
+
+# Reporte de patio (gestion.analitica)
+# El reporte de un período se recalcula al comenzar cada intervalo de
+# ANALITICA_INTERVALO_CACHE segundos; entretanto se sirve desde la caché.
+
+ANALITICA_INTERVALO_CACHE = int(os.environ.get('ANALITICA_INTERVALO_CACHE', '300'))
+
+
+# Agregados de movimientos (gestion.agregados)
+# Cada refresco vuelve a revisar los últimos AGREGADOS_MARGEN_IDS ids ya
+# procesados: cubre las altas cuya transacción confirmó después del refresco
+# anterior aunque su id fuera menor que la marca de agua.
+
+AGREGADOS_MARGEN_IDS = int(os.environ.get('AGREGADOS_MARGEN_IDS', '1000'))
+
+
+# Movimientos en vivo (gestion.en_vivo, requiere ASGI)
+# Cada proceso consulta max(id) de movimiento_carga cada EN_VIVO_INTERVALO
+# segundos, una sola vez para todos sus clientes conectados. Cada
+# EN_VIVO_LATIDO segundos sin eventos se envía un comentario para que los
+# proxies no cierren la conexión.
+
+EN_VIVO_INTERVALO = float(os.environ.get('EN_VIVO_INTERVALO', '2'))
+EN_VIVO_LATIDO = int(os.environ.get('EN_VIVO_LATIDO', '15'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Memoria local por defecto; con REDIS_URL definido se usa Redis (compartido
+# entre procesos, necesario para que la invalidación llegue a todos los workers).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'logistica-forestal',
+        }
+    }
+
 
+# Cola local de ingesta (gestion.cola)
+# Con COLA_INGESTA_ACTIVA=1 la API de alta por lotes guarda los movimientos en
+# un archivo SQLite local y responde 202; el comando procesar_cola_ingesta los
+# inserta en la base principal. COLA_INGESTA_MAXIMO limita las solicitudes
+# pendientes (al superarlo la API responde 503). Una entrada que falla
+# COLA_INGESTA_MAX_INTENTOS veces pasa a la cola de descartes. Las respuestas
+# de los lotes procesados se guardan en la cola COLA_INGESTA_RETENCION_DIAS
+# días para repetirlas ante reintentos sin consultar la base principal.
+
+COLA_INGESTA_ACTIVA = os.environ.get('COLA_INGESTA_ACTIVA') == '1'
+COLA_INGESTA_RUTA = os.environ.get('COLA_INGESTA_RUTA', str(BASE_DIR / 'cola_ingesta.sqlite3'))
+COLA_INGESTA_MAXIMO = int(os.environ.get('COLA_INGESTA_MAXIMO', '10000'))
+COLA_INGESTA_MAX_INTENTOS = int(os.environ.get('COLA_INGESTA_MAX_INTENTOS', '5'))
+COLA_INGESTA_RETENCION_DIAS = int(os.environ.get('COLA_INGESTA_RETENCION_DIAS', '7'))
 
 
 # Password validation
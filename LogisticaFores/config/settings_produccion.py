@@ -0,0 +1,90 @@
+"""
+Perfil de producción: hereda config/settings.py y cambia lo que no debe
+correr en un servidor real.
+
+Se selecciona por entorno:
+
+    DJANGO_SETTINGS_MODULE=config.settings_produccion
+    DJANGO_SECRET_KEY=...            (obligatoria)
+    REDIS_URL=redis://10.0.0.8:6379/0          (obligatoria)
+    DJANGO_ALLOWED_HOSTS=logistica.example.cl,10.0.0.5
+    DJANGO_STATIC_ROOT=/srv/logistica/static   (opcional)
+
+Antes de arrancar: ``python manage.py collectstatic --noinput`` (genera los
+archivos con hash, el manifiesto y sus versiones .gz/.br).
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, TEMPLATES
+
+# Sin DEBUG: Django no registra cada consulta en connection.queries (tiempo en
+# cada consulta y hasta 9000 entradas en memoria en comandos de larga vida como
+# procesar_cola_ingesta) ni arma páginas de error técnicas
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("Defina DJANGO_SECRET_KEY para el perfil de producción.")
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+    if host.strip()
+]
+
+# Caché compartida (CACHES con Redis, ver config/settings.py). Con memoria
+# local cada worker tendría su propia copia: un logout sólo borraría la
+# sesión cached_db del worker que lo atendió, y la invalidación de las cachés
+# versionadas (vehículos, ubicaciones, fragmentos) no llegaría a los demás.
+if not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured("Defina REDIS_URL para el perfil de producción.")
+
+
+# Plantillas
+# Las plantillas se compilan una vez por proceso y quedan en memoria
+# (cached.Loader envuelve a los loaders de APP_DIRS, que no puede usarse junto
+# a 'loaders').
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+
+# Archivos estáticos
+# Nombres con hash de contenido (caché de navegador indefinida) y copias
+# precomprimidas que el servidor web entrega directamente (ver README).
+
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'gestion.estaticos.ManifestComprimido',
+    },
+}
+
+
+# Sesiones
+# Lectura desde la caché (Redis, compartida por todos los workers) y escritura
+# en caché y base de datos: la sesión de cada solicitud deja de costar una
+# consulta a django_session.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehiculo, MovimientoCarga
+from .models import Vehiculo, MovimientoCarga, TokenApi, Ubicacion
 
 
 @admin.register(Vehiculo)
@@ -14,13 +14,45 @@ class VehiculoAdmin(admin.ModelAdmin):
     # readonly_fields = ('patente',)
 
 
+@admin.register(Ubicacion)
+class UbicacionAdmin(admin.ModelAdmin):
+    list_display = ('nombre',)
+    search_fields = ('nombre',)
+    ordering = ('nombre',)
+    list_per_page = 25
+
+
 @admin.register(MovimientoCarga)
 class MovimientoCargaAdmin(admin.ModelAdmin):
     list_display = ('vehiculo', 'tipo_movimiento', 'fecha_hora', 'origen', 'destino')
     list_display_links = ('vehiculo',)
-    search_fields = ('vehiculo__patente', 'origen', 'destino', 'descripcion')
+    # Búsqueda por prefijo (LIKE 'texto%', puede usar los índices); la
+    # descripción se busca en get_search_results con el índice de texto
+    search_fields = ('^vehiculo__patente', '^origen__nombre', '^destino__nombre')
     list_filter = ('tipo_movimiento',)
     ordering = ('-fecha_hora',)
     list_per_page = 25
     # Usar raw_id_fields mejora el rendimiento para relaciones con muchas filas
     raw_id_fields = ('vehiculo',)
+    autocomplete_fields = ('origen', 'destino')
+    # Patente y nombres de lugares en la misma consulta del listado
+    list_select_related = ('vehiculo', 'origen', 'destino')
+
+    def get_search_results(self, request, queryset, search_term):
+        resultados, duplicados = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            # Texto libre en la descripción por FULLTEXT / FTS5 (ver gestion.busqueda)
+            resultados |= queryset.filter(descripcion__busqueda=search_term)
+        return resultados, duplicados
+
+
+@admin.register(TokenApi)
+class TokenApiAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'usuario', 'activo', 'creado')
+    list_filter = ('activo',)
+    search_fields = ('nombre', 'usuario__username')
+    readonly_fields = ('usuario', 'creado')
+
+    # Los tokens se crean con "manage.py crear_token_api" (la clave sólo se muestra una vez)
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,248 @@
+"""Agregados de movimientos por hora/día × tipo × origen × destino.
+
+Los reportes de gestión leen sólo AgregadoMovimiento; nunca agrupan sobre
+movimiento_carga en la solicitud. ``refrescar`` (comando
+``actualizar_agregados``, pensado para cron) recalcula únicamente las horas
+que cambiaron desde la corrida anterior:
+
+- Altas: los ids mayores que la marca de agua (MarcaAgregado.ultimo_id). Se
+  revisan también los últimos ``AGREGADOS_MARGEN_IDS`` ids ya procesados,
+  por las transacciones que obtuvieron su id antes del refresco anterior y
+  confirmaron después. Cubre también las inserciones hechas fuera de la
+  aplicación (importaciones, SQL directo).
+- Ediciones y bajas (``movimiento_update``, eliminación, admin): las señales
+  marcan en AgregadoPendiente la hora previa y la nueva del movimiento. Una
+  edición que cambia la fecha a un mes anterior recalcula esa hora aunque el
+  id sea viejo.
+
+Cada hora marcada se recalcula entera desde movimiento_carga y el archivo y
+sólo se escriben las filas que difieren, por lo que el refresco es
+idempotente. Los
+días se recalculan sumando las filas por hora de cada día local; esto supone
+que la zona horaria tiene desfases de horas enteras (como America/Santiago).
+
+Origen y destino son ids de Ubicacion (NULL si el movimiento no lo indica):
+agrupar y filtrar compara enteros.
+"""
+
+import datetime
+from collections import Counter
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from . import ubicaciones
+from .models import AgregadoMovimiento, AgregadoPendiente, MarcaAgregado, MovimientoArchivado, MovimientoCarga
+
+MARCA = 'movimiento_carga'
+# Días como máximo por consulta de recálculo
+DIAS_POR_TRAMO = 31
+# Filas insertadas por sentencia
+TAMANO_LOTE_AGREGADOS = 5000
+HORA = datetime.timedelta(hours=1)
+CLAVE = ('tipo_movimiento', 'origen_id', 'destino_id')
+
+
+def inicio_hora(fecha_hora):
+    """Inicio (UTC) de la hora de ``fecha_hora``."""
+    return fecha_hora.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def inicio_dia(dia):
+    """Medianoche local de ``dia`` con zona horaria."""
+    return timezone.make_aware(datetime.datetime.combine(dia, datetime.time.min))
+
+
+def marcar_pendientes(fechas):
+    """Marca para recálculo las horas de las fechas indicadas.
+
+    Args:
+        fechas (Iterable[datetime.datetime]): Fechas de los movimientos
+            editados o eliminados.
+    """
+    horas = {inicio_hora(fecha) for fecha in fechas if fecha is not None}
+    if horas:
+        AgregadoPendiente.objects.bulk_create(
+            [AgregadoPendiente(hora=hora) for hora in sorted(horas)], ignore_conflicts=True
+        )
+
+
+def _tramos(inicios, paso, maximo):
+    """Agrupa inicios ordenados en tramos contiguos [desde, hasta) acotados."""
+    tramos = []
+    for inicio in sorted(inicios):
+        if tramos and tramos[-1][1] == inicio and inicio - tramos[-1][0] < maximo:
+            tramos[-1][1] = inicio + paso
+        else:
+            tramos.append([inicio, inicio + paso])
+    return tramos
+
+
+def _horas(movimientos):
+    return set(
+        movimientos.order_by()
+        .annotate(hora=TruncHour('fecha_hora', tzinfo=datetime.timezone.utc))
+        .values_list('hora', flat=True).distinct()
+    )
+
+
+def _contar(modelo, desde, hasta):
+    return (
+        modelo.objects.order_by()
+        .filter(fecha_hora__gte=desde, fecha_hora__lt=hasta)
+        .annotate(hora=TruncHour('fecha_hora', tzinfo=datetime.timezone.utc))
+        .values_list('hora', *CLAVE)
+        .annotate(cantidad=Count('id'))
+    )
+
+
+def _reemplazar(granularidad, desde, hasta, cantidades):
+    """Deja en [desde, hasta) exactamente las filas de ``cantidades``.
+
+    Sólo escribe las diferencias: en un refresco la mayoría de las filas
+    recalculadas no cambian y no se reescriben.
+    """
+    existentes = {
+        (inicio, tipo, origen, destino): (pk, cantidad)
+        for pk, inicio, tipo, origen, destino, cantidad in AgregadoMovimiento.objects.filter(
+            granularidad=granularidad, inicio__gte=desde, inicio__lt=hasta,
+        ).values_list('pk', 'inicio', *CLAVE, 'cantidad')
+    }
+    sobrantes = [pk for clave, (pk, _) in existentes.items() if clave not in cantidades]
+    for inicio in range(0, len(sobrantes), TAMANO_LOTE_AGREGADOS):
+        AgregadoMovimiento.objects.filter(pk__in=sobrantes[inicio:inicio + TAMANO_LOTE_AGREGADOS]).delete()
+    AgregadoMovimiento.objects.bulk_update([
+        AgregadoMovimiento(pk=existentes[clave][0], cantidad=cantidad)
+        for clave, cantidad in cantidades.items()
+        if clave in existentes and existentes[clave][1] != cantidad
+    ], ['cantidad'], batch_size=TAMANO_LOTE_AGREGADOS)
+    AgregadoMovimiento.objects.bulk_create([
+        AgregadoMovimiento(
+            granularidad=granularidad, inicio=inicio, tipo_movimiento=tipo,
+            origen_id=origen, destino_id=destino, cantidad=cantidad,
+        )
+        for (inicio, tipo, origen, destino), cantidad in cantidades.items()
+        if (inicio, tipo, origen, destino) not in existentes
+    ], batch_size=TAMANO_LOTE_AGREGADOS)
+
+
+def _recalcular_horas(horas):
+    for desde, hasta in _tramos(horas, HORA, datetime.timedelta(days=DIAS_POR_TRAMO)):
+        cantidades = Counter()
+        for modelo in (MovimientoCarga, MovimientoArchivado):
+            for hora, tipo, origen, destino, cantidad in _contar(modelo, desde, hasta):
+                cantidades[(hora, tipo, origen, destino)] += cantidad
+        _reemplazar('hora', desde, hasta, cantidades)
+
+
+def _recalcular_dias(dias):
+    for desde, hasta in _tramos(dias, datetime.timedelta(days=1), datetime.timedelta(days=DIAS_POR_TRAMO)):
+        desde, hasta = inicio_dia(desde), inicio_dia(hasta)
+        filas = (
+            AgregadoMovimiento.objects.order_by()
+            .filter(granularidad='hora', inicio__gte=desde, inicio__lt=hasta)
+            .values_list('inicio', *CLAVE, 'cantidad')
+        )
+        cantidades = Counter()
+        for inicio, tipo, origen, destino, cantidad in filas:
+            dia = inicio_dia(timezone.localtime(inicio).date())
+            cantidades[(dia, tipo, origen, destino)] += cantidad
+        _reemplazar('dia', desde, hasta, cantidades)
+
+
+def refrescar(completo=False):
+    """Recalcula los agregados de las horas con cambios desde el último refresco.
+
+    Corre en una transacción con la marca de agua bloqueada (SELECT … FOR
+    UPDATE): dos refrescos simultáneos se ejecutan uno detrás del otro.
+
+    Args:
+        completo (bool): Recalcula todas las horas con movimientos (primera
+            carga o reparación), incluidas las del archivo.
+
+    Returns:
+        tuple[int, int]: Horas y días recalculados.
+    """
+    with transaction.atomic():
+        marca, _ = MarcaAgregado.objects.select_for_update().get_or_create(nombre=MARCA)
+        tope = MovimientoCarga.objects.aggregate(tope=Max('id'))['tope'] or 0
+        # Antes del recálculo: lo marcado mientras tanto queda para la próxima corrida
+        pendientes = list(AgregadoPendiente.objects.values_list('hora', flat=True))
+
+        horas = set(pendientes)
+        nuevos = MovimientoCarga.objects.filter(id__lte=tope)
+        if completo:
+            AgregadoMovimiento.objects.all().delete()
+            horas |= _horas(MovimientoArchivado.objects.all())
+        else:
+            nuevos = nuevos.filter(id__gt=max(marca.ultimo_id - settings.AGREGADOS_MARGEN_IDS, 0))
+        horas |= _horas(nuevos)
+
+        _recalcular_horas(horas)
+        dias = {timezone.localtime(hora).date() for hora in horas}
+        _recalcular_dias(dias)
+
+        AgregadoPendiente.objects.filter(hora__in=pendientes).delete()
+        marca.ultimo_id = max(tope, marca.ultimo_id)
+        marca.actualizado = timezone.now()
+        marca.save()
+    return len(horas), len(dias)
+
+
+def ultimo_refresco():
+    """Fecha del último refresco de los agregados (None si nunca corrió)."""
+    return MarcaAgregado.objects.filter(nombre=MARCA).values_list('actualizado', flat=True).first()
+
+
+def serie(desde, hasta, granularidad='dia', **filtros):
+    """Totales por intervalo y tipo de movimiento leídos de los agregados.
+
+    Args:
+        desde (datetime.datetime): Inicio del período (con zona horaria).
+        hasta (datetime.datetime): Fin del período, excluido.
+        granularidad (str): 'hora' o 'dia'.
+        **filtros: Condiciones sobre tipo_movimiento, origen_id o destino_id.
+
+    Returns:
+        list[dict]: Por intervalo, ``inicio``, ``INGRESO``, ``SALIDA`` y ``total``.
+    """
+    filas = (
+        AgregadoMovimiento.objects.order_by('inicio')
+        .filter(granularidad=granularidad, inicio__gte=desde, inicio__lt=hasta, **filtros)
+        .values_list('inicio', 'tipo_movimiento')
+        .annotate(total=Sum('cantidad'))
+    )
+    resultado = []
+    for inicio, grupo in groupby(filas, key=lambda fila: fila[0]):
+        intervalo = {'inicio': timezone.localtime(inicio), 'INGRESO': 0, 'SALIDA': 0}
+        for _, tipo, total in grupo:
+            intervalo[tipo] = total
+        intervalo['total'] = intervalo['INGRESO'] + intervalo['SALIDA']
+        resultado.append(intervalo)
+    return resultado
+
+
+def rutas(desde, hasta, **filtros):
+    """Totales por (tipo, origen, destino) del período, de mayor a menor.
+
+    Lee las filas por día; ``desde`` y ``hasta`` deben ser medianoches locales.
+
+    Returns:
+        list[dict]: ``tipo_movimiento``, ``origen`` y ``destino`` (ids de
+        Ubicacion o None), ``origen_nombre``, ``destino_nombre`` y ``total``.
+    """
+    filas = list(
+        AgregadoMovimiento.objects.order_by()
+        .filter(granularidad='dia', inicio__gte=desde, inicio__lt=hasta, **filtros)
+        .values('tipo_movimiento', 'origen', 'destino')
+        .annotate(total=Sum('cantidad'))
+        .order_by('-total', *CLAVE)
+    )
+    for fila in filas:
+        fila['origen_nombre'] = ubicaciones.nombre_por_id(fila['origen'])
+        fila['destino_nombre'] = ubicaciones.nombre_por_id(fila['destino'])
+    return filas
@@ -0,0 +1,350 @@
+"""Ocupación del patio, estadías y vueltas de la flota.
+
+Un vehículo está "dentro" desde un INGRESO hasta su siguiente movimiento.
+El reporte de un período se calcula en una sola pasada sobre
+``(vehiculo_id, tipo_movimiento, fecha_hora, origen_id, destino_id, id)``,
+leídos con ``values_list`` en lotes por cursor sobre (vehiculo_id,
+fecha_hora, id) (exportacion.iterar_lotes: con ``.iterator()`` los drivers
+de MySQL cargarían todo el período en memoria): cada movimiento se empareja
+con el siguiente del mismo vehículo, sin consultas por vehículo ni
+instancias de modelos. Las rutas se agrupan por ids de
+Ubicacion y se traducen a nombres (caché de gestion.ubicaciones) al final.
+
+- Estadía: INGRESO seguido de SALIDA; se agrupa por ruta (origen del ingreso,
+  destino de la salida). Un INGRESO seguido de otro INGRESO cuenta como
+  ingreso sin salida y su intervalo termina en el siguiente ingreso.
+- Vuelta: SALIDA seguida del siguiente INGRESO (viaje fuera del patio), por
+  destino de la salida.
+- Ocupación: vehículos dentro al cierre de cada hora o día, con los ingresos
+  y salidas del intervalo. Los que ya estaban dentro al comenzar el período
+  salen de su último movimiento anterior (una subconsulta por índice).
+
+Los vehículos dentro en este momento se leen aparte del puntero
+``Vehiculo.ultimo_movimiento``, sin recorrer movimientos. El reporte del
+período se guarda en caché por intervalos de ``ANALITICA_INTERVALO_CACHE``
+segundos: al empezar el siguiente intervalo se recalcula. Sólo considera
+movimiento_carga (no el archivo, ver gestion.archivo).
+"""
+
+import datetime
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from itertools import chain, groupby
+from operator import itemgetter
+from statistics import fmean
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from . import ubicaciones
+from .exportacion import iterar_lotes
+from .models import MovimientoCarga, Vehiculo
+
+# El id desempata el orden y forma parte del cursor de lectura
+CAMPOS = ('vehiculo_id', 'tipo_movimiento', 'fecha_hora', 'origen_id', 'destino_id', 'id')
+ORDEN_LECTURA = ['vehiculo_id', 'fecha_hora', 'id']
+# Movimientos leídos por viaje a la base
+TAMANO_BLOQUE = 20000
+GRANULARIDADES = ('hora', 'dia')
+# Período máximo con ocupación por hora (más largo se agrupa por día)
+MAX_DIAS_POR_HORA = 31
+# Límites superiores (horas) del histograma de estadías
+TRAMOS_ESTADIA = (1, 2, 4, 8, 24, 72)
+MAX_DENTRO_EN_PANTALLA = 100
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return None
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+def _horas(delta):
+    return delta.total_seconds() / 3600
+
+
+@dataclass
+class Distribucion:
+    """Resumen de una lista de duraciones en horas."""
+    cantidad: int
+    media: float | None
+    p50: float | None
+    p90: float | None
+    p99: float | None
+
+    @classmethod
+    def de(cls, horas):
+        ordenadas = sorted(horas)
+        return cls(
+            cantidad=len(ordenadas),
+            media=round(fmean(ordenadas), 2) if ordenadas else None,
+            p50=_redondear(_percentil(ordenadas, 50)),
+            p90=_redondear(_percentil(ordenadas, 90)),
+            p99=_redondear(_percentil(ordenadas, 99)),
+        )
+
+
+def _redondear(valor):
+    return None if valor is None else round(valor, 2)
+
+
+@dataclass
+class ReportePatio:
+    """Resultado de ``calcular`` para un período.
+
+    Attributes:
+        desde (datetime.datetime): Inicio del período (incluido).
+        hasta (datetime.datetime): Fin del período (excluido).
+        granularidad (str): 'hora' o 'dia'.
+        estadias (Distribucion): Estadías con ingreso dentro del período.
+        histograma (list[tuple[str, int]]): Estadías por tramo de duración.
+        rutas (list[dict]): Por (origen, destino): cantidad y distribución de la estadía.
+        vueltas (list[dict]): Por destino de la salida: cantidad y distribución de la vuelta.
+        ocupacion (list[dict]): Por intervalo: inicio, ingresos, salidas y dentro al cierre.
+        sin_salida (int): Ingresos seguidos de otro ingreso del mismo vehículo.
+        movimientos (int): Movimientos leídos.
+        calculado (datetime.datetime): Momento del cálculo.
+    """
+    desde: datetime.datetime
+    hasta: datetime.datetime
+    granularidad: str
+    estadias: Distribucion
+    histograma: list
+    rutas: list
+    vueltas: list
+    ocupacion: list
+    sin_salida: int
+    movimientos: int
+    calculado: datetime.datetime = field(default_factory=timezone.now)
+
+
+class _Acumulador:
+    """Recorre los pares (movimiento, siguiente) de cada vehículo."""
+
+    def __init__(self, desde, hasta, intervalo):
+        self.desde, self.hasta, self.intervalo = desde, hasta, intervalo
+        self.estadias = []
+        self.por_ruta = defaultdict(list)
+        self.por_destino = defaultdict(list)
+        # Variación de vehículos dentro por intervalo (None: antes del período)
+        self.variacion = Counter()
+        self.ingresos = Counter()
+        self.salidas = Counter()
+        self.sin_salida = 0
+        self.movimientos = 0
+
+    def _en_periodo(self, fecha):
+        return self.desde <= fecha < self.hasta
+
+    def _cambio(self, fecha, delta):
+        if fecha < self.desde:
+            self.variacion[None] += delta
+        elif fecha < self.hasta:
+            self.variacion[self.intervalo(fecha)] += delta
+
+    def movimiento(self, fila):
+        _, tipo, fecha, _, _, _ = fila
+        self.movimientos += 1
+        if self._en_periodo(fecha):
+            (self.ingresos if tipo == 'INGRESO' else self.salidas)[self.intervalo(fecha)] += 1
+
+    def par(self, anterior, siguiente):
+        _, tipo, fecha, origen, destino, _ = anterior
+        _, tipo_siguiente, fecha_siguiente, _, destino_siguiente, _ = siguiente
+        if tipo == 'INGRESO':
+            self._cambio(fecha, +1)
+            self._cambio(fecha_siguiente, -1)
+            if not self._en_periodo(fecha):
+                return
+            if tipo_siguiente == 'SALIDA':
+                horas = _horas(fecha_siguiente - fecha)
+                self.estadias.append(horas)
+                self.por_ruta[(origen, destino_siguiente)].append(horas)
+            else:
+                self.sin_salida += 1
+        elif tipo_siguiente == 'INGRESO' and self._en_periodo(fecha):
+            self.por_destino[destino].append(_horas(fecha_siguiente - fecha))
+
+    def ultimo(self, fila):
+        # Un ingreso sin movimiento posterior sigue dentro
+        if fila[1] == 'INGRESO':
+            self._cambio(fila[2], +1)
+
+
+def _intervalos(desde, hasta, granularidad):
+    """Inicio (hora local) de cada intervalo del período y función fecha → intervalo."""
+    if granularidad == 'hora':
+        def intervalo(fecha):
+            return timezone.localtime(fecha).replace(minute=0, second=0, microsecond=0)
+        paso = datetime.timedelta(hours=1)
+    else:
+        def intervalo(fecha):
+            return timezone.localtime(fecha).replace(hour=0, minute=0, second=0, microsecond=0)
+        paso = datetime.timedelta(days=1)
+    inicios = []
+    # Suma en hora local: un día con cambio de horario dura 23 o 25 horas
+    actual = intervalo(desde)
+    while actual < hasta:
+        inicios.append(actual)
+        actual += paso
+    return inicios, intervalo
+
+
+def _previos(desde):
+    """Último movimiento anterior a ``desde`` de cada vehículo que estaba dentro."""
+    anterior = (
+        MovimientoCarga.objects.filter(vehiculo_id=OuterRef('pk'), fecha_hora__lt=desde)
+        .order_by('-fecha_hora', '-id').values('id')[:1]
+    )
+    ids = Vehiculo.objects.annotate(previo=Subquery(anterior)).filter(previo__isnull=False).values('previo')
+    return {
+        fila[0]: fila
+        for fila in MovimientoCarga.objects.filter(id__in=ids, tipo_movimiento='INGRESO').values_list(*CAMPOS)
+    }
+
+
+def _por_clave(grupos, nombres):
+    filas = []
+    for clave, horas in sorted(grupos.items(), key=lambda item: -len(item[1])):
+        claves = clave if isinstance(clave, tuple) else (clave,)
+        lugares = (ubicaciones.nombre_por_id(ubicacion_id) for ubicacion_id in claves)
+        filas.append({**dict(zip(nombres, lugares)), 'distribucion': Distribucion.de(horas)})
+    return filas
+
+
+def periodo(fecha_desde, fecha_hasta, granularidad):
+    """Período [desde, hasta) en hora local a partir de dos fechas incluidas.
+
+    Args:
+        fecha_desde (datetime.date): Primer día.
+        fecha_hasta (datetime.date): Último día (incluido).
+        granularidad (str): Granularidad pedida.
+
+    Returns:
+        tuple[datetime.datetime, datetime.datetime, str]: Inicio, fin y
+        granularidad aplicada ('dia' si el período es largo para 'hora').
+    """
+    desde = timezone.make_aware(datetime.datetime.combine(fecha_desde, datetime.time.min))
+    hasta = timezone.make_aware(datetime.datetime.combine(fecha_hasta + datetime.timedelta(days=1), datetime.time.min))
+    if granularidad not in GRANULARIDADES or (fecha_hasta - fecha_desde).days >= MAX_DIAS_POR_HORA:
+        granularidad = 'dia'
+    return desde, hasta, granularidad
+
+
+def calcular(desde, hasta, granularidad='dia', tamano_bloque=TAMANO_BLOQUE):
+    """Calcula el reporte de patio del período [desde, hasta).
+
+    Args:
+        desde (datetime.datetime): Inicio del período (con zona horaria).
+        hasta (datetime.datetime): Fin del período, excluido.
+        granularidad (str): 'hora' o 'dia' para la ocupación.
+        tamano_bloque (int): Movimientos leídos por viaje a la base.
+
+    Returns:
+        ReportePatio: Resultado del período.
+    """
+    inicios, intervalo = _intervalos(desde, hasta, granularidad)
+    acumulador = _Acumulador(desde, hasta, intervalo)
+    previos = _previos(desde)
+
+    # Se lee hasta el presente: el movimiento que cierra una estadía puede ser posterior a 'hasta'
+    filas = chain.from_iterable(iterar_lotes(
+        MovimientoCarga.objects.filter(fecha_hora__gte=desde), CAMPOS, orden=ORDEN_LECTURA,
+        tamano_lote=tamano_bloque,
+    ))
+    for vehiculo_id, movimientos in groupby(filas, key=itemgetter(0)):
+        anterior = previos.pop(vehiculo_id, None)
+        for fila in movimientos:
+            acumulador.movimiento(fila)
+            if anterior is not None:
+                acumulador.par(anterior, fila)
+            anterior = fila
+        acumulador.ultimo(anterior)
+    # Dentro desde antes del período y sin movimientos posteriores
+    for fila in previos.values():
+        acumulador.ultimo(fila)
+
+    dentro = acumulador.variacion[None]
+    ocupacion = []
+    for inicio in inicios:
+        dentro += acumulador.variacion[inicio]
+        ocupacion.append({
+            'inicio': inicio,
+            'ingresos': acumulador.ingresos[inicio],
+            'salidas': acumulador.salidas[inicio],
+            'dentro': dentro,
+        })
+
+    tramos = Counter(
+        next((f"≤ {limite} h" for limite in TRAMOS_ESTADIA if horas <= limite), f"> {TRAMOS_ESTADIA[-1]} h")
+        for horas in acumulador.estadias
+    )
+    etiquetas = [f"≤ {limite} h" for limite in TRAMOS_ESTADIA] + [f"> {TRAMOS_ESTADIA[-1]} h"]
+    return ReportePatio(
+        desde=desde,
+        hasta=hasta,
+        granularidad=granularidad,
+        estadias=Distribucion.de(acumulador.estadias),
+        histograma=[(etiqueta, tramos[etiqueta]) for etiqueta in etiquetas],
+        rutas=_por_clave(acumulador.por_ruta, ('origen', 'destino')),
+        vueltas=_por_clave(acumulador.por_destino, ('destino',)),
+        ocupacion=ocupacion,
+        sin_salida=acumulador.sin_salida,
+        movimientos=acumulador.movimientos,
+    )
+
+
+def reporte(desde, hasta, granularidad='dia'):
+    """Reporte del período desde la caché, recalculado en cada intervalo de caché.
+
+    La clave incluye el número de intervalo de ``ANALITICA_INTERVALO_CACHE``
+    segundos: al empezar el siguiente, el reporte se recalcula con los
+    movimientos nuevos.
+
+    Args:
+        desde (datetime.datetime): Inicio del período.
+        hasta (datetime.datetime): Fin del período, excluido.
+        granularidad (str): 'hora' o 'dia'.
+
+    Returns:
+        ReportePatio: Resultado del período.
+    """
+    duracion = settings.ANALITICA_INTERVALO_CACHE
+    ahora = time.time()
+    numero = int(ahora // duracion)
+    clave = f'gestion:analitica:{desde.isoformat()}:{hasta.isoformat()}:{granularidad}:{numero}'
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular(desde, hasta, granularidad)
+        cache.set(clave, resultado, max(1, int((numero + 1) * duracion - ahora)))
+    return resultado
+
+
+def dentro_ahora(limite=MAX_DENTRO_EN_PANTALLA):
+    """Vehículos cuyo último movimiento es un INGRESO, los de estadía más larga primero.
+
+    Args:
+        limite (int | None): Máximo de vehículos devueltos (None: todos).
+
+    Returns:
+        tuple[int, list[dict]]: Total dentro y detalle (patente, ingreso,
+        origen, horas dentro).
+    """
+    dentro = Vehiculo.objects.filter(ultimo_movimiento__tipo_movimiento='INGRESO')
+    ahora = timezone.now()
+    filas = dentro.order_by('ultimo_movimiento__fecha_hora').values_list(
+        'patente', 'ultimo_movimiento__fecha_hora', 'ultimo_movimiento__origen_id'
+    )
+    if limite is not None:
+        filas = filas[:limite]
+    detalle = [
+        {
+            'patente': patente, 'ingreso': ingreso, 'origen': ubicaciones.nombre_por_id(origen_id),
+            'horas': round(_horas(ahora - ingreso), 1),
+        }
+        for patente, ingreso, origen_id in filas
+    ]
+    return dentro.count(), detalle
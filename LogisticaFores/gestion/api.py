@@ -0,0 +1,430 @@
+"""API JSON para vehículos y movimientos de carga.
+
+Pensada para terminales de patio y herramientas BI que consultan
+periódicamente los datos, y para básculas y portones que registran
+movimientos en ráfagas:
+
+- Selección de campos con ``?campos=patente,fecha_hora``.
+- Paginación por cursor (``despues``/``antes``/``n``), igual que los listados.
+- Filtros: los de MovimientoFiltroForm para movimientos; ``tipo`` y ``marca``
+  para vehículos.
+- ETag / Last-Modified a partir de la versión de la tabla (gestion.versiones):
+  si nada cambió, se responde 304 sin consultar ni serializar filas.
+- Las filas se leen con ``values()``, sin instanciar modelos.
+- Las lecturas son vistas async (ORM async) para servirse bajo ASGI.
+- Alta por lotes (``POST api/movimientos/lote/``) con las validaciones de la
+  importación CSV, un único ``bulk_create`` y cabecera ``Idempotency-Key``.
+  Con COLA_INGESTA_ACTIVA el lote se guarda en la cola local (gestion.cola)
+  y se responde 202; ``GET api/movimientos/lote/<clave>/`` informa si el
+  lote está pendiente, procesado (con su respuesta) o descartado, y
+  ``GET api/cola/`` el estado de la cola.
+
+Autenticación: sesión de Django o cabecera ``Authorization: Token <clave>``
+para las lecturas; las escrituras exigen token (no usan CSRF).
+"""
+
+import hashlib
+import json
+import uuid
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+
+from . import cola, versiones
+from .cache import ausuario_por_token_hash, usuario_por_token_hash
+from .forms import MovimientoFiltroForm
+from .importacion import registrar_lote_idempotente
+from .models import Vehiculo, MovimientoCarga, TokenApi, SolicitudIdempotente
+from .paginacion import CodificadorJSON, apaginar_keyset, tamano_pagina, url_pagina
+
+# Nombre público del campo → ruta en el ORM (o expresión)
+CAMPOS_VEHICULO = {
+    'id': 'id',
+    'patente': 'patente',
+    'marca': 'marca',
+    'modelo': 'modelo',
+    'tipo': 'tipo',
+    'año': 'año',
+}
+CAMPOS_MOVIMIENTO = {
+    'id': 'id',
+    'vehiculo_id': 'vehiculo_id',
+    'patente': 'vehiculo__patente',
+    'tipo_movimiento': 'tipo_movimiento',
+    'fecha_hora': 'fecha_hora',
+    # Nombre de la ubicación ('' si no tiene, igual que antes de normalizarla)
+    'origen': Coalesce('origen__nombre', Value('')),
+    'destino': Coalesce('destino__nombre', Value('')),
+    'descripcion': 'descripcion',
+}
+
+ORDEN_VEHICULOS = ['patente']
+ORDEN_MOVIMIENTOS = ['-fecha_hora', '-id']
+
+# Movimientos aceptados por solicitud de alta por lotes
+MAX_MOVIMIENTOS_LOTE = 1000
+
+
+def error_json(mensaje, status, **extra):
+    """Respuesta JSON de error con el formato común de la API."""
+    return JsonResponse({'error': mensaje, **extra}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _hash_token(request):
+    """Hash de la clave de ``Authorization: Token <clave>``, o None si no viene."""
+    tipo, _, clave = request.headers.get('Authorization', '').partition(' ')
+    if tipo.lower() != 'token' or not clave.strip():
+        return None
+    return TokenApi.hash_clave(clave.strip())
+
+
+def usuario_por_token(request):
+    """Devuelve el usuario del token de la cabecera Authorization, si es válido.
+
+    Args:
+        request (HttpRequest): Solicitud con ``Authorization: Token <clave>``.
+
+    Returns:
+        User | None: Usuario activo dueño de un token activo, o None.
+    """
+    clave_hash = _hash_token(request)
+    return usuario_por_token_hash(clave_hash) if clave_hash else None
+
+
+async def ausuario_por_token(request):
+    """Versión async de usuario_por_token."""
+    clave_hash = _hash_token(request)
+    return await ausuario_por_token_hash(clave_hash) if clave_hash else None
+
+
+def api_login_required(vista):
+    """Exige sesión o token válido; responde 401 JSON en lugar de redirigir.
+
+    Acepta vistas sync y async. En las async el usuario queda resuelto en
+    ``request.user``, así el código posterior no consulta la sesión de forma
+    síncrona dentro del bucle de eventos.
+    """
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            usuario = await request.auser()
+            if not usuario.is_authenticated:
+                usuario = await ausuario_por_token(request)
+                if usuario is None:
+                    return error_json("Autenticación requerida.", 401)
+            request.user = usuario
+            return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            usuario = usuario_por_token(request)
+            if usuario is None:
+                return error_json("Autenticación requerida.", 401)
+            request.user = usuario
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def api_token_required(vista):
+    """Exige token válido (sin sesión ni CSRF); responde 401 JSON si falta."""
+    @wraps(vista)
+    @csrf_exempt
+    def envoltura(request, *args, **kwargs):
+        usuario = usuario_por_token(request)
+        if usuario is None:
+            return error_json("Se requiere la cabecera 'Authorization: Token <clave>'.", 401)
+        request.user = usuario
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def _campos_pedidos(request, disponibles):
+    """Lee ``?campos=`` y valida que existan.
+
+    Returns:
+        list[str]: Campos públicos pedidos (todos si no se indica).
+
+    Raises:
+        ValueError: Si se pide un campo inexistente.
+    """
+    pedidos = [c.strip() for c in request.GET.get('campos', '').split(',') if c.strip()]
+    invalidos = [c for c in pedidos if c not in disponibles]
+    if invalidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(invalidos)}.")
+    return pedidos or list(disponibles)
+
+
+async def _respuesta_condicional(request, tablas, generar):
+    """Responde 304 si ninguna de ``tablas`` cambió; si no, espera ``generar()``.
+
+    El ETag combina las versiones de las tablas de las que salen los campos
+    (p. ej. la patente viene de Vehiculo) con la URL completa (filtros,
+    campos y cursor), así cada página tiene su propio ETag. Last-Modified es
+    el cambio más reciente entre esas tablas.
+    """
+    numeros, actualizado = await versiones.aobtener_con_fecha(tablas)
+    version = '.'.join(str(n) for n in numeros)
+    huella = hashlib.sha1(f"{','.join(tablas)}:{version}:{request.get_full_path()}".encode()).hexdigest()
+    etag = quote_etag(huella)
+    ultima_modificacion = int(actualizado.timestamp()) if actualizado else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if respuesta is None:
+        respuesta = await generar()
+    if respuesta.status_code in (200, 304):
+        respuesta['ETag'] = etag
+        if ultima_modificacion is not None:
+            respuesta['Last-Modified'] = http_date(ultima_modificacion)
+        respuesta['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(respuesta, ('Authorization', 'Cookie'))
+    return respuesta
+
+
+async def _listar(request, queryset, disponibles, orden):
+    """Serializa una página de ``queryset`` con los campos pedidos."""
+    try:
+        campos = _campos_pedidos(request, disponibles)
+    except ValueError as exc:
+        return error_json(str(exc), 400)
+    claves_orden = [c.lstrip('-') for c in orden]
+    seleccion = list(dict.fromkeys(campos + claves_orden))
+    directos = [c for c in seleccion if disponibles.get(c, c) == c]
+    # Los campos calculados se leen con un alias propio: el nombre público
+    # puede coincidir con un campo del modelo (origen, destino)
+    columnas = {c: c if c in directos else f'api_{c}' for c in seleccion}
+    alias = {
+        columnas[c]: disponibles[c] if hasattr(disponibles[c], 'resolve_expression') else F(disponibles[c])
+        for c in seleccion if c not in directos
+    }
+    pagina = await apaginar_keyset(
+        queryset.values(*directos, **alias),
+        orden,
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+        tamano=tamano_pagina(request.GET.get('n')),
+    )
+    datos = {
+        'resultados': [{c: fila[columnas[c]] for c in campos} for fila in pagina.items],
+        'siguiente': request.path + url_pagina(request, despues=pagina.siguiente, antes=None) if pagina.siguiente else None,
+        'anterior': request.path + url_pagina(request, antes=pagina.anterior, despues=None) if pagina.anterior else None,
+    }
+    return JsonResponse(datos, encoder=CodificadorJSON, json_dumps_params={'ensure_ascii': False})
+
+
+@api_login_required
+async def api_vehiculos(request):
+    """Lista de vehículos en JSON (GET).
+
+    Vista async: bajo ASGI las lecturas usan el ORM async sin ocupar un hilo
+    por solicitud mientras esperan.
+
+    Parámetros GET: ``campos``, ``tipo``, ``marca``, ``despues``/``antes``, ``n``.
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        JsonResponse: ``{"resultados": [...], "siguiente": url, "anterior": url}``
+        o 304 si la tabla no cambió desde el ETag enviado.
+    """
+    if request.method != 'GET':
+        return error_json("Método no permitido.", 405)
+
+    async def generar():
+        vehiculos = Vehiculo.objects.all()
+        for campo in ('tipo', 'marca'):
+            valor = request.GET.get(campo, '').strip()
+            if valor:
+                vehiculos = vehiculos.filter(**{campo: valor.upper() if campo == 'tipo' else valor})
+        return await _listar(request, vehiculos, CAMPOS_VEHICULO, ORDEN_VEHICULOS)
+
+    return await _respuesta_condicional(request, [versiones.VEHICULOS], generar)
+
+
+@api_login_required
+async def api_movimientos(request):
+    """Lista de movimientos de carga en JSON (GET).
+
+    Vista async, igual que api_vehiculos.
+
+    Parámetros GET: ``campos``, filtros de MovimientoFiltroForm (patente,
+    desde, hasta, tipo_movimiento, origen, destino, q), ``despues``/``antes``, ``n``.
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        JsonResponse: ``{"resultados": [...], "siguiente": url, "anterior": url}``
+        o 304 si la tabla no cambió desde el ETag enviado.
+    """
+    if request.method != 'GET':
+        return error_json("Método no permitido.", 405)
+
+    async def generar():
+        filtro = MovimientoFiltroForm(request.GET)
+        if not filtro.is_valid():
+            return error_json("Filtros inválidos.", 400, errores=filtro.errors.get_json_data())
+        movimientos = await filtro.afiltrar(MovimientoCarga.objects.all())
+        return await _listar(request, movimientos, CAMPOS_MOVIMIENTO, ORDEN_MOVIMIENTOS)
+
+    # La patente sale de Vehiculo y los nombres de origen y destino de Ubicacion
+    tablas = [versiones.MOVIMIENTOS, versiones.VEHICULOS, versiones.UBICACIONES]
+    return await _respuesta_condicional(request, tablas, generar)
+
+
+def _leer_lote(request):
+    """Decodifica el cuerpo de un alta por lotes.
+
+    Acepta una lista de movimientos o ``{"movimientos": [...]}``.
+
+    Returns:
+        list[dict]: Movimientos recibidos.
+
+    Raises:
+        ValueError: Si el cuerpo no es JSON válido o no tiene el formato esperado.
+    """
+    try:
+        datos = json.loads(request.body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("El cuerpo debe ser JSON válido.")
+    if isinstance(datos, dict):
+        datos = datos.get('movimientos')
+    if not isinstance(datos, list) or not all(isinstance(m, dict) for m in datos):
+        raise ValueError("Se espera una lista de movimientos (objetos JSON).")
+    if not datos:
+        raise ValueError("La lista de movimientos está vacía.")
+    if len(datos) > MAX_MOVIMIENTOS_LOTE:
+        raise ValueError(f"Se admiten como máximo {MAX_MOVIMIENTOS_LOTE} movimientos por solicitud.")
+    return datos
+
+
+@api_token_required
+def api_movimientos_lote(request):
+    """Alta de movimientos por lotes en JSON (POST).
+
+    Cada movimiento lleva ``patente``, ``tipo_movimiento``, ``fecha_hora``
+    (ISO 8601), ``origen``, ``destino`` y ``descripcion``. Se aplican las
+    reglas de MovimientoForm (vehículo existente, tipo válido, fecha no
+    futura) a todo el lote de una vez y las filas válidas se insertan con un
+    único ``bulk_create``; las inválidas se informan por índice.
+
+    Con la cabecera ``Idempotency-Key`` un reintento de la misma solicitud
+    devuelve la respuesta original sin volver a insertar. Reutilizar la clave
+    con otro cuerpo responde 422.
+
+    Con COLA_INGESTA_ACTIVA el lote se encola y se valida al procesarlo
+    (comando procesar_cola_ingesta); el resultado queda en
+    SolicitudIdempotente y en la cola bajo la clave devuelta, y se consulta
+    en api_movimientos_lote_estado.
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        JsonResponse: ``{"creados": n, "rechazados": [{"indice": i, "error": "..."}]}``,
+        o 202 ``{"encolado": true, "clave": ..., "pendientes": n}`` con la
+        cola activa (503 si está llena).
+    """
+    if request.method != 'POST':
+        return error_json("Método no permitido.", 405)
+    clave = request.headers.get('Idempotency-Key', '').strip()
+    if len(clave) > SolicitudIdempotente._meta.get_field('clave').max_length:
+        return error_json("Idempotency-Key demasiado larga.", 400)
+    try:
+        movimientos = _leer_lote(request)
+    except ValueError as exc:
+        return error_json(str(exc), 400)
+
+    huella = hashlib.sha256(request.body).hexdigest()
+    if settings.COLA_INGESTA_ACTIVA:
+        return _encolar_lote(request, clave, huella, movimientos)
+
+    datos, previo = registrar_lote_idempotente(request.user.pk, clave, huella, movimientos)
+    if previo is None:
+        return JsonResponse(datos, json_dumps_params={'ensure_ascii': False})
+    if previo.huella != huella:
+        return error_json("Idempotency-Key ya utilizada con otro contenido.", 422)
+    return _repetir_respuesta(previo.estado, previo.respuesta)
+
+
+def _repetir_respuesta(estado, datos):
+    """Respuesta guardada de una clave ya registrada."""
+    respuesta = JsonResponse(datos, status=estado, json_dumps_params={'ensure_ascii': False})
+    respuesta['Idempotent-Replayed'] = 'true'
+    return respuesta
+
+
+def _encolar_lote(request, clave, huella, movimientos):
+    """Guarda el lote en la cola local y responde 202 sin tocar la base principal.
+
+    Una clave ya procesada repite la respuesta que el worker guardó en la
+    cola, como sin cola; una clave ya encolada con el mismo cuerpo vuelve a
+    responder 202 sin duplicar la entrada. Sin Idempotency-Key se genera una
+    clave, para que el worker no duplique el lote si debe reprocesarlo.
+    """
+    clave = clave or uuid.uuid4().hex
+    try:
+        pendientes = cola.encolar(request.user.pk, clave, huella, movimientos)
+    except cola.LoteProcesado as exc:
+        return _repetir_respuesta(exc.estado, exc.respuesta)
+    except cola.ClaveUsada as exc:
+        return error_json(str(exc), 422)
+    except cola.ColaLlena as exc:
+        respuesta = error_json(str(exc), 503)
+        respuesta['Retry-After'] = '5'
+        return respuesta
+    return JsonResponse({'encolado': True, 'clave': clave, 'pendientes': pendientes}, status=202)
+
+
+@api_token_required
+def api_movimientos_lote_estado(request, clave):
+    """Estado de un lote enviado con la cola de ingesta activa (GET).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        clave (str): Clave de idempotencia devuelta al encolar.
+
+    Returns:
+        JsonResponse: ``{"clave": ..., "estado": "procesada", "respuesta": {...}}``,
+        ``"pendiente"`` (con ``intentos``) o ``"fallida"`` (con ``error``);
+        404 si la clave no existe para el usuario.
+    """
+    if request.method != 'GET':
+        return error_json("Método no permitido.", 405)
+    datos = cola.estado(request.user.pk, clave) if settings.COLA_INGESTA_ACTIVA else None
+    if datos is None:
+        # De la primaria: la réplica puede no tener aún el registro del worker
+        previo = SolicitudIdempotente.objects.using(DEFAULT_DB_ALIAS).filter(
+            usuario_id=request.user.pk, clave=clave
+        ).first()
+        if previo is None:
+            return error_json("Clave desconocida.", 404)
+        datos = {'estado': 'procesada', 'respuesta': previo.respuesta}
+    return JsonResponse({'clave': clave, **datos}, json_dumps_params={'ensure_ascii': False})
+
+
+@api_login_required
+def api_cola(request):
+    """Estado de la cola local de ingesta (GET).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        JsonResponse: ``{"activa": bool, ...}`` con las métricas de gestion.cola.
+    """
+    if request.method != 'GET':
+        return error_json("Método no permitido.", 405)
+    datos = {'activa': settings.COLA_INGESTA_ACTIVA}
+    if settings.COLA_INGESTA_ACTIVA:
+        datos.update(cola.metricas())
+    return JsonResponse(datos)
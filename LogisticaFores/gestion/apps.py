@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class GestionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion'
+
+    def ready(self):
+        # Registra los receptores de señales (invalidación de caché, etc.)
+        from . import signals  # noqa: F401
+        # Medidor de consultas en cada conexión nueva (gestion.metricas)
+        from . import metricas  # noqa: F401
@@ -0,0 +1,153 @@
+"""Traslado de movimientos antiguos a la tabla de archivo.
+
+Los movimientos anteriores a un corte (primer día de un mes, UTC) se copian a
+MovimientoArchivado con el mismo id y se quitan de movimiento_carga, que queda
+con los meses recientes: índices más chicos y listados que leen menos páginas.
+
+- Con la tabla particionada (MySQL, gestion.particiones) los meses anteriores
+  al corte se copian y luego se elimina su partición entera (DROP PARTITION),
+  sólo si todas sus filas están en el archivo; si no, se lanza
+  ArchivoIncompleto y la partición se conserva.
+- En otro caso las filas se copian y se borran por lotes de ids, cada lote en
+  su propia transacción.
+
+El resumen (ResumenMovimiento) no cambia: sigue contando los movimientos
+archivados, y ``resumen.reconstruir`` los incluye. Sólo se suelta el puntero
+``ultimo_movimiento`` de los vehículos cuyo último movimiento se archiva.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from . import particiones, versiones
+from .models import MovimientoArchivado, MovimientoCarga, Vehiculo
+
+# Movimientos trasladados por transacción
+TAMANO_LOTE_ARCHIVO = 5000
+CAMPOS = ('id', 'vehiculo_id', 'tipo_movimiento', 'fecha_hora', 'origen_id', 'destino_id', 'descripcion')
+
+
+class ArchivoIncompleto(Exception):
+    """Una partición tiene filas que no están en el archivo; no se elimina."""
+
+
+def corte(meses, hoy=None):
+    """Inicio (UTC) del mes que está ``meses`` meses antes del actual.
+
+    Args:
+        meses (int): Meses completos que se conservan además del actual.
+        hoy (datetime.date | None): Fecha de referencia (por defecto hoy, UTC).
+
+    Returns:
+        datetime.datetime: Fecha y hora con zona horaria.
+    """
+    hoy = hoy or datetime.datetime.now(datetime.timezone.utc).date()
+    mes = particiones.sumar_meses(particiones.inicio_mes(hoy), -meses)
+    return datetime.datetime(mes.year, mes.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def _copiar(filas):
+    MovimientoArchivado.objects.bulk_create(
+        [MovimientoArchivado(**fila) for fila in filas], ignore_conflicts=True
+    )
+
+
+def _archivar_filas(antes_de, tamano_lote, alias, progreso):
+    viejos = MovimientoCarga.objects.using(alias).filter(fecha_hora__lt=antes_de).order_by('id')
+    archivados = 0
+    while True:
+        with transaction.atomic(using=alias):
+            filas = list(viejos.values(*CAMPOS)[:tamano_lote])
+            if not filas:
+                break
+            _copiar(filas)
+            # Borrado directo en SQL, sin señales: el resumen no debe restar
+            # los movimientos que sólo cambian de tabla.
+            archivados += MovimientoCarga.objects.filter(id__in=[f['id'] for f in filas])._raw_delete(alias)
+            versiones.incrementar(versiones.MOVIMIENTOS)
+            versiones.incrementar(versiones.ARCHIVO)
+        if progreso:
+            progreso(archivados)
+    return archivados
+
+
+def _verificar_copia(cursor, particion):
+    """Comprueba que cada fila de la partición esté en el archivo antes de eliminarla.
+
+    Cubre las filas con fecha vieja insertadas mientras se copiaba la partición.
+
+    Raises:
+        ArchivoIncompleto: Si falta alguna fila en movimiento_archivado.
+    """
+    qn = cursor.db.ops.quote_name
+    cursor.execute(
+        f"SELECT COUNT(*), COUNT(a.id) FROM {qn(MovimientoCarga._meta.db_table)} "
+        f"PARTITION ({qn(particion.nombre)}) m "
+        f"LEFT JOIN {qn(MovimientoArchivado._meta.db_table)} a ON a.id = m.id"
+    )
+    filas, copiadas = cursor.fetchone()
+    if filas != copiadas:
+        raise ArchivoIncompleto(
+            f"La partición {particion.nombre} tiene {filas} movimientos y sólo {copiadas} "
+            f"están en el archivo; no se eliminó. Vuelva a ejecutar el archivo."
+        )
+
+
+def _archivar_particiones(antes_de, tamano_lote, alias, progreso):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        vencidas = [p for p in particiones.listar(cursor) if p.hasta and p.hasta <= antes_de.date()]
+    archivados = 0
+    desde = None
+    for particion in vencidas:
+        hasta = datetime.datetime.combine(particion.hasta, datetime.time(), datetime.timezone.utc)
+        mes = MovimientoCarga.objects.using(alias).filter(fecha_hora__lt=hasta).order_by('id')
+        if desde:
+            mes = mes.filter(fecha_hora__gte=desde)
+        ultimo_id = 0
+        while True:
+            # La partición se elimina recién con todo copiado; si el proceso
+            # se interrumpe, la copia se retoma sin duplicar (ignore_conflicts).
+            filas = list(mes.filter(id__gt=ultimo_id).values(*CAMPOS)[:tamano_lote])
+            if not filas:
+                break
+            with transaction.atomic(using=alias):
+                _copiar(filas)
+                versiones.incrementar(versiones.ARCHIVO)
+            ultimo_id = filas[-1]['id']
+            archivados += len(filas)
+            if progreso:
+                progreso(archivados)
+        with connection.cursor() as cursor:
+            _verificar_copia(cursor, particion)
+            cursor.execute(particiones.sql_eliminar([particion.nombre]))
+        versiones.incrementar(versiones.MOVIMIENTOS)
+        desde = hasta
+    return archivados
+
+
+def archivar(antes_de, tamano_lote=TAMANO_LOTE_ARCHIVO, progreso=None):
+    """Traslada al archivo los movimientos anteriores a ``antes_de``.
+
+    Args:
+        antes_de (datetime.datetime): Corte (ver ``corte``); con tabla
+            particionada debe ser inicio de mes para eliminar particiones enteras.
+        tamano_lote (int): Movimientos copiados por transacción.
+        progreso (Callable[[int], None] | None): Se llama tras cada lote con
+            la cantidad de movimientos archivados hasta el momento.
+
+    Returns:
+        int: Cantidad de movimientos archivados.
+
+    Raises:
+        ArchivoIncompleto: Si una partición tiene filas sin copiar al
+            eliminarla (la partición se conserva).
+    """
+    alias = router.db_for_write(MovimientoCarga)
+    # Soltar el puntero de los vehículos sin movimientos posteriores al corte
+    Vehiculo.objects.filter(ultimo_movimiento__fecha_hora__lt=antes_de).update(ultimo_movimiento=None)
+    if connections[alias].vendor == 'mysql' and settings.MOVIMIENTOS_PARTICIONADOS:
+        return _archivar_particiones(antes_de, tamano_lote, alias, progreso)
+    return _archivar_filas(antes_de, tamano_lote, alias, progreso)
@@ -0,0 +1,14 @@
+"""Backend MySQL con pool de conexiones por proceso.
+
+Se activa con ``ENGINE = 'gestion.backends.mysql'`` (config/settings.py lo
+elige cuando ``DB_POOL_TAMANO`` es mayor que cero). Todo lo demás es el
+backend estándar de Django; ver gestion.backends.pool.
+"""
+
+from django.db.backends.mysql import base
+
+from ..pool import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,192 @@
+"""Pool de conexiones por proceso para los backends de base de datos.
+
+Django abre una conexión por hilo y, con ``CONN_MAX_AGE = 0``, la cierra al
+terminar cada solicitud; con ``CONN_MAX_AGE > 0`` la conserva en el hilo. Bajo
+ASGI cada solicitud corre en un hilo propio, así que la conexión persistente
+no se reutiliza nunca (y las que quedan abiertas se acumulan). Este pool
+guarda las conexiones cerradas por Django y se las presta al siguiente hilo
+que las pida, sin repetir el handshake TCP ni la autenticación.
+
+Configuración en ``DATABASES[alias]['POOL']`` (ver config/settings.py):
+
+- ``TAMANO``: conexiones ociosas que se conservan.
+- ``DESBORDE``: conexiones extra permitidas en picos (se cierran al devolverse).
+- ``ESPERA``: segundos a esperar una conexión con el pool agotado.
+- ``VIDA_MAXIMA``: segundos tras los que una conexión se recicla (por debajo
+  del ``wait_timeout`` del servidor).
+
+Con ``CONN_HEALTH_CHECKS`` cada préstamo se valida con ``is_usable()`` del
+backend (``ping`` en MySQL) y las conexiones caídas se descartan.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+_pools = {}
+_candado = threading.Lock()
+
+
+class PoolAgotado(Exception):
+    """No hubo conexión disponible dentro del tiempo de espera."""
+
+
+class PoolConexiones:
+    """Conexiones DB-API reutilizables entre hilos de un mismo proceso.
+
+    Args:
+        tamano (int): Máximo de conexiones ociosas conservadas.
+        desborde (int): Conexiones adicionales permitidas sobre ``tamano``.
+        espera (float): Segundos de espera con el pool agotado.
+        vida_maxima (float | None): Antigüedad máxima de una conexión.
+    """
+
+    def __init__(self, tamano, desborde=0, espera=30, vida_maxima=None):
+        self.tamano = tamano
+        self.espera = espera
+        self.vida_maxima = vida_maxima
+        self._libres = queue.LifoQueue(maxsize=tamano)
+        self._cupos = threading.BoundedSemaphore(tamano + desborde)
+        self._creadas = {}
+        self._contadores = Counter()
+
+    def tomar(self, abrir, usable=None):
+        """Presta una conexión ociosa o abre una nueva.
+
+        Args:
+            abrir (Callable[[], Connection]): Abre una conexión física.
+            usable (Callable[[Connection], bool] | None): Chequeo de salud;
+                None para no validar.
+
+        Returns:
+            Connection: Conexión DB-API lista para usar.
+
+        Raises:
+            PoolAgotado: Si todas las conexiones siguen en uso tras ``espera``.
+        """
+        while True:
+            try:
+                conexion = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            vencida = (
+                self.vida_maxima is not None
+                and time.monotonic() - self._creadas[id(conexion)] > self.vida_maxima
+            )
+            if vencida or (usable is not None and not usable(conexion)):
+                self._descartar(conexion)
+                continue
+            self._contadores['reutilizadas'] += 1
+            return conexion
+
+        if not self._cupos.acquire(timeout=self.espera):
+            self._contadores['agotado'] += 1
+            raise PoolAgotado(f"Sin conexiones libres tras {self.espera} s.")
+        try:
+            conexion = abrir()
+        except BaseException:
+            self._cupos.release()
+            raise
+        self._creadas[id(conexion)] = time.monotonic()
+        self._contadores['abiertas'] += 1
+        return conexion
+
+    def devolver(self, conexion, descartar=False):
+        """Devuelve una conexión prestada; la cierra si sobra o está dañada.
+
+        Args:
+            conexion (Connection): Conexión obtenida con ``tomar``.
+            descartar (bool): Cerrarla en vez de guardarla (p. ej. tras un
+                error o dentro de una transacción sin terminar).
+        """
+        if not descartar:
+            try:
+                self._libres.put_nowait(conexion)
+                return
+            except queue.Full:
+                pass
+        self._descartar(conexion)
+
+    def _descartar(self, conexion):
+        self._creadas.pop(id(conexion), None)
+        self._contadores['descartadas'] += 1
+        self._cupos.release()
+        try:
+            conexion.close()
+        except Exception:
+            # Una conexión caída puede fallar al cerrarse; igual se libera el cupo
+            pass
+
+    def metricas(self):
+        """Contadores del pool en este proceso.
+
+        Returns:
+            dict: ``abiertas`` (conexiones físicas), ``reutilizadas``,
+            ``descartadas``, ``agotado`` y ``libres`` (ociosas ahora).
+        """
+        datos = {clave: self._contadores[clave] for clave in ('abiertas', 'reutilizadas', 'descartadas', 'agotado')}
+        datos['libres'] = self._libres.qsize()
+        return datos
+
+
+def obtener_pool(alias, opciones):
+    """Pool del alias en el proceso actual (se crea al primer uso).
+
+    La clave incluye el PID: si el proceso se bifurca (p. ej. gunicorn con
+    ``--preload``) cada worker arma su propio pool en vez de compartir sockets
+    con el proceso padre.
+    """
+    clave = (os.getpid(), alias)
+    pool = _pools.get(clave)
+    if pool is None:
+        with _candado:
+            pool = _pools.get(clave)
+            if pool is None:
+                pool = _pools[clave] = PoolConexiones(
+                    tamano=opciones.get('TAMANO', 5),
+                    desborde=opciones.get('DESBORDE', 10),
+                    espera=opciones.get('ESPERA', 30),
+                    vida_maxima=opciones.get('VIDA_MAXIMA', 3600),
+                )
+    return pool
+
+
+class PoolMixin:
+    """Mezcla para un DatabaseWrapper: abre y cierra a través del pool.
+
+    Se antepone a la clase del backend real, p. ej.
+    ``class DatabaseWrapper(PoolMixin, mysql.DatabaseWrapper)``.
+    """
+
+    @property
+    def pool(self):
+        return obtener_pool(self.alias, self.settings_dict.get('POOL') or {})
+
+    def get_new_connection(self, conn_params):
+        usable = self._conexion_usable if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        try:
+            return self.pool.tomar(lambda: super(PoolMixin, self).get_new_connection(conn_params), usable)
+        except PoolAgotado as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _conexion_usable(self, conexion):
+        # Reutiliza el chequeo del backend (ping en MySQL) sobre la conexión ociosa
+        anterior, self.connection = self.connection, conexion
+        try:
+            return self.is_usable()
+        finally:
+            self.connection = anterior
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Una transacción abierta, un autocommit alterado o una conexión que
+        # quedó inservible tras un error se cierran en vez de volver al pool
+        descartar = (
+            self.in_atomic_block
+            or self.autocommit != self.settings_dict['AUTOCOMMIT']
+            or (self.errors_occurred and not self.is_usable())
+        )
+        self.pool.devolver(self.connection, descartar=descartar)
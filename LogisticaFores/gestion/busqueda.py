@@ -0,0 +1,132 @@
+"""Búsqueda de texto libre sobre la descripción de los movimientos.
+
+En lugar de ``icontains`` (LIKE '%…%', que recorre toda la tabla) se usa el
+índice de texto completo del motor:
+
+- MySQL: índice FULLTEXT sobre ``descripcion`` y ``MATCH … AGAINST``. Con
+  ``MOVIMIENTOS_PARTICIONADOS`` (tabla particionada, sin FULLTEXT) se usa
+  LIKE, acotado por el listado a las particiones recientes.
+- SQLite: tabla virtual FTS5 de contenido externo, sincronizada con triggers.
+
+El lookup ``busqueda`` se registra sólo sobre el campo
+``MovimientoCarga.descripcion``::
+
+    MovimientoCarga.objects.filter(descripcion__busqueda="tablones")
+"""
+
+import re
+
+from django.conf import settings
+from django.db.models import Lookup
+
+# Nombre del índice FULLTEXT (MySQL) y sufijo de la tabla FTS5 (SQLite)
+INDICE_FULLTEXT = 'mov_descripcion_ft'
+SUFIJO_FTS = '_fts'
+
+
+class BusquedaTexto(Lookup):
+    """Lookup de texto completo: ``campo__busqueda='texto'``."""
+
+    lookup_name = 'busqueda'
+
+    def as_mysql(self, compiler, connection):
+        if not _usa_fulltext(connection):
+            return self.as_sql(compiler, connection)
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"MATCH ({lhs}) AGAINST ({rhs} IN BOOLEAN MODE)", (*lhs_params, *rhs_params)
+
+    def as_sqlite(self, compiler, connection):
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        qn = compiler.quote_name_unless_alias
+        tabla = self.lhs.target.model._meta.db_table
+        pk = self.lhs.target.model._meta.pk.column
+        fts = connection.ops.quote_name(f"{tabla}{SUFIJO_FTS}")
+        return (
+            f"{qn(self.lhs.alias)}.{qn(pk)} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH {rhs})",
+            tuple(rhs_params),
+        )
+
+    def as_sql(self, compiler, connection):
+        # Otros motores: sin índice de texto, se recurre a LIKE.
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} LIKE {rhs}", (*lhs_params, *rhs_params)
+
+    def get_db_prep_lookup(self, value, connection):
+        vendor = connection.vendor
+        if vendor == 'mysql' and not _usa_fulltext(connection):
+            vendor = 'like'
+        return '%s', [preparar_terminos(value, vendor)]
+
+
+def _usa_fulltext(connection):
+    return connection.vendor == 'mysql' and not settings.MOVIMIENTOS_PARTICIONADOS
+
+
+def preparar_terminos(texto, vendor):
+    """Convierte el texto ingresado por el usuario en una consulta segura.
+
+    Cada palabra se exige como término (AND) y se escapa para que los
+    operadores del motor no provoquen errores de sintaxis.
+
+    Args:
+        texto (str): Texto libre ingresado en el filtro.
+        vendor (str): Motor de base de datos (``connection.vendor``), o
+            ``'like'`` para un patrón LIKE.
+
+    Returns:
+        str: Consulta en la sintaxis del motor.
+    """
+    palabras = re.findall(r'\w+', str(texto))
+    if vendor == 'mysql':
+        return ' '.join(f'+{p}*' for p in palabras)
+    if vendor == 'sqlite':
+        return ' '.join(f'"{p}"*' for p in palabras) or '""'
+    return f"%{' '.join(palabras)}%"
+
+
+def crear_indice_texto(schema_editor, tabla, columna):
+    """Crea la estructura de texto completo para ``tabla.columna``.
+
+    Pensado para usarse desde migraciones con RunPython. En SQLite debe
+    volver a ejecutarse si una migración posterior reconstruye la tabla
+    (los triggers se pierden junto con la tabla original).
+
+    Args:
+        schema_editor (BaseDatabaseSchemaEditor): Editor de la migración.
+        tabla (str): Nombre de la tabla (db_table).
+        columna (str): Columna de texto a indexar.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {INDICE_FULLTEXT} ON {tabla} ({columna})"
+        )
+    elif vendor == 'sqlite':
+        fts = f"{tabla}{SUFIJO_FTS}"
+        eliminar_indice_texto(schema_editor, tabla)
+        for sql in (
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({columna}, content='{tabla}', content_rowid='id')",
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columna}) VALUES (new.id, new.{columna}); END",
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columna}) VALUES ('delete', old.id, old.{columna}); END",
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {columna} ON {tabla} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columna}) VALUES ('delete', old.id, old.{columna}); "
+            f"INSERT INTO {fts}(rowid, {columna}) VALUES (new.id, new.{columna}); END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ):
+            schema_editor.execute(sql)
+
+
+def eliminar_indice_texto(schema_editor, tabla):
+    """Elimina la estructura creada por crear_indice_texto."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(f"DROP INDEX {INDICE_FULLTEXT} ON {tabla}")
+    elif vendor == 'sqlite':
+        fts = f"{tabla}{SUFIJO_FTS}"
+        for sufijo in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{sufijo}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
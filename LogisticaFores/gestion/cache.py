@@ -0,0 +1,201 @@
+"""Caché de lectura (read-through) para búsquedas de vehículos.
+
+Guarda en el backend de caché de Django (``CACHES['default']``: memoria local
+por defecto, Redis en producción) los resultados del autocompletado de
+vehículos por prefijo de patente, la traducción patente → id y la etiqueta
+del vehículo ya elegido en el formulario de movimientos.
+
+Las claves incluyen un número de versión. Al guardar o eliminar un vehículo
+(señales post_save/post_delete) se incrementa la versión, con lo que todas
+las entradas anteriores quedan obsoletas sin tener que borrarlas una a una.
+
+También guarda por poco tiempo (TTL_TOKEN) el usuario de cada token de la
+API, para que las escrituras encoladas (gestion.cola) no consulten la base
+principal en cada solicitud. Al editar o eliminar un token se borra su entrada.
+
+Los fallos de caché se llenan siempre desde la base primaria (``default``),
+no desde la réplica de la solicitud: la versión cambia al confirmar una
+escritura en la primaria, y una réplica atrasada guardaría bajo la versión
+nueva un resultado viejo (p. ej. sin el vehículo recién creado) que verían
+todos los procesos hasta el siguiente cambio.
+
+Los aciertos y fallos se cuentan por proceso (``estadisticas()``) y se
+publican en ``/metricas/`` como ``gestion_cache_total`` (gestion.metricas).
+"""
+
+import time
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Vehiculo, TokenApi
+
+CLAVE_VERSION = 'gestion:vehiculos:version'
+# Tiempo de vida de las entradas (la invalidación real la hace la versión)
+TTL_VEHICULOS = 60 * 60
+# Tiempo máximo que un token revocado sigue aceptándose en otros procesos
+TTL_TOKEN = 60
+
+_AUSENTE = object()
+_contadores = Counter()
+
+
+def version_vehiculos():
+    """Devuelve la versión vigente de los datos de vehículos en caché.
+
+    Si la clave no existe (caché vacía o expulsada) se inicializa con una
+    marca de tiempo, para no reutilizar versiones que aún tengan entradas.
+
+    Returns:
+        int: Versión actual.
+    """
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar_vehiculos():
+    """Invalida todas las entradas de vehículos incrementando la versión."""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), timeout=None)
+
+
+def _leer(nombre, clave, calcular):
+    """Lectura read-through: devuelve la entrada o la calcula y la guarda."""
+    clave = f'gestion:vehiculos:{version_vehiculos()}:{clave}'
+    valor = cache.get(clave, _AUSENTE)
+    if valor is not _AUSENTE:
+        _contadores[(nombre, 'acierto')] += 1
+        return valor
+    _contadores[(nombre, 'fallo')] += 1
+    valor = calcular()
+    cache.set(clave, valor, TTL_VEHICULOS)
+    return valor
+
+
+def _siguiente_prefijo(prefijo):
+    """Menor cadena mayor que todas las que comienzan con ``prefijo``.
+
+    Sólo incrementa letras A-Z y dígitos 0-9 (con acarreo), de modo que el
+    orden coincide en colaciones binarias y *_ci. Devuelve None si no hay
+    cota superior (p. ej. 'ZZ').
+    """
+    while prefijo:
+        ultimo = prefijo[-1]
+        if ultimo not in 'Z9':
+            return prefijo[:-1] + chr(ord(ultimo) + 1)
+        prefijo = prefijo[:-1]
+    return None
+
+
+def vehiculos_por_prefijo(prefijo, limite):
+    """Vehículos cuya patente comienza con ``prefijo`` (autocompletado).
+
+    La búsqueda es un rango ``prefijo <= patente < siguiente`` sobre el índice
+    único de patente (LIKE no usa el índice en SQLite ni con LIKE BINARY en
+    MySQL). La etiqueta coincide con ``str(vehiculo)``.
+
+    Args:
+        prefijo (str): Prefijo en mayúsculas (letras y dígitos).
+        limite (int): Cantidad máxima de resultados.
+
+    Returns:
+        list[tuple[int, str]]: Pares ``(id, etiqueta)`` ordenados por patente.
+    """
+    def calcular():
+        qs = Vehiculo.objects.using(DEFAULT_DB_ALIAS).filter(patente__gte=prefijo)
+        siguiente = _siguiente_prefijo(prefijo)
+        if siguiente:
+            qs = qs.filter(patente__lt=siguiente)
+        filas = qs.order_by('patente').values_list('id', 'patente', 'tipo')[:limite]
+        return [(pk, f"{patente} - {tipo}") for pk, patente, tipo in filas]
+
+    return _leer('prefijo', f'prefijo:{prefijo}:{limite}', calcular)
+
+
+def id_por_patente(patente):
+    """Traduce una patente al id del vehículo.
+
+    Args:
+        patente (str): Patente en mayúsculas.
+
+    Returns:
+        int | None: Id del vehículo, o None si no existe (también se cachea).
+    """
+    def calcular():
+        vehiculos = Vehiculo.objects.using(DEFAULT_DB_ALIAS)
+        return vehiculos.filter(patente=patente).values_list('id', flat=True).first()
+
+    return _leer('patente', f'patente:{patente}', calcular)
+
+
+def etiqueta_por_id(pk):
+    """Etiqueta ``"PATENTE - TIPO"`` de un vehículo (autocompletado ya elegido).
+
+    Args:
+        pk (int): Id del vehículo.
+
+    Returns:
+        str | None: Etiqueta, o None si no existe (también se cachea).
+    """
+    def calcular():
+        fila = Vehiculo.objects.using(DEFAULT_DB_ALIAS).filter(pk=pk).values_list('patente', 'tipo').first()
+        return f"{fila[0]} - {fila[1]}" if fila else None
+
+    return _leer('etiqueta', f'etiqueta:{pk}', calcular)
+
+
+def _clave_token(clave_hash):
+    return f'gestion:token:{clave_hash}'
+
+
+def usuario_por_token_hash(clave_hash):
+    """Usuario activo dueño de un token activo, leído a través de la caché.
+
+    Args:
+        clave_hash (str): Hash de la clave (TokenApi.hash_clave).
+
+    Returns:
+        User | None: Usuario, o None si el token no es válido (también se cachea).
+    """
+    clave = _clave_token(clave_hash)
+    valor = cache.get(clave, _AUSENTE)
+    if valor is not _AUSENTE:
+        _contadores[('token', 'acierto')] += 1
+        return valor
+    _contadores[('token', 'fallo')] += 1
+    token = (
+        TokenApi.objects.using(DEFAULT_DB_ALIAS).select_related('usuario')
+        .filter(clave_hash=clave_hash, activo=True, usuario__is_active=True)
+        .first()
+    )
+    usuario = token.usuario if token else None
+    cache.set(clave, usuario, TTL_TOKEN)
+    return usuario
+
+
+def invalidar_token(clave_hash):
+    """Descarta el usuario cacheado de un token."""
+    cache.delete(_clave_token(clave_hash))
+
+
+# Variantes para vistas async: una sola espera cubre la caché y la consulta
+avehiculos_por_prefijo = sync_to_async(vehiculos_por_prefijo)
+aid_por_patente = sync_to_async(id_por_patente)
+ausuario_por_token_hash = sync_to_async(usuario_por_token_hash)
+
+
+def estadisticas():
+    """Contadores de aciertos/fallos de la caché en este proceso.
+
+    Returns:
+        dict[tuple[str, str], int]: Lecturas por (tipo de lectura, resultado),
+        p. ej. ``('patente', 'acierto')``.
+    """
+    return dict(_contadores)
@@ -0,0 +1,357 @@
+"""Cola local y durable para la ingesta de movimientos.
+
+Con ``COLA_INGESTA_ACTIVA`` la API de alta por lotes no escribe en la base
+principal: guarda el lote en un archivo SQLite local (modo WAL,
+``synchronous=FULL``, así el lote sobrevive a un corte apenas se confirma) y
+responde 202. El comando ``procesar_cola_ingesta`` vacía la cola en
+transacciones grandes.
+
+Entrega *al menos una vez*: el worker reserva entradas por un tiempo
+(arrendamiento); si muere antes de confirmarlas, vuelven a quedar visibles al
+vencer el plazo. Cada entrada lleva una clave de idempotencia que se registra
+en la misma transacción que los movimientos (SolicitudIdempotente), de modo
+que un reproceso no duplica filas.
+
+Al confirmar una entrada el worker guarda su respuesta en la tabla
+``procesada`` (durante ``COLA_INGESTA_RETENCION_DIAS``): un reintento del
+cliente con la misma clave recibe esa respuesta sin que la API consulte la
+base principal. Pasado ese plazo el lote se vuelve a encolar y el worker
+repite la respuesta de SolicitudIdempotente sin insertar nada.
+
+Una entrada que falla al registrarse (por ejemplo, su usuario ya no existe)
+no frena a las demás: se libera sola, con una demora creciente, y al superar
+``COLA_INGESTA_MAX_INTENTOS`` pasa a la tabla ``fallida`` (cola de
+descartes), donde queda con el motivo para revisarla a mano. Su clave sigue
+ocupada: un reintento del cliente no la vuelve a encolar.
+
+Contrapresión: con ``COLA_INGESTA_MAXIMO`` entradas pendientes ``encolar``
+lanza ColaLlena y la API responde 503. ``metricas()`` informa profundidad,
+antigüedad y reintentos.
+"""
+
+import json
+import sqlite3
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+
+# Segundos que una entrada reservada queda oculta para otros workers
+ARRENDAMIENTO_SEGUNDOS = 300
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entrada (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario_id INTEGER NOT NULL,
+    clave TEXT NOT NULL,
+    huella TEXT NOT NULL,
+    cuerpo TEXT NOT NULL,
+    filas INTEGER NOT NULL,
+    encolado REAL NOT NULL,
+    reservado_hasta REAL NOT NULL DEFAULT 0,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (usuario_id, clave)
+);
+CREATE TABLE IF NOT EXISTS fallida (
+    id INTEGER PRIMARY KEY,
+    usuario_id INTEGER NOT NULL,
+    clave TEXT NOT NULL,
+    huella TEXT NOT NULL,
+    cuerpo TEXT NOT NULL,
+    filas INTEGER NOT NULL,
+    encolado REAL NOT NULL,
+    intentos INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    descartado REAL NOT NULL,
+    UNIQUE (usuario_id, clave)
+);
+CREATE TABLE IF NOT EXISTS procesada (
+    usuario_id INTEGER NOT NULL,
+    clave TEXT NOT NULL,
+    huella TEXT NOT NULL,
+    estado INTEGER NOT NULL,
+    respuesta TEXT NOT NULL,
+    procesado REAL NOT NULL,
+    PRIMARY KEY (usuario_id, clave)
+);
+CREATE INDEX IF NOT EXISTS procesada_procesado ON procesada (procesado);
+"""
+
+_inicializadas = set()
+_contadores = Counter()
+
+
+class ColaLlena(Exception):
+    """La cola alcanzó COLA_INGESTA_MAXIMO entradas pendientes."""
+
+
+class ClaveUsada(Exception):
+    """La clave ya está en la cola con otro contenido o su lote se descartó."""
+
+
+class LoteProcesado(Exception):
+    """La clave ya se registró en la base principal.
+
+    Attributes:
+        estado (int): Código HTTP de la respuesta guardada.
+        respuesta (dict): Cuerpo de la respuesta guardada.
+    """
+
+    def __init__(self, estado, respuesta):
+        super().__init__("Lote ya procesado.")
+        self.estado = estado
+        self.respuesta = respuesta
+
+
+@dataclass
+class EntradaCola:
+    """Lote de movimientos reservado por un worker.
+
+    Attributes:
+        id (int): Id de la entrada en la cola.
+        usuario_id (int): Usuario que envió el lote.
+        clave (str): Clave de idempotencia.
+        huella (str): SHA-256 del cuerpo original.
+        movimientos (list[dict]): Movimientos recibidos.
+        intentos (int): Veces que se reservó (incluida esta).
+    """
+    id: int
+    usuario_id: int
+    clave: str
+    huella: str
+    movimientos: list
+    intentos: int
+
+
+@contextmanager
+def _conexion():
+    ruta = settings.COLA_INGESTA_RUTA
+    # isolation_level=None: las transacciones se controlan con BEGIN/COMMIT
+    conexion = sqlite3.connect(ruta, timeout=10, isolation_level=None)
+    try:
+        conexion.execute('PRAGMA synchronous=FULL')
+        if ruta not in _inicializadas:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+            _inicializadas.add(ruta)
+        yield conexion
+    finally:
+        conexion.close()
+
+
+@contextmanager
+def _transaccion():
+    """Transacción de escritura (BEGIN IMMEDIATE) sobre la cola."""
+    with _conexion() as conexion:
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            yield conexion
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+        conexion.execute('COMMIT')
+
+
+def encolar(usuario_id, clave, huella, movimientos):
+    """Guarda un lote en la cola.
+
+    Un lote con una clave ya encolada y aún no procesada no se duplica; uno
+    ya procesado no se vuelve a encolar.
+
+    Args:
+        usuario_id (int): Usuario que envía el lote.
+        clave (str): Clave de idempotencia (obligatoria).
+        huella (str): SHA-256 del cuerpo.
+        movimientos (list[dict]): Movimientos recibidos.
+
+    Returns:
+        int: Entradas pendientes tras encolar.
+
+    Raises:
+        ColaLlena: Si hay COLA_INGESTA_MAXIMO entradas pendientes.
+        ClaveUsada: Si la clave está encolada o procesada con otra huella, o
+            en ``fallida``.
+        LoteProcesado: Si la clave ya se procesó con la misma huella.
+    """
+    with _transaccion() as conexion:
+        procesada = conexion.execute(
+            'SELECT huella, estado, respuesta FROM procesada WHERE usuario_id = ? AND clave = ?',
+            (usuario_id, clave),
+        ).fetchone()
+        if procesada is not None:
+            if procesada[0] != huella:
+                raise ClaveUsada("Idempotency-Key ya utilizada con otro contenido.")
+            raise LoteProcesado(procesada[1], json.loads(procesada[2]))
+        previa = conexion.execute(
+            'SELECT huella FROM entrada WHERE usuario_id = ? AND clave = ?', (usuario_id, clave)
+        ).fetchone()
+        if previa is not None and previa[0] != huella:
+            raise ClaveUsada("Idempotency-Key ya utilizada con otro contenido.")
+        descartada = conexion.execute(
+            'SELECT huella, error FROM fallida WHERE usuario_id = ? AND clave = ?', (usuario_id, clave)
+        ).fetchone()
+        if descartada is not None:
+            if descartada[0] != huella:
+                raise ClaveUsada("Idempotency-Key ya utilizada con otro contenido.")
+            raise ClaveUsada(f"El lote de esta Idempotency-Key se descartó: {descartada[1]}")
+        pendientes = conexion.execute('SELECT COUNT(*) FROM entrada').fetchone()[0]
+        if pendientes >= settings.COLA_INGESTA_MAXIMO:
+            _contadores['rechazadas_cola_llena'] += 1
+            raise ColaLlena(f"Cola de ingesta llena ({pendientes} entradas pendientes).")
+        cursor = conexion.execute(
+            'INSERT OR IGNORE INTO entrada (usuario_id, clave, huella, cuerpo, filas, encolado) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (usuario_id, clave, huella, json.dumps(movimientos), len(movimientos), time.time()),
+        )
+    if cursor.rowcount:
+        _contadores['encoladas'] += 1
+        return pendientes + 1
+    _contadores['duplicadas'] += 1
+    return pendientes
+
+
+def reservar(limite, arrendamiento=ARRENDAMIENTO_SEGUNDOS):
+    """Reserva las entradas más antiguas visibles para procesarlas.
+
+    Args:
+        limite (int): Máximo de entradas a reservar.
+        arrendamiento (float): Segundos durante los que quedan ocultas.
+
+    Returns:
+        list[EntradaCola]: Entradas reservadas, en orden de llegada.
+    """
+    ahora = time.time()
+    with _transaccion() as conexion:
+        filas = conexion.execute(
+            'SELECT id, usuario_id, clave, huella, cuerpo, intentos FROM entrada '
+            'WHERE reservado_hasta <= ? ORDER BY id LIMIT ?',
+            (ahora, limite),
+        ).fetchall()
+        conexion.executemany(
+            'UPDATE entrada SET reservado_hasta = ?, intentos = intentos + 1 WHERE id = ?',
+            [(ahora + arrendamiento, fila[0]) for fila in filas],
+        )
+    return [
+        EntradaCola(id_, usuario_id, clave, huella, json.loads(cuerpo), intentos + 1)
+        for id_, usuario_id, clave, huella, cuerpo, intentos in filas
+    ]
+
+
+def confirmar(respuestas):
+    """Quita de la cola las entradas ya registradas y guarda su respuesta.
+
+    También elimina las respuestas guardadas hace más de
+    COLA_INGESTA_RETENCION_DIAS días.
+
+    Args:
+        respuestas (dict[int, tuple[int, dict]]): Código HTTP y cuerpo de la
+            respuesta por id de entrada.
+    """
+    ahora = time.time()
+    with _transaccion() as conexion:
+        conexion.executemany(
+            'INSERT OR REPLACE INTO procesada (usuario_id, clave, huella, estado, respuesta, procesado) '
+            'SELECT usuario_id, clave, huella, ?, ?, ? FROM entrada WHERE id = ?',
+            [(estado, json.dumps(datos), ahora, id_) for id_, (estado, datos) in respuestas.items()],
+        )
+        conexion.executemany('DELETE FROM entrada WHERE id = ?', [(i,) for i in respuestas])
+        conexion.execute(
+            'DELETE FROM procesada WHERE procesado < ?',
+            (ahora - settings.COLA_INGESTA_RETENCION_DIAS * 24 * 60 * 60,),
+        )
+
+
+def liberar(ids, demora=0):
+    """Devuelve entradas reservadas a la cola.
+
+    Args:
+        ids (list[int]): Entradas a liberar.
+        demora (float): Segundos antes de que vuelvan a ser visibles (0 para
+            reintentarlas enseguida).
+    """
+    visible = time.time() + demora if demora else 0
+    with _transaccion() as conexion:
+        conexion.executemany(
+            'UPDATE entrada SET reservado_hasta = ? WHERE id = ?', [(visible, i) for i in ids]
+        )
+
+
+def descartar(errores):
+    """Pasa entradas a la tabla ``fallida`` y las quita de la cola.
+
+    Args:
+        errores (dict[int, str]): Motivo del descarte por id de entrada.
+    """
+    ahora = time.time()
+    with _transaccion() as conexion:
+        conexion.executemany(
+            'INSERT OR REPLACE INTO fallida (id, usuario_id, clave, huella, cuerpo, filas, encolado, '
+            'intentos, error, descartado) SELECT id, usuario_id, clave, huella, cuerpo, filas, '
+            'encolado, intentos, ?, ? FROM entrada WHERE id = ?',
+            [(error, ahora, id_) for id_, error in errores.items()],
+        )
+        conexion.executemany('DELETE FROM entrada WHERE id = ?', [(i,) for i in errores])
+    _contadores['descartadas'] += len(errores)
+
+
+def estado(usuario_id, clave):
+    """Estado de una clave en la cola.
+
+    Args:
+        usuario_id (int): Usuario dueño de la clave.
+        clave (str): Clave de idempotencia.
+
+    Returns:
+        dict | None: ``{"estado": "procesada", "respuesta": {...}}``,
+        ``{"estado": "pendiente", "intentos": n}`` o
+        ``{"estado": "fallida", "intentos": n, "error": "..."}``; None si la
+        clave no está en la cola.
+    """
+    with _conexion() as conexion:
+        fila = conexion.execute(
+            'SELECT respuesta FROM procesada WHERE usuario_id = ? AND clave = ?', (usuario_id, clave)
+        ).fetchone()
+        if fila is not None:
+            return {'estado': 'procesada', 'respuesta': json.loads(fila[0])}
+        fila = conexion.execute(
+            'SELECT intentos FROM entrada WHERE usuario_id = ? AND clave = ?', (usuario_id, clave)
+        ).fetchone()
+        if fila is not None:
+            return {'estado': 'pendiente', 'intentos': fila[0]}
+        fila = conexion.execute(
+            'SELECT intentos, error FROM fallida WHERE usuario_id = ? AND clave = ?', (usuario_id, clave)
+        ).fetchone()
+    if fila is not None:
+        return {'estado': 'fallida', 'intentos': fila[0], 'error': fila[1]}
+    return None
+
+
+def metricas():
+    """Estado de la cola y contadores de este proceso.
+
+    Returns:
+        dict: ``pendientes``, ``filas_pendientes``, ``reservadas``,
+        ``antiguedad_segundos`` (de la entrada más vieja), ``max_intentos``,
+        ``fallidas`` (en la cola de descartes), ``capacidad`` y los contadores
+        de encolado del proceso.
+    """
+    ahora = time.time()
+    with _conexion() as conexion:
+        pendientes, filas, mas_antigua, reservadas, max_intentos = conexion.execute(
+            'SELECT COUNT(*), COALESCE(SUM(filas), 0), MIN(encolado), '
+            'COALESCE(SUM(reservado_hasta > ?), 0), COALESCE(MAX(intentos), 0) FROM entrada',
+            (ahora,),
+        ).fetchone()
+        fallidas = conexion.execute('SELECT COUNT(*) FROM fallida').fetchone()[0]
+    return {
+        'pendientes': pendientes,
+        'filas_pendientes': filas,
+        'reservadas': reservadas,
+        'antiguedad_segundos': round(ahora - mas_antigua, 3) if mas_antigua else 0,
+        'max_intentos': max_intentos,
+        'fallidas': fallidas,
+        'capacidad': settings.COLA_INGESTA_MAXIMO,
+        **_contadores,
+    }
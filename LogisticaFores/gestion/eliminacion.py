@@ -0,0 +1,69 @@
+"""Eliminación de vehículos con historiales grandes de movimientos.
+
+``vehiculo.delete()`` hace que el Collector de Django cargue en memoria cada
+MovimientoCarga relacionado (para emitir señales y emular CASCADE) antes de
+borrarlos, manteniendo bloqueos durante toda la operación. Aquí los
+movimientos se borran por lotes acotados de ids, cada lote en su propia
+transacción (también los archivados, ver gestion.archivo), y al final se
+elimina el vehículo con el mismo estado final que el borrado normal (resumen,
+agregados y caché incluidos).
+"""
+
+from django.db import transaction
+
+from . import agregados, versiones
+from .models import Vehiculo, MovimientoArchivado, MovimientoCarga
+
+# Movimientos borrados por transacción
+TAMANO_LOTE_ELIMINACION = 5000
+
+
+def eliminar_vehiculo(vehiculo, tamano_lote=TAMANO_LOTE_ELIMINACION, progreso=None):
+    """Elimina un vehículo y sus movimientos por lotes.
+
+    Args:
+        vehiculo (Vehiculo): Vehículo a eliminar.
+        tamano_lote (int): Movimientos borrados por transacción.
+        progreso (Callable[[int, int], None] | None): Se llama tras cada lote
+            con (movimientos eliminados, total estimado).
+
+    Returns:
+        int: Cantidad de movimientos eliminados.
+    """
+    movimientos = MovimientoCarga.objects.filter(vehiculo_id=vehiculo.pk)
+    total = movimientos.count()
+    # Soltar el puntero al último movimiento para que no referencie filas borradas
+    Vehiculo.objects.filter(pk=vehiculo.pk).update(ultimo_movimiento=None)
+
+    eliminados = 0
+    while True:
+        with transaction.atomic():
+            filas = list(movimientos.order_by().values_list('id', 'fecha_hora')[:tamano_lote])
+            if not filas:
+                break
+            ids, fechas = zip(*filas)
+            # Borrado directo en SQL, sin cargar instancias ni emitir señales:
+            # el resumen del vehículo se elimina junto con él y las horas de
+            # los agregados se marcan aquí.
+            eliminados += MovimientoCarga.objects.filter(id__in=ids)._raw_delete(movimientos.db)
+            agregados.marcar_pendientes(fechas)
+            versiones.incrementar(versiones.MOVIMIENTOS)
+        if progreso:
+            progreso(eliminados, max(total, eliminados))
+
+    # El archivo del vehículo se borra igual, sin contarlo como movimientos eliminados
+    archivados = MovimientoArchivado.objects.filter(vehiculo_id=vehiculo.pk)
+    while True:
+        with transaction.atomic():
+            filas = list(archivados.order_by().values_list('id', 'fecha_hora')[:tamano_lote])
+            if not filas:
+                break
+            ids, fechas = zip(*filas)
+            MovimientoArchivado.objects.filter(id__in=ids)._raw_delete(archivados.db)
+            agregados.marcar_pendientes(fechas)
+            versiones.incrementar(versiones.ARCHIVO)
+
+    # Lo que quede (resumen, movimientos insertados durante el proceso) lo
+    # resuelve el Collector de forma normal, y se emite post_delete del vehículo.
+    vehiculo.delete()
+    return eliminados
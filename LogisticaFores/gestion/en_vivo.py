@@ -0,0 +1,238 @@
+"""Movimientos en vivo para el listado (Server-Sent Events).
+
+Cada proceso ASGI tiene un Difusor por bucle de eventos que reparte los
+movimientos nuevos o editados a todos los clientes conectados al stream
+``movimiento_en_vivo``. Las consultas las hace sólo el difusor, no cada
+cliente: con cientos de pantallas abiertas el costo en la base sigue siendo
+una consulta de ``max(id)`` por intervalo y proceso, más la lectura de las
+filas cuando hay cambios.
+
+Fuentes de cambios:
+
+- Avisos de ``post_save`` de este proceso (al confirmar la transacción): el
+  difusor despierta de inmediato y envía también las ediciones.
+- Sondeo de ``max(id)`` cada ``EN_VIVO_INTERVALO`` segundos: cubre las altas
+  de otros procesos y las de ``bulk_create`` (importación, API por lotes,
+  cola de ingesta), que no emiten señales. Las ediciones hechas en otros
+  procesos no se detectan; aparecen al recargar la página.
+
+Las filas se renderizan una sola vez por evento con la plantilla del listado
+(movimientos/fila.html, ver gestion.fragmentos) y el mismo mensaje se pone en
+la cola de cada cliente. Un cliente que no lee se desconecta al llenarse su
+cola; el navegador reconecta con ``Last-Event-ID`` y recibe los eventos
+recientes que le faltan.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import weakref
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Max, Q
+
+from . import fragmentos
+from .models import MovimientoCarga
+
+logger = logging.getLogger(__name__)
+
+PLANTILLA_FILA = 'movimientos/fila.html'
+# Filas como máximo por evento (una importación grande sólo envía las últimas)
+MAX_FILAS_EVENTO = 100
+# Eventos pendientes por cliente antes de desconectarlo
+TAMANO_COLA_CLIENTE = 50
+# Eventos guardados para los clientes que reconectan
+EVENTOS_RECIENTES = 100
+
+# Un difusor por bucle de eventos (bajo ASGI, uno por proceso)
+_difusores = weakref.WeakKeyDictionary()
+_candado_difusores = threading.Lock()
+
+
+def _leer_cambios(ultimo_id, editados):
+    """Consulta el tope de ids y las filas nuevas o editadas.
+
+    Lee de la primaria: un alta recién avisada puede no haber llegado aún a
+    la réplica.
+
+    Returns:
+        tuple[int, list[tuple]]: Tope de ids y filas (columnas de
+        PLANTILLA_FILA) en orden de id.
+    """
+    movimientos = MovimientoCarga.objects.using(DEFAULT_DB_ALIAS).order_by()
+    tope = movimientos.aggregate(tope=Max('id'))['tope'] or 0
+    if ultimo_id is None:
+        return tope, []
+    condicion = Q(id__in=editados)
+    if tope > ultimo_id:
+        condicion |= Q(id__gt=max(ultimo_id, tope - MAX_FILAS_EVENTO), id__lte=tope)
+    elif not editados:
+        return tope, []
+    renderizador = fragmentos.renderizador(PLANTILLA_FILA)
+    filas = movimientos.filter(condicion).order_by('id').values_list(*renderizador.columnas)
+    return tope, list(filas[:MAX_FILAS_EVENTO + len(editados)])
+
+
+class Difusor:
+    """Reparte los cambios de movimiento_carga a los clientes de un bucle de eventos.
+
+    La tarea que consulta la base corre mientras haya clientes conectados.
+
+    Attributes:
+        ultimo_id (int | None): Mayor id ya enviado (None antes de la primera lectura).
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._clientes = set()
+        self._aviso = asyncio.Event()
+        self._editados = set()
+        self._candado = threading.Lock()
+        self._recientes = deque(maxlen=EVENTOS_RECIENTES)
+        self._tarea = None
+        self.ultimo_id = None
+
+    @property
+    def clientes(self):
+        """Cantidad de clientes conectados."""
+        return len(self._clientes)
+
+    def suscribir(self, desde_id=None):
+        """Registra un cliente y devuelve su cola de mensajes.
+
+        Args:
+            desde_id (int | None): Último id recibido (``Last-Event-ID``):
+                se reenvían los eventos recientes posteriores.
+
+        Returns:
+            asyncio.Queue: Mensajes SSE ya formateados; ``None`` indica que
+            el cliente debe cerrar la conexión.
+        """
+        cola = asyncio.Queue(maxsize=TAMANO_COLA_CLIENTE)
+        if desde_id is not None:
+            for tope, mensaje in self._recientes:
+                if tope > desde_id and not cola.full():
+                    cola.put_nowait(mensaje)
+        self._clientes.add(cola)
+        if self._tarea is None:
+            # Contexto vacío: las consultas del difusor no se cuentan en las
+            # métricas de la solicitud que lo inició (gestion.metricas)
+            self._tarea = self._loop.create_task(self._vigilar(), context=contextvars.Context())
+        return cola
+
+    def desuscribir(self, cola):
+        """Quita un cliente (al cerrarse su conexión)."""
+        self._clientes.discard(cola)
+
+    def avisar(self, movimiento_id):
+        """Registra un movimiento guardado; se puede llamar desde cualquier hilo."""
+        with self._candado:
+            self._editados.add(movimiento_id)
+        try:
+            self._loop.call_soon_threadsafe(self._aviso.set)
+        except RuntimeError:
+            # Bucle cerrado: nadie escucha
+            pass
+
+    def _tomar_editados(self):
+        with self._candado:
+            editados, self._editados = self._editados, set()
+        return editados
+
+    async def _vigilar(self):
+        try:
+            while self._clientes:
+                editados = self._tomar_editados()
+                try:
+                    tope, filas = await sync_to_async(_leer_cambios)(self.ultimo_id, editados)
+                except DatabaseError:
+                    # Base no disponible: se reintenta en el siguiente intervalo
+                    logger.exception("No se pudieron leer los movimientos en vivo.")
+                else:
+                    if filas:
+                        self._difundir(tope, filas)
+                    self.ultimo_id = max(self.ultimo_id or 0, tope)
+                try:
+                    await asyncio.wait_for(self._aviso.wait(), settings.EN_VIVO_INTERVALO)
+                except TimeoutError:
+                    pass
+                self._aviso.clear()
+        finally:
+            self._tarea = None
+
+    def _difundir(self, tope, filas):
+        renderizador = fragmentos.renderizador(PLANTILLA_FILA)
+        posicion_id = renderizador.columnas.index('id')
+        datos = {'filas': [
+            {
+                'id': fila[posicion_id],
+                'nuevo': fila[posicion_id] > self.ultimo_id,
+                'html': renderizador.renderizar([fila]).strip(),
+            }
+            for fila in filas
+        ]}
+        mensaje = f"id: {tope}\nevent: movimientos\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+        self._recientes.append((tope, mensaje))
+        for cola in list(self._clientes):
+            try:
+                cola.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Cliente lento: se lo desconecta y reconecta con Last-Event-ID
+                self._clientes.discard(cola)
+                while not cola.empty():
+                    cola.get_nowait()
+                cola.put_nowait(None)
+
+
+def difusor():
+    """Difusor del bucle de eventos en curso (se crea con el primer cliente)."""
+    loop = asyncio.get_running_loop()
+    with _candado_difusores:
+        if loop not in _difusores:
+            _difusores[loop] = Difusor(loop)
+        return _difusores[loop]
+
+
+def avisar(movimiento_id):
+    """Avisa a los difusores de este proceso que un movimiento se guardó.
+
+    Lo llaman las señales al confirmar la transacción. Sin clientes
+    conectados no hace nada.
+    """
+    with _candado_difusores:
+        activos = [d for d in _difusores.values() if d.clientes]
+    for activo in activos:
+        activo.avisar(movimiento_id)
+
+
+async def eventos(desde_id=None):
+    """Mensajes SSE para un cliente: eventos ``movimientos`` y latidos.
+
+    Args:
+        desde_id (int | None): Valor de ``Last-Event-ID`` al reconectar.
+
+    Yields:
+        str: Bloques de texto ``text/event-stream``.
+    """
+    actual = difusor()
+    cola = actual.suscribir(desde_id)
+    try:
+        # Milisegundos que espera el navegador antes de reconectar
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                mensaje = await asyncio.wait_for(cola.get(), settings.EN_VIVO_LATIDO)
+            except TimeoutError:
+                # Comentario SSE: mantiene la conexión abierta en proxies
+                yield ": latido\n\n"
+                continue
+            if mensaje is None:
+                return
+            yield mensaje
+    finally:
+        actual.desuscribir(cola)
@@ -0,0 +1,123 @@
+"""Enrutamiento de lecturas a réplicas con lectura de las propias escrituras.
+
+Las lecturas de los modelos de ``gestion`` (listados, admin, exportaciones,
+API) van a los alias ``replica*`` de ``DATABASES``; las escrituras y todo lo
+demás (sesiones, usuarios) van a ``default``. Sin réplicas configuradas el
+enrutador no cambia nada.
+
+Consistencia:
+
+- Cada solicitud usa una sola réplica: la versión de las tablas
+  (gestion.versiones) y los datos cacheados con ella salen de la misma copia.
+- Dentro de una transacción, o después de escribir en la misma solicitud,
+  las lecturas van a la primaria.
+- Tras una solicitud que escribió, la cookie ``leer_primaria`` fija las
+  lecturas del navegador en la primaria durante
+  ``REPLICA_VENTANA_PRIMARIA`` segundos (más que el retraso de replicación),
+  así la redirección posterior a un alta o edición muestra el cambio.
+- Las cachés compartidas con clave versionada (gestion.cache,
+  gestion.ubicaciones) se llenan desde la primaria: lo que guardan lo leen
+  también las solicitudes fijadas en la primaria.
+"""
+
+import random
+from contextvars import ContextVar
+from functools import cache
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+COOKIE_PRIMARIA = 'leer_primaria'
+APP_ENRUTADA = 'gestion'
+
+# Estado de la solicitud en curso (valores por defecto fuera de solicitudes)
+_replica = ContextVar('gestion_replica', default=None)
+_fijada = ContextVar('gestion_primaria_fijada', default=False)
+_escribio = ContextVar('gestion_escribio', default=False)
+
+
+@cache
+def replicas():
+    """Alias de réplica definidos en ``DATABASES`` (los que empiezan con 'replica')."""
+    return tuple(alias for alias in settings.DATABASES if alias.startswith('replica'))
+
+
+class EnrutadorReplicas:
+    """Router de Django: lecturas de ``gestion`` a réplicas, escrituras a default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_ENRUTADA or not replicas():
+            return None
+        if _fijada.get() or _escribio.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == APP_ENRUTADA and replicas():
+            # Desde aquí la solicitud lee sus propias escrituras
+            _escribio.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas son copias de la primaria: las relaciones entre ellas son válidas
+        bases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema de las réplicas llega por replicación
+        if db in replicas():
+            return False
+        return None
+
+
+def _iniciar(request):
+    return (
+        _replica.set(random.choice(replicas()) if replicas() else None),
+        _fijada.set(bool(request.COOKIES.get(COOKIE_PRIMARIA))),
+        _escribio.set(False),
+    )
+
+
+def _terminar(respuesta):
+    if _escribio.get():
+        respuesta.set_cookie(
+            COOKIE_PRIMARIA, '1', max_age=settings.REPLICA_VENTANA_PRIMARIA,
+            httponly=True, samesite='Lax',
+        )
+    return respuesta
+
+
+def _restaurar(fichas):
+    for variable, ficha in zip((_replica, _fijada, _escribio), fichas):
+        variable.reset(ficha)
+
+
+@sync_and_async_middleware
+def lectura_primaria_middleware(get_response):
+    """Elige la réplica de cada solicitud y aplica la cookie ``leer_primaria``.
+
+    Args:
+        get_response (Callable): Siguiente capa (sync o async).
+
+    Returns:
+        Callable: Middleware del mismo tipo que ``get_response``.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            fichas = _iniciar(request)
+            try:
+                return _terminar(await get_response(request))
+            finally:
+                _restaurar(fichas)
+    else:
+        def middleware(request):
+            fichas = _iniciar(request)
+            try:
+                return _terminar(get_response(request))
+            finally:
+                _restaurar(fichas)
+    return middleware
@@ -0,0 +1,55 @@
+"""Almacenamiento de archivos estáticos con hash y versiones precomprimidas.
+
+``collectstatic`` con ManifestComprimido escribe, además de los archivos con
+hash de ManifestStaticFilesStorage, un ``.gz`` (y un ``.br`` si el paquete
+opcional ``brotli`` está instalado) de cada archivo de texto. El servidor web
+los entrega sin comprimir en cada solicitud (nginx: ``gzip_static on;`` y
+``brotli_static on;``).
+"""
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli sólo se generan los .gz
+    brotli = None
+
+# Extensiones que vale la pena comprimir (imágenes y fuentes woff ya lo están)
+EXTENSIONES_COMPRIMIBLES = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.eot'}
+# Por debajo de este tamaño el ahorro no compensa la solicitud adicional al disco
+TAMANO_MINIMO = 256
+
+
+class ManifestComprimido(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage que además precomprime con gzip y brotli."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for nombre in sorted(set(self.hashed_files.values())):
+            yield from self._comprimir(nombre)
+
+    def _comprimir(self, nombre):
+        if os.path.splitext(nombre)[1].lower() not in EXTENSIONES_COMPRIMIBLES:
+            return
+        with self.open(nombre) as archivo:
+            contenido = archivo.read()
+        if len(contenido) < TAMANO_MINIMO:
+            return
+        # mtime=0: la misma entrada produce el mismo .gz en cada despliegue
+        variantes = [('.gz', gzip.compress(contenido, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variantes.append(('.br', brotli.compress(contenido, quality=11)))
+        for sufijo, comprimido in variantes:
+            if len(comprimido) >= len(contenido):
+                continue
+            destino = nombre + sufijo
+            if self.exists(destino):
+                self.delete(destino)
+            self._save(destino, ContentFile(comprimido))
+            yield nombre, destino, True
@@ -0,0 +1,128 @@
+"""Exportación en streaming de movimientos de carga (CSV y JSON Lines).
+
+Las filas se leen como tuplas con ``values_list`` (sin instanciar modelos)
+en lotes por cursor sobre ``(fecha_hora, id)``. Se usa keyset en lugar de
+``.iterator()`` porque los drivers de MySQL cargan el resultado completo en
+memoria del cliente; así la memoria se mantiene constante sin importar
+cuántas filas se exporten y cada lote es una lectura acotada del índice.
+"""
+
+import csv
+import io
+import json
+
+from . import ubicaciones
+from .paginacion import filtro_keyset
+
+# Filas leídas por consulta durante la exportación
+TAMANO_LOTE_EXPORTACION = 5000
+
+# Encabezado y columnas (values_list) de la exportación
+COLUMNAS_EXPORTACION = [
+    ('id', 'id'),
+    ('patente', 'vehiculo__patente'),
+    ('tipo_movimiento', 'tipo_movimiento'),
+    ('fecha_hora', 'fecha_hora'),
+    ('origen', 'origen_id'),
+    ('destino', 'destino_id'),
+    ('descripcion', 'descripcion'),
+]
+
+ORDEN_EXPORTACION = ['-fecha_hora', '-id']
+
+
+def iterar_lotes(queryset, columnas, orden=ORDEN_EXPORTACION, tamano_lote=TAMANO_LOTE_EXPORTACION):
+    """Recorre ``queryset`` en lotes de tuplas usando paginación por cursor.
+
+    Args:
+        queryset (QuerySet): Consulta base (con filtros aplicados).
+        columnas (list[str]): Campos para ``values_list``; deben incluir los
+            campos de ``orden``.
+        orden (list[str]): Ordenamiento total usado como clave del cursor.
+        tamano_lote (int): Filas por consulta.
+
+    Yields:
+        list[tuple]: Lotes de hasta ``tamano_lote`` filas.
+    """
+    campos = [c.lstrip('-') for c in orden]
+    descendentes = [c.startswith('-') for c in orden]
+    posiciones = [columnas.index(c) for c in campos]
+    base = queryset.order_by(*orden).values_list(*columnas)
+    valores = None
+    while True:
+        qs = base
+        if valores is not None:
+            qs = qs.filter(filtro_keyset(campos, descendentes, valores, False))
+        lote = list(qs[:tamano_lote])
+        if not lote:
+            return
+        yield lote
+        if len(lote) < tamano_lote:
+            return
+        ultimo = lote[-1]
+        valores = [ultimo[p] for p in posiciones]
+
+
+def _filas_exportacion(queryset, tamano_lote):
+    columnas = [c for _, c in COLUMNAS_EXPORTACION]
+    posicion_fecha = columnas.index('fecha_hora')
+    # Los lugares se leen como ids y se traducen con la tabla en caché (sin JOIN)
+    posiciones_lugar = [columnas.index('origen_id'), columnas.index('destino_id')]
+    for lote in iterar_lotes(queryset, columnas, tamano_lote=tamano_lote):
+        lugares = ubicaciones.nombres()
+        for fila in lote:
+            fila = list(fila)
+            fila[posicion_fecha] = fila[posicion_fecha].isoformat()
+            for posicion in posiciones_lugar:
+                fila[posicion] = lugares.get(fila[posicion], '')
+            yield fila
+
+
+def exportar_csv(queryset, tamano_lote=TAMANO_LOTE_EXPORTACION):
+    """Genera el contenido CSV por bloques (un bloque por lote de BD).
+
+    Args:
+        queryset (QuerySet): Movimientos a exportar.
+        tamano_lote (int): Filas por consulta y por bloque generado.
+
+    Yields:
+        str: Encabezado y luego bloques de líneas CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([nombre for nombre, _ in COLUMNAS_EXPORTACION])
+    yield buffer.getvalue()
+    filas = _filas_exportacion(queryset, tamano_lote)
+    while True:
+        buffer.seek(0)
+        buffer.truncate()
+        escritas = 0
+        for fila in filas:
+            writer.writerow(fila)
+            escritas += 1
+            if escritas == tamano_lote:
+                break
+        if not escritas:
+            return
+        yield buffer.getvalue()
+
+
+def exportar_jsonl(queryset, tamano_lote=TAMANO_LOTE_EXPORTACION):
+    """Genera el contenido JSON Lines (un objeto por movimiento).
+
+    Args:
+        queryset (QuerySet): Movimientos a exportar.
+        tamano_lote (int): Filas por consulta y por bloque generado.
+
+    Yields:
+        str: Bloques de líneas JSON.
+    """
+    nombres = [nombre for nombre, _ in COLUMNAS_EXPORTACION]
+    bloque = []
+    for fila in _filas_exportacion(queryset, tamano_lote):
+        bloque.append(json.dumps(dict(zip(nombres, fila)), ensure_ascii=False))
+        if len(bloque) == tamano_lote:
+            yield '\n'.join(bloque) + '\n'
+            bloque = []
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
@@ -4,16 +4,23 @@ Este módulo contiene formularios personalizados para:
 - Autenticación con estilos Bootstrap personalizados
 - CRUD de vehículos con validaciones de patente y año
 - CRUD de movimientos de carga con validación de fechas
+- Filtros del listado de movimientos servidos por índices
+- Carga de archivos CSV para importación masiva
 
 Todos los formularios incluyen validaciones de negocio personalizadas.
 """
 
 from django import forms
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+import datetime
 import re
 
-from .models import Vehiculo, MovimientoCarga
+from . import ubicaciones
+from .models import Vehiculo, MovimientoCarga, Ubicacion
+from .cache import aid_por_patente, id_por_patente
+from .widgets import UbicacionWidget, VehiculoAutocompleteWidget
 from django.contrib.auth.forms import AuthenticationForm
 
 
@@ -45,6 +52,20 @@ class CustomAuthForm(AuthenticationForm):
 # Regex para validar 4 letras + 2 números
 PATENTE_REGEX = re.compile(r'^[A-Z]{4}[0-9]{2}$')
 
+MENSAJE_PATENTE_DUPLICADA = "Ya existe un vehículo con esa patente."
+
+
+def patentes_existentes(patentes):
+    """Devuelve cuáles de las patentes ya están registradas (una sola consulta).
+    
+    Args:
+        patentes (Iterable[str]): Patentes normalizadas en mayúsculas.
+        
+    Returns:
+        set[str]: Subconjunto de patentes que ya existen en BD.
+    """
+    return set(Vehiculo.objects.filter(patente__in=set(patentes)).values_list('patente', flat=True))
+
 class VehiculoForm(forms.ModelForm):
     """Formulario CRUD para vehículos con validaciones personalizadas.
     
@@ -52,6 +73,12 @@ class VehiculoForm(forms.ModelForm):
     - Patente: formato chileno (AAAA11) y unicidad en BD
     - Año: rango 1900 a año actual + 1
     
+    Con ``verificar_unicidad=False`` se omiten las consultas previas de
+    unicidad (clean_patente y validate_unique) y se confía en el índice único:
+    si el INSERT/UPDATE falla por IntegrityError, save() agrega el mismo error
+    al campo patente y devuelve None. Pensado para flujos masivos o de API,
+    donde la consulta previa duplica los viajes a la BD por vehículo.
+    
     Attributes:
         Meta.model: Modelo Vehiculo
         Meta.fields: patente, marca, modelo, tipo, año
@@ -75,6 +102,10 @@ class VehiculoForm(forms.ModelForm):
             'año': 'Año',
         }
 
+    def __init__(self, *args, verificar_unicidad=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.verificar_unicidad = verificar_unicidad
+
     def clean_patente(self):
         """Valida que la patente tenga formato correcto y sea única.
         
@@ -93,14 +124,64 @@ class VehiculoForm(forms.ModelForm):
             raise ValidationError("Formato inválido: debe ser 4 letras + 2 números, ejemplo ABCD12.")
 
         # Verificar duplicado (más amigable que dejar el error de DB)
-        qs = Vehiculo.objects.filter(patente=p)
-        if self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
-            raise ValidationError("Ya existe un vehículo con esa patente.")
+        if self.verificar_unicidad:
+            qs = Vehiculo.objects.filter(patente=p)
+            if self.instance.pk:
+                qs = qs.exclude(pk=self.instance.pk)
+            if qs.exists():
+                raise ValidationError(MENSAJE_PATENTE_DUPLICADA)
 
         return p
 
+    def validate_unique(self):
+        """Omite la consulta de unicidad del modelo si se confía en el índice."""
+        if self.verificar_unicidad:
+            super().validate_unique()
+
+    def save(self, commit=True):
+        """Guarda el vehículo; sin verificación previa, traduce el IntegrityError.
+        
+        Returns:
+            Vehiculo | None: Instancia guardada, o None si la patente ya existía
+            (en ese caso el error queda en ``form.errors['patente']``).
+        """
+        if self.verificar_unicidad or not commit:
+            return super().save(commit)
+        try:
+            if transaction.get_connection().in_atomic_block:
+                # Dentro de una transacción, el savepoint la mantiene utilizable
+                with transaction.atomic():
+                    return super().save(commit)
+            return super().save(commit)
+        except IntegrityError:
+            self.add_error('patente', MENSAJE_PATENTE_DUPLICADA)
+            return None
+
+    @classmethod
+    def validar_lote(cls, datos):
+        """Valida muchos vehículos verificando la unicidad con una sola consulta.
+        
+        Cada formulario se valida sin consultas de unicidad; luego se consultan
+        en un único IN las patentes válidas del lote y se marcan como error las
+        que ya existen o que vienen repetidas dentro del mismo lote.
+        
+        Args:
+            datos (list[dict]): Datos de cada vehículo (como request.POST).
+            
+        Returns:
+            list[VehiculoForm]: Formularios validados, en el mismo orden.
+        """
+        formularios = [cls(d, verificar_unicidad=False) for d in datos]
+        validos = [f for f in formularios if f.is_valid()]
+        patentes = [f.cleaned_data['patente'] for f in validos]
+        existentes = patentes_existentes(patentes)
+        vistas = set()
+        for formulario, patente in zip(validos, patentes):
+            if patente in existentes or patente in vistas:
+                formulario.add_error('patente', MENSAJE_PATENTE_DUPLICADA)
+            vistas.add(patente)
+        return formularios
+
     def clean_año(self):
         """Valida que el año sea un valor razonable.
         
@@ -123,34 +204,68 @@ class VehiculoForm(forms.ModelForm):
         return anio_int
 
 
+class UbicacionField(forms.CharField):
+    """Ubicación escrita como texto y guardada como FK a Ubicacion.
+
+    Limpia a una Ubicacion (o None si viene vacío). Los nombres conocidos se
+    traducen con la tabla en caché; uno nuevo queda como Ubicacion sin
+    guardar y se registra en MovimientoForm.save().
+    """
+    widget = UbicacionWidget
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 100)
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        # El valor inicial de un ModelForm es el id de la FK
+        if isinstance(value, int):
+            return ubicaciones.nombre_por_id(value)
+        return value
+
+    def clean(self, value):
+        nombre = super().clean(value)
+        if not nombre:
+            return None
+        return Ubicacion(pk=ubicaciones.id_por_nombre(nombre), nombre=nombre)
+
+    def has_changed(self, initial, data):
+        return str(self.prepare_value(initial) or '') != (data or '').strip()
+
+
 class MovimientoForm(forms.ModelForm):
     """Formulario CRUD para movimientos de carga con validación temporal.
     
     Valida:
     - Fecha/hora: no puede ser en el futuro (validación de negocio)
     
+    El vehículo se elige con un autocompletado por patente
+    (VehiculoAutocompleteWidget) que sólo envía el id seleccionado, en lugar
+    de un select con toda la flota. Origen y destino se escriben como texto
+    con sugerencias (UbicacionField) y se guardan como ids de Ubicacion.
+    
     Attributes:
         Meta.model: Modelo MovimientoCarga
         Meta.fields: vehiculo, tipo_movimiento, fecha_hora, origen, destino, descripcion
     """
+    origen = UbicacionField(label='Origen', widget=UbicacionWidget(attrs={'class': 'form-control'}))
+    destino = UbicacionField(label='Destino', widget=UbicacionWidget(attrs={'class': 'form-control'}))
+
     class Meta:
         model = MovimientoCarga
         fields = ['vehiculo', 'tipo_movimiento', 'fecha_hora', 'origen', 'destino', 'descripcion']
         widgets = {
-            'vehiculo': forms.Select(attrs={'class': 'form-select'}),
+            'vehiculo': VehiculoAutocompleteWidget(attrs={'class': 'form-control'}),
             'tipo_movimiento': forms.Select(attrs={'class': 'form-select'}),
             # datetime-local requiere que el valor que se pase esté en el formato adecuado desde la vista/template.
             'fecha_hora': forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
-            'origen': forms.TextInput(attrs={'class': 'form-control'}),
-            'destino': forms.TextInput(attrs={'class': 'form-control'}),
             'descripcion': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
         labels = {
             'vehiculo': 'Vehículo',
             'tipo_movimiento': 'Tipo de movimiento',
             'fecha_hora': 'Fecha y hora',
-            'origen': 'Origen',
-            'destino': 'Destino',
             'descripcion': 'Descripción',
         }
 
@@ -170,3 +285,167 @@ class MovimientoForm(forms.ModelForm):
         if fecha > timezone.now():
             raise ValidationError("La fecha no puede ser futura.")
         return fecha
+
+    def _get_validation_exclusions(self):
+        # Las ubicaciones ya salen de la tabla en caché (invalidada al crear o
+        # eliminar una): se omite la consulta de existencia de cada FK
+        return super()._get_validation_exclusions() | {'origen', 'destino'}
+
+    def save(self, commit=True):
+        """Registra las ubicaciones nuevas y guarda el movimiento."""
+        nuevas = [
+            ubicacion for ubicacion in (self.cleaned_data.get('origen'), self.cleaned_data.get('destino'))
+            if ubicacion is not None and ubicacion.pk is None
+        ]
+        if nuevas:
+            ids = ubicaciones.resolver(ubicacion.nombre for ubicacion in nuevas)
+            for ubicacion in nuevas:
+                ubicacion.pk = ids[ubicacion.nombre]
+        return super().save(commit)
+
+
+class MovimientoFiltroForm(forms.Form):
+    """Formulario GET con los filtros del listado de movimientos.
+    
+    Cada filtro se traduce a una condición servida por un índice:
+    - Patente: id desde la caché de vehículos + (vehiculo_id, fecha_hora)
+    - Rango de fechas: (fecha_hora, id)
+    - Tipo: (tipo_movimiento, fecha_hora), comparación exacta
+    - Origen, destino: nombre → id desde la caché de ubicaciones +
+      (origen_id|destino_id, fecha_hora)
+    - Texto: FULLTEXT (MySQL) / FTS5 (SQLite) sobre descripcion
+    """
+    patente = forms.CharField(
+        required=False, max_length=6, label='Patente',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'ABCD12'}),
+    )
+    desde = forms.DateField(
+        required=False, label='Desde',
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    hasta = forms.DateField(
+        required=False, label='Hasta',
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    tipo_movimiento = forms.ChoiceField(
+        required=False, label='Tipo',
+        choices=[('', 'Todos')] + MovimientoCarga.MOVIMIENTO_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    origen = forms.CharField(
+        required=False, max_length=100, label='Origen',
+        widget=UbicacionWidget(attrs={'class': 'form-control'}),
+    )
+    destino = forms.CharField(
+        required=False, max_length=100, label='Destino',
+        widget=UbicacionWidget(attrs={'class': 'form-control'}),
+    )
+    q = forms.CharField(
+        required=False, max_length=200, label='Descripción',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Buscar texto'}),
+    )
+
+    def clean_patente(self):
+        """Normaliza la patente a mayúsculas (tal como se guarda en BD)."""
+        return self.cleaned_data.get('patente', '').strip().upper()
+
+    def clean(self):
+        """Valida que el rango de fechas sea coherente.
+        
+        Raises:
+            ValidationError: Si 'desde' es posterior a 'hasta'.
+        """
+        cleaned = super().clean()
+        desde, hasta = cleaned.get('desde'), cleaned.get('hasta')
+        if desde and hasta and desde > hasta:
+            raise ValidationError("La fecha 'desde' no puede ser posterior a 'hasta'.")
+        return cleaned
+
+    def filtrar(self, queryset):
+        """Aplica los filtros válidos al queryset de movimientos.
+        
+        Si el formulario no es válido se devuelve el queryset sin filtrar.
+        
+        Args:
+            queryset (QuerySet): Consulta base de MovimientoCarga.
+            
+        Returns:
+            QuerySet: Consulta con los filtros aplicados.
+        """
+        if not self.is_valid():
+            return queryset
+        patente = self.cleaned_data['patente']
+        vehiculo_id = id_por_patente(patente) if PATENTE_REGEX.match(patente) else None
+        lugares = {campo: ubicaciones.id_por_nombre(self.cleaned_data[campo]) for campo in ('origen', 'destino')}
+        return self._aplicar(queryset, vehiculo_id, lugares)
+
+    async def afiltrar(self, queryset):
+        """Versión async de filtrar para vistas ASGI.
+        
+        La patente se traduce a id sin bloquear el bucle de eventos; el resto
+        de los filtros no consulta la base hasta evaluar el queryset.
+        """
+        if not self.is_valid():
+            return queryset
+        patente = self.cleaned_data['patente']
+        vehiculo_id = await aid_por_patente(patente) if PATENTE_REGEX.match(patente) else None
+        lugares = {
+            campo: await ubicaciones.aid_por_nombre(self.cleaned_data[campo]) for campo in ('origen', 'destino')
+        }
+        return self._aplicar(queryset, vehiculo_id, lugares)
+
+    async def acargar_lugares(self):
+        """Lee las sugerencias de origen y destino antes del render.
+
+        El render de la plantilla es síncrono: si la versión de las
+        ubicaciones cambiara antes de renderizar, UbicacionWidget consultaría
+        la base dentro del bucle de eventos (SynchronousOnlyOperation).
+        """
+        lugares = list((await ubicaciones.anombres()).values())
+        for campo in ('origen', 'destino'):
+            self.fields[campo].widget.opciones = lugares
+
+    def _aplicar(self, queryset, vehiculo_id, lugares):
+        datos = self.cleaned_data
+        if datos['patente']:
+            if vehiculo_id is None:
+                return queryset.none()
+            queryset = queryset.filter(vehiculo_id=vehiculo_id)
+        if datos['desde']:
+            inicio = datetime.datetime.combine(datos['desde'], datetime.time.min)
+            queryset = queryset.filter(fecha_hora__gte=timezone.make_aware(inicio))
+        if datos['hasta']:
+            fin = datetime.datetime.combine(datos['hasta'] + datetime.timedelta(days=1), datetime.time.min)
+            queryset = queryset.filter(fecha_hora__lt=timezone.make_aware(fin))
+        if datos['tipo_movimiento']:
+            queryset = queryset.filter(tipo_movimiento=datos['tipo_movimiento'])
+        for campo, ubicacion_id in lugares.items():
+            if datos[campo].strip():
+                if ubicacion_id is None:
+                    return queryset.none()
+                queryset = queryset.filter(**{f'{campo}_id': ubicacion_id})
+        if datos['q'].strip():
+            # El archivo (MovimientoArchivado) no tiene índice de texto: LIKE
+            if queryset.model._meta.get_field('descripcion').get_lookup('busqueda'):
+                queryset = queryset.filter(descripcion__busqueda=datos['q'])
+            else:
+                queryset = queryset.filter(descripcion__icontains=datos['q'].strip())
+        return queryset
+
+
+class ImportacionForm(forms.Form):
+    """Formulario de carga de un CSV para importación masiva.
+    
+    Attributes:
+        tipo: Qué se importa (vehículos o movimientos).
+        archivo: Archivo CSV con encabezado.
+    """
+    tipo = forms.ChoiceField(
+        label='Importar',
+        choices=[('vehiculos', 'Vehículos'), ('movimientos', 'Movimientos de carga')],
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    archivo = forms.FileField(
+        label='Archivo CSV',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
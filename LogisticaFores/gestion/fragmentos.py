@@ -0,0 +1,146 @@
+"""Renderizado rápido y caché por página de las tablas de los listados.
+
+Las filas de ``vehiculos/list.html`` y ``movimientos/list.html`` no se
+recorren con ``{% for %}``: cada plantilla de fila (``*/fila.html``) se
+compila una vez a una cadena de formato y se llena con las tuplas de
+``values_list``. Cada valor pasa por ``render_value_in_context``, la misma
+función que usa ``{{ variable }}``, así el escape, la zona horaria y el
+formato de fechas y números son idénticos a los del motor de plantillas.
+
+El HTML de las filas y los cursores de cada página se guardan en la caché
+(``CACHES['default']``) con una clave que incluye la versión de las tablas
+involucradas (gestion.versiones). Cualquier alta, edición o baja incrementa
+la versión y deja obsoletas las páginas cacheadas sin borrarlas una a una.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from functools import cache as memorizar
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.template import Context
+from django.template.base import TextNode, VariableNode, render_value_in_context
+from django.template.loader import get_template
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
+
+from . import versiones
+
+# Tiempo de vida de las páginas cacheadas (la invalidación real la hace la versión)
+TTL_FRAGMENTO = 10 * 60
+# Sangría de las filas dentro de <tbody> en las plantillas de listado
+SANGRIA_FILAS = ' ' * 8
+
+
+class RenderizadorFilas:
+    """Plantilla de fila compilada a una cadena de formato.
+
+    La plantilla sólo puede contener texto y variables sin filtros de la
+    forma ``{{ x.campo }}`` o ``{{ x.relacion.campo }}``; cada variable se
+    convierte en una columna de ``values_list`` (``campo`` o
+    ``relacion__campo``). Como en la plantilla, un campo de una relación
+    nula (``None`` en la columna ``relacion__campo``) se muestra vacío.
+
+    Attributes:
+        columnas (tuple[str]): Columnas a pedir a ``values_list``, en el
+            orden en que se pasan al formato.
+    """
+
+    def __init__(self, nombre_plantilla, sangria=SANGRIA_FILAS):
+        nodos = get_template(nombre_plantilla).template.nodelist
+        columnas, partes = [], []
+        for nodo in nodos:
+            if isinstance(nodo, TextNode):
+                partes.append(nodo.s.replace('{', '{{').replace('}', '}}'))
+                continue
+            variable = getattr(nodo, 'filter_expression', None)
+            lookups = getattr(getattr(variable, 'var', None), 'lookups', None)
+            if not isinstance(nodo, VariableNode) or variable.filters or not lookups or len(lookups) < 2:
+                raise ImproperlyConfigured(
+                    f"{nombre_plantilla}: sólo se admiten texto y variables sin filtros ({nodo!r})."
+                )
+            columna = '__'.join(lookups[1:])
+            if columna not in columnas:
+                columnas.append(columna)
+            partes.append(f'{{{columnas.index(columna)}}}')
+        # Cada fila ocupa lo mismo que una vuelta de {% for %} en el listado
+        self.formato = f'\n{sangria}' + ''.join(partes).rstrip('\n') + f'\n{sangria}'
+        self.columnas = tuple(columnas)
+        self._relaciones = frozenset(i for i, columna in enumerate(columnas) if '__' in columna)
+
+    def renderizar(self, filas):
+        """Devuelve el HTML de las filas.
+
+        Args:
+            filas (Iterable[tuple]): Tuplas con al menos las ``columnas``, en
+                ese orden (las posiciones sobrantes se ignoran).
+
+        Returns:
+            SafeString: Filas concatenadas; cadena vacía si no hay filas.
+        """
+        contexto = Context(autoescape=True)
+        formato = self.formato.format
+        columnas = range(len(self.columnas))
+        relaciones = self._relaciones
+        return mark_safe(''.join(
+            formato(*[
+                '' if fila[i] is None and i in relaciones else render_value_in_context(fila[i], contexto)
+                for i in columnas
+            ])
+            for fila in filas
+        ))
+
+
+@memorizar
+def renderizador(nombre_plantilla):
+    """RenderizadorFilas compilado una sola vez por plantilla y proceso."""
+    return RenderizadorFilas(nombre_plantilla)
+
+
+@dataclass
+class FragmentoPagina:
+    """Página de un listado lista para insertar en la plantilla.
+
+    Attributes:
+        filas (str): HTML de las filas (vacío si la página no tiene registros).
+        siguiente (str | None): Cursor de la página siguiente.
+        anterior (str | None): Cursor de la página anterior.
+    """
+    filas: str
+    siguiente: str | None = None
+    anterior: str | None = None
+
+
+def _clave_fragmento(nombre, request, numeros_version):
+    # El formato de fechas depende del idioma y la zona horaria activos
+    parametros = sorted(request.GET.lists())
+    huella = hashlib.sha1(repr(parametros).encode()).hexdigest()
+    version = '.'.join(str(n) for n in numeros_version)
+    return (
+        f'gestion:fragmento:{nombre}:{version}:{translation.get_language()}:'
+        f'{timezone.get_current_timezone_name()}:{huella}'
+    )
+
+
+async def afragmento_pagina(nombre, request, tablas, calcular):
+    """Devuelve la página cacheada del listado o la calcula y la guarda.
+
+    Args:
+        nombre (str): Nombre del listado (parte de la clave).
+        request (HttpRequest): Solicitud; sus parámetros GET (filtros, cursor,
+            tamaño) forman parte de la clave.
+        tablas (list[str]): Tablas de gestion.versiones de las que dependen las filas.
+        calcular (Callable[[], Awaitable[FragmentoPagina]]): Consulta y
+            renderiza la página si no está en la caché.
+
+    Returns:
+        FragmentoPagina: Página del listado.
+    """
+    clave = _clave_fragmento(nombre, request, await versiones.aobtener_varias(tablas))
+    fragmento = await cache.aget(clave)
+    if fragmento is None:
+        fragmento = await calcular()
+        await cache.aset(clave, fragmento, TTL_FRAGMENTO)
+    fragmento.filas = mark_safe(fragmento.filas)
+    return fragmento
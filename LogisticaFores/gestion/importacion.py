@@ -0,0 +1,300 @@
+"""Importación masiva de vehículos y movimientos desde archivos CSV.
+
+El archivo se lee en streaming y se procesa por lotes: las validaciones de
+negocio (formato de patente, año, fecha no futura, tipo) se aplican a todas
+las filas del lote de una vez, los vehículos se resuelven con un único
+``in_bulk`` por lote, los lugares de origen y destino con la tabla de
+ubicaciones en caché (registrando los nuevos) y las filas válidas se insertan con ``bulk_create``
+dentro de una transacción por lote. Si el insert choca con una escritura
+concurrente (``IntegrityError``), el lote se revierte, se vuelve a validar y
+las filas en conflicto se informan como rechazadas. Las filas rechazadas se
+informan con su número de línea y el motivo.
+
+Formatos (con encabezado):
+- Vehículos: patente, marca, modelo, tipo, año
+- Movimientos: patente, tipo_movimiento, fecha_hora, origen, destino, descripcion
+  (mismas columnas que la exportación; la columna ``id`` se ignora si viene)
+"""
+
+import csv
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import resumen, ubicaciones, versiones
+from .cache import invalidar_vehiculos
+from .forms import PATENTE_REGEX, patentes_existentes
+from .models import Vehiculo, MovimientoCarga, SolicitudIdempotente
+
+# Filas validadas e insertadas por lote
+TAMANO_LOTE_IMPORTACION = 1000
+
+COLUMNAS_VEHICULOS = ['patente', 'marca', 'modelo', 'tipo', 'año']
+COLUMNAS_MOVIMIENTOS = ['patente', 'tipo_movimiento', 'fecha_hora', 'origen', 'destino', 'descripcion']
+
+
+@dataclass
+class ResultadoImportacion:
+    """Resumen de una importación.
+
+    Attributes:
+        creados (int): Filas insertadas.
+        rechazados (list[tuple[int, str]]): Pares (línea del archivo, motivo).
+    """
+    creados: int = 0
+    rechazados: list = field(default_factory=list)
+
+
+def leer_csv(archivo, columnas):
+    """Lee un CSV en streaming y valida que tenga las columnas requeridas.
+
+    Args:
+        archivo (TextIO): Archivo de texto abierto.
+        columnas (list[str]): Columnas obligatorias del encabezado.
+
+    Yields:
+        tuple[int, dict]: Número de línea y fila como diccionario.
+
+    Raises:
+        ValueError: Si faltan columnas en el encabezado.
+    """
+    lector = csv.DictReader(archivo)
+    faltantes = [c for c in columnas if c not in (lector.fieldnames or [])]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el encabezado: {', '.join(faltantes)}.")
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def _lotes(filas, tamano):
+    iterador = iter(filas)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _texto(fila, columna):
+    valor = fila.get(columna)
+    return '' if valor is None else str(valor).strip()
+
+
+def _validar_vehiculos(lote):
+    """Valida un lote de filas de vehículos.
+
+    Returns:
+        tuple[list[Vehiculo], list[tuple[int, str]]]: Válidos y rechazados.
+    """
+    tipos = {clave for clave, _ in Vehiculo.TIPO_CHOICES}
+    anio_max = timezone.now().year + 1
+    patentes = [_texto(f, 'patente').upper() for _, f in lote]
+    existentes = patentes_existentes(patentes)
+
+    validos, rechazados, vistas = [], [], set()
+    for (linea, fila), patente in zip(lote, patentes):
+        anio = _texto(fila, 'año')
+        tipo = _texto(fila, 'tipo').upper()
+        if not PATENTE_REGEX.match(patente):
+            rechazados.append((linea, f"Patente con formato inválido: '{patente}'."))
+        elif patente in existentes or patente in vistas:
+            rechazados.append((linea, f"Ya existe un vehículo con la patente {patente}."))
+        elif tipo not in tipos:
+            rechazados.append((linea, f"Tipo de vehículo inválido: '{tipo}'."))
+        elif not anio.isdigit() or not 1900 <= int(anio) <= anio_max:
+            rechazados.append((linea, f"Año inválido. Debe estar entre 1900 y {anio_max}."))
+        else:
+            vistas.add(patente)
+            validos.append(Vehiculo(
+                patente=patente,
+                marca=_texto(fila, 'marca')[:50],
+                modelo=_texto(fila, 'modelo')[:50],
+                tipo=tipo,
+                año=int(anio),
+            ))
+    return validos, rechazados
+
+
+def _validar_movimientos(lote):
+    """Valida un lote de filas de movimientos.
+
+    Returns:
+        tuple[list[MovimientoCarga], list[tuple[int, str]]]: Válidos y rechazados.
+    """
+    tipos = {clave for clave, _ in MovimientoCarga.MOVIMIENTO_CHOICES}
+    ahora = timezone.now()
+    patentes = [_texto(f, 'patente').upper() for _, f in lote]
+    vehiculos = Vehiculo.objects.in_bulk(
+        {p for p in patentes if PATENTE_REGEX.match(p)}, field_name='patente'
+    )
+
+    validos, rechazados, lugares = [], [], []
+    for (linea, fila), patente in zip(lote, patentes):
+        tipo = _texto(fila, 'tipo_movimiento').upper()
+        try:
+            fecha = parse_datetime(_texto(fila, 'fecha_hora'))
+        except ValueError:
+            fecha = None
+        if fecha is not None and timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+
+        if patente not in vehiculos:
+            rechazados.append((linea, f"No existe un vehículo con la patente '{patente}'."))
+        elif tipo not in tipos:
+            rechazados.append((linea, f"Tipo de movimiento inválido: '{tipo}'."))
+        elif fecha is None:
+            rechazados.append((linea, "Fecha y hora inválida (use formato ISO 8601)."))
+        elif fecha > ahora:
+            rechazados.append((linea, "La fecha no puede ser futura."))
+        else:
+            validos.append(MovimientoCarga(
+                vehiculo=vehiculos[patente],
+                tipo_movimiento=tipo,
+                fecha_hora=fecha,
+                descripcion=str(fila.get('descripcion') or ''),
+            ))
+            lugares.append((_texto(fila, 'origen')[:100].strip(), _texto(fila, 'destino')[:100].strip()))
+
+    # Un solo paso por lote para traducir (y registrar) los lugares
+    ids = ubicaciones.resolver(nombre for par in lugares for nombre in par)
+    for movimiento, (origen, destino) in zip(validos, lugares):
+        movimiento.origen_id = ids.get(origen)
+        movimiento.destino_id = ids.get(destino)
+    return validos, rechazados
+
+
+def _insertar(validos, modelo, tamano_lote, despues_de_insertar):
+    if not validos:
+        return
+    with transaction.atomic():
+        modelo.objects.bulk_create(validos, batch_size=tamano_lote)
+        versiones.incrementar(modelo._meta.db_table)
+        if despues_de_insertar:
+            despues_de_insertar(validos)
+
+
+def _importar(filas, validar, modelo, tamano_lote, despues_de_insertar=None):
+    resultado = ResultadoImportacion()
+    for lote in _lotes(filas, tamano_lote):
+        validos, rechazados = validar(lote)
+        try:
+            _insertar(validos, modelo, tamano_lote, despues_de_insertar)
+        except IntegrityError:
+            # Otra escritura confirmó datos en conflicto (p. ej. la misma
+            # patente) entre la validación y el insert: el lote se revierte
+            # y se vuelve a validar contra el estado actual de la base.
+            validos, rechazados = validar(lote)
+            try:
+                _insertar(validos, modelo, tamano_lote, despues_de_insertar)
+            except IntegrityError:
+                informadas = {linea for linea, _ in rechazados}
+                rechazados += [
+                    (linea, "La fila entra en conflicto con datos registrados durante la importación.")
+                    for linea, _ in lote if linea not in informadas
+                ]
+                validos = []
+        resultado.rechazados.extend(rechazados)
+        resultado.creados += len(validos)
+    return resultado
+
+
+def importar_vehiculos(archivo, tamano_lote=TAMANO_LOTE_IMPORTACION):
+    """Importa vehículos desde un CSV.
+
+    Args:
+        archivo (TextIO): Archivo CSV abierto en modo texto.
+        tamano_lote (int): Filas validadas e insertadas por lote.
+
+    Returns:
+        ResultadoImportacion: Cantidad creada y filas rechazadas.
+
+    Raises:
+        ValueError: Si el encabezado no tiene las columnas requeridas.
+    """
+    filas = leer_csv(archivo, COLUMNAS_VEHICULOS)
+    resultado = _importar(filas, _validar_vehiculos, Vehiculo, tamano_lote)
+    # bulk_create no emite post_save: se invalida la caché explícitamente
+    if resultado.creados:
+        invalidar_vehiculos()
+    return resultado
+
+
+def importar_movimientos(archivo, tamano_lote=TAMANO_LOTE_IMPORTACION):
+    """Importa movimientos de carga desde un CSV.
+
+    Args:
+        archivo (TextIO): Archivo CSV abierto en modo texto.
+        tamano_lote (int): Filas validadas e insertadas por lote.
+
+    Returns:
+        ResultadoImportacion: Cantidad creada y filas rechazadas.
+
+    Raises:
+        ValueError: Si el encabezado no tiene las columnas requeridas.
+    """
+    return registrar_movimientos(leer_csv(archivo, COLUMNAS_MOVIMIENTOS), tamano_lote)
+
+
+def registrar_movimientos(filas, tamano_lote=TAMANO_LOTE_IMPORTACION):
+    """Valida e inserta movimientos ya leídos (CSV, JSON de la API, etc.).
+
+    Args:
+        filas (Iterable[tuple[int, dict]]): Pares (línea o índice, fila) con
+            las columnas de COLUMNAS_MOVIMIENTOS.
+        tamano_lote (int): Filas validadas e insertadas por lote.
+
+    Returns:
+        ResultadoImportacion: Cantidad creada y filas rechazadas.
+    """
+    # bulk_create no emite señales: el resumen se actualiza por lote
+    return _importar(
+        filas, _validar_movimientos, MovimientoCarga, tamano_lote,
+        despues_de_insertar=resumen.registrar_creados,
+    )
+
+
+def registrar_lote_idempotente(usuario_id, clave, huella, movimientos):
+    """Registra un lote de movimientos de la API una sola vez por clave.
+
+    El registro de la clave se crea en la misma transacción que los
+    movimientos: si la clave ya existe (reintento del cliente o reproceso de
+    la cola de ingesta) no se inserta nada y se devuelve el registro previo.
+
+    Args:
+        usuario_id (int): Usuario dueño de la clave.
+        clave (str): Clave de idempotencia; vacía para no registrarla.
+        huella (str): SHA-256 del cuerpo de la solicitud.
+        movimientos (list[dict]): Movimientos recibidos.
+
+    Returns:
+        tuple[dict, SolicitudIdempotente | None]: Respuesta (creados y
+        rechazados por índice) y el registro previo si la clave ya se usó.
+    """
+    with transaction.atomic():
+        if clave:
+            try:
+                # La restricción única serializa los reintentos concurrentes:
+                # el segundo espera a que el primero confirme o revierta.
+                with transaction.atomic():
+                    registro = SolicitudIdempotente.objects.create(
+                        usuario_id=usuario_id, clave=clave, huella=huella
+                    )
+            except IntegrityError:
+                previo = SolicitudIdempotente.objects.get(usuario_id=usuario_id, clave=clave)
+                return previo.respuesta, previo
+
+        resultado = registrar_movimientos(enumerate(movimientos), tamano_lote=len(movimientos))
+        datos = {
+            'creados': resultado.creados,
+            'rechazados': [{'indice': i, 'error': motivo} for i, motivo in resultado.rechazados],
+        }
+        if clave:
+            registro.respuesta = datos
+            registro.save(update_fields=['respuesta'])
+    return datos, None
+
+
+IMPORTADORES = {
+    'vehiculos': importar_vehiculos,
+    'movimientos': importar_movimientos,
+}
@@ -0,0 +1,32 @@
+"""Comando que refresca los agregados de movimientos (gestion.agregados).
+
+Recalcula sólo las horas con altas desde la marca de agua y las marcadas por
+ediciones o bajas. Pensado para cron (p. ej. cada 5 minutos); ``--completo``
+recalcula todo (primera carga tras la migración, o reparación).
+
+Uso:
+    python manage.py actualizar_agregados [--completo]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestion.agregados import refrescar
+
+
+class Command(BaseCommand):
+    help = "Recalcula los agregados por hora y día de las horas con movimientos nuevos o modificados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo', action='store_true',
+            help="Recalcula todas las horas, incluidas las del archivo.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        horas, dias = refrescar(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Agregados actualizados: {horas} horas y {dias} días en {time.perf_counter() - inicio:.1f} s."
+        ))
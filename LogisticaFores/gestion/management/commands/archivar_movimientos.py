@@ -0,0 +1,59 @@
+"""Comando que traslada los movimientos antiguos a la tabla de archivo.
+
+Conserva en movimiento_carga el mes en curso y los ``--meses`` anteriores;
+lo demás pasa a movimiento_archivado (ver gestion.archivo). Pensado para
+correr una vez al mes desde cron, después de ``particionar_movimientos``.
+
+Uso:
+    python manage.py archivar_movimientos [--meses 12] [--lote 5000] [--simular]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.archivo import TAMANO_LOTE_ARCHIVO, ArchivoIncompleto, archivar, corte
+from gestion.models import MovimientoCarga
+
+
+class Command(BaseCommand):
+    help = "Traslada al archivo los movimientos anteriores a los últimos --meses meses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=12,
+            help="Meses completos que se conservan además del actual (por defecto 12).",
+        )
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_ARCHIVO,
+            help=f"Movimientos copiados por transacción (por defecto {TAMANO_LOTE_ARCHIVO}).",
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help="Sólo informa cuántos movimientos se archivarían.",
+        )
+
+    def handle(self, *args, **options):
+        if options['meses'] < 0:
+            raise CommandError("--meses no puede ser negativo.")
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+
+        antes_de = corte(options['meses'])
+        if options['simular']:
+            cantidad = MovimientoCarga.objects.filter(fecha_hora__lt=antes_de).count()
+            self.stdout.write(f"Se archivarían {cantidad} movimientos anteriores a {antes_de:%Y-%m-%d}.")
+            return
+
+        inicio = time.perf_counter()
+        try:
+            total = archivar(
+                antes_de, options['lote'],
+                progreso=lambda archivados: self.stdout.write(f"  {archivados} archivados..."),
+            )
+        except ArchivoIncompleto as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} movimientos anteriores a {antes_de:%Y-%m-%d} archivados "
+            f"en {time.perf_counter() - inicio:.1f} s."
+        ))
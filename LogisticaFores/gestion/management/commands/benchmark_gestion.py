@@ -0,0 +1,257 @@
+"""Benchmark de las vistas de gestion con escenarios repetibles.
+
+Recorre escenarios de listado, alta, edición, eliminación y changelist del
+admin con el cliente de pruebas de Django (en el mismo proceso, contra la
+base configurada: SQLite local o MySQL) e informa por escenario latencia
+p50/p95/p99, consultas por solicitud y RSS pico del proceso. El resultado se
+guarda en JSON para comparar corridas entre commits.
+
+Conviene correrlo sobre una base dedicada con datos de
+``generar_datos_sinteticos`` (misma semilla entre corridas). Los movimientos
+que crea el escenario de alta se eliminan en el de eliminación.
+
+Uso:
+    python manage.py benchmark_gestion [--iteraciones 200] [--calentamiento 10] \\
+        [--escenarios lista_movimientos,crear_movimiento] [--sin-cache] \\
+        [--salida resultado.json] [--comparar anterior.json]
+"""
+
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+from collections import Counter
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.metricas import presupuesto_consultas
+from gestion.models import MovimientoCarga, Vehiculo
+from gestion.sinteticos import ESPECIES, PLANTAS, PREDIOS
+
+# Marca de los movimientos creados por el benchmark
+DESCRIPCION = 'benchmark_gestion'
+ESCENARIOS = [
+    'lista_vehiculos', 'lista_movimientos', 'filtro_movimientos', 'busqueda_movimientos',
+    'crear_movimiento', 'editar_movimiento', 'eliminar_movimiento', 'admin_movimientos', 'admin_vehiculos',
+]
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+def _rss_pico_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _commit():
+    try:
+        salida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5,
+        )
+    except OSError:
+        return None
+    return salida.stdout.strip() or None
+
+
+class _Solicitudes:
+    """Genera la solicitud (método, URL, datos) de cada iteración de un escenario."""
+
+    def __init__(self, azar, vehiculos):
+        self.azar = azar
+        self.vehiculos = vehiculos
+        self.creados = []
+
+    def _movimiento(self, descripcion=DESCRIPCION):
+        vehiculo_id, _ = self.azar.choice(self.vehiculos)
+        ingreso = self.azar.random() < 0.5
+        return {
+            'vehiculo': vehiculo_id,
+            'tipo_movimiento': 'INGRESO' if ingreso else 'SALIDA',
+            'fecha_hora': timezone.localtime().strftime('%Y-%m-%dT%H:%M'),
+            'origen': self.azar.choice(PREDIOS if ingreso else PLANTAS),
+            'destino': self.azar.choice(PLANTAS),
+            'descripcion': descripcion,
+        }
+
+    def lista_vehiculos(self, i):
+        return 'get', reverse('vehiculo_list'), {'n': self.azar.choice([25, 50, 100])}
+
+    def lista_movimientos(self, i):
+        return 'get', reverse('movimiento_list'), {'n': self.azar.choice([25, 50, 100])}
+
+    def filtro_movimientos(self, i):
+        return 'get', reverse('movimiento_list'), {'patente': self.azar.choice(self.vehiculos)[1]}
+
+    def busqueda_movimientos(self, i):
+        return 'get', reverse('movimiento_list'), {'q': self.azar.choice(ESPECIES).split()[-1]}
+
+    def crear_movimiento(self, i):
+        return 'post', reverse('movimiento_create'), self._movimiento()
+
+    def editar_movimiento(self, i):
+        return 'post', reverse('movimiento_update', args=[self.creados[i % len(self.creados)]]), self._movimiento()
+
+    def eliminar_movimiento(self, i):
+        return 'post', reverse('movimiento_delete', args=[self.creados.pop()]), {}
+
+    def admin_movimientos(self, i):
+        return 'get', reverse('admin:gestion_movimientocarga_changelist'), {'p': self.azar.randint(1, 5)}
+
+    def admin_vehiculos(self, i):
+        return 'get', reverse('admin:gestion_vehiculo_changelist'), {}
+
+
+class Command(BaseCommand):
+    help = "Mide latencia, consultas por solicitud y RSS de las vistas principales; guarda JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=200, help="Solicitudes medidas por escenario.")
+        parser.add_argument('--calentamiento', type=int, default=10, help="Solicitudes previas no medidas.")
+        parser.add_argument(
+            '--escenarios', default=','.join(ESCENARIOS),
+            help=f"Escenarios separados por coma (por defecto todos: {', '.join(ESCENARIOS)}).",
+        )
+        parser.add_argument('--usuario', help="Superusuario con el que se navega (por defecto el primero).")
+        parser.add_argument('--sin-cache', action='store_true', help="Vacía la caché antes de cada solicitud.")
+        parser.add_argument('--semilla', type=int, default=1, help="Semilla de los parámetros aleatorios.")
+        parser.add_argument('--salida', help="Archivo JSON donde guardar el resultado.")
+        parser.add_argument('--comparar', help="JSON de una corrida anterior para mostrar diferencias.")
+
+    def handle(self, *args, **options):
+        escenarios = [e.strip() for e in options['escenarios'].split(',') if e.strip()]
+        desconocidos = set(escenarios) - set(ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}.")
+        if options['iteraciones'] < 1 or options['calentamiento'] < 0:
+            raise CommandError("--iteraciones debe ser mayor que 0 y --calentamiento no negativo.")
+        anterior = None
+        if options['comparar']:
+            try:
+                anterior = json.loads(Path(options['comparar']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"No se pudo leer {options['comparar']}: {exc}")
+
+        usuarios = get_user_model().objects.filter(is_superuser=True, is_active=True)
+        if options['usuario']:
+            usuarios = usuarios.filter(username=options['usuario'])
+        usuario = usuarios.order_by('pk').first()
+        if usuario is None:
+            raise CommandError("Se necesita un superusuario activo (createsuperuser o --usuario).")
+        vehiculos = list(Vehiculo.objects.order_by().values_list('id', 'patente')[:5000])
+        if not vehiculos:
+            raise CommandError("No hay vehículos: ejecute antes generar_datos_sinteticos.")
+
+        cliente = Client()
+        cliente.force_login(usuario)
+        solicitudes = _Solicitudes(random.Random(options['semilla']), vehiculos)
+        resultado = {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'vehiculos': Vehiculo.objects.count(),
+            'movimientos': MovimientoCarga.objects.count(),
+            'iteraciones': options['iteraciones'],
+            'cache': not options['sin_cache'],
+            'escenarios': {},
+        }
+        # El cliente de pruebas usa el host 'testserver'
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            try:
+                for nombre in escenarios:
+                    resultado['escenarios'][nombre] = self._escenario(cliente, solicitudes, nombre, options)
+            finally:
+                # Los creados que no llegó a eliminar el escenario de eliminación
+                MovimientoCarga.objects.filter(descripcion=DESCRIPCION).delete()
+        resultado['rss_pico_mb'] = _rss_pico_mb()
+
+        self._imprimir(resultado, anterior)
+        if options['salida']:
+            Path(options['salida']).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(f"Resultado guardado en {options['salida']}.")
+
+    def _escenario(self, cliente, solicitudes, nombre, options):
+        generar = getattr(solicitudes, nombre)
+        total = options['calentamiento'] + options['iteraciones']
+        if nombre in ('editar_movimiento', 'eliminar_movimiento'):
+            # Opera sobre los movimientos creados por el benchmark (o los crea)
+            faltan = total - MovimientoCarga.objects.filter(descripcion=DESCRIPCION).count()
+            for _ in range(max(faltan, 0)):
+                cliente.post(reverse('movimiento_create'), solicitudes._movimiento())
+            solicitudes.creados = list(
+                MovimientoCarga.objects.filter(descripcion=DESCRIPCION).values_list('id', flat=True)
+            )
+
+        latencias, consultas, estados = [], [], Counter()
+        for i in range(total):
+            metodo, url, datos = generar(i)
+            if options['sin_cache']:
+                cache.clear()
+            with presupuesto_consultas(float('inf')) as medicion:
+                inicio = time.perf_counter()
+                respuesta = getattr(cliente, metodo)(url, datos)
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                duracion = time.perf_counter() - inicio
+            if i < options['calentamiento']:
+                continue
+            latencias.append(duracion)
+            consultas.append(medicion.consultas)
+            estados[respuesta.status_code] += 1
+
+        ordenadas = sorted(latencias)
+        return {
+            'p50_ms': round(_percentil(ordenadas, 50) * 1000, 2),
+            'p95_ms': round(_percentil(ordenadas, 95) * 1000, 2),
+            'p99_ms': round(_percentil(ordenadas, 99) * 1000, 2),
+            'media_ms': round(statistics.fmean(ordenadas) * 1000, 2),
+            'consultas_media': round(statistics.fmean(consultas), 2),
+            'consultas_max': max(consultas),
+            'estados': {str(codigo): cantidad for codigo, cantidad in sorted(estados.items())},
+            'rss_pico_mb': _rss_pico_mb(),
+        }
+
+    def _imprimir(self, resultado, anterior):
+        self.stdout.write(
+            f"{resultado['motor']} | {resultado['vehiculos']} vehículos | {resultado['movimientos']} movimientos | "
+            f"commit {resultado['commit'] or '-'} | caché {'sí' if resultado['cache'] else 'no'}"
+        )
+        self.stdout.write(
+            f"{'escenario':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}  estados"
+        )
+        previos = (anterior or {}).get('escenarios', {})
+        for nombre, datos in resultado['escenarios'].items():
+            linea = (
+                f"{nombre:<22}{datos['p50_ms']:>9}{datos['p95_ms']:>9}{datos['p99_ms']:>9}"
+                f"{datos['consultas_media']:>11}  {datos['estados']}"
+            )
+            previo = previos.get(nombre)
+            if previo and previo['p95_ms']:
+                cambio = (datos['p95_ms'] - previo['p95_ms']) / previo['p95_ms'] * 100
+                linea += (
+                    f"  | antes p95 {previo['p95_ms']} ms ({cambio:+.0f} %), "
+                    f"consultas {previo['consultas_media']}"
+                )
+            self.stdout.write(linea)
+        linea = f"RSS pico {resultado['rss_pico_mb']} MB"
+        if anterior:
+            linea += f" (antes {anterior.get('rss_pico_mb')} MB, commit {anterior.get('commit') or '-'})"
+        self.stdout.write(linea)
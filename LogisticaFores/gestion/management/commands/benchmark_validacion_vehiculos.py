@@ -0,0 +1,95 @@
+"""Benchmark de viajes a la BD por vehículo creado según el modo de validación.
+
+Compara:
+- ``interactivo``: VehiculoForm por defecto (consulta previa de unicidad).
+- ``indice``: VehiculoForm(verificar_unicidad=False), confía en el índice único.
+- ``lote``: VehiculoForm.validar_lote + bulk_create (una consulta por lote).
+
+Los vehículos creados usan patentes libres con prefijo ``QX``; al final se
+eliminan sólo los que creó esta ejecución (los ``QX`` ya existentes, y sus
+movimientos, no se tocan).
+
+Uso:
+    python manage.py benchmark_validacion_vehiculos [--cantidad 200]
+"""
+
+import itertools
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from gestion.forms import VehiculoForm
+from gestion.models import Vehiculo
+
+PREFIJO = 'QX'
+
+
+def _patentes(cantidad, ocupadas):
+    letras = itertools.product(string.ascii_uppercase, repeat=2)
+    for sufijo, numero in itertools.product(letras, range(100)):
+        if cantidad == 0:
+            return
+        patente = f"{PREFIJO}{''.join(sufijo)}{numero:02d}"
+        if patente in ocupadas:
+            continue
+        cantidad -= 1
+        yield patente
+
+
+def _datos(patentes):
+    return [
+        {'patente': p, 'marca': 'Volvo', 'modelo': 'FH', 'tipo': 'CAMION', 'año': 2020}
+        for p in patentes
+    ]
+
+
+def _interactivo(datos, verificar_unicidad=True):
+    for d in datos:
+        form = VehiculoForm(d, verificar_unicidad=verificar_unicidad)
+        if form.is_valid():
+            form.save()
+
+
+def _indice(datos):
+    _interactivo(datos, verificar_unicidad=False)
+
+
+def _lote(datos):
+    formularios = VehiculoForm.validar_lote(datos)
+    Vehiculo.objects.bulk_create([f.save(commit=False) for f in formularios if f.is_valid()])
+
+
+ESCENARIOS = [('interactivo', _interactivo), ('indice', _indice), ('lote', _lote)]
+
+
+class Command(BaseCommand):
+    help = "Mide consultas y tiempo por vehículo creado con cada modo de validación de VehiculoForm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=200, help="Vehículos por escenario.")
+
+    def handle(self, *args, **options):
+        cantidad = options['cantidad']
+        ocupadas = set(Vehiculo.objects.filter(patente__startswith=PREFIJO).values_list('patente', flat=True))
+        patentes = list(_patentes(cantidad * len(ESCENARIOS), ocupadas))
+        if len(patentes) < cantidad * len(ESCENARIOS):
+            raise CommandError(f"No quedan suficientes patentes libres con prefijo {PREFIJO}.")
+        try:
+            for i, (nombre, escenario) in enumerate(ESCENARIOS):
+                datos = _datos(patentes[i * cantidad:(i + 1) * cantidad])
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    escenario(datos)
+                    duracion = time.perf_counter() - inicio
+                creados = Vehiculo.objects.filter(patente__in=[d['patente'] for d in datos]).count()
+                self.stdout.write(
+                    f"{nombre:<12} {creados} creados  "
+                    f"{len(consultas) / max(creados, 1):.2f} consultas/vehículo  "
+                    f"{duracion * 1000 / max(creados, 1):.3f} ms/vehículo"
+                )
+        finally:
+            # Sólo las patentes de esta ejecución: estaban libres al comenzar
+            Vehiculo.objects.filter(patente__in=patentes).delete()
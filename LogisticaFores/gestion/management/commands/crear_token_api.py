@@ -0,0 +1,33 @@
+"""Comando que crea un token de acceso a la API JSON.
+
+La clave se muestra una única vez; en la base sólo se guarda su SHA-256.
+
+Uso:
+    python manage.py crear_token_api operador "Romana Planta A"
+"""
+
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.models import TokenApi
+
+
+class Command(BaseCommand):
+    help = "Crea un token para la API JSON y muestra la clave (sólo esta vez)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuario', help="Usuario en cuyo nombre actúa el token.")
+        parser.add_argument('nombre', help="Identificación del cliente.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            usuario = User.objects.get(**{User.USERNAME_FIELD: options['usuario']})
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['usuario']}.")
+        clave = secrets.token_urlsafe(32)
+        TokenApi.objects.create(usuario=usuario, nombre=options['nombre'], clave_hash=TokenApi.hash_clave(clave))
+        self.stdout.write(self.style.SUCCESS(f"Token creado para {options['nombre']}:"))
+        self.stdout.write(clave)
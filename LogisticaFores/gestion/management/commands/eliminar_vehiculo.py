@@ -0,0 +1,40 @@
+"""Comando para eliminar un vehículo con todo su historial de movimientos.
+
+Borra los movimientos por lotes (ver gestion.eliminacion) e informa el avance.
+
+Uso:
+    python manage.py eliminar_vehiculo ABCD12 [--lote 5000]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.eliminacion import TAMANO_LOTE_ELIMINACION, eliminar_vehiculo
+from gestion.models import Vehiculo
+
+
+class Command(BaseCommand):
+    help = "Elimina un vehículo y sus movimientos por lotes, informando el avance."
+
+    def add_arguments(self, parser):
+        parser.add_argument('patente', help="Patente del vehículo a eliminar.")
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_ELIMINACION,
+            help=f"Movimientos borrados por transacción (por defecto {TAMANO_LOTE_ELIMINACION}).",
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+        patente = options['patente'].strip().upper()
+        try:
+            vehiculo = Vehiculo.objects.get(patente=patente)
+        except Vehiculo.DoesNotExist:
+            raise CommandError(f"No existe un vehículo con la patente {patente}.")
+
+        def progreso(eliminados, total):
+            self.stdout.write(f"{eliminados}/{total} movimientos eliminados")
+
+        eliminados = eliminar_vehiculo(vehiculo, options['lote'], progreso)
+        self.stdout.write(self.style.SUCCESS(
+            f"Vehículo {patente} eliminado junto con {eliminados} movimientos."
+        ))
@@ -0,0 +1,120 @@
+"""Comando que ejecuta EXPLAIN sobre las consultas principales de la aplicación.
+
+Sirve para detectar regresiones de índices antes de llegar a producción:
+cualquier consulta cuyo plan recorra una tabla completa se marca como
+escaneo completo. Con ``--estricto`` el comando termina con error, lo que
+permite usarlo en CI.
+
+Uso:
+    python manage.py explicar_consultas [--estricto] [-v 2]
+"""
+
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from gestion.models import Vehiculo, MovimientoCarga
+
+# Planes de SQLite: "SCAN tabla" sin índice (ni índice FTS5) indica recorrido completo
+_SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?!\w)(?! USING (?:COVERING )?INDEX| VIRTUAL TABLE INDEX)')
+
+
+def consultas_principales():
+    """Devuelve las consultas representativas de cada vista y del admin.
+
+    Returns:
+        list[tuple[str, QuerySet]]: Pares (nombre, queryset) a explicar.
+    """
+    ahora = timezone.now()
+    movimientos = MovimientoCarga.objects.select_related('vehiculo')
+    return [
+        ("vehiculo_list (primera página)",
+         Vehiculo.objects.order_by('patente')[:51]),
+        ("vehiculo_list (página por cursor)",
+         Vehiculo.objects.filter(patente__gt='MMMM00').order_by('patente')[:51]),
+        ("movimiento_list (primera página)",
+         movimientos.order_by('-fecha_hora', '-id')[:51]),
+        ("movimiento_list (página por cursor)",
+         movimientos.filter(
+             Q(fecha_hora__lte=ahora) & (Q(fecha_hora__lt=ahora) | Q(fecha_hora=ahora, id__lt=1))
+         ).order_by('-fecha_hora', '-id')[:51]),
+        ("historial de un vehículo",
+         MovimientoCarga.objects.filter(vehiculo_id=1).order_by('-fecha_hora')[:51]),
+        ("admin: filtro por tipo_movimiento",
+         movimientos.filter(tipo_movimiento='INGRESO').order_by('-fecha_hora')[:25]),
+        ("movimiento_list: filtro por patente",
+         movimientos.filter(vehiculo__patente='ABCD12').order_by('-fecha_hora', '-id')[:51]),
+        ("movimiento_list: filtro por origen",
+         movimientos.filter(origen_id=1).order_by('-fecha_hora', '-id')[:51]),
+        ("movimiento_list: filtro por destino",
+         movimientos.filter(destino_id=1).order_by('-fecha_hora', '-id')[:51]),
+        ("movimiento_list: búsqueda en descripción",
+         movimientos.filter(descripcion__busqueda='carga').order_by('-fecha_hora', '-id')[:51]),
+    ]
+
+
+def _escaneos_mysql(plan):
+    """Recorre un plan EXPLAIN FORMAT=JSON de MySQL buscando access_type ALL."""
+    tablas = []
+    if isinstance(plan, dict):
+        if plan.get('access_type') == 'ALL':
+            tablas.append(plan.get('table_name', '?'))
+        for valor in plan.values():
+            tablas.extend(_escaneos_mysql(valor))
+    elif isinstance(plan, list):
+        for valor in plan:
+            tablas.extend(_escaneos_mysql(valor))
+    return tablas
+
+
+def explicar(queryset):
+    """Ejecuta EXPLAIN sobre ``queryset`` y detecta escaneos completos.
+
+    Args:
+        queryset (QuerySet): Consulta a analizar.
+
+    Returns:
+        tuple[str, list[str]]: Plan en texto y tablas recorridas completas.
+    """
+    vendor = connection.vendor
+    if vendor == 'mysql':
+        plan = queryset.explain(format='json')
+        return plan, _escaneos_mysql(json.loads(plan))
+    plan = queryset.explain()
+    if vendor == 'sqlite':
+        return plan, _SQLITE_SCAN.findall(plan)
+    if vendor == 'postgresql':
+        return plan, re.findall(r'Seq Scan on (\w+)', plan)
+    return plan, []
+
+
+class Command(BaseCommand):
+    help = "Ejecuta EXPLAIN sobre las consultas principales y marca escaneos completos de tabla."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--estricto', action='store_true',
+            help="Termina con error si alguna consulta recorre una tabla completa.",
+        )
+
+    def handle(self, *args, **options):
+        verbose = options['verbosity'] > 1
+        con_escaneo = []
+        for nombre, queryset in consultas_principales():
+            plan, tablas = explicar(queryset)
+            if tablas:
+                con_escaneo.append(nombre)
+                self.stdout.write(self.style.WARNING(
+                    f"ESCANEO COMPLETO  {nombre}: {', '.join(sorted(set(tablas)))}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK                {nombre}"))
+            if verbose or tablas:
+                self.stdout.write(f"    {plan}".replace('\n', '\n    '))
+
+        if con_escaneo and options['estricto']:
+            raise CommandError(f"{len(con_escaneo)} consulta(s) con escaneo completo de tabla.")
@@ -0,0 +1,62 @@
+"""Comando que genera vehículos y movimientos sintéticos para pruebas de rendimiento.
+
+Ver gestion.sinteticos para las distribuciones. Los vehículos llevan patente
+``SY…``; ``--borrar`` elimina los sintéticos anteriores (y sus movimientos)
+sin tocar los datos reales. Con la misma ``--semilla`` los datos son iguales
+entre corridas, así los resultados de benchmark_gestion son comparables.
+
+Uso:
+    python manage.py generar_datos_sinteticos --vehiculos 500 --movimientos 1000000 \\
+        [--dias 365] [--semilla 1] [--borrar]
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.eliminacion import eliminar_vehiculo
+from gestion.models import Vehiculo
+from gestion.sinteticos import PREFIJO, TAMANO_LOTE_SINTETICOS, generar_movimientos, generar_vehiculos
+
+
+class Command(BaseCommand):
+    help = "Genera vehículos (patente SY…) y movimientos sintéticos con distribuciones realistas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehiculos', type=int, default=200, help="Vehículos a crear (por defecto 200).")
+        parser.add_argument('--movimientos', type=int, default=50000, help="Movimientos a crear (por defecto 50000).")
+        parser.add_argument('--dias', type=int, default=365, help="Antigüedad máxima en días (por defecto 365).")
+        parser.add_argument('--semilla', type=int, default=1, help="Semilla del generador (por defecto 1).")
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_SINTETICOS,
+            help=f"Movimientos por transacción (por defecto {TAMANO_LOTE_SINTETICOS}).",
+        )
+        parser.add_argument('--borrar', action='store_true', help="Elimina antes los datos sintéticos existentes.")
+
+    def handle(self, *args, **options):
+        if options['vehiculos'] < 0 or options['movimientos'] < 0:
+            raise CommandError("--vehiculos y --movimientos no pueden ser negativos.")
+        if options['dias'] < 1 or options['lote'] < 1:
+            raise CommandError("--dias y --lote deben ser mayores que 0.")
+
+        inicio = time.perf_counter()
+        if options['borrar']:
+            eliminados = 0
+            for vehiculo in Vehiculo.objects.filter(patente__startswith=PREFIJO).iterator():
+                eliminados += eliminar_vehiculo(vehiculo)
+            self.stdout.write(f"Datos sintéticos anteriores eliminados ({eliminados} movimientos).")
+
+        azar = random.Random(options['semilla'])
+        vehiculos = generar_vehiculos(options['vehiculos'], azar)
+        try:
+            movimientos = generar_movimientos(
+                options['movimientos'], options['dias'], azar, options['lote'],
+                progreso=lambda creados: self.stdout.write(f"  {creados} movimientos..."),
+            ) if options['movimientos'] else 0
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{vehiculos} vehículos y {movimientos} movimientos sintéticos creados "
+            f"en {time.perf_counter() - inicio:.1f} s."
+        ))
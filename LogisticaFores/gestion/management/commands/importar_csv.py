@@ -0,0 +1,61 @@
+"""Comando para importar vehículos o movimientos de carga desde un CSV.
+
+Uso:
+    python manage.py importar_csv vehiculos flota.csv
+    python manage.py importar_csv movimientos romana_2025-11-25.csv --lote 5000 --rechazados errores.csv
+"""
+
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.importacion import IMPORTADORES, TAMANO_LOTE_IMPORTACION
+
+
+class Command(BaseCommand):
+    help = "Importa vehículos o movimientos desde un archivo CSV usando inserciones por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=sorted(IMPORTADORES), help="Qué se importa.")
+        parser.add_argument('archivo', help="Ruta del CSV ('-' para leer de stdin).")
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_IMPORTACION,
+            help=f"Filas validadas e insertadas por lote (por defecto {TAMANO_LOTE_IMPORTACION}).",
+        )
+        parser.add_argument(
+            '--rechazados', metavar='CSV',
+            help="Escribe las filas rechazadas (línea, motivo) en este archivo.",
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+        importar = IMPORTADORES[options['tipo']]
+        inicio = time.perf_counter()
+        try:
+            if options['archivo'] == '-':
+                resultado = importar(sys.stdin, options['lote'])
+            else:
+                with open(options['archivo'], newline='', encoding='utf-8-sig') as archivo:
+                    resultado = importar(archivo, options['lote'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        segundos = time.perf_counter() - inicio
+
+        if options['rechazados']:
+            with open(options['rechazados'], 'w', newline='', encoding='utf-8') as salida:
+                writer = csv.writer(salida)
+                writer.writerow(['linea', 'motivo'])
+                writer.writerows(resultado.rechazados)
+        else:
+            for linea, motivo in resultado.rechazados:
+                self.stderr.write(f"Línea {linea}: {motivo}")
+
+        filas = resultado.creados + len(resultado.rechazados)
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.creados} {options['tipo']} importados, "
+            f"{len(resultado.rechazados)} filas rechazadas en {segundos:.1f} s "
+            f"({filas / segundos if segundos else 0:.0f} filas/s)."
+        ))
@@ -0,0 +1,151 @@
+"""Comando que compara arranque y primeras solicitudes entre perfiles de settings.
+
+Por cada módulo de settings (``--perfiles``) lanza ``--repeticiones``
+procesos nuevos. Cada proceso:
+
+1. importa Django y construye la aplicación WSGI (arranque);
+2. atiende la primera solicitud a cada URL (plantillas sin compilar);
+3. atiende ``--solicitudes`` más en ronda (régimen estable) contando las
+   consultas a la base de datos;
+
+e informa su memoria máxima. Las solicitudes entran directo a la aplicación
+WSGI, sin servidor HTTP. Se reportan medianas entre procesos.
+
+Uso:
+    DJANGO_SECRET_KEY=x REDIS_URL=redis://localhost:6379/0 python manage.py medir_arranque \\
+        [--perfiles config.settings config.settings_produccion] \\
+        [--url /accounts/login/ --url /vehiculos/] [--cookie sessionid=...]
+
+El perfil de producción requiere haber corrido ``collectstatic`` y un Redis
+accesible en REDIS_URL. Para
+comparar vistas con login ambos perfiles deben compartir SECRET_KEY (la
+sesión está firmada con ella).
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Código del proceso hijo: importa sólo lo necesario antes de medir
+_HIJO = r"""
+import io, json, resource, statistics, sys, time
+inicio = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+aplicacion = get_wsgi_application()
+arranque = time.perf_counter() - inicio
+
+from django.conf import settings
+from django.db import connection
+
+parametros = json.loads(sys.argv[1])
+host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.').replace('*', 'localhost')
+
+
+def pedir(url):
+    ruta, _, consulta = url.partition('?')
+    entorno = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': consulta,
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host,
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    if parametros['cookie']:
+        entorno['HTTP_COOKIE'] = parametros['cookie']
+    estados = []
+    t0 = time.perf_counter()
+    respuesta = aplicacion(entorno, lambda estado, cabeceras, exc_info=None: estados.append(estado))
+    try:
+        b''.join(respuesta)
+    finally:
+        respuesta.close()
+    return time.perf_counter() - t0, int(estados[0].split()[0])
+
+
+primeras, estados = {}, {}
+for url in parametros['urls']:
+    primeras[url], estados[url] = pedir(url)
+consultas = []
+with connection.execute_wrapper(lambda ejecutar, sql, params, many, contexto: consultas.append(1) or ejecutar(sql, params, many, contexto)):
+    regimen = [pedir(parametros['urls'][i % len(parametros['urls'])])[0] for i in range(parametros['solicitudes'])]
+print(json.dumps({
+    'arranque_s': arranque,
+    'primeras_s': primeras,
+    'regimen_s': statistics.median(regimen) if regimen else 0.0,
+    'consultas_por_solicitud': len(consultas) / len(regimen) if regimen else 0.0,
+    'estados': estados,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'debug': settings.DEBUG,
+}))
+"""
+
+
+def _mediana(valores):
+    return statistics.median(valores) if valores else 0.0
+
+
+class Command(BaseCommand):
+    help = "Mide arranque, primera solicitud y régimen para cada perfil de settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--perfiles', nargs='+', default=['config.settings', 'config.settings_produccion'],
+            help="Módulos de settings a comparar.",
+        )
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help="Ruta a pedir (repetible; por defecto /accounts/login/).",
+        )
+        parser.add_argument('--cookie', help="Cabecera Cookie, p. ej. sessionid=... para vistas con login.")
+        parser.add_argument('--repeticiones', type=int, default=5, help="Procesos por perfil (por defecto 5).")
+        parser.add_argument('--solicitudes', type=int, default=200, help="Solicitudes tras las primeras (por defecto 200).")
+        parser.add_argument('--json', action='store_true', help="Imprime el resultado como JSON.")
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1 or options['solicitudes'] < 0:
+            raise CommandError("--repeticiones debe ser positivo y --solicitudes no negativo.")
+        urls = options['urls'] or ['/accounts/login/']
+        parametros = json.dumps({'urls': urls, 'cookie': options['cookie'], 'solicitudes': options['solicitudes']})
+
+        resultados = {}
+        for perfil in options['perfiles']:
+            corridas = [self._correr(perfil, parametros) for _ in range(options['repeticiones'])]
+            resultados[perfil] = {
+                'debug': corridas[0]['debug'],
+                'arranque_ms': round(_mediana([c['arranque_s'] for c in corridas]) * 1000, 1),
+                'primera_ms': {
+                    url: round(_mediana([c['primeras_s'][url] for c in corridas]) * 1000, 2) for url in urls
+                },
+                'regimen_ms': round(_mediana([c['regimen_s'] for c in corridas]) * 1000, 2),
+                'consultas_por_solicitud': round(_mediana([c['consultas_por_solicitud'] for c in corridas]), 2),
+                'estados': corridas[0]['estados'],
+                'rss_mb': round(_mediana([c['rss_mb'] for c in corridas]), 1),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultados))
+            return
+        for perfil, datos in resultados.items():
+            self.stdout.write(f"{perfil} (DEBUG={datos['debug']})")
+            self.stdout.write(f"  arranque: {datos['arranque_ms']} ms")
+            for url, valor in datos['primera_ms'].items():
+                self.stdout.write(f"  primera {url}: {valor} ms (HTTP {datos['estados'][url]})")
+            self.stdout.write(
+                f"  régimen: {datos['regimen_ms']} ms/solicitud | {datos['consultas_por_solicitud']} consultas/solicitud | "
+                f"RSS máx {datos['rss_mb']} MB"
+            )
+
+    def _correr(self, perfil, parametros):
+        entorno = {**os.environ, 'DJANGO_SETTINGS_MODULE': perfil}
+        proceso = subprocess.run(
+            [sys.executable, '-c', _HIJO, parametros],
+            cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f"{perfil}: el proceso de medición falló:\n{proceso.stderr.strip()[-2000:]}")
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
@@ -0,0 +1,145 @@
+"""Comando que mide el costo de conexión a la base de datos por solicitud.
+
+Reproduce el ciclo de conexiones de ``--solicitudes`` solicitudes sin pasar
+por HTTP: envía las señales ``request_started`` y ``request_finished`` (las
+que usa Django para cerrar o reciclar conexiones según ``CONN_MAX_AGE``) y
+entre ambas mide ``connection.ensure_connection()`` (conexión nueva, la
+persistente del hilo o un préstamo del pool, con su chequeo de salud) y una
+consulta ``SELECT 1``.
+
+``--hilos`` reparte las solicitudes como un worker WSGI con hilos;
+``--hilo-por-solicitud`` corre cada una en un hilo nuevo, como Django bajo
+ASGI. Sirve para comparar configuraciones de config/settings.py:
+
+    DB_CONN_MAX_AGE=0 python manage.py medir_conexiones            # sin reutilización
+    DB_CONN_MAX_AGE=60 python manage.py medir_conexiones --hilos 8  # persistentes (WSGI)
+    DB_POOL_TAMANO=8 python manage.py medir_conexiones --hilo-por-solicitud  # pool (ASGI)
+"""
+
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+def _resumen_ms(valores):
+    ordenadas = sorted(valores)
+    return {
+        'p50_ms': round(_percentil(ordenadas, 50) * 1000, 3),
+        'p95_ms': round(_percentil(ordenadas, 95) * 1000, 3),
+        'p99_ms': round(_percentil(ordenadas, 99) * 1000, 3),
+        'media_ms': round(statistics.fmean(ordenadas) * 1000, 3) if ordenadas else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo de conexión a la base de datos por solicitud con la configuración actual."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solicitudes', type=int, default=1000, help="Solicitudes simuladas (por defecto 1000).")
+        parser.add_argument('--hilos', type=int, default=1, help="Hilos que atienden solicitudes (por defecto 1).")
+        parser.add_argument(
+            '--hilo-por-solicitud', action='store_true',
+            help="Atiende cada solicitud en un hilo nuevo (como Django bajo ASGI).",
+        )
+        parser.add_argument('--json', action='store_true', help="Imprime el resultado como JSON.")
+
+    def handle(self, *args, **options):
+        if options['solicitudes'] < 1 or options['hilos'] < 1:
+            raise CommandError("--solicitudes y --hilos deben ser positivos.")
+
+        conexiones, preparacion, consulta = [], [], []
+        candado = threading.Lock()
+
+        def al_conectar(sender, connection, **kwargs):
+            with candado:
+                conexiones.append(connection.alias)
+
+        def solicitud():
+            request_started.send(sender=self.__class__)
+            try:
+                inicio = time.perf_counter()
+                connection.ensure_connection()
+                conectado = time.perf_counter()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                fin = time.perf_counter()
+            finally:
+                request_finished.send(sender=self.__class__)
+            with candado:
+                preparacion.append(conectado - inicio)
+                consulta.append(fin - conectado)
+
+        def atender(cantidad):
+            for _ in range(cantidad):
+                if options['hilo_por_solicitud']:
+                    hilo = threading.Thread(target=solicitud)
+                    hilo.start()
+                    hilo.join()
+                else:
+                    solicitud()
+            # Las conexiones persistentes del hilo no sobreviven al comando
+            connections.close_all()
+
+        hilos = options['hilos']
+        cuotas = [options['solicitudes'] // hilos + (i < options['solicitudes'] % hilos) for i in range(hilos)]
+        connection_created.connect(al_conectar)
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=hilos) as ejecutor:
+                list(ejecutor.map(atender, cuotas))
+            transcurrido = time.perf_counter() - inicio
+        finally:
+            connection_created.disconnect(al_conectar)
+
+        ajustes = connection.settings_dict
+        resultado = {
+            'motor': ajustes['ENGINE'],
+            'conn_max_age': ajustes['CONN_MAX_AGE'],
+            'health_checks': ajustes['CONN_HEALTH_CHECKS'],
+            'hilos': hilos,
+            'hilo_por_solicitud': options['hilo_por_solicitud'],
+            'solicitudes': len(preparacion),
+            'por_segundo': round(len(preparacion) / transcurrido, 1),
+            # Conexiones que Django abrió; con pool muchas son préstamos
+            'conexiones_django': len(conexiones),
+            'conexion': _resumen_ms(preparacion),
+            'consulta': _resumen_ms(consulta),
+        }
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            resultado['pool'] = pool.metricas()
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado))
+            return
+        self.stdout.write(
+            f"{resultado['motor']} | CONN_MAX_AGE={resultado['conn_max_age']} | "
+            f"health checks={'sí' if resultado['health_checks'] else 'no'} | {hilos} hilo(s)"
+            f"{' | hilo por solicitud' if options['hilo_por_solicitud'] else ''}"
+        )
+        self.stdout.write(
+            f"{resultado['solicitudes']} solicitudes ({resultado['por_segundo']}/s), "
+            f"{resultado['conexiones_django']} conexiones abiertas por Django"
+        )
+        for nombre in ('conexion', 'consulta'):
+            datos = resultado[nombre]
+            self.stdout.write(
+                f"{nombre}: p50 {datos['p50_ms']} ms | p95 {datos['p95_ms']} ms | "
+                f"p99 {datos['p99_ms']} ms | media {datos['media_ms']} ms"
+            )
+        if pool is not None:
+            self.stdout.write(f"pool: {resultado['pool']}")
@@ -0,0 +1,85 @@
+"""Comando que administra las particiones mensuales de movimiento_carga (MySQL).
+
+La conversión inicial reconstruye la tabla y elimina sus claves foráneas y el
+índice FULLTEXT (ver gestion.particiones): requiere
+``MOVIMIENTOS_PARTICIONADOS=1`` en el entorno, para que la búsqueda pase a
+LIKE. Después, ``--futuras`` debe correr una vez al mes (cron) para que los
+meses siguientes tengan su partición antes de recibir movimientos.
+
+Uso:
+    python manage.py particionar_movimientos --listar
+    python manage.py particionar_movimientos --convertir [--futuras 3] [--sql]
+    python manage.py particionar_movimientos [--futuras 3] [--sql]
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Min
+
+from gestion import particiones
+from gestion.models import MovimientoCarga
+
+
+class Command(BaseCommand):
+    help = "Convierte movimiento_carga a particiones mensuales y crea las de los próximos meses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convertir', action='store_true',
+            help="Particiona la tabla (una vez; reconstruye movimiento_carga).",
+        )
+        parser.add_argument(
+            '--futuras', type=int, default=3,
+            help="Meses posteriores al actual con partición propia (por defecto 3).",
+        )
+        parser.add_argument('--listar', action='store_true', help="Muestra las particiones existentes.")
+        parser.add_argument('--sql', action='store_true', help="Muestra las sentencias sin ejecutarlas.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError("Las particiones sólo están disponibles con MySQL.")
+        if options['futuras'] < 0:
+            raise CommandError("--futuras no puede ser negativo.")
+
+        with connection.cursor() as cursor:
+            existentes = particiones.listar(cursor)
+        if options['listar']:
+            if not existentes:
+                self.stdout.write("movimiento_carga no está particionada.")
+            for particion in existentes:
+                hasta = f"< {particion.hasta:%Y-%m-%d}" if particion.hasta else "MAXVALUE"
+                self.stdout.write(f"{particion.nombre:<10} {hasta:<14} ~{particion.filas} filas")
+            return
+
+        hoy = datetime.datetime.now(datetime.timezone.utc).date()
+        hasta = particiones.sumar_meses(particiones.inicio_mes(hoy), options['futuras'])
+        if options['convertir']:
+            if existentes:
+                raise CommandError("movimiento_carga ya está particionada.")
+            if not settings.MOVIMIENTOS_PARTICIONADOS and not options['sql']:
+                raise CommandError(
+                    "Defina MOVIMIENTOS_PARTICIONADOS=1 antes de convertir: la tabla particionada "
+                    "no admite el índice FULLTEXT de la búsqueda."
+                )
+            primero = MovimientoCarga.objects.using('default').aggregate(Min('fecha_hora'))['fecha_hora__min']
+            sentencias = particiones.sql_convertir(connection, primero or hoy, hasta)
+        elif not existentes:
+            raise CommandError("movimiento_carga no está particionada: use --convertir.")
+        else:
+            sentencia = particiones.sql_crear_futuras(existentes, hasta)
+            sentencias = [sentencia] if sentencia else []
+
+        if options['sql']:
+            for sentencia in sentencias:
+                self.stdout.write(f"{sentencia};")
+            return
+        with connection.cursor() as cursor:
+            for sentencia in sentencias:
+                self.stdout.write(sentencia.splitlines()[0])
+                cursor.execute(sentencia)
+        self.stdout.write(self.style.SUCCESS(
+            f"Particiones al día hasta {hasta:%Y-%m} ({len(sentencias)} sentencias)."
+        ))
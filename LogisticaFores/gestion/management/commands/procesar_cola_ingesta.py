@@ -0,0 +1,183 @@
+"""Comando worker que vacía la cola local de ingesta en la base principal.
+
+Reserva hasta ``--lote`` entradas de la cola (gestion.cola), las registra en
+una sola transacción (cada una en su propio savepoint) y recién después las
+confirma, guardando en la cola la respuesta de cada una para los reintentos
+del cliente. Una entrada con errores de datos (clave foránea, valor fuera de
+rango) se revierte sola: las demás del lote se confirman, y la fallida se
+libera con una demora creciente o, tras ``--max-intentos`` reservas, pasa a
+la cola de descartes. Si la base principal no responde, todas las entradas
+se liberan y se reintentan; si el proceso muere, vuelven a la cola al vencer
+el arrendamiento. Las claves de idempotencia evitan duplicar movimientos al
+reprocesar.
+
+Uso:
+    python manage.py procesar_cola_ingesta [--lote 50] [--espera 1] [--max-intentos 5] [--una-vez]
+"""
+
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections, transaction
+
+from gestion import cola
+from gestion.importacion import registrar_lote_idempotente
+
+logger = logging.getLogger(__name__)
+
+# Motivo de descarte de una clave reutilizada (no se reintenta)
+CLAVE_USADA = "Idempotency-Key ya utilizada con otro contenido."
+
+
+class Command(BaseCommand):
+    help = "Inserta en la base principal los movimientos encolados por la API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=50,
+            help="Entradas de la cola registradas por transacción (por defecto 50).",
+        )
+        parser.add_argument(
+            '--espera', type=float, default=1.0,
+            help="Segundos de espera cuando la cola está vacía o la base falla (por defecto 1).",
+        )
+        parser.add_argument(
+            '--arrendamiento', type=float, default=cola.ARRENDAMIENTO_SEGUNDOS,
+            help=f"Segundos que una entrada reservada queda oculta (por defecto {cola.ARRENDAMIENTO_SEGUNDOS}).",
+        )
+        parser.add_argument(
+            '--max-intentos', type=int, default=settings.COLA_INGESTA_MAX_INTENTOS,
+            help="Reservas de una entrada con errores antes de descartarla "
+                 f"(por defecto {settings.COLA_INGESTA_MAX_INTENTOS}).",
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help="Termina cuando la cola queda vacía en lugar de seguir esperando.",
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+        if options['max_intentos'] < 1:
+            raise CommandError("--max-intentos debe ser mayor que 0.")
+        self.detener = False
+        signal.signal(signal.SIGTERM, self._detener)
+        signal.signal(signal.SIGINT, self._detener)
+
+        totales = {'entradas': 0, 'filas': 0, 'repetidas': 0, 'descartadas': 0}
+        while not self.detener:
+            entradas = cola.reservar(options['lote'], options['arrendamiento'])
+            if not entradas:
+                if options['una_vez']:
+                    break
+                time.sleep(options['espera'])
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                creados, repetidas, respuestas, errores = self._registrar(entradas)
+            except DatabaseError as exc:
+                logger.warning("Fallo al registrar %d entradas de la cola: %s", len(entradas), exc)
+                cola.liberar([e.id for e in entradas])
+                # Descarta la conexión rota para reconectar en el próximo intento
+                close_old_connections()
+                time.sleep(options['espera'])
+                continue
+            cola.confirmar(respuestas)
+            descartadas = self._separar_fallidas(entradas, errores, options)
+
+            totales['entradas'] += len(entradas) - len(errores)
+            totales['descartadas'] += descartadas
+            totales['filas'] += creados
+            totales['repetidas'] += repetidas
+            metricas = cola.metricas()
+            self.stdout.write(
+                f"{len(entradas) - len(errores)} entradas, {creados} movimientos en "
+                f"{time.perf_counter() - inicio:.2f} s | pendientes {metricas['pendientes']} "
+                f"({metricas['filas_pendientes']} filas), antigüedad {metricas['antiguedad_segundos']:.1f} s"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cola procesada: {totales['entradas']} entradas, {totales['filas']} movimientos, "
+            f"{totales['repetidas']} repetidas, {totales['descartadas']} descartadas."
+        ))
+
+    def _registrar(self, entradas):
+        """Registra las entradas en una transacción, cada una en su savepoint.
+
+        Las restricciones diferidas (claves foráneas en SQLite y PostgreSQL)
+        recién fallan al confirmar la transacción exterior; en ese caso el
+        lote se repite entrada por entrada, cada una en su propia transacción,
+        para aislar a la que falla.
+
+        Returns:
+            tuple[int, int, dict[int, tuple[int, dict]], dict[int, str]]:
+            Movimientos creados, entradas repetidas, respuesta (código HTTP y
+            cuerpo) de las registradas y motivo del fallo de las demás, por id
+            de entrada.
+
+        Raises:
+            DatabaseError: Si la base principal no está disponible.
+        """
+        try:
+            with transaction.atomic():
+                return self._registrar_entradas(entradas)
+        except IntegrityError as exc:
+            logger.warning("Lote de %d entradas revertido al confirmar (%s); se aísla cada entrada.",
+                           len(entradas), exc)
+            return self._registrar_entradas(entradas)
+
+    def _registrar_entradas(self, entradas):
+        creados = repetidas = 0
+        respuestas = {}
+        errores = {}
+        for entrada in entradas:
+            try:
+                with transaction.atomic():
+                    datos, previo = registrar_lote_idempotente(
+                        entrada.usuario_id, entrada.clave, entrada.huella, entrada.movimientos
+                    )
+            except (IntegrityError, DataError) as exc:
+                # Error de los datos de esta entrada: no afecta al resto del lote
+                errores[entrada.id] = str(exc) or exc.__class__.__name__
+                continue
+            if previo is not None:
+                repetidas += 1
+                if previo.huella != entrada.huella:
+                    # La API ya responde 422; sólo llega aquí en una carrera entre dos envíos
+                    errores[entrada.id] = CLAVE_USADA
+                else:
+                    respuestas[entrada.id] = (previo.estado, previo.respuesta)
+                continue
+            creados += datos['creados']
+            respuestas[entrada.id] = (200, datos)
+        return creados, repetidas, respuestas, errores
+
+    def _separar_fallidas(self, entradas, errores, options):
+        """Libera con demora las entradas fallidas o las descarta al agotar los intentos.
+
+        Returns:
+            int: Entradas pasadas a la cola de descartes.
+        """
+        agotadas = {}
+        for entrada in entradas:
+            if entrada.id not in errores:
+                continue
+            error = errores[entrada.id]
+            if entrada.intentos >= options['max_intentos'] or error == CLAVE_USADA:
+                agotadas[entrada.id] = error
+                logger.error("Entrada %s (clave %s del usuario %s) descartada tras %d intentos: %s",
+                             entrada.id, entrada.clave, entrada.usuario_id, entrada.intentos, error)
+            else:
+                logger.warning("Entrada %s falló (intento %d): %s", entrada.id, entrada.intentos, error)
+                cola.liberar([entrada.id], demora=options['espera'] * 2 ** entrada.intentos)
+        if agotadas:
+            cola.descartar(agotadas)
+        return len(agotadas)
+
+    def _detener(self, signum, frame):
+        # Termina tras confirmar la transacción en curso
+        self.detener = True
@@ -0,0 +1,146 @@
+"""Comando de prueba de carga HTTP contra un servidor en ejecución.
+
+Abre ``--concurrencia`` conexiones keep-alive (asyncio, sin dependencias
+externas) que piden las URLs indicadas en ronda durante ``--duracion``
+segundos, e informa solicitudes por segundo, percentiles de latencia y
+códigos de estado. Sirve para comparar despliegues WSGI y ASGI con la
+misma base de datos (ver README).
+
+Uso:
+    python manage.py prueba_carga http://127.0.0.1:8000/api/movimientos/ \\
+        [--concurrencia 500] [--duracion 20] [--token CLAVE] [--cookie sessionid=...]
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def _leer_respuesta(lector):
+    """Lee una respuesta HTTP/1.1 y devuelve (status, cuerpo, mantener_conexion)."""
+    linea = await lector.readline()
+    if not linea:
+        raise ConnectionError("Conexión cerrada por el servidor.")
+    status = int(linea.split()[1])
+    cabeceras = {}
+    while (linea := await lector.readline()) not in (b'\r\n', b'\n', b''):
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    if cabeceras.get('transfer-encoding', '').lower() == 'chunked':
+        partes = []
+        while (tamano := int((await lector.readline()).split(b';')[0], 16)):
+            partes.append(await lector.readexactly(tamano))
+            await lector.readline()
+        await lector.readline()
+        cuerpo = b''.join(partes)
+    else:
+        cuerpo = await lector.readexactly(int(cabeceras.get('content-length', 0)))
+    return status, cuerpo, cabeceras.get('connection', '').lower() != 'close'
+
+
+async def _cliente(destinos, cabeceras, fin, latencias, estados):
+    """Un cliente: pide las rutas en ronda sobre una conexión keep-alive."""
+    lector = escritor = None
+    indice = 0
+    while time.perf_counter() < fin:
+        host, puerto, ruta = destinos[indice % len(destinos)]
+        indice += 1
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection(host, puerto)
+            escritor.write(
+                f"GET {ruta} HTTP/1.1\r\nHost: {host}:{puerto}\r\n{cabeceras}"
+                f"Connection: keep-alive\r\n\r\n".encode()
+            )
+            await escritor.drain()
+            status, _, mantener = await _leer_respuesta(lector)
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError) as exc:
+            estados[type(exc).__name__] += 1
+            if escritor is not None:
+                escritor.close()
+            lector = escritor = None
+            await asyncio.sleep(0.05)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+        estados[status] += 1
+        if not mantener:
+            escritor.close()
+            lector = escritor = None
+    if escritor is not None:
+        escritor.close()
+
+
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class Command(BaseCommand):
+    help = "Genera carga HTTP concurrente contra URLs y reporta latencias."
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help="URLs a pedir en ronda (http://host:puerto/ruta).")
+        parser.add_argument('--concurrencia', type=int, default=500, help="Clientes simultáneos (por defecto 500).")
+        parser.add_argument('--duracion', type=float, default=20, help="Segundos de prueba (por defecto 20).")
+        parser.add_argument('--token', help="Clave para la cabecera Authorization: Token.")
+        parser.add_argument('--cookie', help="Cabecera Cookie, p. ej. sessionid=... para las vistas HTML.")
+        parser.add_argument('--json', action='store_true', help="Imprime el resultado como JSON.")
+
+    def handle(self, *args, **options):
+        if options['concurrencia'] < 1 or options['duracion'] <= 0:
+            raise CommandError("--concurrencia y --duracion deben ser positivos.")
+        destinos = []
+        for url in options['urls']:
+            partes = urlsplit(url)
+            if partes.scheme != 'http' or not partes.hostname:
+                raise CommandError(f"URL no soportada (sólo http://): {url}")
+            ruta = (partes.path or '/') + (f'?{partes.query}' if partes.query else '')
+            destinos.append((partes.hostname, partes.port or 80, ruta))
+        cabeceras = ''
+        if options['token']:
+            cabeceras += f"Authorization: Token {options['token']}\r\n"
+        if options['cookie']:
+            cabeceras += f"Cookie: {options['cookie']}\r\n"
+
+        latencias, estados = [], Counter()
+        inicio = time.perf_counter()
+        asyncio.run(self._ejecutar(destinos, cabeceras, options, latencias, estados))
+        transcurrido = time.perf_counter() - inicio
+
+        ordenadas = sorted(latencias)
+        resultado = {
+            'concurrencia': options['concurrencia'],
+            'solicitudes': len(latencias),
+            'por_segundo': round(len(latencias) / transcurrido, 1),
+            'p50_ms': round(_percentil(ordenadas, 50) * 1000, 1),
+            'p95_ms': round(_percentil(ordenadas, 95) * 1000, 1),
+            'p99_ms': round(_percentil(ordenadas, 99) * 1000, 1),
+            'media_ms': round(statistics.fmean(ordenadas) * 1000, 1) if ordenadas else 0.0,
+            'estados': {str(k): v for k, v in sorted(estados.items(), key=str)},
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(resultado))
+            return
+        self.stdout.write(
+            f"{resultado['solicitudes']} solicitudes en {transcurrido:.1f} s "
+            f"({resultado['por_segundo']}/s) con {resultado['concurrencia']} clientes"
+        )
+        self.stdout.write(
+            f"latencia p50 {resultado['p50_ms']} ms | p95 {resultado['p95_ms']} ms | "
+            f"p99 {resultado['p99_ms']} ms | media {resultado['media_ms']} ms"
+        )
+        self.stdout.write(f"estados: {resultado['estados']}")
+
+    async def _ejecutar(self, destinos, cabeceras, options, latencias, estados):
+        fin = time.perf_counter() + options['duracion']
+        await asyncio.gather(*(
+            _cliente(destinos, cabeceras, fin, latencias, estados)
+            for _ in range(options['concurrencia'])
+        ))
@@ -0,0 +1,32 @@
+"""Comando que elimina las claves de idempotencia antiguas de la API.
+
+Los clientes sólo reintentan durante unos minutos u horas; pasado ese plazo
+las respuestas guardadas ya no se necesitan.
+
+Uso:
+    python manage.py purgar_idempotencia [--dias 7]
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gestion.models import SolicitudIdempotente
+
+
+class Command(BaseCommand):
+    help = "Elimina las claves de idempotencia más antiguas que --dias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=7,
+            help="Antigüedad mínima en días de las claves a eliminar (por defecto 7).",
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError("--dias debe ser mayor que 0.")
+        limite = timezone.now() - timedelta(days=options['dias'])
+        eliminadas, _ = SolicitudIdempotente.objects.filter(creado__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f"{eliminadas} claves de idempotencia eliminadas."))
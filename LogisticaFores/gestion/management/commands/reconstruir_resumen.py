@@ -0,0 +1,33 @@
+"""Comando que recalcula el resumen de movimientos desde cero.
+
+Útil para la carga inicial (backfill) tras aplicar la migración, o si el
+resumen quedó desalineado por escrituras fuera de la aplicación.
+
+Uso:
+    python manage.py reconstruir_resumen [--lote 5000]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gestion.resumen import TAMANO_LOTE_RESUMEN, reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula ResumenMovimiento y el último movimiento de cada vehículo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_RESUMEN,
+            help=f"Filas de resumen insertadas por lote (por defecto {TAMANO_LOTE_RESUMEN}).",
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+        inicio = time.perf_counter()
+        total = reconstruir(options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumen reconstruido: {total} filas en {time.perf_counter() - inicio:.1f} s."
+        ))
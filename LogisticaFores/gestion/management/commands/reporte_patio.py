@@ -0,0 +1,73 @@
+"""Comando que calcula el reporte de patio de un período (gestion.analitica).
+
+Sin caché: siempre recorre los movimientos. Útil para revisar un período
+largo o alimentar otra herramienta con ``--json``.
+
+Uso:
+    python manage.py reporte_patio [--desde 2025-01-01] [--hasta 2025-01-31] \\
+        [--granularidad dia|hora] [--json]
+"""
+
+import dataclasses
+import datetime
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from gestion import analitica
+
+
+def _fecha(texto):
+    try:
+        return datetime.date.fromisoformat(texto)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (AAAA-MM-DD): {texto}")
+
+
+class Command(BaseCommand):
+    help = "Vehículos dentro, estadías por ruta, vueltas por destino y ocupación de un período."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Primer día (por defecto 30 días antes de --hasta).")
+        parser.add_argument('--hasta', help="Último día, incluido (por defecto hoy).")
+        parser.add_argument('--granularidad', choices=analitica.GRANULARIDADES, default='dia')
+        parser.add_argument('--json', action='store_true', help="Imprime el reporte completo como JSON.")
+
+    def handle(self, *args, **options):
+        fecha_hasta = _fecha(options['hasta']) if options['hasta'] else timezone.localdate()
+        fecha_desde = _fecha(options['desde']) if options['desde'] else fecha_hasta - datetime.timedelta(days=29)
+        if fecha_desde > fecha_hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta.")
+        desde, hasta, granularidad = analitica.periodo(fecha_desde, fecha_hasta, options['granularidad'])
+
+        inicio = time.perf_counter()
+        reporte = analitica.calcular(desde, hasta, granularidad)
+        duracion = time.perf_counter() - inicio
+        total_dentro, _ = analitica.dentro_ahora(limite=0)
+
+        if options['json']:
+            datos = {**dataclasses.asdict(reporte), 'dentro_ahora': total_dentro}
+            self.stdout.write(json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False))
+            return
+        estadias = reporte.estadias
+        self.stdout.write(
+            f"{fecha_desde} a {fecha_hasta}: {reporte.movimientos} movimientos leídos en {duracion:.1f} s"
+        )
+        self.stdout.write(f"Dentro ahora: {total_dentro} vehículos")
+        self.stdout.write(
+            f"Estadías: {estadias.cantidad} | mediana {estadias.p50} h | p90 {estadias.p90} h | "
+            f"p99 {estadias.p99} h | ingresos sin salida {reporte.sin_salida}"
+        )
+        for ruta in reporte.rutas[:10]:
+            d = ruta['distribucion']
+            self.stdout.write(f"  {ruta['origen'] or '-'} → {ruta['destino'] or '-'}: {d.cantidad} (mediana {d.p50} h)")
+        self.stdout.write("Vueltas por destino:")
+        for vuelta in reporte.vueltas[:10]:
+            d = vuelta['distribucion']
+            self.stdout.write(f"  {vuelta['destino'] or '-'}: {d.cantidad} (mediana {d.p50} h)")
+        pico = max(reporte.ocupacion, key=lambda o: o['dentro'], default=None)
+        if pico:
+            self.stdout.write(f"Ocupación máxima al cierre: {pico['dentro']} ({pico['inicio']:%Y-%m-%d %H:%M})")
@@ -0,0 +1,371 @@
+"""Métricas por solicitud: consultas, tiempo de BD, plantillas y tamaño.
+
+``metricas_middleware`` mide cada solicitud y la etiqueta con el nombre de la
+ruta (``vehiculo_list``, ``movimiento_create``, ``admin:index``…):
+
+- duración total;
+- cantidad de consultas y tiempo en la base, con un ``execute_wrapper`` que
+  se instala en cada conexión al abrirse (cubre las réplicas y los hilos en
+  que corre el ORM de las vistas async);
+- tiempo de render de la plantilla de la respuesta (backend
+  ``PlantillasMedidas``; las filas precompiladas de gestion.fragmentos cuentan
+  como tiempo de la vista);
+- tamaño del cuerpo (no se mide en respuestas en streaming).
+
+Cada proceso acumula sus histogramas en memoria y los publica en la caché
+cada ``METRICAS_INTERVALO_PUBLICACION`` segundos; ``GET /metricas/`` suma los
+de todos los procesos (con Redis, todos los workers y servidores) en el
+formato de texto de Prometheus, junto con los aciertos y fallos de la caché
+de lectura (gestion.cache) en ``gestion_cache_total``.
+
+Presupuestos de consultas: ``PRESUPUESTO_CONSULTAS`` fija el máximo por
+nombre de ruta. Una solicitud que lo supera se registra en el log y en
+``gestion_presupuesto_excedido_total``; con ``PRESUPUESTO_CONSULTAS_ESTRICTO``
+(tests, CI) además lanza PresupuestoExcedido, así un N+1 nuevo hace fallar la
+prueba que recorre esa vista. ``presupuesto_consultas`` aplica un máximo a
+un bloque de código.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils.decorators import sync_and_async_middleware
+
+from .api import api_login_required
+from .cache import estadisticas as estadisticas_cache
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+BUCKETS_BYTES = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# Nombre → (descripción, límites superiores de los buckets)
+HISTOGRAMAS = {
+    'gestion_solicitud_segundos': ("Duración de la solicitud", BUCKETS_SEGUNDOS),
+    'gestion_consultas': ("Consultas SQL por solicitud", BUCKETS_CONSULTAS),
+    'gestion_bd_segundos': ("Tiempo en la base de datos por solicitud", BUCKETS_SEGUNDOS),
+    'gestion_plantilla_segundos': ("Tiempo de render de la plantilla por solicitud", BUCKETS_SEGUNDOS),
+    'gestion_respuesta_bytes': ("Tamaño del cuerpo de la respuesta", BUCKETS_BYTES),
+}
+EXCEDIDOS = 'gestion_presupuesto_excedido_total'
+CACHE_TOTAL = 'gestion_cache_total'
+
+CLAVE_PROCESOS = 'gestion:metricas:procesos'
+# Las métricas de un proceso que dejó de publicar (reiniciado) caducan
+TTL_PUBLICACION = 300
+VISTA_SIN_RUTA = 'sin_ruta'
+
+_medicion = ContextVar('gestion_medicion', default=None)
+
+
+class PresupuestoExcedido(AssertionError):
+    """Una vista o bloque hizo más consultas que su presupuesto."""
+
+
+@dataclass
+class Medicion:
+    """Acumulado de una solicitud o de un bloque ``presupuesto_consultas``.
+
+    Attributes:
+        consultas (int): Consultas SQL ejecutadas.
+        bd (float): Segundos dentro de la base de datos.
+        plantilla (float): Segundos renderizando plantillas.
+        padre (Medicion | None): Medición que la contiene, que también acumula.
+    """
+    consultas: int = 0
+    bd: float = 0.0
+    plantilla: float = 0.0
+    padre: 'Medicion | None' = None
+
+
+# --------------------------
+#   CONSULTAS Y PLANTILLAS
+# --------------------------
+def _medir_consulta(ejecutar, sql, params, many, contexto):
+    medicion = _medicion.get()
+    if medicion is None:
+        return ejecutar(sql, params, many, contexto)
+    inicio = time.perf_counter()
+    try:
+        return ejecutar(sql, params, many, contexto)
+    finally:
+        duracion = time.perf_counter() - inicio
+        while medicion is not None:
+            medicion.consultas += 1
+            medicion.bd += duracion
+            medicion = medicion.padre
+
+
+@receiver(connection_created)
+def instalar_medidor(sender, connection, **kwargs):
+    """Agrega el medidor de consultas a cada conexión nueva (una sola vez)."""
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_consulta)
+
+
+class _PlantillaMedida(Template):
+    def render(self, context=None, request=None):
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            duracion = time.perf_counter() - inicio
+            medicion = _medicion.get()
+            while medicion is not None:
+                medicion.plantilla += duracion
+                medicion = medicion.padre
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """Backend DjangoTemplates que mide el render de cada plantilla cargada.
+
+    Sólo se miden las plantillas obtenidas del backend (``render``,
+    ``render_to_string``); los ``{% include %}`` quedan dentro de su tiempo.
+    """
+
+    def from_string(self, template_code):
+        return _PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return _PlantillaMedida(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+@contextmanager
+def presupuesto_consultas(maximo, descripcion="bloque"):
+    """Falla si el bloque ejecuta más de ``maximo`` consultas.
+
+    A diferencia de ``assertNumQueries`` fija un máximo (no un número exacto)
+    y cuenta también las consultas de vistas async y de réplicas.
+
+    Args:
+        maximo (int): Consultas permitidas.
+        descripcion (str): Nombre del bloque para el mensaje de error.
+
+    Yields:
+        Medicion: Acumulado del bloque.
+
+    Raises:
+        PresupuestoExcedido: Si se superó el máximo.
+    """
+    medicion = Medicion(padre=_medicion.get())
+    ficha = _medicion.set(medicion)
+    try:
+        yield medicion
+    finally:
+        _medicion.reset(ficha)
+    if medicion.consultas > maximo:
+        raise PresupuestoExcedido(f"{descripcion}: {medicion.consultas} consultas (presupuesto {maximo}).")
+
+
+# --------------------------
+#        REGISTRO
+# --------------------------
+class Registro:
+    """Histogramas y contadores de un proceso, etiquetados por vista."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (métrica, vista) → [conteo por bucket…, conteo sobre el último, suma]
+        self.histogramas = {}
+        self.contadores = {}
+
+    def observar(self, metrica, vista, valor):
+        limites = HISTOGRAMAS[metrica][1]
+        with self._lock:
+            datos = self.histogramas.get((metrica, vista))
+            if datos is None:
+                datos = self.histogramas[(metrica, vista)] = [0] * (len(limites) + 1) + [0.0]
+            indice = next((i for i, limite in enumerate(limites) if valor <= limite), len(limites))
+            datos[indice] += 1
+            datos[-1] += valor
+
+    def incrementar(self, metrica, vista):
+        with self._lock:
+            self.contadores[(metrica, vista)] = self.contadores.get((metrica, vista), 0) + 1
+
+    def instantanea(self):
+        with self._lock:
+            return {
+                'histogramas': {clave: list(datos) for clave, datos in self.histogramas.items()},
+                'contadores': dict(self.contadores),
+                # (lectura, resultado) → lecturas de gestion.cache en este proceso
+                'cache': estadisticas_cache(),
+            }
+
+
+registro = Registro()
+_proceso = f"{socket.gethostname()}:{os.getpid()}"
+_publicado = 0.0
+
+
+def _clave_proceso(proceso):
+    return f'gestion:metricas:proceso:{proceso}'
+
+
+def publicar():
+    """Guarda la instantánea de este proceso en la caché compartida."""
+    global _publicado
+    _publicado = time.monotonic()
+    cache.set(_clave_proceso(_proceso), registro.instantanea(), TTL_PUBLICACION)
+    procesos = cache.get(CLAVE_PROCESOS) or set()
+    if _proceso not in procesos:
+        cache.set(CLAVE_PROCESOS, procesos | {_proceso}, None)
+
+
+def _publicacion_pendiente():
+    return time.monotonic() - _publicado >= settings.METRICAS_INTERVALO_PUBLICACION
+
+
+def instantanea_total():
+    """Suma las instantáneas publicadas por todos los procesos.
+
+    Returns:
+        dict: Con las claves ``histogramas``, ``contadores`` y ``cache`` de
+        Registro.instantanea.
+    """
+    publicar()
+    procesos = cache.get(CLAVE_PROCESOS) or set()
+    claves = {_clave_proceso(proceso): proceso for proceso in procesos}
+    publicadas = cache.get_many(claves)
+    vigentes = {claves[clave] for clave in publicadas}
+    if vigentes != procesos:
+        cache.set(CLAVE_PROCESOS, vigentes, None)
+    total = {'histogramas': {}, 'contadores': {}, 'cache': {}}
+    for instantanea in publicadas.values():
+        for clave, datos in instantanea['histogramas'].items():
+            acumulado = total['histogramas'].setdefault(clave, [0] * len(datos))
+            for i, valor in enumerate(datos):
+                acumulado[i] += valor
+        for clave, valor in instantanea['contadores'].items():
+            total['contadores'][clave] = total['contadores'].get(clave, 0) + valor
+        for clave, valor in instantanea.get('cache', {}).items():
+            total['cache'][clave] = total['cache'].get(clave, 0) + valor
+    return total
+
+
+def formato_prometheus(instantanea):
+    """Texto de exposición de Prometheus (versión 0.0.4) de una instantánea."""
+    lineas = []
+    for metrica, (descripcion, limites) in HISTOGRAMAS.items():
+        lineas += [f"# HELP {metrica} {descripcion}", f"# TYPE {metrica} histogram"]
+        for (nombre, vista), datos in sorted(instantanea['histogramas'].items()):
+            if nombre != metrica:
+                continue
+            acumulado = 0
+            for limite, conteo in zip([*limites, '+Inf'], datos[:-1]):
+                acumulado += conteo
+                lineas.append(f'{metrica}_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{metrica}_sum{{vista="{vista}"}} {datos[-1]:g}')
+            lineas.append(f'{metrica}_count{{vista="{vista}"}} {acumulado}')
+    lineas += [
+        f"# HELP {EXCEDIDOS} Solicitudes que superaron su presupuesto de consultas",
+        f"# TYPE {EXCEDIDOS} counter",
+    ]
+    for (_, vista), valor in sorted(instantanea['contadores'].items()):
+        lineas.append(f'{EXCEDIDOS}{{vista="{vista}"}} {valor}')
+    lineas += [
+        f"# HELP {CACHE_TOTAL} Lecturas de la caché de vehículos y tokens por resultado",
+        f"# TYPE {CACHE_TOTAL} counter",
+    ]
+    for (lectura, resultado), valor in sorted(instantanea.get('cache', {}).items()):
+        lineas.append(f'{CACHE_TOTAL}{{lectura="{lectura}",resultado="{resultado}"}} {valor}')
+    return '\n'.join(lineas) + '\n'
+
+
+@api_login_required
+def metricas_prometheus(request):
+    """Expone las métricas agregadas de todos los procesos (sólo staff).
+
+    Prometheus se autentica con el token de un usuario staff
+    (``authorization: {type: Token, credentials: <clave>}`` en scrape_config).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        HttpResponse: Texto en formato de exposición de Prometheus.
+    """
+    if not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        formato_prometheus(instantanea_total()), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+# --------------------------
+#        MIDDLEWARE
+# --------------------------
+def _registrar(request, respuesta, medicion, duracion):
+    coincidencia = getattr(request, 'resolver_match', None)
+    vista = coincidencia.view_name if coincidencia else VISTA_SIN_RUTA
+    registro.observar('gestion_solicitud_segundos', vista, duracion)
+    registro.observar('gestion_consultas', vista, medicion.consultas)
+    registro.observar('gestion_bd_segundos', vista, medicion.bd)
+    registro.observar('gestion_plantilla_segundos', vista, medicion.plantilla)
+    if not respuesta.streaming:
+        registro.observar('gestion_respuesta_bytes', vista, len(respuesta.content))
+
+    presupuesto = settings.PRESUPUESTO_CONSULTAS.get(vista)
+    if presupuesto is not None and medicion.consultas > presupuesto:
+        registro.incrementar(EXCEDIDOS, vista)
+        mensaje = f"{vista}: {medicion.consultas} consultas (presupuesto {presupuesto}) en {request.path}"
+        if settings.PRESUPUESTO_CONSULTAS_ESTRICTO:
+            raise PresupuestoExcedido(mensaje)
+        logger.warning(mensaje)
+
+
+@sync_and_async_middleware
+def metricas_middleware(get_response):
+    """Mide cada solicitud y la registra por nombre de ruta.
+
+    Args:
+        get_response (Callable): Siguiente capa (sync o async).
+
+    Returns:
+        Callable: Middleware del mismo tipo que ``get_response``.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            medicion = Medicion(padre=_medicion.get())
+            ficha = _medicion.set(medicion)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await get_response(request)
+            finally:
+                _medicion.reset(ficha)
+            _registrar(request, respuesta, medicion, time.perf_counter() - inicio)
+            if _publicacion_pendiente():
+                await sync_to_async(publicar)()
+            return respuesta
+    else:
+        def middleware(request):
+            medicion = Medicion(padre=_medicion.get())
+            ficha = _medicion.set(medicion)
+            inicio = time.perf_counter()
+            try:
+                respuesta = get_response(request)
+            finally:
+                _medicion.reset(ficha)
+            _registrar(request, respuesta, medicion, time.perf_counter() - inicio)
+            if _publicacion_pendiente():
+                publicar()
+            return respuesta
+    return middleware
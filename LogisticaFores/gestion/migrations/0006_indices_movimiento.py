@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_alter_movimientocarga_descripcion_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='movimientocarga',
+            options={'ordering': ['-fecha_hora', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['-fecha_hora', '-id'], name='mov_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['vehiculo', 'fecha_hora'], name='mov_vehiculo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['tipo_movimiento', 'fecha_hora'], name='mov_tipo_fecha_idx'),
+        ),
+    ]
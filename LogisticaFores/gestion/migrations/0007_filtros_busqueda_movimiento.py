@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+from gestion.busqueda import crear_indice_texto, eliminar_indice_texto
+
+
+def crear_busqueda_descripcion(apps, schema_editor):
+    crear_indice_texto(schema_editor, 'movimiento_carga', 'descripcion')
+
+
+def eliminar_busqueda_descripcion(apps, schema_editor):
+    eliminar_indice_texto(schema_editor, 'movimiento_carga')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_indices_movimiento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['origen', 'fecha_hora'], name='mov_origen_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['destino', 'fecha_hora'], name='mov_destino_fecha_idx'),
+        ),
+        migrations.RunPython(crear_busqueda_descripcion, eliminar_busqueda_descripcion),
+    ]
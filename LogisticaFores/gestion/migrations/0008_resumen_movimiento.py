@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_filtros_busqueda_movimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='ultimo_movimiento',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Último movimiento registrado del vehículo', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gestion.movimientocarga'),
+        ),
+        migrations.CreateModel(
+            name='ResumenMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(help_text='Día de los movimientos')),
+                ('tipo_movimiento', models.CharField(choices=[('INGRESO', 'Ingreso'), ('SALIDA', 'Salida')], help_text='Tipo de movimiento: Ingreso o Salida', max_length=10)),
+                ('cantidad', models.PositiveIntegerField(default=0, help_text='Cantidad de movimientos')),
+                ('vehiculo', models.ForeignKey(help_text='Vehículo resumido', on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='gestion.vehiculo')),
+            ],
+            options={
+                'db_table': 'resumen_movimiento',
+                'indexes': [models.Index(fields=['dia', 'tipo_movimiento'], name='resumen_dia_tipo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('vehiculo', 'dia', 'tipo_movimiento'), name='resumen_vehiculo_dia_tipo_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_resumen_movimiento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTabla',
+            fields=[
+                ('tabla', models.CharField(help_text='Nombre lógico de la tabla', max_length=50, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0, help_text='Contador de cambios')),
+                ('actualizado', models.DateTimeField(help_text='Fecha y hora del último cambio')),
+            ],
+            options={
+                'db_table': 'version_tabla',
+            },
+        ),
+        migrations.CreateModel(
+            name='TokenApi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text='Identificación del cliente (Ej: Romana Planta A)', max_length=100)),
+                ('clave_hash', models.CharField(editable=False, max_length=64, unique=True)),
+                ('activo', models.BooleanField(default=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(help_text='Usuario en cuyo nombre actúa el token', on_delete=django.db.models.deletion.CASCADE, related_name='tokens_api', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'token_api',
+            },
+        ),
+    ]
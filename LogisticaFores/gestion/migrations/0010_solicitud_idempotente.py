@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0009_api_version_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(help_text='Valor de la cabecera Idempotency-Key', max_length=100)),
+                ('huella', models.CharField(help_text='SHA-256 del cuerpo de la solicitud', max_length=64)),
+                ('estado', models.PositiveSmallIntegerField(default=200, help_text='Código HTTP de la respuesta')),
+                ('respuesta', models.JSONField(default=dict, help_text='Cuerpo de la respuesta')),
+                ('creado', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('usuario', models.ForeignKey(help_text='Usuario que envió la solicitud', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'solicitud_idempotente',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'clave'), name='solicitud_usuario_clave_uniq')],
+            },
+        ),
+    ]
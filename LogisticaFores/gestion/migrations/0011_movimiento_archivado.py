@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def comprimir_archivo(apps, schema_editor):
+    # Sólo MySQL (InnoDB con innodb_file_per_table): el archivo se lee poco
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE movimiento_archivado ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_solicitud_idempotente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tipo_movimiento', models.CharField(choices=[('INGRESO', 'Ingreso'), ('SALIDA', 'Salida')], max_length=10)),
+                ('fecha_hora', models.DateTimeField()),
+                ('origen', models.CharField(blank=True, max_length=100)),
+                ('destino', models.CharField(blank=True, max_length=100)),
+                ('descripcion', models.TextField(blank=True)),
+                ('archivado', models.DateTimeField(auto_now_add=True, help_text='Fecha en que se archivó')),
+                ('vehiculo', models.ForeignKey(help_text='Vehículo que realizó el movimiento', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gestion.vehiculo')),
+            ],
+            options={
+                'db_table': 'movimiento_archivado',
+                'ordering': ['-fecha_hora', '-id'],
+                'indexes': [models.Index(fields=['-fecha_hora', '-id'], name='arch_fecha_id_idx'), models.Index(fields=['vehiculo', 'fecha_hora'], name='arch_vehiculo_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(comprimir_archivo, migrations.RunPython.noop),
+    ]
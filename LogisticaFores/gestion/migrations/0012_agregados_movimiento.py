@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-17 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_movimiento_archivado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregadoPendiente',
+            fields=[
+                ('hora', models.DateTimeField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'db_table': 'agregado_pendiente',
+            },
+        ),
+        migrations.CreateModel(
+            name='MarcaAgregado',
+            fields=[
+                ('nombre', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('ultimo_id', models.PositiveBigIntegerField(default=0, help_text='Mayor id de movimiento procesado')),
+                ('actualizado', models.DateTimeField(blank=True, help_text='Fecha y hora del último refresco', null=True)),
+            ],
+            options={
+                'db_table': 'marca_agregado',
+            },
+        ),
+        migrations.CreateModel(
+            name='AgregadoMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidad', models.CharField(choices=[('hora', 'Hora'), ('dia', 'Día')], max_length=4)),
+                ('inicio', models.DateTimeField(help_text='Inicio de la hora o del día local')),
+                ('tipo_movimiento', models.CharField(choices=[('INGRESO', 'Ingreso'), ('SALIDA', 'Salida')], max_length=10)),
+                ('origen', models.CharField(blank=True, max_length=100)),
+                ('destino', models.CharField(blank=True, max_length=100)),
+                ('cantidad', models.PositiveIntegerField(default=0, help_text='Cantidad de movimientos')),
+            ],
+            options={
+                'db_table': 'agregado_movimiento',
+                'constraints': [models.UniqueConstraint(fields=('granularidad', 'inicio', 'tipo_movimiento', 'origen', 'destino'), name='agregado_intervalo_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,160 @@
+# Generated by Django 5.2.8 on 2026-10-17 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Trim
+
+from gestion.busqueda import crear_indice_texto
+
+# Filas convertidas por transacción
+TAMANO_LOTE = 5000
+MODELOS = ('MovimientoCarga', 'MovimientoArchivado', 'AgregadoMovimiento')
+
+
+def _lotes(modelo, alias):
+    """Rangos [primer id, último id] de a TAMANO_LOTE filas."""
+    ultimo = None
+    while True:
+        ids = modelo.objects.using(alias).order_by('pk')
+        if ultimo is not None:
+            ids = ids.filter(pk__gt=ultimo)
+        ids = list(ids.values_list('pk', flat=True)[:TAMANO_LOTE])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        ultimo = ids[-1]
+
+
+def normalizar_ubicaciones(apps, schema_editor):
+    """Registra cada nombre distinto en Ubicacion y apunta las filas a su id.
+
+    Por lotes de ids, cada uno en su propia transacción: sólo se insertan los
+    nombres del lote que aún no existen.
+    """
+    Ubicacion = apps.get_model('gestion', 'Ubicacion')
+    alias = schema_editor.connection.alias
+    conocidos = set()
+    for nombre_modelo in MODELOS:
+        modelo = apps.get_model('gestion', nombre_modelo)
+        for primero, ultimo in _lotes(modelo, alias):
+            lote = modelo.objects.using(alias).filter(pk__gte=primero, pk__lte=ultimo)
+            with transaction.atomic(using=alias):
+                nombres = set()
+                for origen, destino in lote.values_list('origen', 'destino').distinct():
+                    nombres.update((origen.strip(), destino.strip()))
+                nuevos = nombres - conocidos - {''}
+                Ubicacion.objects.using(alias).bulk_create(
+                    [Ubicacion(nombre=n) for n in sorted(nuevos)], ignore_conflicts=True
+                )
+                conocidos |= nuevos
+                lote.update(**{
+                    f'{campo}_ubicacion': Subquery(
+                        Ubicacion.objects.using(alias).filter(nombre=Trim(OuterRef(campo))).values('pk')[:1]
+                    )
+                    for campo in ('origen', 'destino')
+                })
+
+
+def copiar_nombres(apps, schema_editor):
+    """Inverso: vuelve a escribir el nombre en las columnas de texto."""
+    Ubicacion = apps.get_model('gestion', 'Ubicacion')
+    alias = schema_editor.connection.alias
+    for nombre_modelo in MODELOS:
+        modelo = apps.get_model('gestion', nombre_modelo)
+        for primero, ultimo in _lotes(modelo, alias):
+            with transaction.atomic(using=alias):
+                modelo.objects.using(alias).filter(pk__gte=primero, pk__lte=ultimo).update(**{
+                    campo: Coalesce(Subquery(
+                        Ubicacion.objects.using(alias).filter(pk=OuterRef(f'{campo}_ubicacion')).values('nombre')[:1]
+                    ), Value(''))
+                    for campo in ('origen', 'destino')
+                })
+
+
+def recrear_busqueda_descripcion(apps, schema_editor):
+    # SQLite reconstruye movimiento_carga al cambiar columnas y pierde los triggers FTS5
+    if schema_editor.connection.vendor == 'sqlite':
+        crear_indice_texto(schema_editor, 'movimiento_carga', 'descripcion')
+
+
+def _ubicacion(**opciones):
+    return models.ForeignKey(
+        null=True, blank=True, on_delete=django.db.models.deletion.PROTECT,
+        related_name='+', to='gestion.ubicacion', **opciones,
+    )
+
+
+def _operaciones_campos():
+    opciones = {
+        'movimientocarga': {'db_constraint': False, 'db_index': False},
+        'movimientoarchivado': {},
+        'agregadomovimiento': {'db_index': False},
+    }
+    agregar, quitar, renombrar = [], [], []
+    for modelo, extra in opciones.items():
+        for campo in ('origen', 'destino'):
+            if modelo == 'movimientocarga':
+                extra = {**extra, 'help_text': f'Lugar de {campo}'}
+            agregar.append(migrations.AddField(
+                model_name=modelo, name=f'{campo}_ubicacion', field=_ubicacion(**extra),
+            ))
+            quitar.append(migrations.RemoveField(model_name=modelo, name=campo))
+            renombrar.append(migrations.RenameField(
+                model_name=modelo, old_name=f'{campo}_ubicacion', new_name=campo,
+            ))
+    return agregar, quitar, renombrar
+
+
+AGREGAR, QUITAR, RENOMBRAR = _operaciones_campos()
+
+
+class Migration(migrations.Migration):
+
+    # Cada lote de la conversión se confirma por separado
+    atomic = False
+
+    dependencies = [
+        ('gestion', '0012_agregados_movimiento'),
+    ]
+
+    operations = [
+        # Al revertir, último paso: las columnas de texto vuelven con otra reconstrucción
+        migrations.RunPython(migrations.RunPython.noop, recrear_busqueda_descripcion),
+        migrations.CreateModel(
+            name='Ubicacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text='Nombre del lugar (Ej: Planta Arauco)', max_length=100, unique=True)),
+            ],
+            options={
+                'db_table': 'ubicacion',
+                'ordering': ['nombre'],
+            },
+        ),
+        # Antes de la conversión: al revertir, la unicidad sobre los textos
+        # vuelve recién con los nombres ya copiados
+        migrations.RemoveIndex(model_name='movimientocarga', name='mov_origen_fecha_idx'),
+        migrations.RemoveIndex(model_name='movimientocarga', name='mov_destino_fecha_idx'),
+        migrations.RemoveConstraint(model_name='agregadomovimiento', name='agregado_intervalo_uniq'),
+        *AGREGAR,
+        migrations.RunPython(normalizar_ubicaciones, copiar_nombres),
+        *QUITAR,
+        *RENOMBRAR,
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['origen', 'fecha_hora'], name='mov_origen_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocarga',
+            index=models.Index(fields=['destino', 'fecha_hora'], name='mov_destino_fecha_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='agregadomovimiento',
+            constraint=models.UniqueConstraint(
+                fields=('granularidad', 'inicio', 'tipo_movimiento', 'origen', 'destino'),
+                name='agregado_intervalo_uniq',
+            ),
+        ),
+        migrations.RunPython(recrear_busqueda_descripcion, migrations.RunPython.noop),
+    ]
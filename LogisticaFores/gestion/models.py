@@ -2,15 +2,24 @@
 
 Este módulo define los modelos principales de la aplicación:
 - Vehiculo: Registra vehículos de transporte (camiones, camionetas, maquinaria).
+- Ubicacion: Lugares de origen y destino, referenciados por id desde los movimientos.
 - MovimientoCarga: Registra ingresos/salidas de cargas con referencias a vehículos.
+- ResumenMovimiento: Conteo precalculado de movimientos por vehículo, día y tipo.
+- VersionTabla: Contador de cambios por tabla (ETag / caché de las lecturas).
+- TokenApi: Credenciales de la API JSON para terminales y herramientas BI.
+- SolicitudIdempotente: Respuestas guardadas por clave de idempotencia de la API.
 
 Todos los modelos incluyen validaciones de datos críticos y constraints de base de datos.
 """
 
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
+import hashlib
 import re
 
+from .busqueda import BusquedaTexto
+
 def validar_patente(valor):
     """Valida el formato de patente chilena nueva: 4 letras + 2 números (Ej: ABCD12).
     
@@ -47,6 +56,16 @@ class Vehiculo(models.Model):
     modelo = models.CharField(max_length=50, blank=True, help_text="Modelo del vehículo")
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, help_text="Tipo de vehículo")
     año = models.PositiveIntegerField(help_text="Año de fabricación")
+    # Puntero al movimiento más reciente, mantenido por gestion.resumen
+    ultimo_movimiento = models.ForeignKey(
+        'MovimientoCarga',
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        help_text="Último movimiento registrado del vehículo"
+    )
 
     class Meta:
         db_table = 'vehiculo'
@@ -57,10 +76,42 @@ class Vehiculo(models.Model):
         self.patente = self.patente.upper()
         validar_patente(self.patente)
 
+    def save(self, **kwargs):
+        """Guarda el vehículo; al editarlo no escribe ``ultimo_movimiento``.
+
+        El puntero sólo se cambia con UPDATE directos (gestion.resumen): una
+        instancia leída antes de que se registrara un movimiento lo tiene
+        desactualizado y, al guardarla (formulario, admin), lo pisaría.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'ultimo_movimiento'
+            ]
+        super().save(**kwargs)
+
     def __str__(self):
         return f"{self.patente} - {self.tipo}"
 
 
+class Ubicacion(models.Model):
+    """Lugar de origen o destino de los movimientos (predio, planta, puerto).
+
+    Cada nombre se guarda una sola vez; los movimientos, el archivo y los
+    agregados lo referencian por id. La tabla completa se lee desde la caché
+    (ver gestion.ubicaciones).
+    """
+
+    nombre = models.CharField(max_length=100, unique=True, help_text="Nombre del lugar (Ej: Planta Arauco)")
+
+    class Meta:
+        db_table = 'ubicacion'
+        ordering = ['nombre']
+
+    def __str__(self):
+        return self.nombre
+
+
 class MovimientoCarga(models.Model):
     """Modelo de movimientos de carga (ingresos/salidas).
     
@@ -85,13 +136,284 @@ class MovimientoCarga(models.Model):
         help_text="Tipo de movimiento: Ingreso o Salida"
     )
     fecha_hora = models.DateTimeField(help_text="Fecha y hora del movimiento")
-    origen = models.CharField(max_length=100, blank=True, help_text="Lugar de origen")
-    destino = models.CharField(max_length=100, blank=True, help_text="Lugar de destino")
+    # Sin FOREIGN KEY en la base: MySQL no las admite en tablas particionadas
+    # (gestion.particiones). Los índices (origen|destino, fecha_hora) de Meta
+    # cubren los filtros y las búsquedas por ubicación.
+    origen = models.ForeignKey(
+        Ubicacion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+        db_index=False,
+        help_text="Lugar de origen"
+    )
+    destino = models.ForeignKey(
+        Ubicacion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+        db_index=False,
+        help_text="Lugar de destino"
+    )
     descripcion = models.TextField(blank=True, help_text="Descripción detallada del movimiento")
 
     class Meta:
         db_table = 'movimiento_carga'
-        ordering = ['-fecha_hora']
+        # 'id' desempata movimientos con la misma fecha y hace el orden estable
+        ordering = ['-fecha_hora', '-id']
+        indexes = [
+            # Listado principal y paginación por cursor sobre (fecha_hora, id)
+            models.Index(fields=['-fecha_hora', '-id'], name='mov_fecha_id_idx'),
+            # Historial de un vehículo ordenado por fecha
+            models.Index(fields=['vehiculo', 'fecha_hora'], name='mov_vehiculo_fecha_idx'),
+            # Filtro por tipo (admin list_filter) ordenado por fecha
+            models.Index(fields=['tipo_movimiento', 'fecha_hora'], name='mov_tipo_fecha_idx'),
+            # Filtros del listado por origen/destino ordenados por fecha
+            models.Index(fields=['origen', 'fecha_hora'], name='mov_origen_fecha_idx'),
+            models.Index(fields=['destino', 'fecha_hora'], name='mov_destino_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehiculo.patente} | {self.tipo_movimiento} | {self.fecha_hora}"
+
+
+class ResumenMovimiento(models.Model):
+    """Cantidad de movimientos por vehículo, día y tipo.
+    
+    Tabla precalculada que se mantiene de forma incremental al crear, editar o
+    eliminar movimientos (ver gestion.resumen) y que permite responder
+    "cuántos ingresos/salidas hizo el camión X hoy o este mes" sin agregar
+    sobre movimiento_carga. El día corresponde a la zona horaria TIME_ZONE.
+    """
+
+    vehiculo = models.ForeignKey(
+        Vehiculo,
+        on_delete=models.CASCADE,
+        related_name='resumenes',
+        help_text="Vehículo resumido"
+    )
+    dia = models.DateField(help_text="Día de los movimientos")
+    tipo_movimiento = models.CharField(
+        max_length=10,
+        choices=MovimientoCarga.MOVIMIENTO_CHOICES,
+        help_text="Tipo de movimiento: Ingreso o Salida"
+    )
+    cantidad = models.PositiveIntegerField(default=0, help_text="Cantidad de movimientos")
+
+    class Meta:
+        db_table = 'resumen_movimiento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vehiculo', 'dia', 'tipo_movimiento'], name='resumen_vehiculo_dia_tipo_uniq'
+            ),
+        ]
+        indexes = [
+            # Totales de la flota por día
+            models.Index(fields=['dia', 'tipo_movimiento'], name='resumen_dia_tipo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vehiculo_id} | {self.dia} | {self.tipo_movimiento}: {self.cantidad}"
+
+
+class VersionTabla(models.Model):
+    """Versión de los datos de una tabla, incrementada en cada escritura.
+    
+    Permite saber si una tabla cambió con una lectura por clave primaria
+    (p. ej. para responder 304 en la API) en lugar de consultar la tabla.
+    La mantiene gestion.versiones a partir de las señales de los modelos y de
+    los flujos masivos.
+    """
+
+    tabla = models.CharField(max_length=50, primary_key=True, help_text="Nombre lógico de la tabla")
+    version = models.PositiveBigIntegerField(default=0, help_text="Contador de cambios")
+    actualizado = models.DateTimeField(help_text="Fecha y hora del último cambio")
+
+    class Meta:
+        db_table = 'version_tabla'
+
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
+
+
+class TokenApi(models.Model):
+    """Token de acceso a la API JSON (cabecera ``Authorization: Token <clave>``).
+    
+    Sólo se guarda el SHA-256 de la clave; la clave en claro se muestra una
+    única vez al crearla (comando crear_token_api).
+    """
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tokens_api',
+        help_text="Usuario en cuyo nombre actúa el token"
+    )
+    nombre = models.CharField(max_length=100, help_text="Identificación del cliente (Ej: Romana Planta A)")
+    clave_hash = models.CharField(max_length=64, unique=True, editable=False)
+    activo = models.BooleanField(default=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'token_api'
+
+    @staticmethod
+    def hash_clave(clave):
+        """Devuelve el SHA-256 hexadecimal de una clave en claro."""
+        return hashlib.sha256(clave.encode()).hexdigest()
+
+    def __str__(self):
+        return f"{self.nombre} ({self.usuario})"
+
+
+class SolicitudIdempotente(models.Model):
+    """Resultado de una escritura de la API asociado a su clave de idempotencia.
+    
+    Si un cliente reintenta una solicitud con la misma cabecera
+    ``Idempotency-Key`` se devuelve la respuesta guardada en lugar de volver a
+    insertar los movimientos.
+    """
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Usuario que envió la solicitud"
+    )
+    clave = models.CharField(max_length=100, help_text="Valor de la cabecera Idempotency-Key")
+    huella = models.CharField(max_length=64, help_text="SHA-256 del cuerpo de la solicitud")
+    estado = models.PositiveSmallIntegerField(default=200, help_text="Código HTTP de la respuesta")
+    respuesta = models.JSONField(default=dict, help_text="Cuerpo de la respuesta")
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'solicitud_idempotente'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='solicitud_usuario_clave_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} | {self.clave}"
+
+
+class MovimientoArchivado(models.Model):
+    """Movimiento de carga antiguo trasladado al archivo.
+
+    Lo llena el comando ``archivar_movimientos`` (gestion.archivo) con el mismo
+    id y los mismos datos que tenía en MovimientoCarga. Es de sólo lectura y se
+    consulta desde el listado de movimientos con ``?archivo=1``. En MySQL la
+    tabla usa ROW_FORMAT=COMPRESSED.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    vehiculo = models.ForeignKey(
+        Vehiculo,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Vehículo que realizó el movimiento"
+    )
+    tipo_movimiento = models.CharField(max_length=10, choices=MovimientoCarga.MOVIMIENTO_CHOICES)
+    fecha_hora = models.DateTimeField()
+    origen = models.ForeignKey(Ubicacion, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    destino = models.ForeignKey(Ubicacion, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    descripcion = models.TextField(blank=True)
+    archivado = models.DateTimeField(auto_now_add=True, help_text="Fecha en que se archivó")
+
+    class Meta:
+        db_table = 'movimiento_archivado'
+        ordering = ['-fecha_hora', '-id']
+        indexes = [
+            models.Index(fields=['-fecha_hora', '-id'], name='arch_fecha_id_idx'),
+            models.Index(fields=['vehiculo', 'fecha_hora'], name='arch_vehiculo_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vehiculo_id} | {self.tipo_movimiento} | {self.fecha_hora} (archivado)"
+
+
+
+class AgregadoMovimiento(models.Model):
+    """Cantidad de movimientos por hora o día, tipo, origen y destino.
+
+    Tabla de totales para los reportes de gestión (ver gestion.agregados). Las
+    filas por hora se calculan desde movimiento_carga y el archivo; las
+    filas por día, sumando las horas del día local (TIME_ZONE). Las refresca
+    el comando ``actualizar_agregados`` sólo en los intervalos que cambiaron.
+    Origen y destino vacíos quedan en NULL, que el índice único no compara;
+    la unicidad de esas filas la asegura el refresco, que es el único que
+    escribe y corre serializado.
+    """
+
+    GRANULARIDAD_CHOICES = [
+        ('hora', 'Hora'),
+        ('dia', 'Día'),
+    ]
+
+    granularidad = models.CharField(max_length=4, choices=GRANULARIDAD_CHOICES)
+    inicio = models.DateTimeField(help_text="Inicio de la hora o del día local")
+    tipo_movimiento = models.CharField(max_length=10, choices=MovimientoCarga.MOVIMIENTO_CHOICES)
+    origen = models.ForeignKey(
+        Ubicacion, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False,
+    )
+    destino = models.ForeignKey(
+        Ubicacion, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False,
+    )
+    cantidad = models.PositiveIntegerField(default=0, help_text="Cantidad de movimientos")
+
+    class Meta:
+        db_table = 'agregado_movimiento'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularidad', 'inicio', 'tipo_movimiento', 'origen', 'destino'],
+                name='agregado_intervalo_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.granularidad} {self.inicio} | {self.tipo_movimiento} | "
+            f"{self.origen_id} → {self.destino_id}: {self.cantidad}"
+        )
+
+
+class AgregadoPendiente(models.Model):
+    """Hora (UTC) de agregados que debe recalcularse.
+
+    La marcan las señales al editar o eliminar un movimiento (la hora previa y
+    la nueva) y la eliminación masiva de vehículos; las altas las detecta la
+    marca de agua de MarcaAgregado. ``actualizar_agregados`` las consume.
+    """
+
+    hora = models.DateTimeField(primary_key=True)
+
+    class Meta:
+        db_table = 'agregado_pendiente'
+
+    def __str__(self):
+        return f"{self.hora:%Y-%m-%d %H:00}"
+
+
+class MarcaAgregado(models.Model):
+    """Marca de agua del último refresco de agregados.
+
+    ``ultimo_id`` es el mayor id de movimiento_carga incluido en los
+    agregados: el siguiente refresco sólo revisa los ids posteriores.
+    """
+
+    nombre = models.CharField(max_length=50, primary_key=True)
+    ultimo_id = models.PositiveBigIntegerField(default=0, help_text="Mayor id de movimiento procesado")
+    actualizado = models.DateTimeField(null=True, blank=True, help_text="Fecha y hora del último refresco")
+
+    class Meta:
+        db_table = 'marca_agregado'
+
+    def __str__(self):
+        return f"{self.nombre}: id {self.ultimo_id}"
+
+
+# Búsqueda de texto completo sobre la descripción (FULLTEXT en MySQL, FTS5 en SQLite)
+MovimientoCarga._meta.get_field('descripcion').register_lookup(BusquedaTexto)
@@ -0,0 +1,244 @@
+"""Paginación por cursor (keyset) para los listados de la aplicación.
+
+A diferencia de la paginación por OFFSET, cada página se obtiene filtrando
+por la clave de ordenamiento del último registro visto, por lo que la base de
+datos sólo recorre el índice desde ese punto. La latencia se mantiene constante
+sin importar cuán profunda sea la página solicitada.
+
+El cursor es un token opaco (JSON en base64 url-safe) con los valores de las
+columnas de ordenamiento del registro frontera.
+"""
+
+import base64
+import datetime
+import json
+from dataclasses import dataclass, field
+from functools import reduce
+import operator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Tamaño de página por defecto y límite superior aceptado desde la URL (?n=)
+TAMANO_PAGINA_DEFECTO = 50
+TAMANO_PAGINA_MAXIMO = 200
+
+
+@dataclass
+class PaginaKeyset:
+    """Resultado de una consulta paginada por cursor.
+
+    Attributes:
+        items (list): Registros de la página, en el orden del listado.
+        siguiente (str | None): Cursor para la página siguiente, si existe.
+        anterior (str | None): Cursor para la página anterior, si existe.
+        tamano (int): Tamaño de página efectivamente aplicado.
+    """
+    items: list = field(default_factory=list)
+    siguiente: str | None = None
+    anterior: str | None = None
+    tamano: int = TAMANO_PAGINA_DEFECTO
+
+
+class CodificadorJSON(DjangoJSONEncoder):
+    """Codificador JSON que conserva los microsegundos de las fechas.
+
+    DjangoJSONEncoder trunca a milisegundos, lo que haría que un cursor no
+    coincida exactamente con el valor almacenado y se salten registros.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(valores):
+    """Codifica los valores de ordenamiento de un registro como cursor opaco.
+
+    Args:
+        valores (list): Valores de las columnas de ordenamiento.
+
+    Returns:
+        str: Cursor en base64 url-safe sin relleno.
+    """
+    crudo = json.dumps(valores, cls=CodificadorJSON, separators=(',', ':'))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, campos):
+    """Decodifica un cursor y convierte cada valor al tipo Python de su campo.
+
+    Args:
+        cursor (str): Cursor generado por codificar_cursor.
+        modelo (Model): Modelo sobre el que se pagina.
+        campos (list[str]): Campos de ordenamiento sin prefijo '-'.
+
+    Returns:
+        list: Valores tipados en el mismo orden que ``campos``.
+
+    Raises:
+        ValueError: Si el cursor está mal formado o no corresponde a los campos.
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Cursor inválido.") from exc
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        raise ValueError("Cursor inválido.")
+    try:
+        return [modelo._meta.get_field(c).to_python(v) for c, v in zip(campos, valores)]
+    except ValidationError as exc:
+        raise ValueError("Cursor inválido.") from exc
+
+
+def filtro_keyset(campos, descendentes, valores, hacia_atras):
+    """Construye el filtro ``(c1, c2, ...) > / < (v1, v2, ...)`` como Q.
+
+    Se antepone una condición de rango sobre la primera columna para que el
+    optimizador pueda usar el índice compuesto como rango y no como escaneo.
+
+    Args:
+        campos (list[str]): Campos de ordenamiento sin prefijo '-'.
+        descendentes (list[bool]): Si cada campo se ordena descendente.
+        valores (list): Valores del registro frontera.
+        hacia_atras (bool): True para obtener los registros previos al cursor.
+
+    Returns:
+        Q: Condición que selecciona los registros posteriores (o previos).
+    """
+    condiciones = []
+    for i, (campo, desc) in enumerate(zip(campos, descendentes)):
+        menor = desc != hacia_atras
+        cond = Q(**{f"{campo}__{'lt' if menor else 'gt'}": valores[i]})
+        for previo, valor in zip(campos[:i], valores[:i]):
+            cond &= Q(**{previo: valor})
+        condiciones.append(cond)
+    filtro = reduce(operator.or_, condiciones)
+    if len(campos) > 1:
+        menor = descendentes[0] != hacia_atras
+        filtro = Q(**{f"{campos[0]}__{'lte' if menor else 'gte'}": valores[0]}) & filtro
+    return filtro
+
+
+def tamano_pagina(valor):
+    """Normaliza el tamaño de página recibido por parámetro GET.
+
+    Args:
+        valor (str | None): Valor crudo de ``?n=``.
+
+    Returns:
+        int: Tamaño entre 1 y TAMANO_PAGINA_MAXIMO.
+    """
+    try:
+        n = int(valor)
+    except (TypeError, ValueError):
+        return TAMANO_PAGINA_DEFECTO
+    return max(1, min(n, TAMANO_PAGINA_MAXIMO))
+
+
+def _preparar_keyset(queryset, orden, despues, antes, tamano):
+    """Arma la consulta de una página (sin ejecutarla).
+
+    Returns:
+        tuple: ``(consulta, campos, valores, hacia_atras)``; ``consulta`` trae
+        hasta ``tamano + 1`` registros para saber si hay más.
+    """
+    campos = [c.lstrip('-') for c in orden]
+    descendentes = [c.startswith('-') for c in orden]
+    modelo = queryset.model
+
+    hacia_atras = False
+    cursor = despues or antes
+    valores = None
+    if cursor:
+        try:
+            valores = decodificar_cursor(cursor, modelo, campos)
+            hacia_atras = not despues
+        except ValueError:
+            valores = None
+
+    if hacia_atras:
+        orden_consulta = [c[1:] if c.startswith('-') else f'-{c}' for c in orden]
+    else:
+        orden_consulta = list(orden)
+
+    qs = queryset.order_by(*orden_consulta)
+    if valores is not None:
+        qs = qs.filter(filtro_keyset(campos, descendentes, valores, hacia_atras))
+    return qs[:tamano + 1], campos, valores, hacia_atras
+
+
+def _armar_pagina(filas, tamano, campos, valores, hacia_atras):
+    """Recorta las filas leídas y calcula los cursores de navegación."""
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if hacia_atras:
+        filas.reverse()
+
+    def clave(obj):
+        if isinstance(obj, dict):
+            return [obj[c] for c in campos]
+        return [getattr(obj, c) for c in campos]
+
+    pagina = PaginaKeyset(items=filas, tamano=tamano)
+    if filas:
+        if hacia_atras:
+            pagina.siguiente = codificar_cursor(clave(filas[-1]))
+            pagina.anterior = codificar_cursor(clave(filas[0])) if hay_mas else None
+        else:
+            pagina.siguiente = codificar_cursor(clave(filas[-1])) if hay_mas else None
+            pagina.anterior = codificar_cursor(clave(filas[0])) if valores is not None else None
+    return pagina
+
+
+def paginar_keyset(queryset, orden, despues=None, antes=None, tamano=TAMANO_PAGINA_DEFECTO):
+    """Obtiene una página de ``queryset`` usando paginación por cursor.
+
+    Args:
+        queryset (QuerySet): Consulta base (filtros, select_related, etc.).
+            Puede ser de instancias o de ``values()``; en ese caso los campos
+            de ``orden`` deben estar entre las columnas seleccionadas.
+        orden (list[str]): Ordenamiento total, p. ej. ['-fecha_hora', '-id'].
+            La última columna debe ser única para que el orden sea estable.
+        despues (str | None): Cursor; devuelve los registros posteriores a él.
+        antes (str | None): Cursor; devuelve los registros anteriores a él.
+        tamano (int): Cantidad máxima de registros por página.
+
+    Returns:
+        PaginaKeyset: Registros de la página y cursores de navegación.
+        Un cursor inválido se trata como si no se hubiera enviado.
+    """
+    consulta, *estado = _preparar_keyset(queryset, orden, despues, antes, tamano)
+    return _armar_pagina(list(consulta), tamano, *estado)
+
+
+async def apaginar_keyset(queryset, orden, despues=None, antes=None, tamano=TAMANO_PAGINA_DEFECTO):
+    """Versión async de paginar_keyset para vistas ASGI.
+
+    Lee la página con ``aiterator`` en un único bloque, sin bloquear el
+    bucle de eventos. Mismos argumentos y resultado que paginar_keyset.
+    """
+    consulta, *estado = _preparar_keyset(queryset, orden, despues, antes, tamano)
+    filas = [fila async for fila in consulta.aiterator(chunk_size=tamano + 1)]
+    return _armar_pagina(filas, tamano, *estado)
+
+
+def url_pagina(request, **params):
+    """Construye la query string de otra página conservando los filtros GET.
+
+    Args:
+        request (HttpRequest): Solicitud actual.
+        **params: Parámetros a reemplazar; un valor None elimina el parámetro.
+
+    Returns:
+        str: Query string con el prefijo '?'.
+    """
+    query = request.GET.copy()
+    for clave, valor in params.items():
+        query.pop(clave, None)
+        if valor is not None:
+            query[clave] = valor
+    return f"?{query.urlencode()}"
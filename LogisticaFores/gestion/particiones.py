@@ -0,0 +1,161 @@
+"""Particiones mensuales de ``movimiento_carga`` (sólo MySQL).
+
+La tabla se particiona por RANGE sobre ``TO_DAYS(fecha_hora)``: una partición
+por mes (``pAAAAMM``, meses en UTC, como se guardan las fechas) y
+``pfuturo`` para lo posterior a la última. Las consultas con rango de fechas
+(listado acotado por MOVIMIENTOS_MESES_RECIENTES, filtros desde/hasta,
+cursores) sólo leen las particiones que tocan, y archivar un mes completo es
+un DROP PARTITION en lugar de un DELETE fila a fila.
+
+MySQL impone tres condiciones a una tabla particionada, que ``sql_convertir``
+resuelve:
+
+- Toda clave única debe incluir la columna de partición: la clave primaria
+  pasa a ``(id, fecha_hora)``; ``id`` sigue siendo único (AUTO_INCREMENT).
+- No admite claves foráneas, ni propias ni que la referencien: se eliminan
+  las de ``movimiento_carga.vehiculo_id`` y ``vehiculo.ultimo_movimiento_id``.
+  CASCADE y SET_NULL los aplica el ORM de Django, no la base.
+- No admite índices FULLTEXT: se elimina el de ``descripcion`` y la búsqueda
+  pasa a LIKE (requiere ``MOVIMIENTOS_PARTICIONADOS``).
+"""
+
+import datetime
+from dataclasses import dataclass
+
+from .busqueda import INDICE_FULLTEXT
+from .models import MovimientoCarga, Vehiculo
+
+TABLA = MovimientoCarga._meta.db_table
+PARTICION_FUTURO = 'pfuturo'
+# TO_DAYS() de MySQL cuenta desde el año 0; date.toordinal() desde el año 1
+_DESFASE_TO_DAYS = 365
+
+
+@dataclass
+class Particion:
+    """Partición existente de movimiento_carga.
+
+    Attributes:
+        nombre (str): Nombre (``pAAAAMM`` o ``pfuturo``).
+        hasta (datetime.date | None): Límite superior exclusivo; None para MAXVALUE.
+        filas (int): Filas estimadas (information_schema, aproximado en InnoDB).
+    """
+    nombre: str
+    hasta: datetime.date | None
+    filas: int
+
+
+def inicio_mes(fecha):
+    """Primer día del mes de ``fecha`` (date o datetime)."""
+    return datetime.date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes, cantidad):
+    """Primer día del mes que está ``cantidad`` meses después (o antes) de ``mes``."""
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    """Nombre de la partición que contiene el mes ``mes``."""
+    return f"p{mes:%Y%m}"
+
+
+def _definicion(mes):
+    siguiente = sumar_meses(mes, 1)
+    return f"PARTITION {nombre_particion(mes)} VALUES LESS THAN (TO_DAYS('{siguiente:%Y-%m-%d}'))"
+
+
+def _definicion_futuro():
+    return f"PARTITION {PARTICION_FUTURO} VALUES LESS THAN MAXVALUE"
+
+
+def listar(cursor):
+    """Particiones de movimiento_carga en orden; lista vacía si no está particionada.
+
+    Args:
+        cursor: Cursor de la conexión MySQL.
+
+    Returns:
+        list[Particion]: Particiones existentes.
+    """
+    cursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION",
+        [TABLA],
+    )
+    particiones = []
+    for nombre, descripcion, filas in cursor.fetchall():
+        hasta = None
+        if descripcion and descripcion.upper() != 'MAXVALUE':
+            hasta = datetime.date.fromordinal(int(descripcion) - _DESFASE_TO_DAYS)
+        particiones.append(Particion(nombre, hasta, filas or 0))
+    return particiones
+
+
+def sql_convertir(connection, desde, hasta):
+    """Sentencias para convertir movimiento_carga en tabla particionada.
+
+    Cada ALTER reconstruye la tabla: en tablas grandes conviene ejecutarlo en
+    una ventana de mantenimiento (o con pt-online-schema-change).
+
+    Args:
+        connection: Conexión MySQL (para leer los nombres de restricciones).
+        desde (datetime.date): Mes de la primera partición (el del movimiento más antiguo).
+        hasta (datetime.date): Mes de la última partición mensual.
+
+    Returns:
+        list[str]: Sentencias SQL en orden de ejecución.
+    """
+    sentencias = []
+    with connection.cursor() as cursor:
+        for tabla, columna in ((Vehiculo._meta.db_table, 'ultimo_movimiento_id'), (TABLA, 'vehiculo_id')):
+            for nombre, datos in connection.introspection.get_constraints(cursor, tabla).items():
+                if datos['foreign_key'] and datos['columns'] == [columna]:
+                    sentencias.append(f"ALTER TABLE {tabla} DROP FOREIGN KEY {nombre}")
+        if INDICE_FULLTEXT in connection.introspection.get_constraints(cursor, TABLA):
+            sentencias.append(f"DROP INDEX {INDICE_FULLTEXT} ON {TABLA}")
+
+    meses = []
+    mes = inicio_mes(desde)
+    while mes <= hasta:
+        meses.append(mes)
+        mes = sumar_meses(mes, 1)
+    definiciones = ',\n    '.join([*(_definicion(m) for m in meses), _definicion_futuro()])
+    # Un solo ALTER: cambio de clave primaria y particionado con una reconstrucción
+    sentencias.append(
+        f"ALTER TABLE {TABLA} DROP PRIMARY KEY, ADD PRIMARY KEY (id, fecha_hora)\n"
+        f"PARTITION BY RANGE (TO_DAYS(fecha_hora)) (\n    {definiciones}\n)"
+    )
+    return sentencias
+
+
+def sql_crear_futuras(particiones, hasta):
+    """Sentencia que agrega las particiones mensuales que faltan hasta ``hasta``.
+
+    Divide ``pfuturo`` (REORGANIZE PARTITION), así que no hace falta que esté
+    vacía.
+
+    Args:
+        particiones (list[Particion]): Resultado de ``listar``.
+        hasta (datetime.date): Último mes que debe tener partición propia.
+
+    Returns:
+        str | None: Sentencia SQL, o None si ya existen todas.
+    """
+    mensuales = [p for p in particiones if p.hasta is not None]
+    mes = mensuales[-1].hasta if mensuales else inicio_mes(datetime.date.today())
+    nuevas = []
+    while mes <= hasta:
+        nuevas.append(_definicion(mes))
+        mes = sumar_meses(mes, 1)
+    if not nuevas:
+        return None
+    definiciones = ',\n    '.join([*nuevas, _definicion_futuro()])
+    return f"ALTER TABLE {TABLA} REORGANIZE PARTITION {PARTICION_FUTURO} INTO (\n    {definiciones}\n)"
+
+
+def sql_eliminar(nombres):
+    """Sentencia que elimina particiones (y sus filas) sin recorrerlas."""
+    return f"ALTER TABLE {TABLA} DROP PARTITION {', '.join(nombres)}"
@@ -0,0 +1,180 @@
+"""Mantenimiento incremental del resumen de movimientos por vehículo.
+
+Mantiene dos estructuras precalculadas:
+
+- ``ResumenMovimiento``: cantidad de movimientos por (vehículo, día, tipo).
+- ``Vehiculo.ultimo_movimiento``: puntero al movimiento más reciente.
+
+Las señales de MovimientoCarga (ver gestion.signals) aplican deltas de +1/-1
+en cada alta, edición o baja; los flujos masivos que usan ``bulk_create``
+llaman a ``registrar_creados``. ``reconstruir`` recalcula todo desde cero
+(comando ``reconstruir_resumen``), incluidos los movimientos archivados.
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Vehiculo, MovimientoArchivado, MovimientoCarga, ResumenMovimiento
+
+# Filas insertadas por lote al reconstruir
+TAMANO_LOTE_RESUMEN = 5000
+# Claves de resumen por sentencia al registrar altas masivas
+CLAVES_POR_SENTENCIA = 500
+
+
+def clave_resumen(vehiculo_id, fecha_hora, tipo_movimiento):
+    """Clave (vehiculo_id, día local, tipo) de un movimiento en el resumen."""
+    return vehiculo_id, timezone.localtime(fecha_hora).date(), tipo_movimiento
+
+
+def aplicar_deltas(deltas):
+    """Suma (o resta) cantidades en el resumen de forma atómica en BD.
+
+    Args:
+        deltas (Mapping[tuple, int]): Clave de resumen → variación.
+    """
+    for (vehiculo_id, dia, tipo), delta in deltas.items():
+        if not delta:
+            continue
+        filtro = {'vehiculo_id': vehiculo_id, 'dia': dia, 'tipo_movimiento': tipo}
+        actualizadas = ResumenMovimiento.objects.filter(**filtro).update(cantidad=F('cantidad') + delta)
+        if actualizadas:
+            if delta < 0:
+                ResumenMovimiento.objects.filter(**filtro, cantidad__lte=0).delete()
+            continue
+        if delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                ResumenMovimiento.objects.create(**filtro, cantidad=delta)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            ResumenMovimiento.objects.filter(**filtro).update(cantidad=F('cantidad') + delta)
+
+
+def _ultimo_movimiento_de(vehiculo_ref):
+    return Subquery(
+        MovimientoCarga.objects.filter(vehiculo_id=vehiculo_ref)
+        .order_by('-fecha_hora', '-id')
+        .values('id')[:1]
+    )
+
+
+def _sumar_lote(deltas):
+    """Suma deltas positivos de muchas claves con pocas sentencias.
+
+    Las filas existentes se actualizan con un único UPDATE … CASE y las
+    faltantes se insertan con ``bulk_create``. Si otro proceso inserta alguna
+    de ellas entretanto, esas claves se reintentan con ``aplicar_deltas``.
+    """
+    candidatas = ResumenMovimiento.objects.filter(
+        vehiculo_id__in={v for v, _, _ in deltas}, dia__in={d for _, d, _ in deltas}
+    ).values_list('vehiculo_id', 'dia', 'tipo_movimiento')
+    existentes = [clave for clave in set(candidatas) if clave in deltas]
+    for inicio in range(0, len(existentes), CLAVES_POR_SENTENCIA):
+        tramo = existentes[inicio:inicio + CLAVES_POR_SENTENCIA]
+        condiciones = [Q(vehiculo_id=v, dia=d, tipo_movimiento=t) for v, d, t in tramo]
+        filtro = Q()
+        for condicion in condiciones:
+            filtro |= condicion
+        ResumenMovimiento.objects.filter(filtro).update(cantidad=F('cantidad') + Case(
+            *(When(condicion, then=Value(deltas[clave])) for condicion, clave in zip(condiciones, tramo)),
+            default=Value(0),
+        ))
+
+    faltantes = deltas.keys() - set(existentes)
+    if not faltantes:
+        return
+    try:
+        with transaction.atomic():
+            ResumenMovimiento.objects.bulk_create([
+                ResumenMovimiento(vehiculo_id=v, dia=d, tipo_movimiento=t, cantidad=deltas[(v, d, t)])
+                for v, d, t in faltantes
+            ], batch_size=CLAVES_POR_SENTENCIA)
+    except IntegrityError:
+        aplicar_deltas({clave: deltas[clave] for clave in faltantes})
+
+
+def actualizar_ultimo_movimiento(vehiculo_ids):
+    """Recalcula el puntero al último movimiento de los vehículos indicados.
+
+    Un único UPDATE por tramo de vehículos; la subconsulta de cada vehículo
+    lee una sola entrada del índice (vehiculo_id, fecha_hora).
+
+    Args:
+        vehiculo_ids (Iterable[int]): Vehículos afectados.
+    """
+    vehiculo_ids = sorted(set(vehiculo_ids))
+    for inicio in range(0, len(vehiculo_ids), CLAVES_POR_SENTENCIA):
+        Vehiculo.objects.filter(pk__in=vehiculo_ids[inicio:inicio + CLAVES_POR_SENTENCIA]).update(
+            ultimo_movimiento=_ultimo_movimiento_de(OuterRef('pk'))
+        )
+
+
+def registrar_creados(movimientos):
+    """Actualiza el resumen tras insertar movimientos con ``bulk_create``.
+
+    Args:
+        movimientos (Iterable[MovimientoCarga]): Movimientos recién creados.
+    """
+    deltas = Counter(
+        clave_resumen(m.vehiculo_id, m.fecha_hora, m.tipo_movimiento) for m in movimientos
+    )
+    _sumar_lote(deltas)
+    actualizar_ultimo_movimiento(vehiculo_id for vehiculo_id, _, _ in deltas)
+
+
+def reconstruir(tamano_lote=TAMANO_LOTE_RESUMEN):
+    """Recalcula el resumen completo y los punteros de último movimiento.
+
+    Args:
+        tamano_lote (int): Filas de resumen insertadas por lote.
+
+    Returns:
+        int: Cantidad de filas de resumen generadas.
+    """
+    def agregados(modelo):
+        return (
+            modelo.objects.order_by()
+            .annotate(dia=TruncDate('fecha_hora'))
+            .values_list('vehiculo_id', 'dia', 'tipo_movimiento')
+            .annotate(cantidad=Count('id'))
+            .iterator(chunk_size=tamano_lote)
+        )
+
+    total = 0
+    with transaction.atomic():
+        # El archivo se agrega aparte y se suma: un día local puede tener
+        # movimientos en ambas tablas (el corte del archivo es en UTC).
+        archivados = Counter({
+            (vehiculo_id, dia, tipo): cantidad
+            for vehiculo_id, dia, tipo, cantidad in agregados(MovimientoArchivado)
+        })
+        ResumenMovimiento.objects.all().delete()
+        lote = []
+        for vehiculo_id, dia, tipo, cantidad in agregados(MovimientoCarga):
+            cantidad += archivados.pop((vehiculo_id, dia, tipo), 0)
+            lote.append(ResumenMovimiento(
+                vehiculo_id=vehiculo_id, dia=dia, tipo_movimiento=tipo, cantidad=cantidad
+            ))
+            if len(lote) == tamano_lote:
+                ResumenMovimiento.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+        for (vehiculo_id, dia, tipo), cantidad in archivados.items():
+            lote.append(ResumenMovimiento(
+                vehiculo_id=vehiculo_id, dia=dia, tipo_movimiento=tipo, cantidad=cantidad
+            ))
+            if len(lote) == tamano_lote:
+                ResumenMovimiento.objects.bulk_create(lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            ResumenMovimiento.objects.bulk_create(lote)
+            total += len(lote)
+        Vehiculo.objects.update(ultimo_movimiento=_ultimo_movimiento_de(OuterRef('pk')))
+    return total
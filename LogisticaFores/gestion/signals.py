@@ -0,0 +1,115 @@
+"""Receptores de señales de la aplicación gestion.
+
+Se conectan en GestionConfig.ready().
+"""
+
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import agregados, en_vivo, resumen, versiones
+from .ubicaciones import invalidar_ubicaciones
+from .cache import invalidar_token, invalidar_vehiculos
+from .models import Vehiculo, MovimientoCarga, TokenApi, Ubicacion
+
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='gestion_invalidar_cache_vehiculo_guardado')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='gestion_invalidar_cache_vehiculo_eliminado')
+def invalidar_cache_vehiculos(sender, **kwargs):
+    """Invalida la caché de vehículos al crear, editar o eliminar uno."""
+    invalidar_vehiculos()
+
+
+@receiver(post_save, sender=TokenApi, dispatch_uid='gestion_invalidar_cache_token_guardado')
+@receiver(post_delete, sender=TokenApi, dispatch_uid='gestion_invalidar_cache_token_eliminado')
+def invalidar_cache_token(sender, instance, **kwargs):
+    """Descarta el usuario cacheado de un token al revocarlo o eliminarlo."""
+    invalidar_token(instance.clave_hash)
+
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='gestion_version_vehiculo_guardado')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='gestion_version_vehiculo_eliminado')
+def incrementar_version_vehiculos(sender, **kwargs):
+    """Registra un cambio en la tabla de vehículos."""
+    versiones.incrementar(versiones.VEHICULOS)
+
+
+@receiver(post_save, sender=Ubicacion, dispatch_uid='gestion_ubicacion_guardada')
+@receiver(post_delete, sender=Ubicacion, dispatch_uid='gestion_ubicacion_eliminada')
+def invalidar_ubicaciones_guardadas(sender, **kwargs):
+    """Invalida la tabla de ubicaciones en caché y las páginas que muestran sus nombres."""
+    invalidar_ubicaciones()
+    versiones.incrementar(versiones.UBICACIONES)
+
+
+@receiver(post_save, sender=MovimientoCarga, dispatch_uid='gestion_version_movimiento_guardado')
+@receiver(post_delete, sender=MovimientoCarga, dispatch_uid='gestion_version_movimiento_eliminado')
+def incrementar_version_movimientos(sender, **kwargs):
+    """Registra un cambio en la tabla de movimientos."""
+    versiones.incrementar(versiones.MOVIMIENTOS)
+
+
+@receiver(post_save, sender=MovimientoCarga, dispatch_uid='gestion_en_vivo_movimiento_guardado')
+def avisar_movimiento_en_vivo(sender, instance, raw=False, **kwargs):
+    """Avisa a los clientes en vivo de este proceso al confirmar la transacción."""
+    if raw:
+        return
+    transaction.on_commit(partial(en_vivo.avisar, instance.pk))
+
+
+@receiver(pre_save, sender=MovimientoCarga, dispatch_uid='gestion_resumen_movimiento_previo')
+def recordar_movimiento_previo(sender, instance, raw=False, **kwargs):
+    """Guarda los valores previos de un movimiento editado para el resumen."""
+    instance._resumen_previo = None
+    if raw or instance.pk is None or instance._state.adding:
+        return
+    instance._resumen_previo = (
+        MovimientoCarga.objects.filter(pk=instance.pk)
+        .values_list('vehiculo_id', 'fecha_hora', 'tipo_movimiento')
+        .first()
+    )
+
+
+@receiver(post_save, sender=MovimientoCarga, dispatch_uid='gestion_resumen_movimiento_guardado')
+def actualizar_resumen_guardado(sender, instance, raw=False, **kwargs):
+    """Aplica al resumen el alta o la edición de un movimiento."""
+    if raw:
+        return
+    deltas = Counter()
+    vehiculos = {instance.vehiculo_id}
+    deltas[resumen.clave_resumen(instance.vehiculo_id, instance.fecha_hora, instance.tipo_movimiento)] += 1
+    previo = getattr(instance, '_resumen_previo', None)
+    if previo:
+        deltas[resumen.clave_resumen(*previo)] -= 1
+        vehiculos.add(previo[0])
+    resumen.aplicar_deltas(deltas)
+    resumen.actualizar_ultimo_movimiento(vehiculos)
+
+
+@receiver(post_delete, sender=MovimientoCarga, dispatch_uid='gestion_resumen_movimiento_eliminado')
+def actualizar_resumen_eliminado(sender, instance, **kwargs):
+    """Descuenta del resumen un movimiento eliminado."""
+    clave = resumen.clave_resumen(instance.vehiculo_id, instance.fecha_hora, instance.tipo_movimiento)
+    resumen.aplicar_deltas({clave: -1})
+    resumen.actualizar_ultimo_movimiento([instance.vehiculo_id])
+
+
+@receiver(post_save, sender=MovimientoCarga, dispatch_uid='gestion_agregados_movimiento_editado')
+def marcar_agregados_editado(sender, instance, created=False, raw=False, **kwargs):
+    """Marca para recálculo las horas previa y nueva de un movimiento editado.
+
+    Las altas no se marcan: las detecta la marca de agua de gestion.agregados.
+    """
+    previo = getattr(instance, '_resumen_previo', None)
+    if raw or created or not previo:
+        return
+    agregados.marcar_pendientes([previo[1], instance.fecha_hora])
+
+
+@receiver(post_delete, sender=MovimientoCarga, dispatch_uid='gestion_agregados_movimiento_eliminado')
+def marcar_agregados_eliminado(sender, instance, **kwargs):
+    """Marca para recálculo la hora de un movimiento eliminado."""
+    agregados.marcar_pendientes([instance.fecha_hora])
@@ -0,0 +1,165 @@
+"""Datos sintéticos con distribuciones parecidas a las de producción.
+
+Para pruebas de rendimiento (comando benchmark_gestion) sobre volúmenes
+reales sin copiar datos de la empresa:
+
+- Vehículos: mayoría de camiones, patentes con prefijo ``SY`` (se pueden
+  borrar sin tocar los datos reales).
+- Actividad por vehículo con cola larga (Pareto): unos pocos camiones
+  concentran buena parte de los movimientos.
+- Fechas en los últimos ``dias`` días, más movimientos en días hábiles y en
+  horario de faena (06:00-20:00).
+- Origen/destino según el tipo: los ingresos vienen de predios y llegan a
+  plantas o canchas; las salidas van de plantas a puertos o aserraderos. La
+  popularidad de cada sitio sigue una distribución de Zipf.
+
+Las inserciones usan ``bulk_create`` por lotes y actualizan el resumen y las
+versiones igual que la importación CSV.
+"""
+
+import datetime
+import itertools
+import random
+import string
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import resumen, ubicaciones, versiones
+from .cache import invalidar_vehiculos
+from .models import MovimientoCarga, Vehiculo
+
+PREFIJO = 'SY'
+TAMANO_LOTE_SINTETICOS = 5000
+
+TIPOS_VEHICULO = [('CAMION', 0.7), ('CAMIONETA', 0.2), ('MAQUINARIA', 0.1)]
+MARCAS = {
+    'CAMION': [('Volvo', 'FH'), ('Scania', 'R450'), ('Mercedes-Benz', 'Actros'), ('Freightliner', 'M2')],
+    'CAMIONETA': [('Toyota', 'Hilux'), ('Nissan', 'Navara'), ('Ford', 'Ranger')],
+    'MAQUINARIA': [('John Deere', '1270G'), ('Ponsse', 'Scorpion'), ('Caterpillar', '320')],
+}
+PREDIOS = [
+    'Predio Los Robles', 'Fundo El Vergel', 'Predio Santa Elena', 'Fundo Las Palmas',
+    'Predio Quilacoya', 'Fundo Cholguán', 'Predio Pemuco', 'Fundo San Ignacio',
+    'Predio Curanilahue', 'Fundo Los Álamos', 'Predio Nacimiento', 'Fundo Yumbel',
+]
+PLANTAS = ['Planta Arauco', 'Planta Nueva Aldea', 'Planta Mininco', 'Cancha Acopio Yumbel', 'Planta Santa Fe']
+DESPACHOS = ['Puerto Coronel', 'Puerto Lirquén', 'Puerto San Vicente', 'Aserradero Horcones', 'Aserradero Cholguán']
+ESPECIES = ['pino radiata', 'eucalipto globulus', 'eucalipto nitens']
+
+# Peso relativo por día de la semana (lunes=0) y por hora del día
+PESO_DIA = [1.0, 1.0, 1.0, 1.0, 0.9, 0.5, 0.15]
+PESO_HORA = [0.05] * 6 + [0.6, 1.0, 1.0, 1.0, 0.9, 0.8, 0.5, 0.7, 0.9, 1.0, 0.9, 0.8, 0.6, 0.4] + [0.1] * 4
+
+
+def _zipf(cantidad):
+    return [1 / (i + 1) for i in range(cantidad)]
+
+
+def _patentes(cantidad, existentes):
+    letras = itertools.product(string.ascii_uppercase, repeat=2)
+    for sufijo, numero in itertools.product(letras, range(100)):
+        if cantidad == 0:
+            return
+        patente = f"{PREFIJO}{''.join(sufijo)}{numero:02d}"
+        if patente not in existentes:
+            cantidad -= 1
+            yield patente
+
+
+def generar_vehiculos(cantidad, azar):
+    """Crea ``cantidad`` vehículos sintéticos (patente ``SY…``).
+
+    Args:
+        cantidad (int): Vehículos a crear (máximo 67.600 en total).
+        azar (random.Random): Generador con semilla.
+
+    Returns:
+        int: Vehículos creados.
+    """
+    existentes = set(
+        Vehiculo.objects.filter(patente__startswith=PREFIJO).values_list('patente', flat=True)
+    )
+    tipos, pesos = zip(*TIPOS_VEHICULO)
+    anio_actual = timezone.localdate().year
+    vehiculos = []
+    for patente in _patentes(cantidad, existentes):
+        tipo = azar.choices(tipos, pesos)[0]
+        marca, modelo = azar.choice(MARCAS[tipo])
+        vehiculos.append(Vehiculo(
+            patente=patente, marca=marca, modelo=modelo, tipo=tipo,
+            año=anio_actual - min(int(azar.expovariate(1 / 6)), 25),
+        ))
+    with transaction.atomic():
+        Vehiculo.objects.bulk_create(vehiculos, batch_size=TAMANO_LOTE_SINTETICOS)
+        versiones.incrementar(versiones.VEHICULOS)
+    invalidar_vehiculos()
+    return len(vehiculos)
+
+
+def _descripcion(azar):
+    if azar.random() < 0.3:
+        return ''
+    if azar.random() < 0.7:
+        return f"Carga de {azar.choice(ESPECIES)}, {azar.randint(18, 45)} m3"
+    return f"Guía de despacho N° {azar.randint(100000, 999999)}"
+
+
+def generar_movimientos(cantidad, dias, azar, tamano_lote=TAMANO_LOTE_SINTETICOS, progreso=None):
+    """Crea ``cantidad`` movimientos repartidos entre los vehículos sintéticos.
+
+    Args:
+        cantidad (int): Movimientos a crear.
+        dias (int): Antigüedad máxima de los movimientos en días.
+        azar (random.Random): Generador con semilla.
+        tamano_lote (int): Movimientos insertados por transacción.
+        progreso (Callable[[int], None] | None): Se llama tras cada lote con
+            los movimientos creados hasta el momento.
+
+    Returns:
+        int: Movimientos creados.
+
+    Raises:
+        ValueError: Si no hay vehículos sintéticos.
+    """
+    vehiculo_ids = list(Vehiculo.objects.filter(patente__startswith=PREFIJO).values_list('id', flat=True))
+    if not vehiculo_ids:
+        raise ValueError("No hay vehículos sintéticos: genere vehículos primero.")
+    actividad = [azar.paretovariate(1.2) for _ in vehiculo_ids]
+
+    ahora = timezone.now()
+    hoy = timezone.localdate()
+    fechas = [hoy - datetime.timedelta(days=d) for d in range(dias)]
+    pesos_fecha = [PESO_DIA[f.weekday()] for f in fechas]
+    pesos_predios, pesos_plantas, pesos_despachos = _zipf(len(PREDIOS)), _zipf(len(PLANTAS)), _zipf(len(DESPACHOS))
+    lugares = ubicaciones.resolver(PREDIOS + PLANTAS + DESPACHOS)
+
+    creados = 0
+    while creados < cantidad:
+        lote = []
+        for vehiculo_id in azar.choices(vehiculo_ids, actividad, k=min(tamano_lote, cantidad - creados)):
+            dia = azar.choices(fechas, pesos_fecha)[0]
+            hora = azar.choices(range(24), PESO_HORA)[0]
+            fecha_hora = timezone.make_aware(datetime.datetime.combine(
+                dia, datetime.time(hora, azar.randrange(60), azar.randrange(60))
+            ))
+            if azar.random() < 0.52:
+                tipo = 'INGRESO'
+                origen = azar.choices(PREDIOS, pesos_predios)[0]
+                destino = azar.choices(PLANTAS, pesos_plantas)[0]
+            else:
+                tipo = 'SALIDA'
+                origen = azar.choices(PLANTAS, pesos_plantas)[0]
+                destino = azar.choices(DESPACHOS, pesos_despachos)[0]
+            lote.append(MovimientoCarga(
+                vehiculo_id=vehiculo_id, tipo_movimiento=tipo, fecha_hora=min(fecha_hora, ahora),
+                origen_id=lugares[origen], destino_id=lugares[destino], descripcion=_descripcion(azar),
+            ))
+        with transaction.atomic():
+            MovimientoCarga.objects.bulk_create(lote, batch_size=tamano_lote)
+            versiones.incrementar(versiones.MOVIMIENTOS)
+            resumen.registrar_creados(lote)
+        creados += len(lote)
+        if progreso:
+            progreso(creados)
+    return creados
@@ -0,0 +1,94 @@
+"""Agregados de movimientos por hora y día (gestion.agregados)."""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from gestion import agregados
+from gestion.models import AgregadoPendiente, MovimientoCarga, Ubicacion, Vehiculo
+
+UTC = datetime.timezone.utc
+# Período propio, lejos de los movimientos de la migración de datos iniciales
+BASE = datetime.datetime(2024, 3, 10, 10, tzinfo=UTC)
+DIA = datetime.timedelta(days=1)
+
+
+class AgregadosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehiculo = Vehiculo.objects.create(patente='AGRE01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        cls.bosque = Ubicacion.objects.create(nombre='Bosque Agregados')
+        cls.planta = Ubicacion.objects.create(nombre='Planta Agregados')
+        for minutos, tipo, origen, destino in (
+            (5, 'INGRESO', cls.bosque, cls.planta),
+            (20, 'INGRESO', cls.bosque, cls.planta),
+            (40, 'SALIDA', cls.planta, cls.bosque),
+            (90, 'INGRESO', cls.bosque, cls.planta),
+            (60 * 23, 'INGRESO', None, None),
+        ):
+            MovimientoCarga.objects.create(
+                vehiculo=cls.vehiculo, tipo_movimiento=tipo, origen=origen, destino=destino,
+                fecha_hora=BASE + datetime.timedelta(minutes=minutos),
+            )
+
+    def setUp(self):
+        cache.clear()
+        agregados.refrescar(completo=True)
+
+    def _horas(self, **filtros):
+        return [
+            (fila['inicio'].astimezone(UTC).hour, fila['INGRESO'], fila['SALIDA'])
+            for fila in agregados.serie(BASE - DIA, BASE + 2 * DIA, 'hora', **filtros)
+        ]
+
+    def _crear(self, fecha_hora, tipo='INGRESO'):
+        return MovimientoCarga.objects.create(vehiculo=self.vehiculo, tipo_movimiento=tipo, fecha_hora=fecha_hora)
+
+    def test_refresco_completo_por_hora_y_dia(self):
+        self.assertEqual(self._horas(), [(10, 2, 1), (11, 1, 0), (9, 1, 0)])
+        dias = agregados.serie(agregados.inicio_dia(BASE.date()), agregados.inicio_dia(BASE.date() + 2 * DIA))
+        self.assertEqual([fila['total'] for fila in dias], [4, 1])
+        self.assertIsNotNone(agregados.ultimo_refresco())
+
+    def test_filtros_por_tipo_y_ubicacion(self):
+        self.assertEqual(self._horas(origen_id=self.planta.pk), [(10, 0, 1)])
+        self.assertEqual(self._horas(tipo_movimiento='INGRESO', destino_id=self.planta.pk), [(10, 2, 0), (11, 1, 0)])
+
+    def test_refresco_incremental_suma_las_altas(self):
+        self._crear(BASE + datetime.timedelta(minutes=100), 'SALIDA')
+        agregados.refrescar()
+        self.assertEqual(self._horas()[1], (11, 1, 1))
+
+    def test_edicion_mueve_el_conteo_a_la_nueva_hora(self):
+        movimiento = MovimientoCarga.objects.get(fecha_hora=BASE + datetime.timedelta(minutes=90))
+        movimiento.fecha_hora = BASE - datetime.timedelta(hours=3)
+        movimiento.save()
+        self.assertEqual(AgregadoPendiente.objects.count(), 2)
+
+        agregados.refrescar()
+        self.assertEqual(self._horas(), [(7, 1, 0), (10, 2, 1), (9, 1, 0)])
+        self.assertFalse(AgregadoPendiente.objects.exists())
+
+    def test_baja_descuenta(self):
+        MovimientoCarga.objects.get(tipo_movimiento='SALIDA', vehiculo=self.vehiculo).delete()
+        agregados.refrescar()
+        self.assertEqual(self._horas()[0], (10, 2, 0))
+
+    def test_refresco_repetido_no_cambia_los_totales(self):
+        antes = self._horas()
+        agregados.refrescar()
+        agregados.refrescar()
+        self.assertEqual(self._horas(), antes)
+
+    def test_rutas_con_nombres(self):
+        rutas = agregados.rutas(agregados.inicio_dia(BASE.date()), agregados.inicio_dia(BASE.date() + 2 * DIA))
+        self.assertEqual(
+            [(r['tipo_movimiento'], r['origen_nombre'], r['destino_nombre'], r['total']) for r in rutas],
+            [
+                ('INGRESO', 'Bosque Agregados', 'Planta Agregados', 3),
+                ('INGRESO', '', '', 1),
+                ('SALIDA', 'Planta Agregados', 'Bosque Agregados', 1),
+            ],
+        )
@@ -0,0 +1,98 @@
+"""Ocupación del patio, estadías y vueltas (gestion.analitica)."""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from gestion import analitica
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+UTC = datetime.timezone.utc
+DIA = datetime.date(2024, 3, 10)
+
+
+def _hora(hora, minuto=0, dia=DIA):
+    return datetime.datetime.combine(dia, datetime.time(hora, minuto), tzinfo=UTC)
+
+
+class ReportePatioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.predio = Ubicacion.objects.create(nombre='Predio Analítica')
+        cls.puerto = Ubicacion.objects.create(nombre='Puerto Analítica')
+        movimientos = {
+            # Estadía de 2,5 h, vuelta de 4 h y sigue dentro
+            'ANAL01': [
+                ('INGRESO', _hora(8), cls.predio, None),
+                ('SALIDA', _hora(10, 30), None, cls.puerto),
+                ('INGRESO', _hora(14, 30), cls.puerto, None),
+            ],
+            # Dentro desde el día anterior: sale durante el período
+            'ANAL02': [
+                ('INGRESO', _hora(20, dia=DIA - datetime.timedelta(days=1)), cls.predio, None),
+                ('SALIDA', _hora(9), None, cls.puerto),
+            ],
+            # Ingreso sin salida seguido de una estadía de 1 h
+            'ANAL03': [
+                ('INGRESO', _hora(11), cls.predio, None),
+                ('INGRESO', _hora(12), cls.puerto, None),
+                ('SALIDA', _hora(13), None, cls.predio),
+            ],
+        }
+        for patente, filas in movimientos.items():
+            vehiculo = Vehiculo.objects.create(patente=patente, marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+            for tipo, fecha, origen, destino in filas:
+                MovimientoCarga.objects.create(
+                    vehiculo=vehiculo, tipo_movimiento=tipo, fecha_hora=fecha, origen=origen, destino=destino,
+                )
+
+    def setUp(self):
+        cache.clear()
+
+    def _calcular(self, **opciones):
+        desde, hasta, granularidad = analitica.periodo(DIA, DIA, 'hora')
+        return analitica.calcular(desde, hasta, granularidad, **opciones)
+
+    def test_estadias_y_rutas(self):
+        reporte = self._calcular()
+        self.assertEqual(reporte.estadias.cantidad, 2)
+        self.assertEqual(reporte.estadias.media, 1.75)
+        self.assertEqual(reporte.sin_salida, 1)
+        self.assertEqual(
+            {(r['origen'], r['destino'], r['distribucion'].p50) for r in reporte.rutas},
+            {('Predio Analítica', 'Puerto Analítica', 2.5), ('Puerto Analítica', 'Predio Analítica', 1.0)},
+        )
+        self.assertEqual(dict(reporte.histograma)['≤ 1 h'], 1)
+        self.assertEqual(dict(reporte.histograma)['≤ 4 h'], 1)
+
+    def test_vueltas_por_destino(self):
+        [vuelta] = self._calcular().vueltas
+        self.assertEqual(vuelta['destino'], 'Puerto Analítica')
+        self.assertEqual(vuelta['distribucion'].p50, 4.0)
+
+    def test_ocupacion_al_cierre_de_cada_hora(self):
+        ocupacion = {fila['inicio'].hour: fila for fila in self._calcular().ocupacion}
+        self.assertEqual(len(ocupacion), 24)
+        self.assertEqual(
+            [ocupacion[hora]['dentro'] for hora in range(7, 16)],
+            # 7: el del día anterior; 8: entra ANAL01; 9: sale ANAL02; ...
+            [1, 2, 1, 0, 1, 1, 0, 1, 1],
+        )
+        self.assertEqual(ocupacion[23]['dentro'], 1)
+        self.assertEqual(sum(f['ingresos'] for f in ocupacion.values()), 4)
+        self.assertEqual(sum(f['salidas'] for f in ocupacion.values()), 3)
+
+    def test_lotes_pequenos_dan_el_mismo_resultado(self):
+        # Con lotes de 2 filas los movimientos de un vehículo quedan repartidos en varios lotes
+        completo = self._calcular()
+        por_lotes = self._calcular(tamano_bloque=2)
+        por_lotes.calculado = completo.calculado
+        self.assertEqual(por_lotes, completo)
+
+    def test_dentro_ahora_desde_el_ultimo_movimiento(self):
+        _, detalle = analitica.dentro_ahora(limite=None)
+        patentes = {fila['patente'] for fila in detalle}
+        self.assertIn('ANAL01', patentes)
+        self.assertFalse(patentes & {'ANAL02', 'ANAL03'})
@@ -0,0 +1,140 @@
+"""Versiones por tabla (gestion.versiones) y API JSON de lectura (gestion.api)."""
+
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion import versiones
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+
+class VersionesTests(TestCase):
+
+    def test_incrementar_crea_y_suma(self):
+        self.assertEqual(versiones.obtener('tabla_prueba'), (0, None))
+        with self.captureOnCommitCallbacks(execute=True):
+            versiones.incrementar('tabla_prueba')
+            versiones.incrementar('tabla_prueba')
+        version, actualizado = versiones.obtener('tabla_prueba')
+        self.assertEqual(version, 2)
+        self.assertIsNotNone(actualizado)
+
+    def test_varias_tablas_con_la_fecha_mas_reciente(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            versiones.incrementar('tabla_a')
+            versiones.incrementar('tabla_b')
+            versiones.incrementar('tabla_b')
+        numeros, actualizado = async_to_sync(versiones.aobtener_con_fecha)(['tabla_b', 'tabla_sin_cambios', 'tabla_a'])
+        self.assertEqual(numeros, (2, 0, 1))
+        self.assertEqual(actualizado, max(versiones.obtener('tabla_a')[1], versiones.obtener('tabla_b')[1]))
+
+    def test_las_senales_incrementan_la_tabla_del_modelo(self):
+        antes = versiones.obtener(versiones.VEHICULOS)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            vehiculo = Vehiculo.objects.create(patente='VERS01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+            vehiculo.delete()
+        self.assertEqual(versiones.obtener(versiones.VEHICULOS)[0], antes + 2)
+
+    def test_incrementa_al_confirmar_y_no_al_revertir(self):
+        with self.captureOnCommitCallbacks() as pendientes:
+            versiones.incrementar('tabla_prueba')
+            # La fila no se toca (ni se bloquea) durante la transacción
+            self.assertEqual(versiones.obtener('tabla_prueba'), (0, None))
+        self.assertEqual(len(pendientes), 1)
+
+        with self.captureOnCommitCallbacks(execute=True) as pendientes:
+            try:
+                with transaction.atomic():
+                    versiones.incrementar('tabla_prueba')
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(pendientes, [])
+        self.assertEqual(versiones.obtener('tabla_prueba'), (0, None))
+
+
+class ApiLecturaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('lector')
+        ahora = timezone.now()
+        # Las versiones se incrementan al confirmar: se ejecutan a mano
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.vehiculo = Vehiculo.objects.create(
+                patente='APIL01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020,
+            )
+            cls.puerto = Ubicacion.objects.create(nombre='Puerto API')
+            for i in range(5):
+                MovimientoCarga.objects.create(
+                    vehiculo=cls.vehiculo, tipo_movimiento='SALIDA', destino=cls.puerto,
+                    fecha_hora=ahora - datetime.timedelta(days=1000, minutes=i), descripcion=f'API {i}',
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.url = reverse('api_movimientos') + '?patente=APIL01'
+
+    def test_requiere_autenticacion(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_campos_pedidos_y_nombres_de_ubicacion(self):
+        respuesta = self.client.get(self.url + '&campos=patente,origen,destino')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta.json()['resultados'][0], {'patente': 'APIL01', 'origen': '', 'destino': 'Puerto API'}
+        )
+
+    def test_campo_desconocido(self):
+        respuesta = self.client.get(self.url + '&campos=patente,clave')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('clave', respuesta.json()['error'])
+
+    def test_paginas_por_cursor(self):
+        respuesta = self.client.get(self.url + '&campos=descripcion&n=3').json()
+        self.assertEqual([f['descripcion'] for f in respuesta['resultados']], ['API 0', 'API 1', 'API 2'])
+        siguiente = self.client.get(respuesta['siguiente']).json()
+        self.assertEqual([f['descripcion'] for f in siguiente['resultados']], ['API 3', 'API 4'])
+        self.assertIsNone(siguiente['siguiente'])
+        anterior = self.client.get(siguiente['anterior']).json()
+        self.assertEqual(anterior['resultados'], respuesta['resultados'])
+
+    def _condicional(self):
+        primera = self.client.get(self.url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertIn('Last-Modified', primera)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 304)
+        return primera['ETag']
+
+    def test_etag_cambia_al_editar_un_movimiento(self):
+        etag = self._condicional()
+        with self.captureOnCommitCallbacks(execute=True):
+            MovimientoCarga.objects.filter(vehiculo=self.vehiculo).first().save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_cambia_al_renombrar_el_vehiculo(self):
+        etag = self._condicional()
+        self.vehiculo.marca = 'Scania'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehiculo.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_cambia_al_renombrar_una_ubicacion(self):
+        etag = self._condicional()
+        self.puerto.nombre = 'Puerto API Norte'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.puerto.save()
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['resultados'][0]['destino'], 'Puerto API Norte')
+
+    def test_etag_distinto_por_pagina(self):
+        self.assertNotEqual(self.client.get(self.url)['ETag'], self.client.get(self.url + '&n=2')['ETag'])
@@ -0,0 +1,102 @@
+"""Traslado de movimientos antiguos al archivo (gestion.archivo)."""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from gestion import resumen, versiones
+from gestion.archivo import archivar, corte
+from gestion.models import MovimientoArchivado, MovimientoCarga, ResumenMovimiento, Ubicacion, Vehiculo
+
+UTC = datetime.timezone.utc
+CORTE = datetime.datetime(2023, 6, 1, tzinfo=UTC)
+
+
+class CorteTests(TestCase):
+
+    def test_inicio_del_mes(self):
+        self.assertEqual(corte(2, hoy=datetime.date(2024, 3, 15)), datetime.datetime(2024, 1, 1, tzinfo=UTC))
+        self.assertEqual(corte(0, hoy=datetime.date(2024, 3, 31)), datetime.datetime(2024, 3, 1, tzinfo=UTC))
+        self.assertEqual(corte(1, hoy=datetime.date(2024, 1, 1)), datetime.datetime(2023, 12, 1, tzinfo=UTC))
+        self.assertEqual(corte(12, hoy=datetime.date(2024, 2, 29)), datetime.datetime(2023, 2, 1, tzinfo=UTC))
+
+
+class ArchivarFilasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.aserradero = Ubicacion.objects.create(nombre='Aserradero Archivo')
+        cls.viejo = Vehiculo.objects.create(patente='ARCH01', marca='Volvo', modelo='FH', tipo='CAMION', año=2015)
+        cls.activo = Vehiculo.objects.create(patente='ARCH02', marca='Ford', modelo='F-150', tipo='CAMIONETA', año=2019)
+        cls.antiguos = [
+            MovimientoCarga.objects.create(
+                vehiculo=cls.viejo, tipo_movimiento='INGRESO', fecha_hora=CORTE - datetime.timedelta(days=10 + i),
+                origen=cls.aserradero, descripcion=f'Antiguo {i}',
+            )
+            for i in range(4)
+        ]
+        cls.antiguos.append(MovimientoCarga.objects.create(
+            vehiculo=cls.activo, tipo_movimiento='SALIDA', fecha_hora=CORTE - datetime.timedelta(seconds=1),
+        ))
+        cls.recientes = [
+            MovimientoCarga.objects.create(vehiculo=cls.activo, tipo_movimiento='INGRESO', fecha_hora=CORTE),
+            MovimientoCarga.objects.create(
+                vehiculo=cls.activo, tipo_movimiento='SALIDA', fecha_hora=CORTE + datetime.timedelta(days=3),
+            ),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def _resumen(self):
+        return sorted(ResumenMovimiento.objects.filter(
+            vehiculo__in=[self.viejo, self.activo],
+        ).values_list('vehiculo_id', 'dia', 'tipo_movimiento', 'cantidad'))
+
+    def test_traslada_por_lotes_con_el_mismo_id(self):
+        resumen_antes = self._resumen()
+        avance = []
+        with self.captureOnCommitCallbacks(execute=True):
+            antes = versiones.obtener(versiones.MOVIMIENTOS), versiones.obtener(versiones.ARCHIVO)
+            total = archivar(CORTE, tamano_lote=2, progreso=avance.append)
+
+        self.assertEqual(total, 5)
+        self.assertEqual(avance, [2, 4, 5])
+        self.assertEqual(
+            set(MovimientoCarga.objects.filter(vehiculo__in=[self.viejo, self.activo]).values_list('id', flat=True)),
+            {m.pk for m in self.recientes},
+        )
+        original = self.antiguos[0]
+        copia = MovimientoArchivado.objects.get(pk=original.pk)
+        self.assertEqual(
+            (copia.vehiculo_id, copia.tipo_movimiento, copia.fecha_hora, copia.origen_id, copia.destino_id, copia.descripcion),
+            (original.vehiculo_id, original.tipo_movimiento, original.fecha_hora, self.aserradero.pk, None, 'Antiguo 0'),
+        )
+        self.assertEqual(MovimientoArchivado.objects.filter(pk__in=[m.pk for m in self.antiguos]).count(), 5)
+        # El resumen sigue contando los archivados
+        self.assertEqual(self._resumen(), resumen_antes)
+        self.assertNotEqual(versiones.obtener(versiones.MOVIMIENTOS), antes[0])
+        self.assertNotEqual(versiones.obtener(versiones.ARCHIVO), antes[1])
+        # Una segunda pasada no encuentra nada
+        self.assertEqual(archivar(CORTE, tamano_lote=2), 0)
+
+    def test_suelta_solo_los_punteros_archivados(self):
+        self.assertEqual(Vehiculo.objects.get(pk=self.viejo.pk).ultimo_movimiento_id, self.antiguos[0].pk)
+        archivar(CORTE)
+        self.assertIsNone(Vehiculo.objects.get(pk=self.viejo.pk).ultimo_movimiento_id)
+        self.assertEqual(Vehiculo.objects.get(pk=self.activo.pk).ultimo_movimiento_id, self.recientes[1].pk)
+        # La reconstrucción incluye el archivo y llega al mismo resumen
+        antes = self._resumen()
+        resumen.reconstruir()
+        self.assertEqual(self._resumen(), antes)
+
+    def test_retoma_una_copia_interrumpida(self):
+        # Un lote copiado pero no borrado (proceso interrumpido) no se duplica
+        copiado = self.antiguos[1]
+        MovimientoArchivado.objects.create(
+            id=copiado.pk, vehiculo=self.viejo, tipo_movimiento=copiado.tipo_movimiento, fecha_hora=copiado.fecha_hora,
+        )
+        self.assertEqual(archivar(CORTE, tamano_lote=3), 5)
+        self.assertFalse(MovimientoCarga.objects.filter(pk=copiado.pk).exists())
+        self.assertEqual(MovimientoArchivado.objects.filter(vehiculo=self.viejo).count(), 4)
@@ -0,0 +1,65 @@
+"""Selector de vehículo por autocompletado (vista y VehiculoAutocompleteWidget)."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from gestion.models import MovimientoCarga, Vehiculo
+
+
+class AutocompletadoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('operador')
+        cls.camion = Vehiculo.objects.create(patente='AUTO01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        Vehiculo.objects.create(patente='AUTO02', marca='Ford', modelo='F-150', tipo='CAMIONETA', año=2021)
+        Vehiculo.objects.create(patente='AUTP01', marca='Ford', modelo='F-150', tipo='CAMIONETA', año=2021)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def _buscar(self, **parametros):
+        return self.client.get(reverse('vehiculo_autocomplete'), parametros).json()['resultados']
+
+    def test_prefijo_normalizado_y_limite(self):
+        self.assertEqual(
+            [r['texto'] for r in self._buscar(q=' auto-0')],
+            ['AUTO01 - CAMION', 'AUTO02 - CAMIONETA'],
+        )
+        self.assertEqual(len(self._buscar(q='AUTO', limite='1')), 1)
+        self.assertEqual(self._buscar(q='!!'), [])
+
+    def test_resultado_cacheado_se_invalida_al_crear(self):
+        self.assertEqual(len(self._buscar(q='AUTO')), 2)
+        Vehiculo.objects.create(patente='AUTO03', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        self.assertEqual(len(self._buscar(q='AUTO')), 3)
+
+    def _crear_movimiento(self, vehiculo):
+        return self.client.post(reverse('movimiento_create'), {
+            'vehiculo': vehiculo, 'tipo_movimiento': 'INGRESO', 'fecha_hora': '2024-01-01T10:00',
+            'origen': 'Predio Autocompletado', 'destino': '', 'descripcion': '',
+        })
+
+    def test_vehiculo_invalido_vuelve_al_formulario(self):
+        for valor in ('abc', '999999', '1e3'):
+            with self.subTest(valor=valor):
+                respuesta = self._crear_movimiento(valor)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn('vehiculo', respuesta.context['form'].errors)
+        self.assertFalse(MovimientoCarga.objects.filter(origen__nombre='Predio Autocompletado').exists())
+
+    def test_formulario_devuelto_conserva_la_etiqueta_del_vehiculo(self):
+        respuesta = self.client.post(reverse('movimiento_create'), {
+            'vehiculo': self.camion.pk, 'tipo_movimiento': 'INGRESO', 'fecha_hora': '2999-01-01T10:00',
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('fecha_hora', respuesta.context['form'].errors)
+        self.assertContains(respuesta, 'value="AUTO01 - CAMION"')
+
+    def test_vehiculo_valido_registra_el_movimiento(self):
+        respuesta = self._crear_movimiento(self.camion.pk)
+        self.assertRedirects(respuesta, reverse('movimiento_list'), fetch_redirect_response=False)
+        self.assertTrue(MovimientoCarga.objects.filter(vehiculo=self.camion, origen__nombre='Predio Autocompletado').exists())
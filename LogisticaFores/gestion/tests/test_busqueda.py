@@ -0,0 +1,79 @@
+"""Búsqueda de texto en la descripción (gestion.busqueda) y en el admin."""
+
+import datetime
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.busqueda import preparar_terminos
+from gestion.forms import MovimientoFiltroForm
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+
+class BusquedaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.predio = Ubicacion.objects.create(nombre='Predio Busqueda')
+        cls.muelle = Ubicacion.objects.create(nombre='Muelle Busqueda')
+        uno = Vehiculo.objects.create(patente='BUSQ01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        dos = Vehiculo.objects.create(patente='BUSQ02', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        ayer = timezone.now() - datetime.timedelta(days=1)
+        cls.listones = MovimientoCarga.objects.create(
+            vehiculo=uno, tipo_movimiento='INGRESO', fecha_hora=ayer,
+            origen=cls.predio, destino=cls.muelle, descripcion='Listones de pino radiata',
+        )
+        cls.trozos = MovimientoCarga.objects.create(
+            vehiculo=dos, tipo_movimiento='SALIDA', fecha_hora=ayer,
+            origen=cls.muelle, destino=cls.muelle, descripcion='Trozos de eucalipto',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _filtrar(self, q):
+        form = MovimientoFiltroForm({'q': q})
+        return set(form.filtrar(MovimientoCarga.objects.all()).values_list('pk', flat=True))
+
+    def _buscar_admin(self, termino):
+        modelo_admin = admin.site._registry[MovimientoCarga]
+        request = RequestFactory().get('/', {'q': termino})
+        request.user = self.usuario
+        resultados, _ = modelo_admin.get_search_results(request, MovimientoCarga.objects.all(), termino)
+        return set(resultados.values_list('pk', flat=True))
+
+    def test_filtro_por_prefijo_de_cada_palabra(self):
+        self.assertEqual(self._filtrar('liston'), {self.listones.pk})
+        self.assertEqual(self._filtrar('PINO listones'), {self.listones.pk})
+        self.assertEqual(self._filtrar('pino eucalipto'), set())
+        # Los operadores del motor se descartan en lugar de romper la consulta
+        self.assertEqual(self._filtrar('"eucal* OR'), set())
+        self.assertEqual(self._filtrar('eucal*'), {self.trozos.pk})
+
+    def test_terminos_por_motor(self):
+        self.assertEqual(preparar_terminos('pino "radiata"', 'mysql'), '+pino* +radiata*')
+        self.assertEqual(preparar_terminos('pino "radiata"', 'sqlite'), '"pino"* "radiata"*')
+        self.assertEqual(preparar_terminos('pino radiata', 'like'), '%pino radiata%')
+        self.assertEqual(preparar_terminos('()', 'sqlite'), '""')
+
+    def test_admin_busca_por_prefijo_de_patente_y_lugar(self):
+        self.assertEqual(self._buscar_admin('busq'), {self.listones.pk, self.trozos.pk})
+        self.assertEqual(self._buscar_admin('BUSQ02'), {self.trozos.pk})
+        self.assertEqual(self._buscar_admin('predio'), {self.listones.pk})
+        # Prefijo, no subcadena
+        self.assertEqual(self._buscar_admin('USQ0'), set())
+
+    def test_admin_busca_en_la_descripcion(self):
+        self.assertEqual(self._buscar_admin('eucalip'), {self.trozos.pk})
+        self.assertEqual(self._buscar_admin('radiata pino'), {self.listones.pk})
+
+    def test_listado_del_admin_con_busqueda(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('admin:gestion_movimientocarga_changelist'), {'q': 'listones'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(list(respuesta.context['cl'].result_list), [self.listones])
@@ -0,0 +1,236 @@
+"""Cola local de ingesta (gestion.cola) y su worker procesar_cola_ingesta."""
+
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion import cola
+from gestion.models import MovimientoCarga, SolicitudIdempotente, TokenApi, Vehiculo
+
+CLAVE_TOKEN = 'clave-de-prueba'
+LOGGER_WORKER = 'gestion.management.commands.procesar_cola_ingesta'
+
+
+class ColaTemporalMixin:
+    """Cada prueba usa un archivo de cola propio en un directorio temporal."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajuste = override_settings(COLA_INGESTA_RUTA=os.path.join(directorio.name, 'cola.sqlite3'))
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+
+def _movimientos(patente='COLA01'):
+    fecha = (timezone.now() - datetime.timedelta(hours=1)).replace(microsecond=0).isoformat()
+    return [{'patente': patente, 'tipo_movimiento': 'INGRESO', 'fecha_hora': fecha, 'origen': 'Romana'}]
+
+
+class ColaTests(ColaTemporalMixin, SimpleTestCase):
+
+    def test_reserva_oculta_la_entrada_hasta_confirmar_o_vencer(self):
+        self.assertEqual(cola.encolar(1, 'k1', 'h1', _movimientos()), 1)
+        [entrada] = cola.reservar(10)
+        self.assertEqual((entrada.clave, entrada.intentos), ('k1', 1))
+        self.assertEqual(cola.reservar(10), [])
+        self.assertEqual(cola.metricas()['reservadas'], 1)
+
+        cola.liberar([entrada.id])
+        [entrada] = cola.reservar(10, arrendamiento=0)
+        self.assertEqual(entrada.intentos, 2)
+        # Arrendamiento vencido: vuelve a estar visible
+        [entrada] = cola.reservar(10)
+        cola.confirmar({entrada.id: (200, {'creados': 1, 'rechazados': []})})
+        self.assertEqual(cola.estado(1, 'k1'), {'estado': 'procesada', 'respuesta': {'creados': 1, 'rechazados': []}})
+        self.assertEqual(cola.metricas()['pendientes'], 0)
+
+    def test_clave_procesada_no_se_vuelve_a_encolar(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        [entrada] = cola.reservar(10)
+        cola.confirmar({entrada.id: (200, {'creados': 1, 'rechazados': []})})
+
+        with self.assertRaises(cola.LoteProcesado) as contexto:
+            cola.encolar(1, 'k1', 'h1', _movimientos())
+        self.assertEqual((contexto.exception.estado, contexto.exception.respuesta['creados']), (200, 1))
+        with self.assertRaisesMessage(cola.ClaveUsada, 'otro contenido'):
+            cola.encolar(1, 'k1', 'h2', _movimientos())
+        self.assertEqual(cola.metricas()['pendientes'], 0)
+
+    def test_confirmar_elimina_las_respuestas_vencidas(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        [entrada] = cola.reservar(10)
+        with override_settings(COLA_INGESTA_RETENCION_DIAS=0):
+            cola.confirmar({entrada.id: (200, {})})
+            cola.confirmar({})
+        self.assertIsNone(cola.estado(1, 'k1'))
+
+    def test_misma_clave_y_cuerpo_no_se_duplica(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        self.assertEqual(cola.encolar(1, 'k1', 'h1', _movimientos()), 1)
+        # La clave es por usuario
+        self.assertEqual(cola.encolar(2, 'k1', 'h1', _movimientos()), 2)
+
+    def test_misma_clave_con_otro_cuerpo(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        with self.assertRaisesMessage(cola.ClaveUsada, 'otro contenido'):
+            cola.encolar(1, 'k1', 'h2', _movimientos())
+
+    def test_cola_llena(self):
+        with override_settings(COLA_INGESTA_MAXIMO=1):
+            cola.encolar(1, 'k1', 'h1', _movimientos())
+            with self.assertRaises(cola.ColaLlena):
+                cola.encolar(1, 'k2', 'h2', _movimientos())
+
+    def test_liberar_con_demora(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        [entrada] = cola.reservar(10)
+        cola.liberar([entrada.id], demora=60)
+        self.assertEqual(cola.reservar(10), [])
+        self.assertEqual(cola.estado(1, 'k1'), {'estado': 'pendiente', 'intentos': 1})
+
+    def test_descartar_pasa_a_fallidas_y_conserva_la_clave(self):
+        cola.encolar(1, 'k1', 'h1', _movimientos())
+        [entrada] = cola.reservar(10)
+        cola.descartar({entrada.id: 'FOREIGN KEY constraint failed'})
+
+        self.assertEqual(cola.reservar(10, arrendamiento=0), [])
+        self.assertEqual(
+            cola.estado(1, 'k1'), {'estado': 'fallida', 'intentos': 1, 'error': 'FOREIGN KEY constraint failed'}
+        )
+        self.assertEqual(cola.metricas()['fallidas'], 1)
+        with self.assertRaisesMessage(cola.ClaveUsada, 'se descartó'):
+            cola.encolar(1, 'k1', 'h1', _movimientos())
+
+
+class ProcesarColaTests(ColaTemporalMixin, TransactionTestCase):
+    """Sin TestCase: las claves foráneas diferidas (SQLite) fallan recién al confirmar."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user('bascula')
+        Vehiculo.objects.create(patente='COLA01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+
+    def _procesar(self, *args):
+        salida = io.StringIO()
+        call_command('procesar_cola_ingesta', '--una-vez', *args, stdout=salida)
+        return salida.getvalue()
+
+    def test_registra_las_entradas_y_las_quita_de_la_cola(self):
+        cola.encolar(self.usuario.pk, 'k1', 'h1', _movimientos())
+        cola.encolar(self.usuario.pk, 'k2', 'h2', _movimientos())
+        self.assertIn('Cola procesada: 2 entradas, 2 movimientos', self._procesar())
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='COLA01').count(), 2)
+        self.assertEqual(cola.metricas()['pendientes'], 0)
+
+    def test_una_entrada_que_falla_no_frena_al_resto(self):
+        # Usuario eliminado después de encolar: la clave de idempotencia no tiene dueño
+        cola.encolar(self.usuario.pk + 1000, 'k1', 'h1', _movimientos())
+        cola.encolar(self.usuario.pk, 'k2', 'h2', _movimientos())
+        with self.assertLogs(LOGGER_WORKER, 'WARNING'):
+            self._procesar('--max-intentos', '3')
+
+        self.assertEqual(SolicitudIdempotente.objects.get(clave='k2').respuesta['creados'], 1)
+        self.assertFalse(SolicitudIdempotente.objects.filter(clave='k1').exists())
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='COLA01').count(), 1)
+        # Se reintenta más tarde, no enseguida
+        self.assertEqual(cola.estado(self.usuario.pk + 1000, 'k1'), {'estado': 'pendiente', 'intentos': 1})
+        self.assertEqual(cola.reservar(10), [])
+
+    def test_agotados_los_intentos_pasa_a_fallidas(self):
+        cola.encolar(self.usuario.pk + 1000, 'k1', 'h1', _movimientos())
+        with self.assertLogs(LOGGER_WORKER, 'ERROR'):
+            self.assertIn('1 descartadas', self._procesar('--max-intentos', '1'))
+        estado = cola.estado(self.usuario.pk + 1000, 'k1')
+        self.assertEqual(estado['estado'], 'fallida')
+        self.assertTrue(estado['error'])
+        self.assertEqual(cola.metricas()['pendientes'], 0)
+
+    def test_clave_ya_registrada_con_otro_cuerpo_se_descarta_enseguida(self):
+        SolicitudIdempotente.objects.create(usuario=self.usuario, clave='k1', huella='h1')
+        cola.encolar(self.usuario.pk, 'k1', 'h2', _movimientos())
+        with self.assertLogs(LOGGER_WORKER, 'ERROR'):
+            self._procesar('--max-intentos', '5')
+        self.assertEqual(cola.estado(self.usuario.pk, 'k1')['estado'], 'fallida')
+        self.assertFalse(MovimientoCarga.objects.filter(vehiculo__patente='COLA01').exists())
+
+
+@override_settings(COLA_INGESTA_ACTIVA=True)
+class ApiColaTests(ColaTemporalMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('bascula')
+        TokenApi.objects.create(usuario=cls.usuario, nombre='báscula', clave_hash=TokenApi.hash_clave(CLAVE_TOKEN))
+        Vehiculo.objects.create(patente='COLA01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.cuerpo = {'movimientos': _movimientos()}
+
+    def _enviar(self, cuerpo, clave=''):
+        cabeceras = {'HTTP_AUTHORIZATION': f'Token {CLAVE_TOKEN}'}
+        if clave:
+            cabeceras['HTTP_IDEMPOTENCY_KEY'] = clave
+        return self.client.post(
+            reverse('api_movimientos_lote'), json.dumps(cuerpo), content_type='application/json', **cabeceras
+        )
+
+    def _estado(self, clave):
+        return self.client.get(
+            reverse('api_movimientos_lote_estado', args=[clave]), HTTP_AUTHORIZATION=f'Token {CLAVE_TOKEN}'
+        )
+
+    def test_encola_sin_tocar_la_base_principal(self):
+        # Primera solicitud: llena la caché del token
+        sin_clave = self._enviar(self.cuerpo)
+        self.assertEqual(sin_clave.status_code, 202)
+        # Sin Idempotency-Key se genera una clave para consultar el estado
+        self.assertEqual(self._estado(sin_clave.json()['clave']).json()['estado'], 'pendiente')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._enviar(self.cuerpo, clave='k1').status_code, 202)
+            self.assertEqual(self._enviar(self.cuerpo, clave='k1').status_code, 202)
+        call_command('procesar_cola_ingesta', '--una-vez', stdout=io.StringIO())
+        with self.assertNumQueries(0):
+            self.assertEqual(self._enviar(self.cuerpo, clave='k1')['Idempotent-Replayed'], 'true')
+            self.assertEqual(self._estado('k1').json()['estado'], 'procesada')
+
+    def test_reintentos_antes_y_despues_de_procesar(self):
+        self.assertEqual(self._enviar(self.cuerpo, clave='k1').status_code, 202)
+        repetida = self._enviar(self.cuerpo, clave='k1')
+        self.assertEqual(repetida.status_code, 202)
+        self.assertEqual(repetida.json()['pendientes'], 1)
+        self.assertEqual(self._enviar({'movimientos': _movimientos() * 2}, clave='k1').status_code, 422)
+
+        call_command('procesar_cola_ingesta', '--una-vez', stdout=io.StringIO())
+        estado = self._estado('k1').json()
+        self.assertEqual(estado['estado'], 'procesada')
+        self.assertEqual(estado['respuesta']['creados'], 1)
+
+        # Ya procesada: se repite la respuesta guardada, como sin cola
+        replay = self._enviar(self.cuerpo, clave='k1')
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), estado['respuesta'])
+        self.assertEqual(self._enviar({'movimientos': _movimientos() * 2}, clave='k1').status_code, 422)
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='COLA01').count(), 1)
+
+    def test_estado_de_la_cola(self):
+        self._enviar(self.cuerpo, clave='k1')
+        self.client.force_login(self.usuario)
+        datos = self.client.get(reverse('api_cola')).json()
+        self.assertTrue(datos['activa'])
+        self.assertEqual(datos['pendientes'], 1)
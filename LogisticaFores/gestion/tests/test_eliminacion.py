@@ -0,0 +1,79 @@
+"""Eliminación de vehículos por lotes (gestion.eliminacion)."""
+
+import datetime
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from gestion import versiones
+from gestion.eliminacion import eliminar_vehiculo
+from gestion.models import (
+    AgregadoPendiente, MovimientoArchivado, MovimientoCarga, ResumenMovimiento, Vehiculo,
+)
+
+UTC = datetime.timezone.utc
+BASE = datetime.datetime(2024, 6, 3, 8, 15, tzinfo=UTC)
+
+
+class EliminarVehiculoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.camion = Vehiculo.objects.create(patente='ELIM01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        self.otro = Vehiculo.objects.create(patente='ELIM02', marca='Ford', modelo='F-150', tipo='CAMIONETA', año=2021)
+        for i in range(7):
+            MovimientoCarga.objects.create(
+                vehiculo=self.camion, tipo_movimiento='INGRESO', fecha_hora=BASE + datetime.timedelta(hours=i),
+            )
+        self.conservado = MovimientoCarga.objects.create(vehiculo=self.otro, tipo_movimiento='SALIDA', fecha_hora=BASE)
+        MovimientoArchivado.objects.bulk_create([
+            MovimientoArchivado(
+                id=900000 + i, vehiculo=self.camion, tipo_movimiento='SALIDA',
+                fecha_hora=BASE - datetime.timedelta(days=400, hours=i),
+            )
+            for i in range(2)
+        ])
+
+    def test_borra_por_lotes_e_informa_el_avance(self):
+        avance = []
+        with self.captureOnCommitCallbacks(execute=True):
+            antes = versiones.obtener(versiones.MOVIMIENTOS), versiones.obtener(versiones.ARCHIVO)
+            eliminados = eliminar_vehiculo(self.camion, tamano_lote=3, progreso=lambda *par: avance.append(par))
+
+        self.assertEqual(eliminados, 7)
+        self.assertEqual(avance, [(3, 7), (6, 7), (7, 7)])
+        self.assertFalse(Vehiculo.objects.filter(pk=self.camion.pk).exists())
+        self.assertFalse(MovimientoCarga.objects.filter(vehiculo_id=self.camion.pk).exists())
+        self.assertFalse(MovimientoArchivado.objects.filter(vehiculo_id=self.camion.pk).exists())
+        self.assertFalse(ResumenMovimiento.objects.filter(vehiculo_id=self.camion.pk).exists())
+        self.assertNotEqual(versiones.obtener(versiones.MOVIMIENTOS), antes[0])
+        self.assertNotEqual(versiones.obtener(versiones.ARCHIVO), antes[1])
+        # Los datos de otros vehículos no se tocan
+        self.assertTrue(MovimientoCarga.objects.filter(pk=self.conservado.pk).exists())
+        self.assertTrue(ResumenMovimiento.objects.filter(vehiculo=self.otro).exists())
+
+    def test_marca_las_horas_de_los_movimientos_borrados(self):
+        eliminar_vehiculo(self.camion, tamano_lote=4)
+        horas = set(AgregadoPendiente.objects.values_list('hora', flat=True))
+        esperadas = {BASE.replace(minute=0) + datetime.timedelta(hours=i) for i in range(7)}
+        esperadas |= {BASE.replace(minute=0) - datetime.timedelta(days=400, hours=i) for i in range(2)}
+        self.assertEqual(horas, esperadas)
+
+    def test_sin_movimientos(self):
+        vacio = Vehiculo.objects.create(patente='ELIM03', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        avance = []
+        self.assertEqual(eliminar_vehiculo(vacio, progreso=lambda *par: avance.append(par)), 0)
+        self.assertEqual(avance, [])
+        self.assertFalse(Vehiculo.objects.filter(pk=vacio.pk).exists())
+
+    def test_comando_informa_cada_lote(self):
+        salida = io.StringIO()
+        call_command('eliminar_vehiculo', 'elim01', '--lote', '5', stdout=salida)
+        self.assertEqual(salida.getvalue().splitlines(), [
+            '5/7 movimientos eliminados',
+            '7/7 movimientos eliminados',
+            'Vehículo ELIM01 eliminado junto con 7 movimientos.',
+        ])
+        self.assertFalse(Vehiculo.objects.filter(patente='ELIM01').exists())
@@ -0,0 +1,116 @@
+"""Enrutamiento de lecturas a réplicas (gestion.enrutador)."""
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.utils.connection import ConnectionDoesNotExist
+
+from gestion import cache as cache_vehiculos, ubicaciones
+from gestion.enrutador import COOKIE_PRIMARIA, EnrutadorReplicas, lectura_primaria_middleware
+from gestion.models import Ubicacion, Vehiculo
+
+REPLICAS = ('replica1', 'replica2')
+
+
+class EnrutadorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.enrutador = EnrutadorReplicas()
+        parche = mock.patch('gestion.enrutador.replicas', return_value=REPLICAS)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def _solicitud(self, vista, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return lectura_primaria_middleware(vista)(request)
+
+    def test_sin_replicas_no_interviene(self):
+        with mock.patch('gestion.enrutador.replicas', return_value=()):
+            self.assertIsNone(self.enrutador.db_for_read(Vehiculo))
+            self.assertEqual(self.enrutador.db_for_write(Vehiculo), DEFAULT_DB_ALIAS)
+
+    def test_solo_lee_de_replicas_los_modelos_de_gestion(self):
+        self.assertIn(self.enrutador.db_for_read(Vehiculo), REPLICAS)
+        self.assertIsNone(self.enrutador.db_for_read(get_user_model()))
+
+    def test_una_replica_por_solicitud(self):
+        def vista(request):
+            elegidas = {self.enrutador.db_for_read(Vehiculo) for _ in range(20)}
+            self.assertEqual(len(elegidas), 1)
+            self.assertLessEqual(elegidas, set(REPLICAS))
+            return HttpResponse()
+
+        respuesta = self._solicitud(vista)
+        self.assertNotIn(COOKIE_PRIMARIA, respuesta.cookies)
+
+    @override_settings(REPLICA_VENTANA_PRIMARIA=7)
+    def test_tras_escribir_lee_de_la_primaria_y_fija_la_cookie(self):
+        def vista(request):
+            self.assertIn(self.enrutador.db_for_read(Vehiculo), REPLICAS)
+            self.enrutador.db_for_write(Vehiculo)
+            self.assertEqual(self.enrutador.db_for_read(Vehiculo), DEFAULT_DB_ALIAS)
+            return HttpResponse()
+
+        respuesta = self._solicitud(vista)
+        self.assertEqual(respuesta.cookies[COOKIE_PRIMARIA]['max-age'], 7)
+        # El estado de la solicitud no pasa a la siguiente
+        self.assertIn(self.enrutador.db_for_read(Vehiculo), REPLICAS)
+
+    def test_con_la_cookie_lee_de_la_primaria(self):
+        def vista(request):
+            self.assertEqual(self.enrutador.db_for_read(Vehiculo), DEFAULT_DB_ALIAS)
+            return HttpResponse()
+
+        self._solicitud(vista, **{COOKIE_PRIMARIA: '1'})
+
+    def test_dentro_de_una_transaccion_lee_de_la_primaria(self):
+        with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+            self.assertEqual(self.enrutador.db_for_read(Vehiculo), DEFAULT_DB_ALIAS)
+
+    def test_no_migra_las_replicas(self):
+        self.assertFalse(self.enrutador.allow_migrate('replica1', 'gestion'))
+        self.assertIsNone(self.enrutador.allow_migrate(DEFAULT_DB_ALIAS, 'gestion'))
+
+    def test_relaciones_entre_primaria_y_replica(self):
+        vehiculo, ubicacion = Vehiculo(), Ubicacion()
+        vehiculo._state.db, ubicacion._state.db = DEFAULT_DB_ALIAS, 'replica1'
+        self.assertTrue(self.enrutador.allow_relation(vehiculo, ubicacion))
+        ubicacion._state.db = 'otra'
+        self.assertIsNone(self.enrutador.allow_relation(vehiculo, ubicacion))
+
+
+class CachesDesdeLaPrimariaTests(TransactionTestCase):
+    """Con réplicas, las cachés versionadas se llenan desde ``default``.
+
+    La réplica configurada no existe: cualquier lectura enrutada a ella falla.
+    Fuera de una transacción (TransactionTestCase) el enrutador sí elige réplica.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.vehiculo = Vehiculo.objects.create(patente='PRIM01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        self.ubicacion = Ubicacion.objects.create(nombre='Planta Primaria')
+        parche = mock.patch('gestion.enrutador.replicas', return_value=('replica1',))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_la_lectura_enrutada_va_a_la_replica(self):
+        with self.assertRaises(ConnectionDoesNotExist):
+            Vehiculo.objects.filter(patente='PRIM01').exists()
+
+    def test_cache_de_vehiculos(self):
+        self.assertEqual(cache_vehiculos.id_por_patente('PRIM01'), self.vehiculo.pk)
+        self.assertEqual(
+            [pk for pk, _ in cache_vehiculos.vehiculos_por_prefijo('PRIM', 10)], [self.vehiculo.pk]
+        )
+
+    def test_cache_de_ubicaciones(self):
+        self.assertEqual(ubicaciones.id_por_nombre('Planta Primaria'), self.ubicacion.pk)
+        ids = ubicaciones.resolver(['Planta Primaria', 'Planta Nueva'])
+        self.assertEqual(ids['Planta Primaria'], self.ubicacion.pk)
+        self.assertEqual(ubicaciones.nombre_por_id(ids['Planta Nueva']), 'Planta Nueva')
@@ -0,0 +1,86 @@
+"""Exportación por lotes con cursor (gestion.exportacion)."""
+
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.exportacion import (
+    COLUMNAS_EXPORTACION, exportar_csv, exportar_jsonl, iterar_lotes,
+)
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+MOVIMIENTOS = 7
+
+
+class ExportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('exporta', password='clave')
+        cls.predio = Ubicacion.objects.create(nombre='Predio Exporta')
+        cls.vehiculo = Vehiculo.objects.create(patente='EXPO01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        base = timezone.now() - datetime.timedelta(days=1)
+        # Fechas repetidas: el cursor debe desempatar por id sin saltar filas
+        for i in range(MOVIMIENTOS):
+            MovimientoCarga.objects.create(
+                vehiculo=cls.vehiculo, tipo_movimiento='INGRESO',
+                fecha_hora=base - datetime.timedelta(hours=i // 3),
+                origen=cls.predio, descripcion=f'Exportado {i}',
+            )
+        cls.esperados = list(
+            MovimientoCarga.objects.filter(vehiculo=cls.vehiculo)
+            .order_by('-fecha_hora', '-id').values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.movimientos = MovimientoCarga.objects.filter(vehiculo=self.vehiculo)
+
+    def test_lotes_recorren_todas_las_filas_una_vez(self):
+        with self.assertNumQueries(3):
+            lotes = list(iterar_lotes(self.movimientos, ['id', 'fecha_hora'], tamano_lote=3))
+        self.assertEqual([len(lote) for lote in lotes], [3, 3, 1])
+        self.assertEqual([fila[0] for lote in lotes for fila in lote], self.esperados)
+
+    def test_lote_exacto_termina_con_una_consulta_vacia(self):
+        with self.assertNumQueries(2):
+            lotes = list(iterar_lotes(self.movimientos, ['id', 'fecha_hora'], tamano_lote=MOVIMIENTOS))
+        self.assertEqual([len(lote) for lote in lotes], [MOVIMIENTOS])
+        ascendentes = list(iterar_lotes(
+            self.movimientos, ['id', 'fecha_hora'], orden=['fecha_hora', 'id'], tamano_lote=2,
+        ))
+        self.assertEqual([fila[0] for lote in ascendentes for fila in lote], self.esperados[::-1])
+
+    def test_csv_por_bloques(self):
+        bloques = list(exportar_csv(self.movimientos, tamano_lote=3))
+        # Encabezado y un bloque por lote
+        self.assertEqual(len(bloques), 4)
+        filas = list(csv.reader(io.StringIO(''.join(bloques))))
+        self.assertEqual(filas[0], [nombre for nombre, _ in COLUMNAS_EXPORTACION])
+        self.assertEqual([int(f[0]) for f in filas[1:]], self.esperados)
+        self.assertEqual({(f[1], f[4], f[5]) for f in filas[1:]}, {('EXPO01', 'Predio Exporta', '')})
+
+    def test_jsonl_por_bloques(self):
+        bloques = list(exportar_jsonl(self.movimientos, tamano_lote=3))
+        self.assertEqual([b.count('\n') for b in bloques], [3, 3, 1])
+        objetos = [json.loads(linea) for bloque in bloques for linea in bloque.splitlines()]
+        self.assertEqual([o['id'] for o in objetos], self.esperados)
+        self.assertEqual(objetos[0]['origen'], 'Predio Exporta')
+        self.assertEqual(
+            datetime.datetime.fromisoformat(objetos[0]['fecha_hora']),
+            MovimientoCarga.objects.get(pk=self.esperados[0]).fecha_hora,
+        )
+
+    def test_vista_aplica_filtros_y_formato(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('movimiento_export'), {'patente': 'expo01', 'formato': 'jsonl'})
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        contenido = b''.join(respuesta.streaming_content).decode()
+        self.assertEqual([json.loads(linea)['id'] for linea in contenido.splitlines()], self.esperados)
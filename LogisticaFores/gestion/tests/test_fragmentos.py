@@ -0,0 +1,65 @@
+"""Filas precompiladas de los listados (gestion.fragmentos)."""
+
+import datetime
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.template import engines
+from django.test import TestCase
+from django.utils import timezone, translation
+
+from gestion import fragmentos
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+# Una vuelta de {% for %} como en los listados: fila con la sangría de <tbody>
+BUCLE = (
+    '{% for x in filas %}\n' + fragmentos.SANGRIA_FILAS
+    + '{% include plantilla with m=x v=x %}' + fragmentos.SANGRIA_FILAS + '{% endfor %}'
+)
+
+
+class RenderizadorFilasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        muelle = Ubicacion.objects.create(nombre='Muelle <3> & "Sur"')
+        cls.vehiculo = Vehiculo.objects.create(patente='FRAG01', marca="O'Higgins & Cía", modelo='<FH>', tipo='CAMION', año=2020)
+        base = datetime.datetime(2024, 7, 1, 3, 30, 15, tzinfo=datetime.timezone.utc)
+        MovimientoCarga.objects.create(vehiculo=cls.vehiculo, tipo_movimiento='INGRESO', fecha_hora=base, origen=muelle)
+        MovimientoCarga.objects.create(
+            vehiculo=cls.vehiculo, tipo_movimiento='SALIDA', fecha_hora=base + datetime.timedelta(days=40), destino=muelle,
+        )
+
+    def _comparar(self, plantilla, queryset):
+        renderizador = fragmentos.RenderizadorFilas(plantilla)
+        esperado = engines['django'].from_string(BUCLE).render({'filas': list(queryset), 'plantilla': plantilla})
+        self.assertEqual(renderizador.renderizar(queryset.values_list(*renderizador.columnas)), esperado)
+        return esperado
+
+    def test_movimientos_igual_que_el_bucle_de_la_plantilla(self):
+        movimientos = MovimientoCarga.objects.filter(vehiculo=self.vehiculo).select_related('vehiculo', 'origen', 'destino')
+        html = self._comparar('movimientos/fila.html', movimientos)
+        self.assertEqual(html.count('<td>Muelle &lt;3&gt; &amp; &quot;Sur&quot;</td>'), 2)
+        self.assertEqual(html.count('<td></td>'), 2)
+        # Fechas en la zona horaria y el formato del idioma activos
+        with timezone.override('America/Santiago'), translation.override('en'):
+            self._comparar('movimientos/fila.html', movimientos)
+
+    def test_vehiculos_igual_que_el_bucle_de_la_plantilla(self):
+        html = self._comparar('vehiculos/fila.html', Vehiculo.objects.filter(pk=self.vehiculo.pk))
+        self.assertIn('<td>O&#x27;Higgins &amp; Cía</td>', html)
+
+    def test_columnas_de_la_plantilla(self):
+        self.assertEqual(
+            fragmentos.renderizador('movimientos/fila.html').columnas,
+            ('id', 'vehiculo__patente', 'tipo_movimiento', 'fecha_hora', 'origen__nombre', 'destino__nombre'),
+        )
+        self.assertEqual(fragmentos.RenderizadorFilas('movimientos/fila.html').renderizar([]), '')
+
+    def test_rechaza_plantillas_con_filtros_o_etiquetas(self):
+        for texto in ('<td>{{ m.fecha_hora|date:"Y" }}</td>', '{% if m.id %}<td></td>{% endif %}', '<td>{{ m }}</td>'):
+            with self.subTest(texto=texto), mock.patch.object(
+                fragmentos, 'get_template', return_value=engines['django'].from_string(texto),
+            ):
+                with self.assertRaises(ImproperlyConfigured):
+                    fragmentos.RenderizadorFilas('prueba.html')
@@ -0,0 +1,139 @@
+"""Importación CSV (gestion.importacion)."""
+
+import datetime
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase
+from django.utils import timezone
+
+from gestion import cache as cache_vehiculos
+from gestion import importacion
+from gestion.importacion import importar_movimientos, importar_vehiculos
+from gestion.models import MovimientoCarga, ResumenMovimiento, Ubicacion, Vehiculo
+
+
+def _csv(*lineas):
+    return io.StringIO('\n'.join(lineas) + '\n')
+
+
+class ImportarVehiculosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_inserta_validos_y_rechaza_por_linea(self):
+        Vehiculo.objects.create(patente='EXIS01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        resultado = importar_vehiculos(_csv(
+            'patente,marca,modelo,tipo,año',
+            'nuev01,Scania,R500,camion,2021',
+            'MAL1,Scania,R500,CAMION,2021',
+            'EXIS01,Volvo,FH,CAMION,2020',
+            'NUEV01,Scania,R500,CAMION,2021',
+            'NUEV02,Ford,F-150,AVION,2021',
+            'NUEV03,Ford,F-150,CAMIONETA,1800',
+            'NUEV04,Ford,F-150,CAMIONETA,2019',
+        ), tamano_lote=3)
+
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual([linea for linea, _ in resultado.rechazados], [3, 4, 5, 6, 7])
+        self.assertIn('formato inválido', resultado.rechazados[0][1])
+        self.assertIn('Ya existe', resultado.rechazados[1][1])
+        # Repetida dentro del mismo archivo
+        self.assertIn('Ya existe', resultado.rechazados[2][1])
+        self.assertEqual(
+            set(Vehiculo.objects.filter(patente__startswith='NUEV').values_list('patente', 'tipo')),
+            {('NUEV01', 'CAMION'), ('NUEV04', 'CAMIONETA')},
+        )
+
+    def test_invalida_la_cache_de_patentes(self):
+        self.assertIsNone(cache_vehiculos.id_por_patente('CACH01'))
+        importar_vehiculos(_csv('patente,marca,modelo,tipo,año', 'CACH01,Volvo,FH,CAMION,2020'))
+        self.assertEqual(cache_vehiculos.id_por_patente('CACH01'), Vehiculo.objects.get(patente='CACH01').pk)
+
+    def test_conflicto_concurrente_rechaza_solo_las_filas_afectadas(self):
+        reales = importacion.patentes_existentes
+
+        def concurrente(patentes):
+            # La primera validación no ve la patente que otra escritura
+            # confirma justo antes del insert.
+            existentes = reales(patentes)
+            if not Vehiculo.objects.filter(patente='CONC01').exists():
+                Vehiculo.objects.create(patente='CONC01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+            return existentes
+
+        with mock.patch.object(importacion, 'patentes_existentes', side_effect=concurrente):
+            resultado = importar_vehiculos(_csv(
+                'patente,marca,modelo,tipo,año',
+                'CONC01,Scania,R500,CAMION,2021',
+                'CONC02,Scania,R500,CAMION,2021',
+            ))
+
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(len(resultado.rechazados), 1)
+        self.assertEqual(resultado.rechazados[0][0], 2)
+        self.assertIn('Ya existe', resultado.rechazados[0][1])
+        self.assertEqual(Vehiculo.objects.get(patente='CONC01').marca, 'Volvo')
+        self.assertTrue(Vehiculo.objects.filter(patente='CONC02').exists())
+
+    def test_conflicto_que_persiste_rechaza_el_lote(self):
+        with mock.patch.object(
+            Vehiculo.objects, 'bulk_create', side_effect=IntegrityError('UNIQUE constraint failed'),
+        ):
+            resultado = importar_vehiculos(_csv(
+                'patente,marca,modelo,tipo,año',
+                'CONF01,Scania,R500,CAMION,2021',
+                'MAL1,Scania,R500,CAMION,2021',
+                'CONF02,Scania,R500,CAMION,2021',
+            ))
+
+        self.assertEqual(resultado.creados, 0)
+        self.assertEqual(sorted(linea for linea, _ in resultado.rechazados), [2, 3, 4])
+        self.assertFalse(Vehiculo.objects.filter(patente__startswith='CONF').exists())
+
+    def test_encabezado_incompleto(self):
+        with self.assertRaisesMessage(ValueError, 'año'):
+            importar_vehiculos(_csv('patente,marca,modelo,tipo', 'NUEV01,Volvo,FH,CAMION'))
+
+
+class ImportarMovimientosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vehiculo = Vehiculo.objects.create(patente='IMPO01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_inserta_validos_registra_ubicaciones_y_actualiza_resumen(self):
+        ayer = (timezone.now() - datetime.timedelta(days=1)).replace(microsecond=0)
+        futuro = timezone.now() + datetime.timedelta(days=1)
+        resultado = importar_movimientos(_csv(
+            'id,patente,tipo_movimiento,fecha_hora,origen,destino,descripcion',
+            f'99,impo01,ingreso,{ayer.isoformat()},Predio Sur,Planta Import,Trozos',
+            f',IMPO01,SALIDA,{ayer.isoformat()},Planta Import,,Tablas',
+            f',NOEX01,INGRESO,{ayer.isoformat()},A,B,',
+            f',IMPO01,TRASLADO,{ayer.isoformat()},A,B,',
+            ',IMPO01,INGRESO,ayer,A,B,',
+            f',IMPO01,INGRESO,{futuro.isoformat()},A,B,',
+        ))
+
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual([linea for linea, _ in resultado.rechazados], [4, 5, 6, 7])
+        movimientos = list(
+            MovimientoCarga.objects.filter(vehiculo=self.vehiculo).order_by('id')
+            .values_list('tipo_movimiento', 'origen__nombre', 'destino__nombre', 'descripcion')
+        )
+        self.assertEqual(movimientos, [
+            ('INGRESO', 'Predio Sur', 'Planta Import', 'Trozos'),
+            ('SALIDA', 'Planta Import', None, 'Tablas'),
+        ])
+        # Una sola fila por nombre aunque aparezca en varias líneas
+        self.assertEqual(Ubicacion.objects.filter(nombre='Planta Import').count(), 1)
+        self.assertEqual(
+            sum(ResumenMovimiento.objects.filter(vehiculo=self.vehiculo).values_list('cantidad', flat=True)), 2
+        )
+        self.vehiculo.refresh_from_db()
+        self.assertIsNotNone(self.vehiculo.ultimo_movimiento_id)
@@ -0,0 +1,118 @@
+"""Alta de movimientos por lotes: API y registro idempotente (gestion.importacion)."""
+
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.importacion import registrar_lote_idempotente
+from gestion.models import MovimientoCarga, SolicitudIdempotente, TokenApi, Vehiculo
+
+CLAVE_TOKEN = 'clave-de-prueba'
+
+
+class RegistrarLoteIdempotenteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('bascula')
+        Vehiculo.objects.create(patente='IDEM01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        fecha = (timezone.now() - datetime.timedelta(hours=1)).isoformat()
+        cls.lote = [
+            {'patente': 'IDEM01', 'tipo_movimiento': 'INGRESO', 'fecha_hora': fecha, 'origen': 'Romana'},
+            {'patente': 'IDEM01', 'tipo_movimiento': 'PESAJE', 'fecha_hora': fecha},
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_un_reintento_no_vuelve_a_insertar(self):
+        datos, previo = registrar_lote_idempotente(self.usuario.pk, 'k1', 'h1', self.lote)
+        self.assertIsNone(previo)
+        self.assertEqual(datos['creados'], 1)
+        self.assertEqual([r['indice'] for r in datos['rechazados']], [1])
+
+        repetido, previo = registrar_lote_idempotente(self.usuario.pk, 'k1', 'h1', self.lote)
+        self.assertEqual(repetido, datos)
+        self.assertEqual(previo.huella, 'h1')
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='IDEM01').count(), 1)
+        self.assertEqual(SolicitudIdempotente.objects.get(clave='k1').respuesta, datos)
+
+    def test_clave_reutilizada_devuelve_el_registro_original(self):
+        registrar_lote_idempotente(self.usuario.pk, 'k1', 'h1', self.lote)
+        _, previo = registrar_lote_idempotente(self.usuario.pk, 'k1', 'otra', self.lote[:1])
+        self.assertEqual(previo.huella, 'h1')
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='IDEM01').count(), 1)
+
+    def test_sin_clave_no_registra_la_solicitud(self):
+        registrar_lote_idempotente(self.usuario.pk, '', 'h1', self.lote)
+        registrar_lote_idempotente(self.usuario.pk, '', 'h1', self.lote)
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='IDEM01').count(), 2)
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+
+
+class ApiLoteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('bascula')
+        TokenApi.objects.create(usuario=cls.usuario, nombre='báscula', clave_hash=TokenApi.hash_clave(CLAVE_TOKEN))
+        Vehiculo.objects.create(patente='LOTE01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        fecha = (timezone.now() - datetime.timedelta(hours=1)).isoformat()
+        cls.lote = {'movimientos': [
+            {'patente': 'LOTE01', 'tipo_movimiento': 'INGRESO', 'fecha_hora': fecha, 'origen': 'Romana'},
+            {'patente': 'XXXX99', 'tipo_movimiento': 'INGRESO', 'fecha_hora': fecha},
+        ]}
+
+    def setUp(self):
+        cache.clear()
+
+    def _enviar(self, cuerpo, clave='', token=CLAVE_TOKEN):
+        cabeceras = {'HTTP_AUTHORIZATION': f'Token {token}'}
+        if clave:
+            cabeceras['HTTP_IDEMPOTENCY_KEY'] = clave
+        datos = cuerpo if isinstance(cuerpo, str) else json.dumps(cuerpo)
+        return self.client.post(reverse('api_movimientos_lote'), datos, content_type='application/json', **cabeceras)
+
+    def _estado(self, clave):
+        return self.client.get(
+            reverse('api_movimientos_lote_estado', args=[clave]), HTTP_AUTHORIZATION=f'Token {CLAVE_TOKEN}'
+        )
+
+    def test_alta_con_rechazos_por_indice(self):
+        respuesta = self._enviar(self.lote)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['creados'], 1)
+        self.assertEqual([r['indice'] for r in respuesta.json()['rechazados']], [1])
+        self.assertTrue(MovimientoCarga.objects.filter(vehiculo__patente='LOTE01', origen__nombre='Romana').exists())
+
+    def test_exige_token(self):
+        self.assertEqual(self._enviar(self.lote, token='otra').status_code, 401)
+
+    def test_cuerpo_invalido(self):
+        self.assertEqual(self._enviar('no es json').status_code, 400)
+        self.assertEqual(self._enviar({'movimientos': []}).status_code, 400)
+
+    def test_reintento_con_la_misma_clave(self):
+        primera = self._enviar(self.lote, clave='k1')
+        segunda = self._enviar(self.lote, clave='k1')
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(segunda.json(), primera.json())
+        self.assertEqual(MovimientoCarga.objects.filter(vehiculo__patente='LOTE01').count(), 1)
+
+    def test_clave_reutilizada_con_otro_cuerpo(self):
+        self._enviar(self.lote, clave='k1')
+        self.assertEqual(self._enviar({'movimientos': self.lote['movimientos'][:1]}, clave='k1').status_code, 422)
+
+    def test_estado_de_una_clave(self):
+        self._enviar(self.lote, clave='k1')
+        respuesta = self._estado('k1')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['estado'], 'procesada')
+        self.assertEqual(respuesta.json()['respuesta'], SolicitudIdempotente.objects.get(clave='k1').respuesta)
+        self.assertEqual(self._estado('desconocida').status_code, 404)
@@ -0,0 +1,93 @@
+"""Paginación por cursor (gestion.paginacion)."""
+
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from gestion.models import MovimientoCarga, Vehiculo
+from gestion.paginacion import (
+    TAMANO_PAGINA_DEFECTO, TAMANO_PAGINA_MAXIMO, codificar_cursor, decodificar_cursor, paginar_keyset,
+    tamano_pagina,
+)
+
+ORDEN = ['-fecha_hora', '-id']
+
+
+class PaginarKeysetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        vehiculo = Vehiculo.objects.create(patente='PAGI01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        base = timezone.now() - datetime.timedelta(days=400)
+        # Fechas repetidas de a tres: el id desempata el orden
+        for i in range(23):
+            MovimientoCarga.objects.create(
+                vehiculo=vehiculo, tipo_movimiento='INGRESO',
+                fecha_hora=base + datetime.timedelta(minutes=i // 3),
+            )
+        cls.movimientos = MovimientoCarga.objects.filter(vehiculo=vehiculo)
+        cls.esperados = list(cls.movimientos.order_by(*ORDEN).values_list('id', flat=True))
+
+    def _recorrer(self, tamano):
+        vistos, cursor, paginas = [], None, []
+        while True:
+            pagina = paginar_keyset(self.movimientos, ORDEN, despues=cursor, tamano=tamano)
+            paginas.append(pagina)
+            vistos += [m.id for m in pagina.items]
+            cursor = pagina.siguiente
+            if cursor is None:
+                return vistos, paginas
+
+    def test_recorrido_hacia_adelante_sin_repetir_ni_saltar(self):
+        vistos, paginas = self._recorrer(5)
+        self.assertEqual(vistos, self.esperados)
+        self.assertEqual(len(paginas), 5)
+        self.assertIsNone(paginas[0].anterior)
+        self.assertIsNotNone(paginas[-1].anterior)
+
+    def test_pagina_anterior_devuelve_la_misma_pagina(self):
+        _, paginas = self._recorrer(5)
+        for previa, actual in zip(paginas, paginas[1:]):
+            atras = paginar_keyset(self.movimientos, ORDEN, antes=actual.anterior, tamano=5)
+            self.assertEqual([m.id for m in atras.items], [m.id for m in previa.items])
+            self.assertIsNotNone(atras.siguiente)
+
+    def test_primera_pagina_al_volver_no_tiene_anterior(self):
+        _, paginas = self._recorrer(5)
+        atras = paginar_keyset(self.movimientos, ORDEN, antes=paginas[1].anterior, tamano=5)
+        self.assertIsNone(atras.anterior)
+
+    def test_funciona_con_values(self):
+        pagina = paginar_keyset(self.movimientos.values('id', 'fecha_hora'), ORDEN, tamano=4)
+        self.assertEqual([f['id'] for f in pagina.items], self.esperados[:4])
+        siguiente = paginar_keyset(self.movimientos.values('id', 'fecha_hora'), ORDEN, despues=pagina.siguiente, tamano=4)
+        self.assertEqual([f['id'] for f in siguiente.items], self.esperados[4:8])
+
+    def test_cursor_invalido_se_ignora(self):
+        pagina = paginar_keyset(self.movimientos, ORDEN, despues='no-es-un-cursor', tamano=5)
+        self.assertEqual([m.id for m in pagina.items], self.esperados[:5])
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_ida_y_vuelta_con_tipos(self):
+        fecha = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)
+        cursor = codificar_cursor([fecha, 42])
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decodificar_cursor(cursor, MovimientoCarga, ['fecha_hora', 'id']), [fecha, 42])
+
+    def test_cursor_con_otra_cantidad_de_campos(self):
+        with self.assertRaises(ValueError):
+            decodificar_cursor(codificar_cursor([1]), MovimientoCarga, ['fecha_hora', 'id'])
+
+    def test_cursor_con_valor_del_tipo_equivocado(self):
+        with self.assertRaises(ValueError):
+            decodificar_cursor(codificar_cursor(['ayer', 1]), MovimientoCarga, ['fecha_hora', 'id'])
+
+    def test_tamano_pagina(self):
+        self.assertEqual(tamano_pagina(None), TAMANO_PAGINA_DEFECTO)
+        self.assertEqual(tamano_pagina('abc'), TAMANO_PAGINA_DEFECTO)
+        self.assertEqual(tamano_pagina('0'), 1)
+        self.assertEqual(tamano_pagina('10'), 10)
+        self.assertEqual(tamano_pagina('100000'), TAMANO_PAGINA_MAXIMO)
@@ -0,0 +1,179 @@
+"""Pool de conexiones por proceso (gestion.backends.pool)."""
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from gestion.backends import pool
+from gestion.backends.pool import PoolAgotado, PoolConexiones, PoolMixin
+
+
+class ConexionFalsa:
+
+    def __init__(self, falla_al_cerrar=False):
+        self.cerrada = False
+        self.falla_al_cerrar = falla_al_cerrar
+
+    def close(self):
+        self.cerrada = True
+        if self.falla_al_cerrar:
+            raise OSError('socket cerrado')
+
+
+class PoolConexionesTests(SimpleTestCase):
+
+    def test_reutiliza_la_conexion_devuelta(self):
+        conexiones = PoolConexiones(tamano=2)
+        primera = conexiones.tomar(ConexionFalsa)
+        conexiones.devolver(primera)
+        self.assertIs(conexiones.tomar(ConexionFalsa), primera)
+        self.assertFalse(primera.cerrada)
+        self.assertEqual(
+            conexiones.metricas(),
+            {'abiertas': 1, 'reutilizadas': 1, 'descartadas': 0, 'agotado': 0, 'libres': 0},
+        )
+
+    def test_desborde_se_cierra_al_devolverse(self):
+        conexiones = PoolConexiones(tamano=1, desborde=1)
+        una, otra = conexiones.tomar(ConexionFalsa), conexiones.tomar(ConexionFalsa)
+        conexiones.devolver(una)
+        conexiones.devolver(otra)
+        self.assertFalse(una.cerrada)
+        self.assertTrue(otra.cerrada)
+        self.assertEqual(conexiones.metricas()['libres'], 1)
+
+    def test_descartar_cierra_y_libera_el_cupo(self):
+        conexiones = PoolConexiones(tamano=1, desborde=0, espera=0)
+        conexion = conexiones.tomar(ConexionFalsa)
+        conexiones.devolver(conexion, descartar=True)
+        self.assertTrue(conexion.cerrada)
+        self.assertIsNot(conexiones.tomar(ConexionFalsa), conexion)
+        self.assertEqual(conexiones.metricas()['descartadas'], 1)
+
+    def test_agotado_tras_la_espera(self):
+        conexiones = PoolConexiones(tamano=1, desborde=0, espera=0)
+        conexion = conexiones.tomar(ConexionFalsa)
+        with self.assertRaises(PoolAgotado):
+            conexiones.tomar(ConexionFalsa)
+        self.assertEqual(conexiones.metricas()['agotado'], 1)
+        conexiones.devolver(conexion)
+        self.assertIs(conexiones.tomar(ConexionFalsa), conexion)
+
+    def test_error_al_abrir_libera_el_cupo(self):
+        conexiones = PoolConexiones(tamano=1, desborde=0, espera=0)
+        with self.assertRaises(ConnectionRefusedError):
+            conexiones.tomar(mock.Mock(side_effect=ConnectionRefusedError))
+        self.assertIsInstance(conexiones.tomar(ConexionFalsa), ConexionFalsa)
+
+    def test_descarta_vencidas_y_no_usables(self):
+        conexiones = PoolConexiones(tamano=2, vida_maxima=60)
+        with mock.patch.object(pool.time, 'monotonic', return_value=1000):
+            vieja = conexiones.tomar(ConexionFalsa)
+        conexiones.devolver(vieja)
+        with mock.patch.object(pool.time, 'monotonic', return_value=1061):
+            nueva = conexiones.tomar(ConexionFalsa)
+            self.assertTrue(vieja.cerrada)
+            self.assertIsNot(nueva, vieja)
+
+            conexiones.devolver(nueva)
+            rota = mock.Mock(return_value=False)
+            otra = conexiones.tomar(ConexionFalsa, usable=rota)
+        rota.assert_called_once_with(nueva)
+        self.assertTrue(nueva.cerrada)
+        self.assertIsNot(otra, nueva)
+        self.assertEqual(conexiones.metricas()['descartadas'], 2)
+
+    def test_falla_al_cerrar_igual_libera_el_cupo(self):
+        conexiones = PoolConexiones(tamano=1, desborde=0, espera=0)
+        conexiones.devolver(conexiones.tomar(lambda: ConexionFalsa(falla_al_cerrar=True)), descartar=True)
+        self.assertIsInstance(conexiones.tomar(ConexionFalsa), ConexionFalsa)
+
+    def test_un_pool_por_proceso_y_alias(self):
+        opciones = {'TAMANO': 3, 'DESBORDE': 1, 'ESPERA': 2, 'VIDA_MAXIMA': 10}
+        with mock.patch.dict(pool._pools, clear=True):
+            with mock.patch.object(pool.os, 'getpid', return_value=100):
+                padre = pool.obtener_pool('default', opciones)
+                self.assertIs(pool.obtener_pool('default', opciones), padre)
+                self.assertIsNot(pool.obtener_pool('replica', opciones), padre)
+            with mock.patch.object(pool.os, 'getpid', return_value=101):
+                self.assertIsNot(pool.obtener_pool('default', opciones), padre)
+        self.assertEqual((padre.tamano, padre.espera, padre.vida_maxima), (3, 2, 10))
+
+
+class BackendFalso:
+    """Lo mínimo de un DatabaseWrapper que usa PoolMixin."""
+
+    class Database:
+        OperationalError = type('OperationalError', (Exception,), {})
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.settings_dict = {'POOL': {'TAMANO': 1, 'DESBORDE': 0, 'ESPERA': 0}, 'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True}
+        self.connection = None
+        self.in_atomic_block = False
+        self.autocommit = True
+        self.errors_occurred = False
+        self.usable = True
+
+    def get_new_connection(self, conn_params):
+        return ConexionFalsa()
+
+    def is_usable(self):
+        return self.usable
+
+
+class BackendConPool(PoolMixin, BackendFalso):
+    pass
+
+
+class PoolMixinTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(pool._pools, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = BackendConPool('prueba')
+
+    def _abrir_y_cerrar(self, **estado):
+        self.backend.connection = self.backend.get_new_connection({})
+        conexion = self.backend.connection
+        for atributo, valor in estado.items():
+            setattr(self.backend, atributo, valor)
+        # Como BaseDatabaseWrapper.close()
+        self.backend._close()
+        self.backend.connection = None
+        return conexion
+
+    def test_conexion_limpia_vuelve_al_pool(self):
+        for estado in ({}, {'errors_occurred': True}):
+            with self.subTest(**estado):
+                conexion = self._abrir_y_cerrar(**estado)
+                self.assertFalse(conexion.cerrada)
+                self.assertIs(self.backend.get_new_connection({}), conexion)
+                self.backend.pool.devolver(conexion)
+
+    def test_se_descartan_transacciones_abiertas_autocommit_y_conexiones_rotas(self):
+        for estado in (
+            {'in_atomic_block': True},
+            {'autocommit': False},
+            {'errors_occurred': True, 'usable': False},
+        ):
+            with self.subTest(**estado):
+                self.backend = BackendConPool('prueba')
+                conexion = self._abrir_y_cerrar(**estado)
+                self.assertTrue(conexion.cerrada)
+                self.assertEqual(self.backend.pool.metricas()['libres'], 0)
+
+    def test_chequeo_de_salud_al_prestar(self):
+        self.backend.settings_dict['CONN_HEALTH_CHECKS'] = True
+        conexion = self._abrir_y_cerrar()
+        self.backend.usable = False
+        self.assertIsNot(self.backend.get_new_connection({}), conexion)
+        self.assertTrue(conexion.cerrada)
+        # El chequeo no deja la conexión ociosa asignada al backend
+        self.assertIsNone(self.backend.connection)
+
+    def test_pool_agotado_es_un_error_del_driver(self):
+        self.backend.get_new_connection({})
+        with self.assertRaises(BackendFalso.Database.OperationalError):
+            self.backend.get_new_connection({})
@@ -0,0 +1,117 @@
+"""Presupuestos de consultas (PRESUPUESTO_CONSULTAS) en modo estricto.
+
+Recorre cada ruta con presupuesto: si una vista supera su máximo (un N+1
+nuevo, una consulta de más en un formulario), metricas_middleware lanza
+PresupuestoExcedido y la prueba falla.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion.metricas import PresupuestoExcedido
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+# Movimientos del listado del admin: un N+1 por fila supera el presupuesto
+MOVIMIENTOS = 30
+
+
+@override_settings(PRESUPUESTO_CONSULTAS_ESTRICTO=True)
+class PresupuestoConsultasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'clave')
+        lugares = [Ubicacion.objects.create(nombre=n) for n in ('Predio Norte', 'Aserradero', 'Muelle 3')]
+        cls.vehiculos = [
+            Vehiculo.objects.create(patente=f'TEST{i:02d}', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+            for i in range(5)
+        ]
+        ahora = timezone.now()
+        for i in range(MOVIMIENTOS):
+            MovimientoCarga.objects.create(
+                vehiculo=cls.vehiculos[i % len(cls.vehiculos)],
+                tipo_movimiento='INGRESO' if i % 2 else 'SALIDA',
+                fecha_hora=ahora - datetime.timedelta(hours=i),
+                origen=lugares[i % 3], destino=lugares[(i + 1) % 3],
+                descripcion=f'Carga {i}',
+            )
+        cls.movimiento = MovimientoCarga.objects.order_by('-id').first()
+
+    def setUp(self):
+        # Las cachés versionadas sobreviven al rollback de cada prueba
+        cache.clear()
+        self.client.force_login(self.usuario)
+        self.recorridas = set()
+
+    def _pedir(self, metodo, url, datos=None):
+        respuesta = getattr(self.client, metodo)(url, datos or {})
+        if metodo == 'post':
+            # Un POST válido redirige; un 200 sería el formulario con errores
+            self.assertEqual(respuesta.status_code, 302, url)
+        else:
+            self.assertLess(respuesta.status_code, 400, url)
+        if respuesta.streaming:
+            b''.join(respuesta.streaming_content)
+        self.recorridas.add(respuesta.resolver_match.view_name)
+        return respuesta
+
+    def _datos_movimiento(self, sufijo):
+        return {
+            'vehiculo': self.vehiculos[0].pk,
+            'tipo_movimiento': 'INGRESO',
+            'fecha_hora': (timezone.localtime() - datetime.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M'),
+            # Ubicaciones nuevas: se crean al guardar (ubicaciones.resolver)
+            'origen': f'Origen {sufijo}',
+            'destino': f'Destino {sufijo}',
+            'descripcion': 'Prueba',
+        }
+
+    def test_todas_las_rutas_respetan_su_presupuesto(self):
+        vehiculo = self.vehiculos[1]
+        self._pedir('get', reverse('vehiculo_list'))
+        self._pedir('get', reverse('vehiculo_autocomplete'), {'q': 'TES'})
+        self._pedir('get', reverse('vehiculo_create'))
+        self._pedir('post', reverse('vehiculo_create'), {
+            'patente': 'NUEV01', 'marca': 'Scania', 'modelo': 'R500', 'tipo': 'CAMION', 'año': 2021,
+        })
+        self._pedir('get', reverse('vehiculo_update', args=[vehiculo.pk]))
+        self._pedir('post', reverse('vehiculo_update', args=[vehiculo.pk]), {
+            'patente': vehiculo.patente, 'marca': 'Mercedes', 'modelo': 'Actros', 'tipo': 'CAMION', 'año': 2022,
+        })
+
+        self._pedir('get', reverse('movimiento_list'))
+        self._pedir('get', reverse('movimiento_list'), {'origen': 'Aserradero', 'tipo': 'INGRESO'})
+        self._pedir('get', reverse('movimiento_export'))
+        self._pedir('get', reverse('movimiento_en_vivo'))
+        self._pedir('get', reverse('movimiento_create'))
+        self._pedir('post', reverse('movimiento_create'), self._datos_movimiento('alta'))
+        self._pedir('get', reverse('movimiento_update', args=[self.movimiento.pk]))
+        self._pedir('post', reverse('movimiento_update', args=[self.movimiento.pk]), self._datos_movimiento('edición'))
+        self._pedir('get', reverse('movimiento_delete', args=[self.movimiento.pk]))
+
+        self._pedir('get', reverse('resumen_dashboard'))
+        self._pedir('get', reverse('reporte_patio'))
+        self._pedir('get', reverse('reporte_agregados'))
+        self._pedir('get', reverse('api_vehiculos'))
+        self._pedir('get', reverse('api_movimientos'))
+        self._pedir('get', reverse('api_cola'))
+        self._pedir('get', reverse('metricas'))
+        self._pedir('get', reverse('admin:gestion_movimientocarga_changelist'))
+        self._pedir('get', reverse('admin:gestion_vehiculo_changelist'))
+
+        # Al final: elimina el vehículo y sus movimientos (CASCADE por lotes)
+        self._pedir('get', reverse('vehiculo_delete', args=[self.vehiculos[2].pk]))
+
+        self.assertEqual(self.recorridas, set(settings.PRESUPUESTO_CONSULTAS))
+
+    def test_vista_que_supera_el_presupuesto_falla(self):
+        presupuestos = {**settings.PRESUPUESTO_CONSULTAS, 'admin:gestion_movimientocarga_changelist': 2}
+        with override_settings(PRESUPUESTO_CONSULTAS=presupuestos):
+            with self.assertRaises(PresupuestoExcedido):
+                self.client.get(reverse('admin:gestion_movimientocarga_changelist'))
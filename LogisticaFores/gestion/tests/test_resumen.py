@@ -0,0 +1,105 @@
+"""Resumen por vehículo y puntero al último movimiento (gestion.resumen)."""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from gestion import resumen
+from gestion.forms import VehiculoForm
+from gestion.models import MovimientoCarga, ResumenMovimiento, Vehiculo
+
+UTC = datetime.timezone.utc
+BASE = datetime.datetime(2024, 5, 20, 12, tzinfo=UTC)
+DIA = datetime.timedelta(days=1)
+
+
+class ResumenIncrementalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.camion = Vehiculo.objects.create(patente='RESU01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        cls.otro = Vehiculo.objects.create(patente='RESU02', marca='Ford', modelo='F-150', tipo='CAMIONETA', año=2021)
+
+    def setUp(self):
+        cache.clear()
+
+    def _crear(self, fecha_hora, tipo='INGRESO', vehiculo=None):
+        return MovimientoCarga.objects.create(
+            vehiculo=vehiculo or self.camion, tipo_movimiento=tipo, fecha_hora=fecha_hora,
+        )
+
+    def _resumen(self, vehiculo=None):
+        return dict(
+            ((fila[0], fila[1]), fila[2]) for fila in
+            ResumenMovimiento.objects.filter(vehiculo=vehiculo or self.camion)
+            .values_list('dia', 'tipo_movimiento', 'cantidad')
+        )
+
+    def _ultimo(self, vehiculo=None):
+        return Vehiculo.objects.values_list('ultimo_movimiento_id', flat=True).get(pk=(vehiculo or self.camion).pk)
+
+    def test_altas_suman_y_actualizan_el_puntero(self):
+        self._crear(BASE)
+        self._crear(BASE + datetime.timedelta(hours=1))
+        ultimo = self._crear(BASE + DIA, 'SALIDA')
+        self._crear(BASE - DIA)
+        self.assertEqual(self._resumen(), {
+            (BASE.date() - DIA, 'INGRESO'): 1,
+            (BASE.date(), 'INGRESO'): 2,
+            (BASE.date() + DIA, 'SALIDA'): 1,
+        })
+        self.assertEqual(self._ultimo(), ultimo.pk)
+
+    def test_edicion_mueve_el_conteo(self):
+        movimiento = self._crear(BASE)
+        movimiento.fecha_hora = BASE + DIA
+        movimiento.tipo_movimiento = 'SALIDA'
+        movimiento.save()
+        # La fila del día previo queda en cero y se elimina
+        self.assertEqual(self._resumen(), {(BASE.date() + DIA, 'SALIDA'): 1})
+
+    def test_cambio_de_vehiculo_actualiza_ambos(self):
+        anterior = self._crear(BASE - DIA)
+        movimiento = self._crear(BASE)
+        movimiento.vehiculo = self.otro
+        movimiento.save()
+        self.assertEqual(self._resumen(), {(BASE.date() - DIA, 'INGRESO'): 1})
+        self.assertEqual(self._resumen(self.otro), {(BASE.date(), 'INGRESO'): 1})
+        self.assertEqual(self._ultimo(), anterior.pk)
+        self.assertEqual(self._ultimo(self.otro), movimiento.pk)
+
+    def test_baja_descuenta_y_retrocede_el_puntero(self):
+        self._crear(BASE)
+        # Misma fecha: desempata el id
+        anterior = self._crear(BASE)
+        ultimo = self._crear(BASE + DIA)
+        ultimo.delete()
+        self.assertEqual(self._resumen(), {(BASE.date(), 'INGRESO'): 2})
+        self.assertEqual(self._ultimo(), anterior.pk)
+        MovimientoCarga.objects.filter(vehiculo=self.camion).delete()
+        self.assertEqual(self._resumen(), {})
+        self.assertIsNone(self._ultimo())
+
+    def test_reconstruir_coincide_con_el_incremental(self):
+        for dias, tipo in ((0, 'INGRESO'), (0, 'SALIDA'), (1, 'INGRESO'), (3, 'INGRESO')):
+            self._crear(BASE + dias * DIA, tipo)
+        editado = self._crear(BASE)
+        editado.fecha_hora = BASE + 2 * DIA
+        editado.save()
+        incremental = self._resumen()
+        resumen.reconstruir(tamano_lote=2)
+        self.assertEqual(self._resumen(), incremental)
+
+    def test_editar_el_vehiculo_no_pisa_el_puntero(self):
+        # Instancia leída antes de que se registre un movimiento
+        leido = Vehiculo.objects.get(pk=self.camion.pk)
+        movimiento = self._crear(BASE)
+        formulario = VehiculoForm(
+            {'patente': 'RESU01', 'marca': 'Scania', 'modelo': 'R500', 'tipo': 'CAMION', 'año': 2020},
+            instance=leido,
+        )
+        self.assertTrue(formulario.is_valid(), formulario.errors)
+        formulario.save()
+        self.camion.refresh_from_db()
+        self.assertEqual((self.camion.marca, self.camion.ultimo_movimiento_id), ('Scania', movimiento.pk))
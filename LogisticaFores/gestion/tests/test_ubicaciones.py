@@ -0,0 +1,127 @@
+"""Ubicaciones normalizadas (gestion.ubicaciones) y su migración 0013."""
+
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from gestion import ubicaciones
+from gestion.forms import MovimientoFiltroForm
+from gestion.models import MovimientoCarga, Ubicacion, Vehiculo
+
+
+class ResolverTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.arauco = Ubicacion.objects.create(nombre='Planta Arauco Ubic')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_crea_solo_las_faltantes(self):
+        ids = ubicaciones.resolver(['Planta Arauco Ubic', ' Predio Nuevo Ubic ', '', 'Predio Nuevo Ubic'])
+        self.assertEqual(set(ids), {'Planta Arauco Ubic', 'Predio Nuevo Ubic'})
+        self.assertEqual(ids['Planta Arauco Ubic'], self.arauco.pk)
+        self.assertEqual(Ubicacion.objects.get(nombre='Predio Nuevo Ubic').pk, ids['Predio Nuevo Ubic'])
+        # La tabla en caché ya incluye la nueva
+        self.assertEqual(ubicaciones.nombre_por_id(ids['Predio Nuevo Ubic']), 'Predio Nuevo Ubic')
+        with self.assertNumQueries(0):
+            self.assertEqual(ubicaciones.resolver(['Predio Nuevo Ubic']), {'Predio Nuevo Ubic': ids['Predio Nuevo Ubic']})
+
+    def test_sin_distinguir_mayusculas(self):
+        self.assertEqual(ubicaciones.id_por_nombre(' planta ARAUCO ubic'), self.arauco.pk)
+        self.assertEqual(ubicaciones.resolver(['PLANTA ARAUCO UBIC']), {'PLANTA ARAUCO UBIC': self.arauco.pk})
+        self.assertEqual(Ubicacion.objects.filter(nombre__iexact='planta arauco ubic').count(), 1)
+
+    def test_nombre_exacto_tiene_prioridad(self):
+        # SQLite distingue mayúsculas en la restricción única
+        otra = Ubicacion.objects.create(nombre='planta arauco ubic')
+        self.assertEqual(ubicaciones.id_por_nombre('planta arauco ubic'), otra.pk)
+        self.assertEqual(ubicaciones.id_por_nombre('Planta Arauco Ubic'), self.arauco.pk)
+
+
+class FiltroPorLugarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user('operador')
+        vehiculo = Vehiculo.objects.create(patente='UBIC01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        arauco = Ubicacion.objects.create(nombre='Planta Arauco Ubic')
+        MovimientoCarga.objects.create(
+            vehiculo=vehiculo, tipo_movimiento='INGRESO', origen=arauco,
+            fecha_hora=timezone.now() - datetime.timedelta(hours=1),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def test_listado_filtra_sin_distinguir_mayusculas(self):
+        respuesta = self.client.get(reverse('movimiento_list'), {'origen': 'planta arauco ubic'})
+        self.assertContains(respuesta, '<tr data-id=', count=1)
+        self.assertContains(respuesta, '<td>UBIC01</td>')
+        self.assertContains(respuesta, '<option value="Planta Arauco Ubic">')
+
+    def test_sugerencias_leidas_antes_del_render(self):
+        filtro = MovimientoFiltroForm({})
+        async_to_sync(filtro.acargar_lugares)()
+        # Una versión nueva no hace que el render vuelva a consultar la base
+        ubicaciones.invalidar_ubicaciones()
+        with self.assertNumQueries(0):
+            html = str(filtro['origen'])
+        self.assertIn('<option value="Planta Arauco Ubic">', html)
+
+
+class MigracionUbicacionTests(TransactionTestCase):
+    """Ida y vuelta de 0013: los nombres de texto pasan a ids y vuelven."""
+
+    anterior = [('gestion', '0012_agregados_movimiento')]
+    posterior = [('gestion', '0013_ubicacion')]
+
+    def _migrar(self, destino):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(destino)
+        return executor.loader.project_state(destino).apps
+
+    def tearDown(self):
+        self._migrar(MigrationExecutor(connection).loader.graph.leaf_nodes('gestion'))
+        super().tearDown()
+
+    def test_ida_y_vuelta(self):
+        apps = self._migrar(self.anterior)
+        Vehiculo = apps.get_model('gestion', 'Vehiculo')
+        Movimiento = apps.get_model('gestion', 'MovimientoCarga')
+        vehiculo = Vehiculo.objects.create(patente='MIGR01', marca='Volvo', modelo='FH', tipo='CAMION', año=2020)
+        fecha = timezone.now() - datetime.timedelta(days=1)
+        for origen, destino in (('Predio Migr ', 'Puerto Migr'), ('Puerto Migr', ''), ('Predio Migr', 'Puerto Migr')):
+            Movimiento.objects.create(
+                vehiculo=vehiculo, tipo_movimiento='INGRESO', fecha_hora=fecha, origen=origen, destino=destino,
+            )
+
+        apps = self._migrar(self.posterior)
+        Ubicacion = apps.get_model('gestion', 'Ubicacion')
+        Movimiento = apps.get_model('gestion', 'MovimientoCarga')
+        self.assertEqual(
+            set(Ubicacion.objects.filter(nombre__endswith='Migr').values_list('nombre', flat=True)),
+            {'Predio Migr', 'Puerto Migr'},
+        )
+        self.assertEqual(
+            list(Movimiento.objects.filter(vehiculo__patente='MIGR01').order_by('id')
+                 .values_list('origen__nombre', 'destino__nombre')),
+            [('Predio Migr', 'Puerto Migr'), ('Puerto Migr', None), ('Predio Migr', 'Puerto Migr')],
+        )
+
+        apps = self._migrar(self.anterior)
+        Movimiento = apps.get_model('gestion', 'MovimientoCarga')
+        self.assertEqual(
+            list(Movimiento.objects.filter(vehiculo__patente='MIGR01').order_by('id').values_list('origen', 'destino')),
+            [('Predio Migr', 'Puerto Migr'), ('Puerto Migr', ''), ('Predio Migr', 'Puerto Migr')],
+        )
@@ -0,0 +1,158 @@
+"""Ubicaciones (origen y destino de los movimientos) con lectura en caché.
+
+Los movimientos guardan el id de su origen y destino (FK a Ubicacion); los
+filtros y agregados comparan enteros. La tabla es chica y casi sólo crece,
+así que se guarda entera en la caché (``CACHES['default']``) como pares
+(id, nombre) bajo una clave versionada, igual que los vehículos en
+gestion.cache. Cada proceso conserva además los diccionarios de la última
+versión leída: traducir un nombre o un id no consulta la base ni arma el
+diccionario de nuevo mientras la versión no cambie. Los nombres se comparan
+sin distinguir mayúsculas, como la colación de MySQL (un nombre escrito
+exactamente igual tiene prioridad).
+
+Como en gestion.cache, la tabla se lee de la base primaria: una réplica
+atrasada dejaría en caché, bajo la versión nueva, la lista sin las
+ubicaciones recién creadas.
+
+Al crear, editar o eliminar una ubicación (señales, o ``resolver`` al
+crear las faltantes) se incrementa la versión.
+"""
+
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+
+from .models import Ubicacion
+
+CLAVE_VERSION = 'gestion:ubicaciones:version'
+# Tiempo de vida de la tabla en caché (la invalidación real la hace la versión)
+TTL_UBICACIONES = 60 * 60
+
+_memoria = {'version': None, 'por_nombre': {}, 'por_nombre_plegado': {}, 'por_id': {}}
+
+
+def version_ubicaciones():
+    """Versión vigente de las ubicaciones en caché (ver cache.version_vehiculos)."""
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, time.time_ns(), timeout=None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def invalidar_ubicaciones():
+    """Invalida la tabla cacheada incrementando la versión."""
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), timeout=None)
+
+
+def _tablas():
+    version = version_ubicaciones()
+    if _memoria['version'] != version:
+        clave = f'gestion:ubicaciones:{version}'
+        pares = cache.get(clave)
+        if pares is None:
+            pares = list(Ubicacion.objects.using(DEFAULT_DB_ALIAS).order_by('nombre').values_list('id', 'nombre'))
+            cache.set(clave, pares, TTL_UBICACIONES)
+        _memoria.update(
+            version=version,
+            por_nombre={nombre: pk for pk, nombre in pares},
+            # En orden inverso: ante dos nombres que sólo difieren en
+            # mayúsculas (posible en SQLite) queda el primero por nombre
+            por_nombre_plegado={nombre.casefold(): pk for pk, nombre in reversed(pares)},
+            por_id=dict(pares),
+        )
+    return _memoria
+
+
+def _buscar(tablas, nombre):
+    pk = tablas['por_nombre'].get(nombre)
+    return pk if pk is not None else tablas['por_nombre_plegado'].get(nombre.casefold())
+
+
+def nombres():
+    """Diccionario id → nombre de todas las ubicaciones."""
+    return _tablas()['por_id']
+
+
+def id_por_nombre(nombre):
+    """Id de la ubicación llamada ``nombre``, sin distinguir mayúsculas.
+
+    Returns:
+        int | None: Id, o None si no existe o ``nombre`` está vacío.
+    """
+    return _buscar(_tablas(), nombre.strip()) if nombre else None
+
+
+def nombre_por_id(ubicacion_id):
+    """Nombre de la ubicación ``ubicacion_id`` ('' si es None o no existe)."""
+    return nombres().get(ubicacion_id, '') if ubicacion_id is not None else ''
+
+
+def _crear_con_ids(nuevas):
+    """Inserta las ubicaciones y les asigna el id devuelto por el INSERT.
+
+    Sólo en las bases con ``INSERT ... RETURNING`` (PostgreSQL, SQLite,
+    MariaDB): evita releer los ids creados.
+
+    Returns:
+        bool: False si la base no devuelve ids o si otro proceso creó alguna
+        de las ubicaciones al mismo tiempo (no se insertó ninguna).
+    """
+    if not connections[DEFAULT_DB_ALIAS].features.can_return_rows_from_bulk_insert:
+        return False
+    try:
+        if transaction.get_connection().in_atomic_block:
+            # Dentro de una transacción, el savepoint la mantiene utilizable
+            with transaction.atomic():
+                Ubicacion.objects.using(DEFAULT_DB_ALIAS).bulk_create(nuevas)
+        else:
+            Ubicacion.objects.using(DEFAULT_DB_ALIAS).bulk_create(nuevas)
+    except IntegrityError:
+        for ubicacion in nuevas:
+            ubicacion.pk = None
+        return False
+    return True
+
+
+def resolver(nombres_pedidos):
+    """Ids de las ubicaciones indicadas, creando las que falten.
+
+    Args:
+        nombres_pedidos (Iterable[str]): Nombres tal como llegan (se quitan
+            los espacios de los extremos; los vacíos se ignoran).
+
+    Returns:
+        dict[str, int]: Nombre (sin espacios extremos) → id.
+    """
+    pedidos = {n.strip()[:100] for n in nombres_pedidos if n and n.strip()}
+    tablas = _tablas()
+    resultado = {n: pk for n in pedidos if (pk := _buscar(tablas, n)) is not None}
+    faltantes = pedidos - resultado.keys()
+    if not faltantes:
+        return resultado
+    nuevas = [Ubicacion(nombre=n) for n in sorted(faltantes)]
+    if _crear_con_ids(nuevas):
+        invalidar_ubicaciones()
+        resultado.update((ubicacion.nombre, ubicacion.pk) for ubicacion in nuevas)
+        return resultado
+    Ubicacion.objects.using(DEFAULT_DB_ALIAS).bulk_create(nuevas, ignore_conflicts=True)
+    invalidar_ubicaciones()
+    resultado.update(Ubicacion.objects.using(DEFAULT_DB_ALIAS).filter(nombre__in=faltantes).values_list('nombre', 'id'))
+    # Con colación sin distinción de mayúsculas (MySQL) el nombre guardado
+    # puede diferir del pedido: se busca uno por uno con la colación de la base
+    for nombre in faltantes - resultado.keys():
+        pk = Ubicacion.objects.using(DEFAULT_DB_ALIAS).filter(nombre=nombre).values_list('id', flat=True).first()
+        if pk is None:
+            raise IntegrityError(f"No se pudo registrar la ubicación '{nombre}'.")
+        resultado[nombre] = pk
+    return resultado
+
+
+# Variantes para vistas async (filtros del listado de movimientos)
+anombres = sync_to_async(nombres)
+aid_por_nombre = sync_to_async(id_por_nombre)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, metricas, views
 
 urlpatterns = [
     # Página de inicio
@@ -9,6 +9,7 @@ urlpatterns = [
     #        VEHÍCULOS
     # --------------------------
     path('vehiculos/', views.vehiculo_list, name='vehiculo_list'),
+    path('vehiculos/buscar/', views.vehiculo_autocomplete, name='vehiculo_autocomplete'),
     path('vehiculos/crear/', views.vehiculo_create, name='vehiculo_create'),
     path('vehiculos/editar/<int:id>/', views.vehiculo_update, name='vehiculo_update'),
     path('vehiculos/eliminar/<int:id>/', views.vehiculo_delete, name='vehiculo_delete'),
@@ -17,7 +18,35 @@ urlpatterns = [
     #   MOVIMIENTOS DE CARGA
     # --------------------------
     path('movimientos/', views.movimiento_list, name='movimiento_list'),
+    path('movimientos/exportar/', views.movimiento_export, name='movimiento_export'),
+    path('movimientos/en-vivo/', views.movimiento_en_vivo, name='movimiento_en_vivo'),
     path('movimientos/crear/', views.movimiento_create, name='movimiento_create'),
     path('movimientos/editar/<int:id>/', views.movimiento_update, name='movimiento_update'),
     path('movimientos/eliminar/<int:id>/', views.movimiento_delete, name='movimiento_delete'),
+
+    # --------------------------
+    #   RESUMEN Y REPORTES
+    # --------------------------
+    path('resumen/', views.resumen_dashboard, name='resumen_dashboard'),
+    path('reportes/patio/', views.reporte_patio, name='reporte_patio'),
+    path('reportes/agregados/', views.reporte_agregados, name='reporte_agregados'),
+
+    # --------------------------
+    #   API JSON
+    # --------------------------
+    path('api/vehiculos/', api.api_vehiculos, name='api_vehiculos'),
+    path('api/movimientos/', api.api_movimientos, name='api_movimientos'),
+    path('api/movimientos/lote/', api.api_movimientos_lote, name='api_movimientos_lote'),
+    path('api/movimientos/lote/<str:clave>/', api.api_movimientos_lote_estado, name='api_movimientos_lote_estado'),
+    path('api/cola/', api.api_cola, name='api_cola'),
+
+    # --------------------------
+    #   MÉTRICAS (Prometheus)
+    # --------------------------
+    path('metricas/', metricas.metricas_prometheus, name='metricas'),
+
+    # --------------------------
+    #   IMPORTACIÓN MASIVA
+    # --------------------------
+    path('importar/', views.importar_csv, name='importar_csv'),
 ]
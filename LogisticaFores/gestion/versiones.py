@@ -0,0 +1,108 @@
+"""Versiones por tabla para detectar cambios con una lectura por clave primaria.
+
+Cada alta, edición o baja de Vehiculo y MovimientoCarga incrementa la versión
+de su tabla (señales en gestion.signals; los flujos masivos llaman a
+``incrementar`` una vez por lote). La API usa la versión como ETag y la fecha
+del último cambio como Last-Modified, y puede responder 304 sin consultar ni
+serializar filas.
+
+El incremento se hace al confirmar la transacción que escribió, en su propia
+transacción corta: la fila de VersionTabla no queda bloqueada durante un lote
+largo (API por lotes, cola de ingesta) y las escrituras concurrentes no se
+serializan sobre ella. Un lector que llegue entre la confirmación y el
+incremento ve los datos nuevos con la versión anterior; el incremento que
+sigue invalida lo que haya guardado con ella.
+"""
+
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import VersionTabla
+
+VEHICULOS = 'vehiculo'
+MOVIMIENTOS = 'movimiento_carga'
+ARCHIVO = 'movimiento_archivado'
+UBICACIONES = 'ubicacion'
+
+
+def incrementar(tabla):
+    """Incrementa la versión de ``tabla`` al confirmar la transacción en curso.
+
+    Fuera de una transacción incrementa enseguida. Si la transacción se
+    revierte no incrementa. Un fallo al incrementar se registra en el log
+    sin afectar a la escritura ya confirmada.
+
+    Args:
+        tabla (str): Nombre lógico (VEHICULOS, MOVIMIENTOS, ARCHIVO o UBICACIONES).
+    """
+    transaction.on_commit(partial(_incrementar, tabla), robust=True)
+
+
+def _incrementar(tabla):
+    ahora = timezone.now()
+    if VersionTabla.objects.filter(tabla=tabla).update(version=F('version') + 1, actualizado=ahora):
+        return
+    try:
+        with transaction.atomic():
+            VersionTabla.objects.create(tabla=tabla, version=1, actualizado=ahora)
+    except IntegrityError:
+        VersionTabla.objects.filter(tabla=tabla).update(version=F('version') + 1, actualizado=ahora)
+
+
+def obtener(tabla):
+    """Devuelve la versión actual y la fecha del último cambio de ``tabla``.
+
+    Args:
+        tabla (str): Nombre lógico (VEHICULOS, MOVIMIENTOS, ARCHIVO o UBICACIONES).
+
+    Returns:
+        tuple[int, datetime | None]: ``(0, None)`` si nunca se registró un cambio.
+    """
+    fila = VersionTabla.objects.filter(tabla=tabla).values_list('version', 'actualizado').first()
+    return fila or (0, None)
+
+
+async def aobtener(tabla):
+    """Versión async de obtener para vistas ASGI."""
+    try:
+        fila = await VersionTabla.objects.only('version', 'actualizado').aget(tabla=tabla)
+    except VersionTabla.DoesNotExist:
+        return 0, None
+    return fila.version, fila.actualizado
+
+
+async def aobtener_varias(tablas):
+    """Versiones de varias tablas con una sola consulta.
+
+    Args:
+        tablas (list[str]): Nombres lógicos.
+
+    Returns:
+        tuple[int]: Versión de cada tabla, en el mismo orden (0 si nunca cambió).
+    """
+    leidas = {
+        tabla: version async for tabla, version in
+        VersionTabla.objects.filter(tabla__in=tablas).values_list('tabla', 'version')
+    }
+    return tuple(leidas.get(tabla, 0) for tabla in tablas)
+
+
+async def aobtener_con_fecha(tablas):
+    """Versiones de varias tablas y la fecha del cambio más reciente, en una consulta.
+
+    Args:
+        tablas (list[str]): Nombres lógicos.
+
+    Returns:
+        tuple[tuple[int], datetime | None]: Versión de cada tabla en el mismo
+        orden (0 si nunca cambió) y el ``actualizado`` más reciente entre ellas.
+    """
+    leidas = {
+        tabla: (version, actualizado) async for tabla, version, actualizado in
+        VersionTabla.objects.filter(tabla__in=tablas).values_list('tabla', 'version', 'actualizado')
+    }
+    fechas = [actualizado for _, actualizado in leidas.values() if actualizado]
+    return tuple(leidas.get(tabla, (0, None))[0] for tabla in tablas), max(fechas, default=None)
@@ -3,16 +3,132 @@
 Este módulo implementa todas las vistas de la aplicación:
 - Vista de inicio que redirige según autenticación
 - CRUD completo para Vehículos (crear, leer, actualizar, eliminar)
-- CRUD completo para Movimientos de Carga
+- CRUD completo para Movimientos de Carga, con filas nuevas en vivo (SSE)
+- Exportación e importación masiva de datos en CSV
+- Panel de resumen que lee sólo de la tabla precalculada ResumenMovimiento
+- Reporte de patio: vehículos dentro, estadías, vueltas y ocupación
 - Todas las vistas requieren autenticación mediante @login_required
+- Los listados son vistas async (ORM async) para servirse bajo ASGI; sus
+  filas se renderizan con plantillas compiladas y se cachean por página
 """
 
+import datetime
+import io
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import Exists, OuterRef, Sum
+
+from .models import Vehiculo, MovimientoArchivado, MovimientoCarga, ResumenMovimiento
+from .forms import VehiculoForm, MovimientoForm, MovimientoFiltroForm, ImportacionForm
+from . import agregados, analitica, en_vivo, fragmentos, ubicaciones, versiones
+from .paginacion import apaginar_keyset, paginar_keyset, tamano_pagina, url_pagina
+from .exportacion import exportar_csv, exportar_jsonl
+from .importacion import IMPORTADORES
+from .cache import avehiculos_por_prefijo, id_por_patente
+from .eliminacion import eliminar_vehiculo
+from .archivo import corte as corte_archivo
+
+# Máximo de filas rechazadas que se muestran en pantalla tras una importación
+MAX_RECHAZADOS_EN_PANTALLA = 100
+
+# Resultados del autocompletado de vehículos (por defecto y máximo)
+LIMITE_AUTOCOMPLETAR = 10
+LIMITE_AUTOCOMPLETAR_MAXIMO = 50
+
 
-from .models import Vehiculo, MovimientoCarga
-from .forms import VehiculoForm, MovimientoForm
+def _paginar(request, queryset, orden):
+    """Aplica paginación por cursor a ``queryset`` según los parámetros GET.
+
+    Lee ``despues``, ``antes`` y ``n`` de la URL y arma las URLs de navegación
+    conservando el resto de parámetros (filtros).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        queryset (QuerySet): Consulta base a paginar.
+        orden (list[str]): Ordenamiento total usado como clave del cursor.
+
+    Returns:
+        dict: Contexto con ``pagina``, ``url_siguiente`` y ``url_anterior``.
+    """
+    pagina = paginar_keyset(
+        queryset,
+        orden,
+        despues=request.GET.get("despues"),
+        antes=request.GET.get("antes"),
+        tamano=tamano_pagina(request.GET.get("n")),
+    )
+    return _contexto_pagina(request, pagina)
+
+
+async def _apaginar_filas(request, nombre, plantilla_fila, consulta, orden, tablas):
+    """Página de un listado con filas precompiladas y caché por versión.
+
+    Las filas se leen con ``values_list`` (sólo las columnas que usa la
+    plantilla de fila más las del orden) y se renderizan con
+    fragmentos.RenderizadorFilas. El resultado se cachea por página hasta que
+    cambie la versión de alguna de ``tablas``.
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        nombre (str): Nombre del listado para la clave de caché.
+        plantilla_fila (str): Plantilla de una fila (p. ej. vehiculos/fila.html).
+        consulta (Callable[[], Awaitable[QuerySet]]): Devuelve la consulta base
+            filtrada; sólo se llama si la página no está en caché.
+        orden (list[str]): Ordenamiento total usado como clave del cursor.
+        tablas (list[str]): Tablas de gestion.versiones que alimentan las filas.
+
+    Returns:
+        dict: Contexto con ``filas``, ``url_siguiente`` y ``url_anterior``.
+    """
+    renderizador = fragmentos.renderizador(plantilla_fila)
+    campos_orden = [c.lstrip("-") for c in orden]
+    columnas = [*renderizador.columnas, *(c for c in campos_orden if c not in renderizador.columnas)]
+
+    async def calcular():
+        queryset = await consulta()
+        pagina = await apaginar_keyset(
+            queryset.values_list(*columnas, named=True),
+            orden,
+            despues=request.GET.get("despues"),
+            antes=request.GET.get("antes"),
+            tamano=tamano_pagina(request.GET.get("n")),
+        )
+        return fragmentos.FragmentoPagina(
+            renderizador.renderizar(pagina.items), pagina.siguiente, pagina.anterior
+        )
+
+    fragmento = await fragmentos.afragmento_pagina(nombre, request, tablas, calcular)
+    return {
+        "filas": fragmento.filas,
+        "url_siguiente": url_pagina(request, despues=fragmento.siguiente, antes=None) if fragmento.siguiente else None,
+        "url_anterior": url_pagina(request, antes=fragmento.anterior, despues=None) if fragmento.anterior else None,
+    }
+
+
+def _contexto_pagina(request, pagina):
+    return {
+        "pagina": pagina,
+        "url_siguiente": url_pagina(request, despues=pagina.siguiente, antes=None) if pagina.siguiente else None,
+        "url_anterior": url_pagina(request, antes=pagina.anterior, despues=None) if pagina.anterior else None,
+    }
+
+
+async def _arender(request, plantilla, contexto):
+    """render() para vistas async.
+
+    Resuelve antes el usuario: el context processor de auth lee
+    ``request.user``, que de otro modo consultaría la base de forma síncrona
+    dentro del bucle de eventos. Los datos del contexto deben estar ya
+    evaluados (listas, no querysets).
+    """
+    request.user = await request.auser()
+    return render(request, plantilla, contexto)
 
 
 # --------------------------
@@ -40,20 +156,29 @@ def home(request):
 # --------------------------
 
 @login_required
-def vehiculo_list(request):
-    """Lista todos los vehículos registrados en el sistema.
+async def vehiculo_list(request):
+    """Lista los vehículos registrados, paginados por cursor sobre la patente.
     
-    Requiere autenticación. Obtiene todos los vehículos de la base de datos
-    y los pasa a la plantilla para su visualización en una tabla.
+    Requiere autenticación. La página se obtiene filtrando por la última
+    patente vista (índice único), por lo que la latencia no depende de la
+    profundidad. Parámetros GET: ``despues``/``antes`` (cursor) y ``n`` (tamaño).
+    Vista async: la página se lee con el ORM async, las filas se renderizan
+    con vehiculos/fila.html compilada y se cachean hasta el próximo cambio
+    en la tabla de vehículos.
     
     Args:
         request (HttpRequest): Objeto de solicitud HTTP.
         
     Returns:
-        HttpResponse: Plantilla vehiculos/list.html con lista de vehículos.
+        HttpResponse: Plantilla vehiculos/list.html con la página de vehículos.
     """
-    vehiculos = Vehiculo.objects.all()
-    return render(request, "vehiculos/list.html", {"vehiculos": vehiculos})
+    async def consulta():
+        return Vehiculo.objects.all()
+
+    contexto = await _apaginar_filas(
+        request, "vehiculos", "vehiculos/fila.html", consulta, ["patente"], [versiones.VEHICULOS]
+    )
+    return await _arender(request, "vehiculos/list.html", contexto)
 
 
 @login_required
@@ -117,7 +242,8 @@ def vehiculo_delete(request, id):
     """Elimina un vehículo del sistema.
     
     POST directo: Elimina el vehículo. También elimina movimientos asociados
-    por relación CASCADE. Redirige a lista de vehículos.
+    (CASCADE), borrándolos por lotes para no cargarlos en memoria ni mantener
+    bloqueos largos. Redirige a lista de vehículos.
     
     Args:
         request (HttpRequest): Objeto de solicitud HTTP.
@@ -128,30 +254,154 @@ def vehiculo_delete(request, id):
         Http404: Si el vehículo no existe.
     """
     vehiculo = get_object_or_404(Vehiculo, id=id)
-    vehiculo.delete()
+    eliminar_vehiculo(vehiculo)
     messages.success(request, "Vehículo eliminado correctamente.")
     return redirect("vehiculo_list")
 
 
+@login_required
+async def vehiculo_autocomplete(request):
+    """Autocompletado de vehículos por prefijo de patente (JSON).
+    
+    Parámetros GET: ``q`` (prefijo de patente) y ``limite`` (máx. 50). La
+    búsqueda es un rango sobre el índice único de patente y el resultado se
+    cachea por prefijo (ver gestion.cache). Vista async.
+    
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        
+    Returns:
+        JsonResponse: ``{"resultados": [{"id": ..., "texto": "ABCD12 - CAMION"}, ...]}``.
+    """
+    prefijo = "".join(c for c in request.GET.get("q", "").upper() if c.isascii() and c.isalnum())[:6]
+    try:
+        limite = min(max(int(request.GET.get("limite", LIMITE_AUTOCOMPLETAR)), 1), LIMITE_AUTOCOMPLETAR_MAXIMO)
+    except ValueError:
+        limite = LIMITE_AUTOCOMPLETAR
+    resultados = await avehiculos_por_prefijo(prefijo, limite) if prefijo else []
+    return JsonResponse({"resultados": [{"id": pk, "texto": texto} for pk, texto in resultados]})
+
+
 # --------------------------
 #   CRUD MOVIMIENTO CARGA
 # --------------------------
 
 @login_required
-def movimiento_list(request):
-    """Lista todos los movimientos de carga del sistema.
+async def movimiento_list(request):
+    """Lista los movimientos de carga, paginados por cursor.
     
-    Utiliza select_related para optimizar consultas a BD (obtiene vehiculo
-    en una sola query). Ordena movimientos por fecha descendente.
+    Lee sólo las columnas de movimientos/fila.html con ``values_list`` (la
+    patente y los nombres de origen y destino llegan por JOIN en la misma
+    consulta). Ordena por fecha descendente con ``id`` como
+    desempate, y pagina por cursor sobre ``(fecha_hora, id)`` en lugar de
+    OFFSET. Parámetros GET: ``despues``/``antes`` (cursor), ``n`` (tamaño)
+    y los filtros de MovimientoFiltroForm (patente, desde, hasta,
+    tipo_movimiento, origen, destino, q). Vista async, igual que vehiculo_list.
+
+    Con ``archivo=1`` lista los movimientos archivados (MovimientoArchivado,
+    sólo lectura). Si MOVIMIENTOS_MESES_RECIENTES > 0 y no hay filtro de
+    fechas, el listado normal se limita a esos meses, de modo que sólo lee
+    las particiones recientes de movimiento_carga.
     
     Args:
         request (HttpRequest): Objeto de solicitud HTTP.
         
     Returns:
-        HttpResponse: Plantilla movimientos/list.html con lista de movimientos.
+        HttpResponse: Plantilla movimientos/list.html con la página de movimientos.
+    """
+    filtro = MovimientoFiltroForm(request.GET)
+    archivo = request.GET.get("archivo") == "1"
+    recientes_desde = None
+    if archivo:
+        nombre, plantilla_fila, modelo = "movimientos_archivo", "movimientos/fila_archivo.html", MovimientoArchivado
+        tablas = [versiones.ARCHIVO, versiones.VEHICULOS, versiones.UBICACIONES]
+    else:
+        nombre, plantilla_fila, modelo = "movimientos", "movimientos/fila.html", MovimientoCarga
+        # La patente y los nombres de lugares vienen de Vehiculo y Ubicacion
+        tablas = [versiones.MOVIMIENTOS, versiones.VEHICULOS, versiones.UBICACIONES]
+        meses = settings.MOVIMIENTOS_MESES_RECIENTES
+        if meses and not (filtro.is_valid() and (filtro.cleaned_data["desde"] or filtro.cleaned_data["hasta"])):
+            recientes_desde = corte_archivo(meses)
+            # El corte cambia cada mes: forma parte de la clave de la caché
+            nombre = f"movimientos_{recientes_desde:%Y%m}"
+
+    async def consulta():
+        queryset = await filtro.afiltrar(modelo.objects.all())
+        if recientes_desde:
+            queryset = queryset.filter(fecha_hora__gte=recientes_desde)
+        return queryset
+
+    contexto = await _apaginar_filas(
+        request, nombre, plantilla_fila, consulta, ["-fecha_hora", "-id"], tablas,
+    )
+    contexto.update(filtro=filtro, archivo=archivo, recientes_desde=recientes_desde)
+    # Las filas en vivo se agregan arriba: sólo en la primera página sin filtros
+    contexto["en_vivo"] = not archivo and not any(
+        valor for clave, valor in request.GET.items() if clave != "n"
+    )
+    # Las sugerencias de lugares del filtro (UbicacionWidget) se leen aquí,
+    # no dentro del render síncrono
+    await filtro.acargar_lugares()
+    return await _arender(request, "movimientos/list.html", contexto)
+
+
+@login_required
+async def movimiento_en_vivo(request):
+    """Stream SSE con los movimientos nuevos o editados (gestion.en_vivo).
+
+    movimientos/list.html lo abre con EventSource en la primera página sin
+    filtros y agrega a la tabla las filas recibidas, sin recargar. Todos los
+    clientes del proceso comparten las consultas del difusor; la solicitud
+    sólo lee la sesión. Al reconectar, el navegador envía ``Last-Event-ID``
+    y recibe los eventos recientes que le faltan.
+
+    Requiere ASGI (config/asgi.py): bajo WSGI la respuesta en streaming
+    ocuparía un hilo por cliente, así que responde 204 y el navegador no
+    reintenta.
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        StreamingHttpResponse: ``text/event-stream`` abierto mientras el
+        cliente siga conectado, o HttpResponse 204 bajo WSGI.
     """
-    movimientos = MovimientoCarga.objects.select_related('vehiculo').all()
-    return render(request, "movimientos/list.html", {"movimientos": movimientos})
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    ultimo = request.headers.get("Last-Event-ID", "")
+    response = StreamingHttpResponse(
+        en_vivo.eventos(int(ultimo) if ultimo.isdigit() else None), content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Sin buffer en nginx: cada evento se envía apenas se genera
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+def movimiento_export(request):
+    """Exporta los movimientos filtrados como CSV o JSON Lines en streaming.
+    
+    Acepta los mismos filtros que movimiento_list y ``formato`` (``csv`` por
+    defecto o ``jsonl``). Las filas se leen por lotes como tuplas, por lo que
+    la memoria no crece con el tamaño de la exportación.
+    
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        
+    Returns:
+        StreamingHttpResponse: Archivo descargable con los movimientos.
+    """
+    filtro = MovimientoFiltroForm(request.GET)
+    movimientos = filtro.filtrar(MovimientoCarga.objects.all())
+    fecha = timezone.localdate().isoformat()
+    if request.GET.get("formato") == "jsonl":
+        contenido, tipo, extension = exportar_jsonl(movimientos), "application/x-ndjson", "jsonl"
+    else:
+        contenido, tipo, extension = exportar_csv(movimientos), "text/csv", "csv"
+    response = StreamingHttpResponse(contenido, content_type=f"{tipo}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="movimientos_{fecha}.{extension}"'
+    return response
 
 
 @login_required
@@ -228,3 +478,214 @@ def movimiento_delete(request, id):
     movimiento.delete()
     messages.success(request, "Movimiento eliminado correctamente.")
     return redirect("movimiento_list")
+
+
+# --------------------------
+#   IMPORTACIÓN MASIVA
+# --------------------------
+
+@login_required
+def importar_csv(request):
+    """Importa vehículos o movimientos desde un archivo CSV subido.
+    
+    GET: Muestra el formulario de carga.
+    POST: Lee el archivo en streaming, valida e inserta por lotes, y muestra
+          la cantidad creada junto con las filas rechazadas.
+    
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        
+    Returns:
+        HttpResponse: Plantilla importacion.html con el resultado.
+    """
+    resultado = None
+    if request.method == "POST":
+        form = ImportacionForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = io.TextIOWrapper(form.cleaned_data["archivo"].file, encoding="utf-8-sig", newline="")
+            try:
+                resultado = IMPORTADORES[form.cleaned_data["tipo"]](archivo)
+            except (ValueError, UnicodeDecodeError) as exc:
+                messages.error(request, f"No se pudo leer el archivo: {exc}")
+            else:
+                messages.success(
+                    request,
+                    f"{resultado.creados} registros importados, {len(resultado.rechazados)} filas rechazadas.",
+                )
+        else:
+            messages.error(request, "Corrige los errores del formulario.")
+    else:
+        form = ImportacionForm()
+    return render(request, "importacion.html", {
+        "form": form,
+        "resultado": resultado,
+        "rechazados": resultado.rechazados[:MAX_RECHAZADOS_EN_PANTALLA] if resultado else [],
+    })
+
+
+# --------------------------
+#   RESUMEN DE MOVIMIENTOS
+# --------------------------
+
+@login_required
+def resumen_dashboard(request):
+    """Panel de ingresos/salidas por vehículo en el día y en el mes.
+    
+    Lee sólo de ResumenMovimiento (conteos precalculados por vehículo, día y
+    tipo) y del puntero Vehiculo.ultimo_movimiento, sin agregar sobre
+    movimiento_carga. Lista los vehículos con actividad en el mes, paginados
+    por patente. Parámetros GET: ``fecha`` (AAAA-MM-DD, por defecto hoy),
+    ``patente`` y los de paginación.
+    
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+        
+    Returns:
+        HttpResponse: Plantilla resumen.html con totales y detalle por vehículo.
+    """
+    try:
+        dia = datetime.date.fromisoformat(request.GET.get("fecha", ""))
+    except ValueError:
+        dia = timezone.localdate()
+    inicio_mes = dia.replace(day=1)
+    patente = request.GET.get("patente", "").strip().upper()
+
+    del_mes = ResumenMovimiento.objects.filter(dia__gte=inicio_mes, dia__lte=dia)
+    totales = {"hoy": {}, "mes": {}}
+    for periodo, qs in (("hoy", del_mes.filter(dia=dia)), ("mes", del_mes)):
+        for tipo, cantidad in qs.values_list("tipo_movimiento").annotate(total=Sum("cantidad")).order_by():
+            totales[periodo][tipo] = cantidad
+
+    vehiculos = Vehiculo.objects.select_related(
+        "ultimo_movimiento__origen", "ultimo_movimiento__destino"
+    ).filter(
+        Exists(del_mes.filter(vehiculo=OuterRef("pk")))
+    )
+    if patente:
+        vehiculos = vehiculos.filter(pk=id_por_patente(patente))
+    contexto = _paginar(request, vehiculos, ["patente"])
+
+    filas = {v.id: {"vehiculo": v, "hoy": {}, "mes": {}} for v in contexto["pagina"].items}
+    detalle = del_mes.filter(vehiculo_id__in=filas).values_list("vehiculo_id", "dia", "tipo_movimiento", "cantidad")
+    for vehiculo_id, fecha, tipo, cantidad in detalle:
+        fila = filas[vehiculo_id]
+        fila["mes"][tipo] = fila["mes"].get(tipo, 0) + cantidad
+        if fecha == dia:
+            fila["hoy"][tipo] = cantidad
+
+    contexto.update({
+        "dia": dia,
+        "patente": patente,
+        "totales": totales,
+        "filas": list(filas.values()),
+    })
+    return render(request, "resumen.html", contexto)
+
+
+# --------------------------
+#     REPORTE DE PATIO
+# --------------------------
+@login_required
+def reporte_patio(request):
+    """Vehículos dentro del patio, estadías, vueltas por destino y ocupación.
+
+    Los vehículos dentro se leen en cada solicitud del puntero
+    Vehiculo.ultimo_movimiento; el resto del reporte viene de
+    gestion.analitica (una pasada por bloques, en caché por intervalo).
+    Parámetros GET: ``desde`` y ``hasta`` (AAAA-MM-DD, por defecto los
+    últimos 30 días) y ``granularidad`` (``dia`` u ``hora``).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        HttpResponse: Plantilla reporte_patio.html con el reporte.
+    """
+    hoy = timezone.localdate()
+    try:
+        fecha_hasta = datetime.date.fromisoformat(request.GET.get("hasta", ""))
+    except ValueError:
+        fecha_hasta = hoy
+    try:
+        fecha_desde = datetime.date.fromisoformat(request.GET.get("desde", ""))
+    except ValueError:
+        fecha_desde = fecha_hasta - datetime.timedelta(days=29)
+    fecha_desde = min(fecha_desde, fecha_hasta)
+    desde, hasta, granularidad = analitica.periodo(fecha_desde, fecha_hasta, request.GET.get("granularidad", "dia"))
+
+    total_dentro, dentro = analitica.dentro_ahora()
+    return render(request, "reporte_patio.html", {
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "granularidad": granularidad,
+        "reporte": analitica.reporte(desde, hasta, granularidad),
+        "total_dentro": total_dentro,
+        "dentro": dentro,
+    })
+
+
+def _ruta_filtrada(filtros):
+    """Nombres del origen y destino filtrados, o None si no se filtra por lugar."""
+    if not any(clave.startswith(("origen", "destino")) for clave in filtros):
+        return None
+    nombres = ubicaciones.nombres()
+    ruta = {}
+    for campo in ("origen", "destino"):
+        if f"{campo}_id" in filtros:
+            ruta[campo] = nombres.get(filtros[f"{campo}_id"], "?")
+        else:
+            ruta[campo] = "(vacío)" if f"{campo}__isnull" in filtros else "(todos)"
+    return ruta
+
+
+@login_required
+def reporte_agregados(request):
+    """Movimientos por hora o día, tipo, origen y destino.
+
+    Lee sólo los agregados precalculados (gestion.agregados), no
+    movimiento_carga: responde en milisegundos con años de datos. Los datos
+    llegan hasta el último ``actualizar_agregados``. Parámetros GET:
+    ``desde`` y ``hasta`` (AAAA-MM-DD, por defecto los últimos 30 días),
+    ``granularidad`` (``dia`` u ``hora``) y filtros exactos ``tipo``,
+    ``origen`` y ``destino`` (ids de Ubicacion).
+
+    Args:
+        request (HttpRequest): Objeto de solicitud HTTP.
+
+    Returns:
+        HttpResponse: Plantilla reporte_agregados.html con la serie y las rutas.
+    """
+    hoy = timezone.localdate()
+    try:
+        fecha_hasta = datetime.date.fromisoformat(request.GET.get("hasta", ""))
+    except ValueError:
+        fecha_hasta = hoy
+    try:
+        fecha_desde = datetime.date.fromisoformat(request.GET.get("desde", ""))
+    except ValueError:
+        fecha_desde = fecha_hasta - datetime.timedelta(days=29)
+    fecha_desde = min(fecha_desde, fecha_hasta)
+    desde, hasta, granularidad = analitica.periodo(fecha_desde, fecha_hasta, request.GET.get("granularidad", "dia"))
+
+    filtros = {}
+    if request.GET.get("tipo") in dict(MovimientoCarga.MOVIMIENTO_CHOICES):
+        filtros["tipo_movimiento"] = request.GET["tipo"]
+    for campo in ("origen", "destino"):
+        valor = request.GET.get(campo, "").strip()
+        if valor.isdigit():
+            filtros[f"{campo}_id"] = int(valor)
+        elif valor == "-":
+            filtros[f"{campo}__isnull"] = True
+
+    serie = agregados.serie(desde, hasta, granularidad, **filtros)
+    return render(request, "reporte_agregados.html", {
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "granularidad": granularidad,
+        "filtros": filtros,
+        "ruta": _ruta_filtrada(filtros),
+        "serie": serie,
+        "total": sum(intervalo["total"] for intervalo in serie),
+        "rutas": agregados.rutas(desde, hasta, **filtros),
+        "actualizado": agregados.ultimo_refresco(),
+    })
@@ -0,0 +1,52 @@
+"""Widgets de formulario propios de la aplicación gestion."""
+
+from django import forms
+from django.urls import reverse
+
+from . import cache, ubicaciones
+
+
+class VehiculoAutocompleteWidget(forms.Widget):
+    """Selector de vehículo por autocompletado de patente.
+    
+    Renderiza un campo de texto que consulta el endpoint
+    ``vehiculo_autocomplete`` a medida que se escribe, y un input oculto con el
+    id del vehículo elegido, que es lo único que se envía en el POST. Evita
+    incluir toda la flota como ``<option>`` en la página. La etiqueta del
+    vehículo ya elegido se lee de la caché de vehículos (gestion.cache).
+    """
+    template_name = 'widgets/vehiculo_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        etiqueta = None
+        # Al volver a mostrar un POST inválido el valor llega tal como se envió
+        if str(value).isdigit():
+            etiqueta = cache.etiqueta_por_id(int(value))
+        context['widget']['etiqueta'] = etiqueta or ''
+        context['widget']['url'] = reverse('vehiculo_autocomplete')
+        return context
+
+
+class UbicacionWidget(forms.TextInput):
+    """Campo de texto con las ubicaciones conocidas como sugerencias.
+
+    Las opciones del ``<datalist>`` salen de la tabla de ubicaciones en
+    caché (gestion.ubicaciones), sin consultar la base en cada formulario.
+    Se puede escribir un lugar nuevo: el formulario lo registra al guardar.
+
+    Attributes:
+        opciones (list[str] | None): Nombres ya leídos (vistas async, ver
+            MovimientoFiltroForm.acargar_lugares); None para leerlos al renderizar.
+    """
+    template_name = 'widgets/ubicacion.html'
+    opciones = None
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['list'] = f"{context['widget']['attrs'].get('id', name)}_opciones"
+        opciones = self.opciones
+        if opciones is None:
+            opciones = list(ubicaciones.nombres().values())
+        context['widget']['opciones'] = opciones
+        return context